@@ -20,7 +20,10 @@ from .constants import (
 # База данных
 from .database import (
     get_db_connection, execute_with_retry, init_database,
-    get_tournament_data, get_court_data, save_courts_data,
+    get_tournament_data, get_tournament_version, get_court_data, save_courts_data,
+    encode_blob, decode_blob, configure_blob_codec,
+    get_tournament_fields, get_tournament_name, get_tournament_courts,
+    get_class_draw, save_class_draws, get_draw_summary,
     save_xml_file_info, get_active_tournament_ids,
     get_court_ids_for_tournament, get_settings, save_settings,
     save_tournament_matches, get_tournament_matches,
@@ -28,6 +31,12 @@ from .database import (
     get_court_has_referee, set_court_has_referee
 )
 
+# Кэши live-XML
+from .xml_catalog import (
+    get_xml_type_index, get_display_catalog, build_xml_data_types, table_type_id,
+    get_cached_xml, invalidate_xml_cache
+)
+
 # Аутентификация
 from .auth import require_auth, check_user_credentials, register_auth_routes
 
@@ -38,23 +47,36 @@ from .auto_refresh import AutoRefreshService
 from .photo_utils import (
     get_photo_urls_for_ids, extract_player_ids,
     enrich_players_with_photos, enrich_court_data_with_photos,
+    enrich_players, participant_directory,
     get_participant_photo_url, get_participant_info
 )
 
 # API клиент
 from .rankedin_api import RankedinAPI
 
-# HTML генераторы
-from .html_generator import HTMLGenerator
-from .html_base import HTMLBaseGenerator
-from .html_scoreboard import ScoreboardGenerator
-from .html_vs import VSGenerator
-from .html_schedule import ScheduleGenerator
-from .html_introduction import IntroductionGenerator
-from .html_intro_player import IntroPlayerGenerator
-from .html_winner import WinnerGenerator
-from .html_round_robin import RoundRobinGenerator
-from .html_elimination import EliminationGenerator
+# HTML генераторы — импортируются при первом обращении (api.ScheduleGenerator и т.п.)
+_LAZY_GENERATORS = {
+    'HTMLGenerator': '.html_generator',
+    'HTMLBaseGenerator': '.html_base',
+    'ScoreboardGenerator': '.html_scoreboard',
+    'VSGenerator': '.html_vs',
+    'ScheduleGenerator': '.html_schedule',
+    'IntroductionGenerator': '.html_introduction',
+    'IntroPlayerGenerator': '.html_intro_player',
+    'WinnerGenerator': '.html_winner',
+    'RoundRobinGenerator': '.html_round_robin',
+    'EliminationGenerator': '.html_elimination',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_GENERATORS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
 
 __all__ = [
     '__version__',
@@ -64,15 +86,21 @@ __all__ = [
     'get_sport_name', 'get_country_name', 'get_country_name_ru',
     'get_xml_type_description', 'get_update_frequency', 'get_uptime',
     'get_db_connection', 'execute_with_retry', 'init_database',
-    'get_tournament_data', 'get_court_data', 'save_courts_data',
+    'get_tournament_data', 'get_tournament_version', 'get_court_data', 'save_courts_data',
+    'encode_blob', 'decode_blob', 'configure_blob_codec',
+    'get_tournament_fields', 'get_tournament_name', 'get_tournament_courts',
+    'get_class_draw', 'save_class_draws', 'get_draw_summary',
     'save_xml_file_info', 'get_active_tournament_ids',
     'get_court_ids_for_tournament', 'get_settings', 'save_settings',
     'save_tournament_matches', 'get_tournament_matches',
     'get_court_has_referee', 'set_court_has_referee',
+    'get_xml_type_index', 'get_display_catalog', 'build_xml_data_types', 'table_type_id',
+    'get_cached_xml', 'invalidate_xml_cache',
     'require_auth', 'check_user_credentials', 'register_auth_routes',
     'AutoRefreshService',
     'get_photo_urls_for_ids', 'extract_player_ids',
     'enrich_players_with_photos', 'enrich_court_data_with_photos',
+    'enrich_players', 'participant_directory',
     'get_participant_photo_url', 'get_participant_info',
     'RankedinAPI',
     'HTMLGenerator', 'HTMLBaseGenerator',
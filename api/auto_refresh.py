@@ -6,9 +6,11 @@ import threading
 import time
 import json
 import logging
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
 
-from .database import execute_with_retry, get_db_connection
+from .change_feed import record_changes, tournament_topic
+from .database import decode_blob, encode_blob, execute_with_retry, get_db_connection, write_courts_data
+from .metrics import observe_refresh_phase
 
 logger = logging.getLogger(__name__)
 
@@ -41,12 +43,27 @@ class AutoRefreshService:
         self._initialized = True
         self.app = None
         self.api = None
+        self._change_listeners: List[Callable[[str, str, Optional[List[str]]], None]] = []
 
     def configure(self, app, api):
         #Конфигурация сервиса
         self.app = app
         self.api = api
 
+    def add_change_listener(self, listener: Callable[[str, str, Optional[List[str]]], None]):
+        #Подписка на изменения данных: listener(tournament_id, kind, keys)
+        #kind: 'courts' (keys — id кортов), 'tables' (keys — id категорий), 'schedule'
+        if listener not in self._change_listeners:
+            self._change_listeners.append(listener)
+
+    def _notify_change(self, tournament_id: str, kind: str, keys: Optional[List[str]] = None):
+        #Оповещение подписчиков; ошибка подписчика не прерывает цикл обновления
+        for listener in self._change_listeners:
+            try:
+                listener(tournament_id, kind, keys)
+            except Exception as e:
+                logger.error(f"Ошибка обработчика изменений ({kind}, турнир {tournament_id}): {e}")
+
     def start(self):
         #Запуск автоматического обновления
         if not self.running:
@@ -94,29 +111,36 @@ class AutoRefreshService:
 
     def _execute_updates(self, tournament_ids: List[str]):
         #Выполнение обновлений
+        cycle_started = time.perf_counter()
         if self.cycle_counter % self.courts_update_frequency == 0:
-            start = time.time()
+            start = time.perf_counter()
             count = self._update_courts_data(tournament_ids)
+            observe_refresh_phase("courts", start)
             if count > 0:
-                logger.info(f"КОРТЫ: обновлено {count} за {time.time() - start:.1f}с")
+                logger.info(f"КОРТЫ: обновлено {count} за {time.perf_counter() - start:.1f}с")
 
         if self.cycle_counter % self.tables_update_frequency == 0:
-            start = time.time()
+            start = time.perf_counter()
             count = self._update_tournament_tables(tournament_ids)
+            observe_refresh_phase("tables", start)
             if count > 0:
-                logger.info(f"ТАБЛИЦЫ: обновлено {count} за {time.time() - start:.1f}с")
+                logger.info(f"ТАБЛИЦЫ: обновлено {count} за {time.perf_counter() - start:.1f}с")
 
         if self.cycle_counter % self.schedule_update_frequency == 0:
-            start = time.time()
+            start = time.perf_counter()
             count = self._update_tournament_schedules(tournament_ids)
+            observe_refresh_phase("schedule", start)
             if count > 0:
-                logger.info(f"РАСПИСАНИЕ: обновлено {count} за {time.time() - start:.1f}с")
+                logger.info(f"РАСПИСАНИЕ: обновлено {count} за {time.perf_counter() - start:.1f}с")
 
         if self.cycle_counter % self.matches_update_frequency == 0:
-            start = time.time()
+            start = time.perf_counter()
             count = self._update_tournament_matches(tournament_ids)
+            observe_refresh_phase("matches", start)
             if count > 0:
-                logger.info(f"МАТЧИ: обновлено {count} за {time.time() - start:.1f}с")
+                logger.info(f"МАТЧИ: обновлено {count} за {time.perf_counter() - start:.1f}с")
+
+        observe_refresh_phase("cycle", cycle_started)
 
     def _get_settings_and_tournaments(self) -> Tuple[bool, int, List[str]]:
         #Получает настройки и список турниров
@@ -178,34 +202,13 @@ class AutoRefreshService:
                     continue
 
                 def save_courts(conn):
-                    nonlocal updated
-                    cursor = conn.cursor()
-                    for court in courts_data:
-                        if "error" not in court:
-                            cursor.execute('''
-                                INSERT OR REPLACE INTO courts_data 
-                                (tournament_id, court_id, court_name, event_state, current_match_state, class_name,
-                                 first_participant_score, second_participant_score, 
-                                 detailed_result, first_participant, second_participant,
-                                 is_tiebreak, is_super_tiebreak, is_first_participant_serving, is_serving_left, match_id,
-                                 updated_at)
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                            ''', (
-                                tid, str(court["court_id"]), court.get("court_name", ""),
-                                court.get("event_state", ""), court.get("current_match_state", ""),
-                                court.get("class_name", ""),
-                                court.get("first_participant_score", 0), court.get("second_participant_score", 0),
-                                json.dumps(court.get("detailed_result", [])), json.dumps(court.get("first_participant", [])),
-                                json.dumps(court.get("second_participant", [])),
-                                1 if court.get("is_tiebreak") else 0,
-                                1 if court.get("is_super_tiebreak") else 0,
-                                1 if court.get("is_first_participant_serving") else (0 if court.get("is_first_participant_serving") is False else None),
-                                1 if court.get("is_serving_left") else (0 if court.get("is_serving_left") is False else None),
-                                court.get("match_id", "")
-                            ))
-                            updated += 1
+                    return write_courts_data(conn.cursor(), tid, courts_data)
 
-                execute_with_retry(save_courts)
+                saved_court_ids, changed_court_ids = execute_with_retry(save_courts)
+                updated += len(saved_court_ids)
+                # XML перестраивается только для кортов, у которых изменилось содержимое
+                if changed_court_ids:
+                    self._notify_change(tid, "courts", changed_court_ids)
 
             except Exception as e:
                 logger.error(f"Ошибка обновления кортов турнира {tid}: {e}")
@@ -222,9 +225,7 @@ class AutoRefreshService:
                     cursor = conn.cursor()
                     cursor.execute('SELECT draw_data FROM tournaments WHERE id = ?', (tid,))
                     row = cursor.fetchone()
-                    if row and row[0]:
-                        return json.loads(row[0])
-                    return {}
+                    return decode_blob(row[0], {}) if row else {}
 
                 draw_data = execute_with_retry(get_draw_data)
                 if not draw_data:
@@ -253,15 +254,19 @@ class AutoRefreshService:
                         updated_draw_data[class_id] = class_data.copy()
 
                 if updated_draw_data and updated_draw_data != draw_data:
+                    changed_classes = [cid for cid, cdata in updated_draw_data.items() if cdata != draw_data.get(cid)]
+
                     def save_draw(conn):
                         cursor = conn.cursor()
                         cursor.execute('''
                             UPDATE tournaments 
                             SET draw_data = ?, updated_at = CURRENT_TIMESTAMP 
                             WHERE id = ?
-                        ''', (json.dumps(updated_draw_data), tid))
+                        ''', (encode_blob(updated_draw_data), tid))
+                        record_changes(cursor, [tournament_topic(tid, "draw", cid) for cid in changed_classes])
 
                     execute_with_retry(save_draw)
+                    self._notify_change(tid, "tables", changed_classes)
 
             except Exception as e:
                 logger.error(f"Ошибка обновления таблиц турнира {tid}: {e}")
@@ -292,14 +297,23 @@ class AutoRefreshService:
                 if court_planner or court_usage:
                     def save_schedule(conn):
                         cursor = conn.cursor()
+                        values = (encode_blob(court_planner or {}), encode_blob(court_usage or {}))
+                        cursor.execute('SELECT court_planner, court_usage FROM tournament_schedule WHERE tournament_id = ?',
+                                       (tid,))
+                        previous = cursor.fetchone()
                         cursor.execute('''
                             INSERT OR REPLACE INTO tournament_schedule 
                             (tournament_id, court_planner, court_usage, updated_at)
                             VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-                        ''', (tid, json.dumps(court_planner or {}), json.dumps(court_usage or {})))
+                        ''', (tid,) + values)
+                        if previous is None or tuple(previous) != values:
+                            record_changes(cursor, [tournament_topic(tid, "schedule")])
+                            return True
+                        return False
 
-                    execute_with_retry(save_schedule)
-                    updated += 1
+                    if execute_with_retry(save_schedule):
+                        updated += 1
+                        self._notify_change(tid, "schedule")
 
             except Exception as e:
                 logger.error(f"Ошибка обновления расписания турнира {tid}: {e}")
@@ -315,19 +329,28 @@ class AutoRefreshService:
                 if matches_data and matches_data.get("Matches"):
                     def save_matches(conn):
                         cursor = conn.cursor()
+                        values = (
+                            encode_blob(matches_data.get("Matches", [])),
+                            1 if matches_data.get("AreMatchesPublished") else 0,
+                            1 if matches_data.get("IsSchedulePublished") else 0
+                        )
+                        cursor.execute('''
+                            SELECT matches_data, are_matches_published, is_schedule_published
+                            FROM tournament_matches WHERE tournament_id = ?
+                        ''', (tid,))
+                        previous = cursor.fetchone()
                         cursor.execute('''
                             INSERT OR REPLACE INTO tournament_matches 
                             (tournament_id, matches_data, are_matches_published, is_schedule_published, updated_at)
                             VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-                        ''', (
-                            tid,
-                            json.dumps(matches_data.get("Matches", [])),
-                            1 if matches_data.get("AreMatchesPublished") else 0,
-                            1 if matches_data.get("IsSchedulePublished") else 0
-                        ))
-
-                    execute_with_retry(save_matches)
-                    updated += 1
+                        ''', (tid,) + values)
+                        if previous is None or tuple(previous) != values:
+                            record_changes(cursor, [tournament_topic(tid, "matches")])
+                            return True
+                        return False
+
+                    if execute_with_retry(save_matches):
+                        updated += 1
 
             except Exception as e:
                 logger.error(f"Ошибка обновления матчей турнира {tid}: {e}")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Лента изменений для экранов (api/change_feed.py): вместо опроса своих эндпоинтов
+по таймеру клиент подписывается на темы и получает только id изменившихся
+сущностей (темы) с версиями, а данные перечитывает лишь по ним.
+
+Long-poll и SSE держат поток воркера на время ожидания — под gunicorn их нужно
+запускать с потоковыми воркерами (--worker-class gthread --threads N).
+"""
+
+import json
+import time
+
+from flask import Blueprint, Response, jsonify, request
+
+from api.change_feed import MAX_WAIT, parse_topics, read_changes, wait_for_changes
+from api.metrics import change_feed_responses
+
+# Время жизни одного SSE-соединения: потом EventSource переподключается сам (с Last-Event-ID)
+STREAM_MAX_AGE = 300
+# Переподключение EventSource, мс
+STREAM_RETRY_MS = 1000
+
+
+def _parse_cursor(value):
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _result_label(result) -> str:
+    if result["reset"]:
+        return "reset"
+    return "changes" if result["changes"] else "empty"
+
+
+def create_changes_blueprint(logger):
+    bp = Blueprint("changes_bp", __name__)
+
+    @bp.route('/api/changes')
+    def get_changes():
+        """
+        GET /api/changes?since=<cursor>&topics=<тема>,<тема>[&wait=<сек>]
+        Изменения после курсора: {"cursor", "changes": [{"topic", "version"[, "payload"]}], "reset"}.
+        payload есть у событий, несущих данные (live-счёт корта).
+        Без since — только текущий курсор (начальная точка клиента).
+        wait > 0 — long-poll: ответ при первом изменении или через wait секунд (не более MAX_WAIT).
+        reset=true — курсор устарел: перечитать данные целиком и продолжить с нового cursor.
+        """
+        try:
+            since = _parse_cursor(request.args.get('since'))
+            topics = parse_topics(request.args.get('topics'))
+            wait = min(float(request.args.get('wait', 0) or 0), MAX_WAIT)
+            if wait > 0:
+                result = wait_for_changes(since, topics, wait)
+            else:
+                result = read_changes(since, topics)
+            change_feed_responses.inc("long_poll" if wait > 0 else "poll", _result_label(result))
+            return jsonify(result)
+        except ValueError:
+            return jsonify({"error": "Некорректный параметр wait"}), 400
+        except Exception as e:
+            logger.error(f"Ошибка ленты изменений: {e}")
+            return jsonify({"error": str(e)}), 500
+
+    @bp.route('/api/changes/stream')
+    def stream_changes():
+        """
+        GET /api/changes/stream?topics=<тема>,<тема>[&since=<cursor>]
+        Server-Sent Events: событие на каждую порцию изменений (id — курсор, data — как у /api/changes).
+        При переподключении EventSource присылает Last-Event-ID — лента продолжается с него.
+        """
+        since = _parse_cursor(request.headers.get('Last-Event-ID') or request.args.get('since'))
+        topics = parse_topics(request.args.get('topics'))
+
+        def events():
+            cursor = since
+            started = time.monotonic()
+            yield f"retry: {STREAM_RETRY_MS}\n\n"
+            try:
+                if cursor is None:
+                    cursor = read_changes(None, topics)["cursor"]
+                    yield f"id: {cursor}\nevent: cursor\ndata: {json.dumps({'cursor': cursor})}\n\n"
+                while time.monotonic() - started < STREAM_MAX_AGE:
+                    result = wait_for_changes(cursor, topics, MAX_WAIT)
+                    cursor = result["cursor"]
+                    if result["changes"] or result["reset"]:
+                        change_feed_responses.inc("stream", _result_label(result))
+                        yield f"id: {cursor}\ndata: {json.dumps(result, ensure_ascii=False)}\n\n"
+                    else:
+                        # Комментарий-пинг: соединение живо, прокси его не закроет
+                        yield f": {cursor}\n\n"
+            except Exception as e:
+                logger.error(f"Ошибка SSE ленты изменений: {e}")
+
+        return Response(events(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    return bp
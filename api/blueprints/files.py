@@ -3,15 +3,45 @@
 
 import json
 import os
-from flask import Blueprint, jsonify, Response, send_from_directory
+from flask import Blueprint, jsonify, request, Response, send_from_directory
 from werkzeug.exceptions import NotFound
 
 from api import (
-    get_tournament_data,
+    get_tournament_fields,
+    get_class_draw,
+    save_class_draws,
+    get_tournament_name,
+    get_tournament_version,
+    get_court_data,
+    save_courts_data,
     save_xml_file_info,
     get_xml_type_description,
     get_update_frequency,
+    get_display_catalog,
+    get_cached_xml,
 )
+from api.rankedin_live import live_manager
+from api.photo_pipeline import PHOTO_CACHE_MAX_AGE, find_photo_variant, get_photo_derived_dir
+
+# Поля турнира, из которых собирается XML каждого типа (см. database.get_tournament_fields)
+XML_TOURNAMENT_FIELDS = {
+    "court_score": ("metadata",),
+    "tournament_table": ("metadata",),
+    "schedule": ("metadata", "dates", "courts", "court_usage"),
+}
+
+
+def load_xml_tournament(tournament_id: str, xml_type_info: dict):
+    """
+    Данные турнира для XML одного типа: только нужные поля, у таблицы — сетки одной категории.
+    Сетки читаются после версии данных: разбор не попадёт в кэш под версией новее самих сеток.
+    """
+    xml_type = xml_type_info["type"]
+    tournament_data = get_tournament_fields(tournament_id, XML_TOURNAMENT_FIELDS.get(xml_type, ("metadata",)))
+    if tournament_data and xml_type == "tournament_table":
+        class_id = str(xml_type_info.get("class_id"))
+        tournament_data["draw_data"] = {class_id: get_class_draw(tournament_id, class_id) or {}}
+    return tournament_data
 
 
 def create_files_blueprint(api_client, xml_manager):
@@ -30,38 +60,35 @@ def create_files_blueprint(api_client, xml_manager):
     @bp.route('/api/xml/<tournament_id>/<xml_type_id>')
     def generate_xml(tournament_id, xml_type_id):
         try:
-            tournament_data = get_tournament_data(tournament_id)
-            if not tournament_data:
+            xml_types = get_display_catalog(tournament_id)
+            if xml_types is None:
                 return jsonify({"error": "Турнир не найден"}), 404
-
-            xml_types = api_client.get_xml_data_types(tournament_data)
-            xml_type_info = next((t for t in xml_types if t["id"] == xml_type_id), None)
+            xml_type_info = xml_types.get(xml_type_id)
             if not xml_type_info:
                 return jsonify({"error": "Неизвестный тип XML"}), 400
 
+            tournament_data = load_xml_tournament(tournament_id, xml_type_info)
+            if not tournament_data:
+                return jsonify({"error": "Турнир не найден"}), 404
+
+            # Stale-while-revalidate: файл собирается из БД сразу, свежие данные rankedin
+            # забираются в фоне и перезаписывают файл. Синхронно — только если в БД ничего нет
             if xml_type_info["type"] == "court_score":
-                court_data = api_client.get_court_scoreboard(str(xml_type_info.get("court_id")))
+                court_id = str(xml_type_info.get("court_id"))
+                court_data = get_court_data(tournament_id, court_id)
                 if "error" in court_data:
-                    return jsonify({"error": "Ошибка получения данных корта"}), 500
+                    court_data = api_client.get_court_scoreboard(court_id)
+                    if "error" in court_data:
+                        return jsonify({"error": "Ошибка получения данных корта"}), 500
+                    save_courts_data(tournament_id, [court_data])
+                else:
+                    api_client.revalidate(("xml", tournament_id, xml_type_id),
+                                          lambda: _refresh_court_xml(tournament_id, court_id, xml_type_info, tournament_data))
                 file_info = xml_manager.generate_and_save(xml_type_info, tournament_data, court_data)
             else:
                 if xml_type_info["type"] == "tournament_table":
-                    class_id = xml_type_info.get("class_id")
-                    draw_type = xml_type_info.get("draw_type")
-
-                    if draw_type == "round_robin":
-                        fresh_data = api_client.get_all_draws_for_class(str(class_id)).get("round_robin", [])
-                    elif draw_type == "elimination":
-                        fresh_data = api_client.get_all_draws_for_class(str(class_id)).get("elimination", [])
-                    else:
-                        fresh_data = None
-
-                    if fresh_data and tournament_data.get("draw_data", {}).get(str(class_id)):
-                        if draw_type == "round_robin":
-                            tournament_data["draw_data"][str(class_id)]["round_robin"] = fresh_data
-                        elif draw_type == "elimination":
-                            tournament_data["draw_data"][str(class_id)]["elimination"] = fresh_data
-
+                    api_client.revalidate(("xml", tournament_id, xml_type_id),
+                                          lambda: _refresh_table_xml(tournament_id, xml_type_info))
                 file_info = xml_manager.generate_and_save(xml_type_info, tournament_data)
 
             save_xml_file_info(tournament_id, file_info)
@@ -69,23 +96,62 @@ def create_files_blueprint(api_client, xml_manager):
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
+    def _refresh_court_xml(tournament_id, court_id, xml_type_info, tournament_data):
+        """Фон: свежий счёт корта с rankedin → courts_data и XML-файл"""
+        court_data = api_client.get_court_scoreboard(court_id)
+        if "error" in court_data:
+            return
+        save_courts_data(tournament_id, [court_data])
+        save_xml_file_info(tournament_id, xml_manager.generate_and_save(xml_type_info, tournament_data, court_data))
+
+    def _refresh_table_xml(tournament_id, xml_type_info):
+        """Фон: свежие сетки категории с rankedin → draw_data (как в AutoRefresh) и XML-файл"""
+        class_id = str(xml_type_info.get("class_id"))
+        if xml_type_info.get("draw_type") not in ("round_robin", "elimination"):
+            return
+        fresh = api_client.get_all_draws_for_class(class_id)
+        draws = {draw_type: fresh[draw_type] for draw_type in ("round_robin", "elimination") if fresh.get(draw_type)}
+        if not draws or not save_class_draws(tournament_id, class_id, draws):
+            return
+        tournament_data = load_xml_tournament(tournament_id, xml_type_info)
+        if tournament_data:
+            save_xml_file_info(tournament_id, xml_manager.generate_and_save(xml_type_info, tournament_data))
+
     @bp.route('/api/xml-live/<tournament_id>/<xml_type_id>')
     def get_live_xml_data(tournament_id, xml_type_id):
+        """
+        XML для vMix из локального состояния (БД), без обращения к rankedin.
+        Счёт корта читается из courts_data, которую поддерживают WebSocket и AutoRefresh;
+        таблицы кэшируются до смены версии данных турнира.
+        """
         try:
-            tournament_data = get_tournament_data(tournament_id)
-            if not tournament_data:
+            version = get_tournament_version(tournament_id)
+            if version is None:
                 return Response("<!-- Турнир не найден -->", mimetype='application/xml'), 404
 
-            xml_types = api_client.get_xml_data_types(tournament_data)
-            xml_type_info = next((t for t in xml_types if t["id"] == xml_type_id), None)
+            xml_types = get_display_catalog(tournament_id, version)
+            xml_type_info = xml_types.get(xml_type_id)
             if not xml_type_info:
                 return Response("<!-- Неизвестный тип -->", mimetype='application/xml'), 400
 
             if xml_type_info["type"] == "court_score":
-                court_data = api_client.get_court_scoreboard(str(xml_type_info.get("court_id")))
-                xml_content = xml_manager.xml_generator.generate_court_score_xml(court_data, tournament_data)
+                court_id = str(xml_type_info.get("court_id"))
+                try:
+                    live_manager.subscribe_court(int(court_id))
+                except Exception:
+                    pass
+                court_data = get_court_data(tournament_id, court_id)
+                if "error" in court_data:
+                    # Корт ещё не попал в БД — однократно берём данные с rankedin
+                    court_data = api_client.get_court_scoreboard(court_id)
+                    if "error" not in court_data:
+                        save_courts_data(tournament_id, [court_data])
+                xml_content = xml_manager.xml_generator.generate_court_score_xml(court_data)
             elif xml_type_info["type"] == "tournament_table":
-                xml_content = xml_manager.xml_generator.generate_tournament_table_xml(tournament_data, xml_type_info)
+                xml_content = get_cached_xml(
+                    tournament_id, xml_type_id, version,
+                    lambda: xml_manager.xml_generator.generate_tournament_table_xml(
+                        load_xml_tournament(tournament_id, xml_type_info) or {}, xml_type_info))
             else:
                 return Response("<!-- Неподдерживаемый тип -->", mimetype='application/xml'), 400
 
@@ -96,13 +162,12 @@ def create_files_blueprint(api_client, xml_manager):
     @bp.route('/api/tournament/<tournament_id>/live-xml-info')
     def get_live_xml_info(tournament_id):
         try:
-            tournament_data = get_tournament_data(tournament_id)
-            if not tournament_data:
+            xml_types = get_display_catalog(tournament_id)
+            if xml_types is None:
                 return jsonify({"error": "Турнир не найден"}), 404
 
-            xml_types = api_client.get_xml_data_types(tournament_data)
             live_xml_info = []
-            for t in xml_types:
+            for t in xml_types.values():
                 info = {
                     "id": t["id"],
                     "name": t.get("name", t["id"]),
@@ -125,7 +190,7 @@ def create_files_blueprint(api_client, xml_manager):
 
             return jsonify({
                 "tournament_id": tournament_id,
-                "tournament_name": tournament_data.get("metadata", {}).get("name", f"Турнир {tournament_id}"),
+                "tournament_name": get_tournament_name(tournament_id) or f"Турнир {tournament_id}",
                 "live_xml_count": len(live_xml_info),
                 "live_xml_types": live_xml_info,
             })
@@ -141,6 +206,18 @@ def create_files_blueprint(api_client, xml_manager):
         except NotFound:
             return Response("<!-- Файл не найден -->", mimetype='application/xml'), 404
 
+    @bp.route('/photos/<name>')
+    def serve_photo_variant(name):
+        """Вариант фото участника; URL содержит хэш, поэтому кэшируется без ревалидации"""
+        found = find_photo_variant(name, request.headers.get('Accept', ''))
+        if not found:
+            return jsonify({"error": "Фото не найдено"}), 404
+        filename, mimetype = found
+        response = send_from_directory(get_photo_derived_dir(), filename, mimetype=mimetype, max_age=PHOTO_CACHE_MAX_AGE)
+        response.headers['Cache-Control'] = f'public, max-age={PHOTO_CACHE_MAX_AGE}, immutable'
+        response.headers['Vary'] = 'Accept'
+        return response
+
     @bp.route('/html/<filename>')
     def serve_html_file(filename):
         if not _is_allowed_filename(filename, {'html', 'htm'}):
@@ -150,4 +227,4 @@ def create_files_blueprint(api_client, xml_manager):
         except NotFound:
             return "<html><body><h1>Файл не найден</h1></body></html>", 404
 
-    return bp
+    return bp
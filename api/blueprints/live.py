@@ -6,15 +6,23 @@ from datetime import datetime, timedelta
 from flask import Blueprint, jsonify, request, Response
 
 from api import (
-    get_tournament_data,
-    get_court_data,
+    get_class_draw,
+    get_display_catalog,
+    get_draw_summary,
     get_participant_info,
-    get_photo_urls_for_ids,
+    enrich_players,
     enrich_court_data_with_photos,
     require_auth,
-    get_court_has_referee,
     set_court_has_referee,
+    table_type_id,
 )
+from api.draw_changes import elimination_delta, round_robin_delta
+from api.request_loader import get_request_loader
+
+# Поля турнира, которые читают страницы (см. database.get_tournament_fields)
+NEXT_MATCH_FIELDS = ("court_usage", "matches_data")
+COURT_PAGE_FIELDS = ("metadata",) + NEXT_MATCH_FIELDS
+SCHEDULE_FIELDS = ("metadata", "courts", "court_usage", "matches_data", "draw_data")
 
 
 def _find_current_match_info(tournament_data: dict, court_id: str, logger) -> dict:
@@ -179,7 +187,7 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
     """
     Фабрика Flask Blueprint со всеми live-маршрутами.
     Принимает зависимости через параметры (dependency injection):
-      api_client     — клиент rankedin API (для get_xml_data_types),
+      api_client     — клиент rankedin API,
       html_generator — генератор HTML-страниц (scoreboard, vs, schedule и т.п.),
       live_manager   — менеджер WebSocket-подписок на корты,
       logger         — логгер модуля.
@@ -187,6 +195,23 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
     """
     bp = Blueprint("live_bp", __name__)
 
+    def _get_class_tournament_data(tournament_id: str, class_id: str):
+        """
+        Проекция турнира для страниц таблиц: метаданные, категории и сетки одной категории.
+        Сетки остальных категорий не читаются. Категории нет в draw_data — пустой draw_data.
+        """
+        tournament_data = get_request_loader().tournament(tournament_id, ("metadata", "classes"))
+        if not tournament_data:
+            return None
+        class_draw = get_class_draw(tournament_id, class_id)
+        tournament_data["draw_data"] = {str(class_id): class_draw} if isinstance(class_draw, dict) else {}
+        return tournament_data
+
+    def _find_table_type(tournament_id: str, draw_type: str, class_id: str, draw_index: int):
+        """Описание типа tournament_table для группы / стадии категории из каталога турнира или None"""
+        xml_types = get_display_catalog(tournament_id) or {}
+        return xml_types.get(table_type_id(class_id, draw_type, draw_index))
+
     @bp.route('/api/html-live/<tournament_id>/<court_id>')
     def get_live_court_html(tournament_id, court_id):
         """
@@ -195,20 +220,21 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
         В режиме без судьи показывает следующий матч вместо текущего.
         """
         try:
+            loader = get_request_loader()
             try:
                 live_manager.subscribe_court(int(court_id))
             except Exception as e:
                 logger.debug(f"WebSocket subscribe failed: {e}")
 
-            tournament_data = get_tournament_data(tournament_id)
+            tournament_data = loader.tournament(tournament_id, COURT_PAGE_FIELDS)
             if not tournament_data:
                 return "<html><body><h1>Турнир не найден</h1></body></html>", 404
 
-            court_data = get_court_data(tournament_id, str(court_id))
+            court_data = loader.court(tournament_id, court_id)
             if not court_data or "error" in court_data:
                 return "<html><body><h1>Корт не найден</h1></body></html>", 500
 
-            if not get_court_has_referee(tournament_id, str(court_id)):
+            if not loader.court_has_referee(tournament_id, court_id):
                 next_data = _get_next_match_participants(tournament_data, court_id)
                 court_data.update(next_data)
                 court_data = _apply_no_referee_mode(court_data)
@@ -226,22 +252,23 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
         В режиме без судьи показывает следующий матч.
         """
         try:
+            loader = get_request_loader()
             try:
                 live_manager.subscribe_court(int(court_id))
             except Exception as e:
                 logger.debug(f"WebSocket subscribe failed: {e}")
 
-            tournament_data = get_tournament_data(tournament_id)
-            court_data = get_court_data(tournament_id, str(court_id))
+            tournament_data = loader.tournament(tournament_id, COURT_PAGE_FIELDS)
+            court_data = loader.court(tournament_id, court_id)
             if not tournament_data or not court_data:
                 return "<html><body><h1>Не найдено</h1></body></html>", 404
 
-            if not get_court_has_referee(tournament_id, str(court_id)):
+            if not loader.court_has_referee(tournament_id, court_id):
                 next_data = _get_next_match_participants(tournament_data, court_id)
                 court_data.update(next_data)
                 court_data = _apply_no_referee_mode(court_data)
 
-            court_data = enrich_court_data_with_photos(court_data)
+            court_data = enrich_court_data_with_photos(court_data, "medium")
             html = html_generator.generate_scoreboard_full_html(court_data, tournament_data, tournament_id, court_id)
             return Response(html, mimetype='text/html; charset=utf-8')
         except Exception as e:
@@ -258,23 +285,24 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
         В режиме без судьи подставляет следующий матч.
         """
         try:
+            loader = get_request_loader()
             try:
                 live_manager.touch(int(court_id))
             except Exception:
                 pass
 
-            court_data = get_court_data(tournament_id, str(court_id))
+            court_data = loader.court(tournament_id, court_id)
             if not court_data:
                 return jsonify({"error": "Корт не найден"}), 404
 
-            if not get_court_has_referee(tournament_id, str(court_id)):
-                tournament_data = get_tournament_data(tournament_id)
+            if not loader.court_has_referee(tournament_id, court_id):
+                tournament_data = loader.tournament(tournament_id, NEXT_MATCH_FIELDS)
                 if tournament_data:
                     next_data = _get_next_match_participants(tournament_data, court_id)
                     court_data.update(next_data)
                 court_data = _apply_no_referee_mode(court_data)
 
-            court_data = enrich_court_data_with_photos(court_data)
+            court_data = enrich_court_data_with_photos(court_data, "medium")
 
             first_participant = court_data.get("first_participant", [])
             second_participant = court_data.get("second_participant", [])
@@ -315,17 +343,18 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
         В режиме без судьи показывает следующий матч.
         """
         try:
-            tournament_data = get_tournament_data(tournament_id)
-            court_data = get_court_data(tournament_id, str(court_id))
+            loader = get_request_loader()
+            tournament_data = loader.tournament(tournament_id, COURT_PAGE_FIELDS)
+            court_data = loader.court(tournament_id, court_id)
             if not tournament_data or not court_data:
                 return "<html><body><h1>Не найдено</h1></body></html>", 404
 
-            if not get_court_has_referee(tournament_id, str(court_id)):
+            if not loader.court_has_referee(tournament_id, court_id):
                 next_data = _get_next_match_participants(tournament_data, court_id)
                 court_data.update(next_data)
                 court_data = _apply_no_referee_mode(court_data)
 
-            court_data = enrich_court_data_with_photos(court_data)
+            court_data = enrich_court_data_with_photos(court_data, "medium")
             html = html_generator.generate_court_vs_html(
                 court_data, tournament_data, tournament_id, court_id
             )
@@ -342,18 +371,19 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
         В режиме без судьи подставляет следующий матч.
         """
         try:
-            court_data = get_court_data(tournament_id, str(court_id))
+            loader = get_request_loader()
+            court_data = loader.court(tournament_id, court_id)
             if not court_data:
                 return jsonify({"error": "Корт не найден"}), 404
 
-            if not get_court_has_referee(tournament_id, str(court_id)):
-                tournament_data = get_tournament_data(tournament_id)
+            if not loader.court_has_referee(tournament_id, court_id):
+                tournament_data = loader.tournament(tournament_id, NEXT_MATCH_FIELDS)
                 if tournament_data:
                     next_data = _get_next_match_participants(tournament_data, court_id)
                     court_data.update(next_data)
                 court_data = _apply_no_referee_mode(court_data)
 
-            court_data = enrich_court_data_with_photos(court_data)
+            court_data = enrich_court_data_with_photos(court_data, "medium")
 
             team1 = court_data.get("first_participant", [])
             team2 = court_data.get("second_participant", [])
@@ -406,19 +436,20 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
         В режиме без судьи показывает следующий матч.
         """
         try:
-            tournament_data = get_tournament_data(tournament_id)
-            court_data = get_court_data(tournament_id, str(court_id))
+            loader = get_request_loader()
+            tournament_data = loader.tournament(tournament_id, COURT_PAGE_FIELDS)
+            court_data = loader.court(tournament_id, court_id)
             if not tournament_data or not court_data:
                 return "<html><body><h1>Не найдено</h1></body></html>", 404
 
             match_info = _find_current_match_info(tournament_data, court_id, logger)
 
-            if not get_court_has_referee(tournament_id, str(court_id)):
+            if not loader.court_has_referee(tournament_id, court_id):
                 next_data = _get_next_match_participants(tournament_data, court_id)
                 court_data.update(next_data)
                 court_data = _apply_no_referee_mode(court_data)
 
-            court_data = enrich_court_data_with_photos(court_data)
+            court_data = enrich_court_data_with_photos(court_data, "full")
             html = html_generator.generate_match_introduction_html(court_data, match_info)
             return Response(html, mimetype='text/html; charset=utf-8')
         except Exception as e:
@@ -432,23 +463,17 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
         Загружает фотографии игроков следующего матча по их id и встраивает в court_data.
         """
         try:
-            tournament_data = get_tournament_data(tournament_id)
-            court_data = get_court_data(tournament_id, str(court_id))
+            loader = get_request_loader()
+            tournament_data = loader.tournament(tournament_id, ("metadata",))
+            court_data = loader.court(tournament_id, court_id)
             if not tournament_data or not court_data:
                 return "<html><body><h1>Не найдено</h1></body></html>", 404
 
-            next_ids = []
-            for p in court_data.get("next_first_participant", []) + court_data.get("next_second_participant", []):
-                if p.get("id"):
-                    next_ids.append(p["id"])
-
-            if next_ids:
-                photo_map = get_photo_urls_for_ids(next_ids)
-                for p in court_data.get("next_first_participant", []) + court_data.get("next_second_participant", []):
-                    if p.get("id") in photo_map:
-                        p["photo_url"] = photo_map[p["id"]]
+            next_players = court_data.get("next_first_participant", []) + court_data.get("next_second_participant", [])
+            enrich_players(next_players, "medium")
+            id_url = [{"id": p.get("id"), "photo_url": p.get("photo_url", "")} for p in next_players if p.get("id")]
 
-            html = html_generator.generate_next_match_page_html(court_data, tournament_data)
+            html = html_generator.generate_next_match_page_html(court_data, id_url, tournament_data)
             return Response(html, mimetype='text/html; charset=utf-8')
         except Exception as e:
             return f"<html><body><h1>Ошибка: {e}</h1></body></html>", 500
@@ -460,12 +485,13 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
         Обогащает данные фотографиями обоих участников и передаёт в generate_winner_page_html.
         """
         try:
-            tournament_data = get_tournament_data(tournament_id)
-            court_data = get_court_data(tournament_id, str(court_id))
+            loader = get_request_loader()
+            tournament_data = loader.tournament(tournament_id, ("metadata",))
+            court_data = loader.court(tournament_id, court_id)
             if not tournament_data or not court_data:
                 return "<html><body><h1>Не найдено</h1></body></html>", 404
 
-            court_data = enrich_court_data_with_photos(court_data)
+            court_data = enrich_court_data_with_photos(court_data, "full")
 
             all_ids = [
                 p.get("id")
@@ -486,7 +512,7 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
         Загружает данные участника по id и генерирует HTML через generate_introduction_page_html.
         """
         try:
-            participant = get_participant_info(int(participant_id))
+            participant = get_participant_info(int(participant_id), "full")
             if not participant:
                 return "<html><body><h1>Участник не найден</h1></body></html>", 404
 
@@ -503,7 +529,7 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
         Опциональный параметр date задаёт дату; по умолчанию — сегодня.
         """
         try:
-            tournament_data = get_tournament_data(tournament_id)
+            tournament_data = get_request_loader().tournament(tournament_id, SCHEDULE_FIELDS)
             if not tournament_data:
                 return "<html><body><h1>Турнир не найден</h1></body></html>", 404
 
@@ -525,7 +551,7 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
         try:
             if half_num not in (1, 2):
                 return "<html><body><h1>Неверный номер половины (1 или 2)</h1></body></html>", 400
-            tournament_data = get_tournament_data(tournament_id)
+            tournament_data = get_request_loader().tournament(tournament_id, SCHEDULE_FIELDS)
             if not tournament_data:
                 return "<html><body><h1>Турнир не найден</h1></body></html>", 404
 
@@ -546,7 +572,7 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
         time_slots, courts, matches. Параметр half фильтрует корты по половине.
         """
         try:
-            tournament_data = get_tournament_data(tournament_id)
+            tournament_data = get_request_loader().tournament(tournament_id, SCHEDULE_FIELDS)
             if not tournament_data:
                 return jsonify({"error": "Турнир не найден"}), 404
 
@@ -579,22 +605,15 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
         404, если группа не найдена в данных турнира.
         """
         try:
-            tournament_data = get_tournament_data(tournament_id)
+            tournament_data = _get_class_tournament_data(tournament_id, class_id)
             if not tournament_data:
                 return "<html><body><h1>Турнир не найден</h1></body></html>", 404
 
-            xml_types = api_client.get_xml_data_types(tournament_data)
-            xml_type_info = next((
-                t for t in xml_types
-                if t.get("type") == "tournament_table"
-                and t.get("draw_type") == "round_robin"
-                and t.get("class_id") == class_id
-                and t.get("draw_index") == draw_index
-            ), None)
+            xml_type_info = _find_table_type(tournament_id, "round_robin", class_id, draw_index)
             if not xml_type_info:
                 return "<html><body><h1>Таблица не найдена</h1></body></html>", 404
 
-            html = html_generator.generate_round_robin_html(tournament_data, xml_type_info)
+            html = html_generator.generate_round_robin_html(tournament_data, xml_type_info, tournament_id)
             return Response(html, mimetype='text/html; charset=utf-8')
         except Exception as e:
             logger.error(f"Ошибка round-robin HTML: {e}")
@@ -609,18 +628,11 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
         404, если сетка не найдена в данных турнира.
         """
         try:
-            tournament_data = get_tournament_data(tournament_id)
+            tournament_data = _get_class_tournament_data(tournament_id, class_id)
             if not tournament_data:
                 return "<html><body><h1>Турнир не найден</h1></body></html>", 404
 
-            xml_types = api_client.get_xml_data_types(tournament_data)
-            xml_type_info = next((
-                t for t in xml_types
-                if t.get("type") == "tournament_table"
-                and t.get("draw_type") == "elimination"
-                and t.get("class_id") == class_id
-                and t.get("draw_index") == draw_index
-            ), None)
+            xml_type_info = _find_table_type(tournament_id, "elimination", class_id, draw_index)
             if not xml_type_info:
                 return "<html><body><h1>Сетка не найдена</h1></body></html>", 404
 
@@ -633,30 +645,24 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
     @bp.route('/api/elimination/<tournament_id>/<class_id>/data')
     def get_elimination_data(tournament_id, class_id):
         """
-        GET /api/elimination/<tournament_id>/<class_id>/data[?draw_index=N]
+        GET /api/elimination/<tournament_id>/<class_id>/data[?draw_index=N][&since=<version>]
         JSON-данные сетки плей-офф для AJAX-обновления (elimination_live.js).
         Параметр draw_index (по умолчанию 0) выбирает нужную стадию внутри категории.
+        since — версия, которая уже есть у клиента: в ответе только изменившиеся матчи (delta=true).
         """
         try:
-            tournament_data = get_tournament_data(tournament_id)
+            tournament_data = _get_class_tournament_data(tournament_id, class_id)
             if not tournament_data:
                 return jsonify({"error": "Турнир не найден"}), 404
 
             draw_index = request.args.get('draw_index', 0, type=int)
-            xml_types = api_client.get_xml_data_types(tournament_data)
-            xml_type_info = next((
-                t for t in xml_types
-                if t.get("type") == "tournament_table"
-                and t.get("draw_type") == "elimination"
-                and t.get("class_id") == class_id
-                and t.get("draw_index") == draw_index
-            ), None)
+            xml_type_info = _find_table_type(tournament_id, "elimination", class_id, draw_index)
 
             if not xml_type_info:
                 return jsonify({"error": "Сетка не найдена", "matches": []}), 404
 
             elimination_data = html_generator.get_elimination_data(tournament_data, xml_type_info)
-            return jsonify(elimination_data)
+            return jsonify(elimination_delta(tournament_id, elimination_data, request.args.get('since')))
         except Exception as e:
             logger.error(f"Ошибка получения данных elimination: {e}")
             return jsonify({"error": str(e)}), 500
@@ -664,28 +670,22 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
     @bp.route('/api/round-robin/<tournament_id>/<class_id>/<int:draw_index>/data')
     def get_round_robin_data(tournament_id, class_id, draw_index):
         """
-        JSON-данные кругового этапа для AJAX-обновления (round_robin_live.js).
-        Возвращает matches (матчи группы) и standings (турнирная таблица).
+        JSON-данные кругового этапа для AJAX-обновления (round_robin.js).
+        Возвращает matches (матчи группы) и standings (турнирная таблица);
+        с ?since=<version> — только изменившиеся ячейки и строки итогов (delta=true).
         """
         try:
-            tournament_data = get_tournament_data(tournament_id)
+            tournament_data = _get_class_tournament_data(tournament_id, class_id)
             if not tournament_data:
                 return jsonify({"error": "Турнир не найден"}), 404
 
-            xml_types = api_client.get_xml_data_types(tournament_data)
-            xml_type_info = next((
-                t for t in xml_types
-                if t.get("type") == "tournament_table"
-                and t.get("draw_type") == "round_robin"
-                and t.get("class_id") == class_id
-                and t.get("draw_index") == draw_index
-            ), None)
+            xml_type_info = _find_table_type(tournament_id, "round_robin", class_id, draw_index)
 
             if not xml_type_info:
                 return jsonify({"error": "Группа не найдена", "matches": {}, "standings": []}), 404
 
             rr_data = html_generator.get_round_robin_data(tournament_data, xml_type_info)
-            return jsonify(rr_data)
+            return jsonify(round_robin_delta(tournament_id, rr_data, request.args.get('since')))
         except Exception as e:
             logger.error(f"Ошибка получения данных round robin: {e}")
             return jsonify({"error": str(e)}), 500
@@ -729,6 +729,40 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
+    @bp.route('/api/live/recording', methods=['GET'])
+    @require_auth
+    def get_live_recording():
+        """
+        GET /api/live/recording — состояние записи кадров хаба в этом воркере.
+        Возвращает {active, path, started, frames, shared}; shared — общий флаг записи воркеров.
+        """
+        return jsonify(live_manager.recording_status())
+
+    @bp.route('/api/live/recording', methods=['POST'])
+    @require_auth
+    def start_live_recording():
+        """
+        POST /api/live/recording — начинает запись всех входящих кадров хаба
+        в сжатые журналы (logs/live_frames, файл на воркер; остальные воркеры
+        подхватывают общий флаг в течение 10 с). Журналы сеанса воспроизводятся
+        вместе через tools/replay_live.py.
+        """
+        try:
+            path = live_manager.start_recording()
+            return jsonify({"success": True, "path": path})
+        except Exception as e:
+            logger.error(f"Error starting live recording: {e}")
+            return jsonify({"error": str(e)}), 500
+
+    @bp.route('/api/live/recording', methods=['DELETE'])
+    @require_auth
+    def stop_live_recording():
+        """
+        DELETE /api/live/recording — останавливает запись кадров во всех воркерах.
+        Возвращает итог этого воркера {active, path, started, frames}.
+        """
+        return jsonify(live_manager.stop_recording())
+
     @bp.route('/api/court/<tournament_id>/<court_id>/settings', methods=['GET'])
     def get_court_settings(tournament_id, court_id):
         """
@@ -737,7 +771,7 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
         has_referee=False активирует режим «без судьи» (показ следующего матча).
         """
         try:
-            has_referee = get_court_has_referee(tournament_id, str(court_id))
+            has_referee = get_request_loader().court_has_referee(tournament_id, court_id)
             return jsonify({"has_referee": has_referee})
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -770,7 +804,8 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
         Также возвращает список уникальных категорий (categories) для фильтрации.
         """
         try:
-            tournament_data = get_tournament_data(tournament_id)
+            loader = get_request_loader()
+            tournament_data = loader.tournament(tournament_id, ("metadata", "courts") + NEXT_MATCH_FIELDS)
             if not tournament_data:
                 return jsonify({"error": "Турнир не найден"}), 404
 
@@ -780,17 +815,14 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
             _DRAW_LABELS = {"RoundRobin": "Групповой", "Elimination": "Плей-офф"}
 
             # Определяем тип этапа по draw_data: round_robin → group, elimination → playoff
-            draw_data = tournament_data.get("draw_data", {})
             class_stage_map = {}
-            for class_info in draw_data.values():
-                name = class_info.get("class_info", {}).get("Name", "")
+            for draw in get_draw_summary(tournament_id):
+                name = draw["name"]
                 if not name:
                     continue
-                has_el = bool(class_info.get("elimination"))
-                has_rr = bool(class_info.get("round_robin"))
-                if has_el:
+                if draw["elimination"]:
                     class_stage_map[name] = "playoff"
-                elif has_rr:
+                elif draw["round_robin"]:
                     class_stage_map[name] = "group"
 
             courts_list = tournament_data.get("courts", [])
@@ -803,7 +835,7 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
                 if not court_id:
                     continue
 
-                court_data = get_court_data(tournament_id, court_id)
+                court_data = loader.court(tournament_id, court_id)
                 if not court_data:
                     continue
 
@@ -835,6 +867,9 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
 
                 courts_result.append(court_data)
 
+            # Фото и страны всех игроков дашборда — одним снимком справочника участников
+            enrich_players([p for c in courts_result for p in c["team1_players"] + c["team2_players"]], "thumb")
+
             return jsonify({
                 "tournament_name": tournament_name,
                 "courts": courts_result,
@@ -853,7 +888,7 @@ def create_live_blueprint(api_client, html_generator, live_manager, logger):
         Требует авторизации. Возвращает {success, tournament_id, courts_subscribed: [...]}.
         """
         try:
-            tournament_data = get_tournament_data(tournament_id)
+            tournament_data = get_request_loader().tournament(tournament_id, ("courts",))
             if not tournament_data:
                 return jsonify({"error": "Турнир не найден"}), 404
 
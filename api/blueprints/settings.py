@@ -12,6 +12,9 @@ from api import (
     get_uptime,
     require_auth,
 )
+from api.db_maintenance import db_maintenance
+from api.metrics import metrics_summary
+from api.rankedin_api_base import circuit_status
 
 
 def create_settings_blueprint(api_client, get_auto_refresh, start_time_provider):
@@ -64,6 +67,9 @@ def create_settings_blueprint(api_client, get_auto_refresh, start_time_provider)
                 "active_tournaments": tournaments,
                 "courts_data_count": courts,
                 "auto_refresh": auto_refresh.running if auto_refresh else False,
+                "metrics": metrics_summary(),
+                "rankedin_circuits": circuit_status(),
+                "db_maintenance": db_maintenance.status(),
             })
         except Exception as e:
             return jsonify({"status": "error", "error": str(e)}), 500
@@ -74,14 +80,33 @@ def create_settings_blueprint(api_client, get_auto_refresh, start_time_provider)
             from api import get_active_tournament_ids, get_court_ids_for_tournament, save_courts_data
 
             tournament_ids = get_active_tournament_ids()
-            updated_courts = 0
 
+            # ?background=1 — не ждать rankedin: обновление кортов ставится в фон
+            # (stale-while-revalidate), ответ сообщает число запланированных турниров.
+            # По умолчанию — синхронно, с числом обновлённых кортов
+            if request.args.get('background') in ('1', 'true'):
+                scheduled = 0
+                for tid in tournament_ids:
+                    court_ids = get_court_ids_for_tournament(tid)
+                    if court_ids and api_client.revalidate(
+                            ("courts", tid),
+                            lambda tid=tid, court_ids=court_ids:
+                            save_courts_data(tid, api_client.get_all_courts_data(court_ids))):
+                        scheduled += 1
+                return jsonify({
+                    "success": True,
+                    "scheduled": scheduled,
+                    "tournaments": len(tournament_ids),
+                })
+
+            updated_courts = 0
             for tid in tournament_ids:
                 court_ids = get_court_ids_for_tournament(tid)
-                if court_ids:
-                    courts_data = api_client.get_all_courts_data(court_ids)
-                    if courts_data:
-                        updated_courts += save_courts_data(tid, courts_data)
+                if not court_ids:
+                    continue
+                courts_data = api_client.get_all_courts_data(court_ids)
+                if courts_data:
+                    updated_courts += save_courts_data(tid, courts_data)
 
             return jsonify({
                 "success": True,
@@ -5,21 +5,28 @@ MixRanker v2.6 - Country Autocomplete Integration
 """
 
 import json
-import os
 from datetime import datetime
 from flask import Blueprint, jsonify, request, session
 from werkzeug.utils import secure_filename
 
 from api import (
     require_auth,
-    get_tournament_data,
+    get_tournament_fields,
+    get_court_ids_for_tournament,
+    get_court_data,
     save_courts_data,
     execute_with_retry,
+    encode_blob,
     save_tournament_matches,
     get_tournament_matches,
     get_sport_name,
     get_court_has_referee,
+    get_display_catalog,
+    invalidate_xml_cache,
+    participant_directory,
 )
+from api.change_feed import record_changes, tournament_topic
+from api.photo_pipeline import configure_photo_dir, submit_photo_derivatives, get_photo_variant_url
 
 def _extract_players(team_data: dict) -> list:
     if not team_data:
@@ -88,6 +95,7 @@ def _enrich_courts_with_next_match(courts_data: list, tournament_data: dict) ->
 
 def create_tournaments_blueprint(api_client, upload_folder: str, logger):
     bp = Blueprint("tournaments_bp", __name__)
+    configure_photo_dir(upload_folder)
 
     @bp.route('/api/tournament/<tournament_id>', methods=['POST'])
     @require_auth
@@ -111,14 +119,14 @@ def create_tournaments_blueprint(api_client, upload_folder: str, logger):
                     tournament_id, metadata.get("name", f"Турнир {tournament_id}"),
                     json.dumps(metadata), json.dumps(tournament_data.get("classes", [])),
                     json.dumps(tournament_data.get("courts", [])), json.dumps(tournament_data.get("dates", [])),
-                    json.dumps(tournament_data.get("draw_data", {})), "active"
+                    encode_blob(tournament_data.get("draw_data", {})), "active"
                 ))
                 cursor.execute('''
                     INSERT OR REPLACE INTO tournament_schedule 
                     (tournament_id, court_planner, court_usage, updated_at)
                     VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-                ''', (tournament_id, json.dumps(tournament_data.get("court_planner", {})),
-                          json.dumps(tournament_data.get("court_usage", {}))))
+                ''', (tournament_id, encode_blob(tournament_data.get("court_planner", {})),
+                          encode_blob(tournament_data.get("court_usage", {}))))
 
                 if matches_data:
                     cursor.execute('''
@@ -127,7 +135,7 @@ def create_tournaments_blueprint(api_client, upload_folder: str, logger):
                         VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
                     ''', (
                         tournament_id,
-                        json.dumps(matches_data.get("Matches", [])),
+                        encode_blob(matches_data.get("Matches", [])),
                         1 if matches_data.get("AreMatchesPublished") else 0,
                         1 if matches_data.get("IsSchedulePublished") else 0
                     ))
@@ -140,8 +148,11 @@ def create_tournaments_blueprint(api_client, upload_folder: str, logger):
                     cursor.executemany('''
                         INSERT OR IGNORE INTO participants_tournaments (participant_id, tournament_id) VALUES (?, ?)
                     ''', [(p.get("Id"), tournament_id) for p in participants])
+                record_changes(cursor, [tournament_topic(tournament_id)])
 
             execute_with_retry(save_transaction)
+            if participants:
+                participant_directory.invalidate()
             logger.info(f"Турнир {tournament_id} загружен")
 
             return jsonify({
@@ -183,7 +194,9 @@ def create_tournaments_blueprint(api_client, upload_folder: str, logger):
                 cursor.execute('DELETE FROM tournament_schedule WHERE tournament_id = ?', (tournament_id,))
                 cursor.execute('DELETE FROM tournament_matches WHERE tournament_id = ?', (tournament_id,))
                 cursor.execute('DELETE FROM tournaments WHERE id = ?', (tournament_id,))
+                record_changes(cursor, [tournament_topic(tournament_id)])
             execute_with_retry(transaction)
+            invalidate_xml_cache(tournament_id)
             return jsonify({"success": True})
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -191,23 +204,22 @@ def create_tournaments_blueprint(api_client, upload_folder: str, logger):
     @bp.route('/api/tournament/<tournament_id>/courts')
     def get_tournament_courts(tournament_id):
         try:
-            def get_court_ids(conn):
-                cursor = conn.cursor()
-                cursor.execute('SELECT courts FROM tournaments WHERE id = ?', (tournament_id,))
-                row = cursor.fetchone()
-                if row and row[0]:
-                    return [str(c.get("Item1")) for c in json.loads(row[0]) if c.get("Item1")]
-                return []
-
-            court_ids = execute_with_retry(get_court_ids)
+            court_ids = get_court_ids_for_tournament(tournament_id)
             if not court_ids:
                 return jsonify([])
 
-            courts_data = api_client.get_all_courts_data(court_ids)
+            # Stale-while-revalidate: корты из БД сразу, свежий счёт с rankedin — в фоне.
+            # Синхронный запрос — только пока в БД нет ни одного корта турнира
+            courts_data = [c for c in (get_court_data(tournament_id, cid) for cid in court_ids) if "error" not in c]
             if courts_data:
-                save_courts_data(tournament_id, courts_data)
+                api_client.revalidate(("courts", tournament_id),
+                                      lambda: save_courts_data(tournament_id, api_client.get_all_courts_data(court_ids)))
+            else:
+                courts_data = api_client.get_all_courts_data(court_ids)
+                if courts_data:
+                    save_courts_data(tournament_id, courts_data)
 
-            tournament_data = get_tournament_data(tournament_id)
+            tournament_data = get_tournament_fields(tournament_id, ("court_usage", "matches_data"))
             if tournament_data:
                 courts_data = _enrich_courts_with_next_match(courts_data, tournament_data)
 
@@ -222,10 +234,10 @@ def create_tournaments_blueprint(api_client, upload_folder: str, logger):
     @bp.route('/api/tournament/<tournament_id>/xml-types')
     def get_xml_types(tournament_id):
         try:
-            tournament_data = get_tournament_data(tournament_id)
-            if not tournament_data:
+            xml_types = get_display_catalog(tournament_id)
+            if xml_types is None:
                 return jsonify({"error": "Турнир не найден"}), 404
-            return jsonify(api_client.get_xml_data_types(tournament_data))
+            return jsonify(list(xml_types.values()))
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
@@ -247,6 +259,7 @@ def create_tournaments_blueprint(api_client, upload_folder: str, logger):
                         cursor.executemany('INSERT OR IGNORE INTO participants_tournaments VALUES (?, ?)',
                                           [(p.get("Id"), tournament_id) for p in participants])
                     execute_with_retry(save)
+                    participant_directory.invalidate()
 
             def get_participants(conn):
                 cursor = conn.cursor()
@@ -256,7 +269,11 @@ def create_tournaments_blueprint(api_client, upload_folder: str, logger):
                     WHERE pt.tournament_id = ?
                 ''', (tournament_id,))
                 cols = [d[0] for d in cursor.description]
-                return [dict(zip(cols, r)) for r in cursor.fetchall()]
+                participants = [dict(zip(cols, r)) for r in cursor.fetchall()]
+                for p in participants:
+                    if p.get('photo_url') and p.get('photo_hash'):
+                        p['photo_thumb_url'] = get_photo_variant_url(p['id'], 'thumb', p['photo_hash'])
+                return participants
 
             return jsonify(execute_with_retry(get_participants))
         except Exception as e:
@@ -265,7 +282,7 @@ def create_tournaments_blueprint(api_client, upload_folder: str, logger):
     @bp.route('/api/tournament/<tournament_id>/participant-classes', methods=['GET'])
     def get_participant_classes(tournament_id):
         """Классы турнира с ID участников из draw_data (round robin + elimination)"""
-        tournament_data = get_tournament_data(tournament_id)
+        tournament_data = get_tournament_fields(tournament_id, ("draw_data",))
         if not tournament_data:
             return jsonify([])
 
@@ -316,8 +333,6 @@ def create_tournaments_blueprint(api_client, upload_folder: str, logger):
     @bp.route('/api/participants/upload-photo', methods=['POST'])
     @require_auth
     def upload_participant_photo():
-        from PIL import Image
-
         participant_id = request.form.get('participant_id')
         if not participant_id:
             return jsonify({"success": False, "error": "Не указан ID участника"}), 400
@@ -360,61 +375,32 @@ def create_tournaments_blueprint(api_client, upload_folder: str, logger):
         })
 
         filename = f"{secure_filename(participant_id)}.png"
-        filepath = os.path.join(upload_folder, filename)
         preview_url = f"/{upload_folder}/{filename}"
 
-        photo_saved = False
-        if 'photo' in request.files:
-            file = request.files['photo']
-            if file and file.filename:
-                try:
-                    crop_x = float(request.form.get('crop_x', 0))
-                    crop_y = float(request.form.get('crop_y', 0))
-                    crop_scale = float(request.form.get('crop_scale', 1.0))
-                    output_width = 1500
-                    output_height = 2048
-                    img = Image.open(file)
-                    if img.mode != 'RGBA':
-                        img = img.convert('RGBA')
-                    scaled_width = int(img.width * crop_scale)
-                    scaled_height = int(img.height * crop_scale)
-                    if scaled_width > 0 and scaled_height > 0:
-                        img_scaled = img.resize((scaled_width, scaled_height), Image.Resampling.LANCZOS)
-                    else:
-                        img_scaled = img
-                    canvas = Image.new('RGBA', (output_width, output_height), (0, 0, 0, 0))
-                    canvas.paste(img_scaled, (int(crop_x), int(crop_y)), img_scaled)
-                    canvas.save(filepath, 'PNG', optimize=True)
-                    photo_saved = True
-                except Exception as e:
-                    logger.error(f"Image process error: {e}")
-                    try:
-                        file.seek(0)
-                        with open(filepath, 'wb') as f:
-                            f.write(file.read())
-                        photo_saved = True
-                    except Exception as e2:
-                        logger.error(f"Image fallback save error: {e2}")
+        # Мастер-PNG собирает и атомарно пишет пул photo_pipeline; здесь — только байты загрузки и кадрирование
+        upload, crop = None, None
+        file = request.files.get('photo')
+        if file and file.filename and participant_id.isdigit():
+            try:
+                crop = (float(request.form.get('crop_x', 0)), float(request.form.get('crop_y', 0)),
+                        float(request.form.get('crop_scale', 1.0)))
+                upload = file.read()
+            except Exception as e:
+                logger.error(f"Image upload read error: {e}")
 
         def update(conn):
             cursor = conn.cursor()
-            if photo_saved:
-                # Обновляем и фото, и дополнительные данные
-                cursor.execute('''
-                    UPDATE participants 
-                    SET photo_url = ?, info = ?, country_code = COALESCE(NULLIF(?, ''), country_code)
-                    WHERE id = ?
-                ''', (preview_url, info, final_country, participant_id))
-            else:
-                # Обновляем только дополнительные данные 
-                cursor.execute('''
-                    UPDATE participants 
-                    SET info = ?, country_code = COALESCE(NULLIF(?, ''), country_code)
-                    WHERE id = ?
-                ''', (info, final_country, participant_id))
+            cursor.execute('''
+                UPDATE participants 
+                SET info = ?, country_code = COALESCE(NULLIF(?, ''), country_code)
+                WHERE id = ?
+            ''', (info, final_country, participant_id))
 
         execute_with_retry(update)
-        return jsonify({"success": True, "preview_url": preview_url if photo_saved else None})
+        participant_directory.invalidate()
+        if upload:
+            submit_photo_derivatives(int(participant_id), upload, crop, preview_url)
+        return jsonify({"success": True, "preview_url": preview_url if upload else None})
 
     @bp.route('/api/tournament/<tournament_id>/schedule/reload', methods=['POST'])
     @require_auth
@@ -434,10 +420,12 @@ def create_tournaments_blueprint(api_client, upload_folder: str, logger):
             court_usage = api_client.get_court_usage(tournament_id, dates)
 
             def save(conn):
-                conn.cursor().execute('''
+                cursor = conn.cursor()
+                cursor.execute('''
                     UPDATE tournament_schedule SET court_planner = ?, court_usage = ?, updated_at = CURRENT_TIMESTAMP
                     WHERE tournament_id = ?
-                ''', (json.dumps(court_planner or {}), json.dumps(court_usage or {}), tournament_id))
+                ''', (encode_blob(court_planner or {}), encode_blob(court_usage or {}), tournament_id))
+                record_changes(cursor, [tournament_topic(tournament_id, "schedule")])
             execute_with_retry(save)
 
             return jsonify({"success": True, "matches_count": len(court_usage) if isinstance(court_usage, list) else 0})
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Журнал изменений (таблица change_log) и лента /api/changes для экранов.
+Писатели (live-счёт, корты, AutoRefresh, окна отображения, composite-страницы)
+вызывают record_changes() в своей транзакции, поэтому запись журнала видна
+ровно тогда, когда закоммичены сами данные. seq — монотонный курсор ленты
+(AUTOINCREMENT: номера не переиспользуются после очистки журнала).
+
+Темы — пути через "/":
+    tournament/<tid>                         турнир целиком (загрузка, удаление)
+    tournament/<tid>/court/<court_id>        счёт и состав корта
+    tournament/<tid>/draw/<class_id>         сетки категории
+    tournament/<tid>/schedule                расписание (court planner / usage)
+    tournament/<tid>/matches                 матчи турнира
+    tournament/<tid>/composite/<type>/<slot> composite-страница
+    window/<type>/<slot>                     окно отображения (display_windows)
+    settings                                 общие настройки
+Подписка на тему включает вложенные (tournament/<tid>/court — все корты турнира),
+а изменение родительской темы (tournament/<tid>) получают все подписчики внутри неё.
+У записи может быть payload (например, счёт корта) — он отдаётся в ленте как есть.
+Ожидание изменений обслуживает шина воркера (event_bus.py).
+Изменение данных турнира (сам турнир, сетки, расписание, матчи) записывает seq журнала
+в tournaments.data_version — это версия турнира для кэшей (database.get_tournament_version).
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from .event_bus import event_bus
+from .metrics import change_log_writes
+
+# Строк журнала, которые остаются после очистки, и как часто чистить (записей процесса)
+CHANGE_LOG_KEEP = 20000
+PRUNE_EVERY = 1000
+# Строк журнала за одно чтение ленты
+READ_LIMIT = 500
+# Long-poll: максимальное ожидание; период опроса журнала, если шина не запущена (утилиты tools/)
+MAX_WAIT = 25.0
+POLL_INTERVAL = 0.5
+
+# Виды тем, изменение которых меняет версию данных турнира (счёт кортов и composite-страницы — нет)
+_VERSIONED_KINDS = ("draw", "schedule", "matches")
+
+_writes_lock = threading.Lock()
+_writes_since_prune = 0
+
+
+def tournament_topic(tournament_id, *parts) -> str:
+    """Тема турнира: tournament_topic(tid, "court", court_id) → tournament/<tid>/court/<court_id>"""
+    return "/".join(["tournament", str(tournament_id)] + [str(p) for p in parts])
+
+
+def window_topic(window_type: str, slot_number) -> str:
+    return f"window/{window_type}/{slot_number}"
+
+
+def parse_topics(value: Optional[str]) -> List[str]:
+    """Список тем из параметра запроса (через запятую); пустой список — все темы"""
+    return [t.strip().strip("/") for t in (value or "").split(",") if t.strip().strip("/")]
+
+
+def topic_matches(topic: str, subscriptions: List[str]) -> bool:
+    """Тема касается подписки: совпадает, вложена в неё или является её родителем"""
+    if not subscriptions:
+        return True
+    for sub in subscriptions:
+        if topic == sub or topic.startswith(sub + "/") or sub.startswith(topic + "/"):
+            return True
+    return False
+
+
+def _topic_kind(topic: str) -> str:
+    parts = topic.split("/")
+    if parts[0] == "tournament" and len(parts) > 2:
+        return parts[2]
+    return parts[0]
+
+
+def _versioned_tournament(topic: str) -> Optional[str]:
+    """id турнира, если тема меняет версию его данных"""
+    parts = topic.split("/")
+    if parts[0] != "tournament" or len(parts) < 2:
+        return None
+    if len(parts) == 2 or parts[2] in _VERSIONED_KINDS:
+        return parts[1]
+    return None
+
+
+def record_changes(cursor, topics: Iterable[str], payloads: Optional[Dict[str, Dict]] = None):
+    """Запись изменившихся тем в журнал в транзакции писателя (cursor — его курсор; payloads — по теме)"""
+    global _writes_since_prune
+    topics = list(dict.fromkeys(topics))
+    if not topics:
+        return
+
+    payloads = payloads or {}
+    pid = os.getpid()
+    cursor.executemany("INSERT INTO change_log (topic, payload, worker) VALUES (?, ?, ?)", [
+        (t, json.dumps(payloads[t], ensure_ascii=False) if t in payloads else None, pid) for t in topics
+    ])
+    for topic in topics:
+        change_log_writes.inc(_topic_kind(topic))
+
+    # Записи журнала этой транзакции — последние, MAX(seq) новее любой прежней версии
+    versioned = sorted({tid for tid in map(_versioned_tournament, topics) if tid})
+    if versioned:
+        cursor.execute(f"UPDATE tournaments SET data_version = (SELECT MAX(seq) FROM change_log) "
+                       f"WHERE id IN ({', '.join('?' * len(versioned))})", versioned)
+
+    with _writes_lock:
+        _writes_since_prune += len(topics)
+        prune = _writes_since_prune >= PRUNE_EVERY
+        if prune:
+            _writes_since_prune = 0
+    if prune:
+        cursor.execute("DELETE FROM change_log WHERE seq <= (SELECT MAX(seq) FROM change_log) - ?",
+                       (CHANGE_LOG_KEEP,))
+
+    # Шина этого воркера заберёт события сразу после commit
+    on_commit = getattr(cursor.connection, "on_commit", None)
+    if on_commit:
+        on_commit(event_bus.notify)
+
+
+def _result(cursor_pos: int, events: Iterable, topics: List[str], reset: bool = False) -> Dict:
+    """Ответ ленты из событий (seq, topic, payload): последняя версия каждой подходящей темы"""
+    latest: Dict[str, tuple] = {}
+    for seq, topic, payload in events:
+        if topic_matches(topic, topics):
+            latest.pop(topic, None)
+            latest[topic] = (seq, payload)
+    changes = []
+    for topic, (seq, payload) in latest.items():
+        change = {"topic": topic, "version": seq}
+        if payload is not None:
+            change["payload"] = payload
+        changes.append(change)
+    return {"cursor": cursor_pos, "changes": changes, "reset": reset}
+
+
+def read_changes(since: Optional[int], topics: List[str], limit: int = READ_LIMIT) -> Dict:
+    """
+    Изменения после курсора since по темам topics: {"cursor", "changes", "reset"}.
+    changes — [{"topic", "version"[, "payload"]}], по одной записи на тему (version — seq последнего изменения).
+    reset=True — курсор старше журнала (очищен) или новее его (другая БД): клиенту нужно
+    перечитать всё и продолжить с нового cursor. since=None — только текущий курсор.
+    """
+    from .database import execute_with_retry
+
+    def transaction(conn):
+        cursor = conn.cursor()
+        cursor.execute("SELECT MIN(seq), MAX(seq) FROM change_log")
+        oldest, latest = cursor.fetchone()
+        oldest, latest = oldest or 0, latest or 0
+        if since is None:
+            return latest, [], False
+        if since > latest or (oldest and since < oldest - 1):
+            return latest, [], True
+        cursor.execute("SELECT seq, topic, payload FROM change_log WHERE seq > ? ORDER BY seq LIMIT ?",
+                       (since, limit))
+        rows = cursor.fetchall()
+        return (rows[-1][0] if rows else since), rows, False
+
+    cursor_pos, rows, reset = execute_with_retry(transaction)
+    return _result(cursor_pos, ((seq, topic, json.loads(payload) if payload else None)
+                                for seq, topic, payload in rows), topics, reset)
+
+
+def wait_for_changes(since: Optional[int], topics: List[str], timeout: float) -> Dict:
+    """
+    Long-poll: ждёт до timeout секунд первого изменения по темам.
+    Первое чтение — из БД (проверка курсора и накопившиеся изменения), дальше — события
+    шины воркера; без запущенной шины журнал опрашивается раз в POLL_INTERVAL.
+    """
+    deadline = time.monotonic() + max(0.0, min(timeout, MAX_WAIT))
+    result = read_changes(since, topics)
+    while since is not None and not result["changes"] and not result["reset"]:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        cursor_pos = result["cursor"]
+        if not event_bus.running:
+            time.sleep(min(POLL_INTERVAL, remaining))
+            result = read_changes(cursor_pos, topics)
+            continue
+        if not event_bus.wait(cursor_pos, remaining):
+            break
+        events = event_bus.events_since(cursor_pos)
+        if events is None:
+            result = read_changes(cursor_pos, topics)
+        else:
+            result = _result(events[-1][0] if events else cursor_pos, events, topics)
+    return result
@@ -118,6 +118,7 @@ def save_composite_page(tournament_id: str, page_type: str, slot_number: int, da
     data должна содержать: name, background_settings, layers.
     Возвращает сохранённую запись.
     """
+    from .change_feed import record_changes, tournament_topic
     from .database import get_db_connection
     
     conn = get_db_connection()
@@ -144,6 +145,7 @@ def save_composite_page(tournament_id: str, page_type: str, slot_number: int, da
             INSERT INTO composite_pages (tournament_id, page_type, slot_number, name, background_settings, layers)
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (tournament_id, page_type, slot_number, name, background_settings, layers))
+    record_changes(cursor, [tournament_topic(tournament_id, "composite", page_type, slot_number)])
     
     conn.commit()
     conn.close()
@@ -223,28 +225,24 @@ def api_save_composite_page(tournament_id: str, page_type: str, slot_number: int
 def api_get_available_pages(tournament_id: str):
     """
     Список доступных сеток/таблиц турнира.
-    Обращается к RankedinAPI и возвращает словарь с двумя ключами:
+    Берёт типы из каталога турнира (xml_catalog) и возвращает словарь с двумя ключами:
       'round_robin'  — список круговых групп (тип draw_type == 'round_robin'),
       'elimination'  — список сеток плей-офф (тип draw_type == 'elimination').
     Каждый элемент содержит: id, name, url, class_id, draw_index.
     """
-    from .database import get_tournament_data
-    from .rankedin_api import RankedinAPI
+    from .xml_catalog import get_display_catalog
 
     try:
-        tournament_data = get_tournament_data(tournament_id)
-        if not tournament_data:
+        xml_types = get_display_catalog(tournament_id)
+        if xml_types is None:
             return jsonify({'error': 'Tournament not found'}), 404
 
-        api_client = RankedinAPI()
-        xml_types = api_client.get_xml_data_types(tournament_data)
-
         available = {
             'round_robin': [],
             'elimination': []
         }
 
-        for xml_type in xml_types:
+        for xml_type in xml_types.values():
             if xml_type.get('type') != 'tournament_table':
                 continue
 
@@ -300,13 +298,12 @@ def composite_bg_round(slot_number: int, tournament_id: str):
     Передаёт в шаблон: tournament_id, tournament_name, name_class.
     Возвращает 404, если номер слота выходит за пределы 1–4.
     """
-    from .database import get_tournament_data
+    from .database import get_tournament_name
     
     if slot_number < 1 or slot_number > 4:
         return '', 404
     
-    tournament_data = get_tournament_data(tournament_id)
-    tournament_name = tournament_data.get('metadata', {}).get('name', 'Турнир') if tournament_data else 'Турнир'
+    tournament_name = get_tournament_name(tournament_id) or 'Турнир'
     name_class = _get_name_class(tournament_name)
     
     return render_template('composite_bg_round.html',
@@ -324,13 +321,12 @@ def composite_bg_elimination(slot_number: int, tournament_id: str):
     Передаёт в шаблон: tournament_id, tournament_name, name_class.
     Возвращает 404, если номер слота выходит за пределы 1–4.
     """
-    from .database import get_tournament_data
+    from .database import get_tournament_name
     
     if slot_number < 1 or slot_number > 4:
         return '404', 404
     
-    tournament_data = get_tournament_data(tournament_id)
-    tournament_name = tournament_data.get('metadata', {}).get('name', 'Турнир') if tournament_data else 'Турнир'
+    tournament_name = get_tournament_name(tournament_id) or 'Турнир'
     name_class = _get_name_class(tournament_name)
     
     return render_template('composite_bg_elimination.html',
@@ -347,7 +343,7 @@ def composite_page_view(tournament_id: str, page_type: str, slot_number: int):
     page_type: 'round' (групповой этап) или 'elimination' (плей-офф).
     slot_number: 1–4. Возвращает 404 при недопустимых значениях.
     """
-    from .database import get_tournament_data
+    from .database import get_tournament_name
     
     if page_type not in ('round', 'elimination'):
         return '---', 404
@@ -355,8 +351,7 @@ def composite_page_view(tournament_id: str, page_type: str, slot_number: int):
         return '---', 404
     
     page = get_composite_page(tournament_id, page_type, slot_number)
-    tournament_data = get_tournament_data(tournament_id)
-    tournament_name = tournament_data.get('metadata', {}).get('name', 'Турнир') if tournament_data else 'Турнир'
+    tournament_name = get_tournament_name(tournament_id) or 'Турнир'
     
     return render_template('composite_page.html',
                           tournament_id=tournament_id,
@@ -374,7 +369,7 @@ def composite_editor_view(tournament_id: str, page_type: str, slot_number: int):
     передавая текущее состояние страницы из БД и имя турнира.
     page_type: 'round' или 'elimination'; slot_number: 1–4.
     """
-    from .database import get_tournament_data
+    from .database import get_tournament_name
 
     if not _is_authenticated():
         return redirect(url_for('index'))
@@ -385,8 +380,7 @@ def composite_editor_view(tournament_id: str, page_type: str, slot_number: int):
         return 'Недопустимый номер слота', 404
 
     page = get_composite_page(tournament_id, page_type, slot_number)
-    tournament_data = get_tournament_data(tournament_id)
-    tournament_name = tournament_data.get('metadata', {}).get('name', 'Турнир') if tournament_data else 'Турнир'
+    tournament_name = get_tournament_name(tournament_id) or 'Турнир'
 
     return render_template(
         'composite_editor.html',
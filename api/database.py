@@ -7,26 +7,283 @@ import json
 import time
 import logging
 import os
-from typing import Dict, List, Optional, Any, Callable
+import zlib
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Any, Callable, Tuple, Union
 from werkzeug.security import generate_password_hash
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from .change_feed import record_changes, tournament_topic
+from .metrics import db_lock_retries, live_score_writes
+
 logger = logging.getLogger(__name__)
 
 DATABASE_PATH = 'data/tournaments.db'
 
 
+# Кодеки больших JSON-колонок (draw_data, matches_data, court_planner, court_usage).
+# Закодированное значение — BLOB: BLOB_MARKER, байт кодека, данные. JSON не может начинаться
+# с нулевого байта, поэтому строки старого формата (текст json.dumps) читаются как раньше.
+BLOB_MARKER = b"\x00"
+DEFAULT_BLOB_CODEC = 'zlib'
+ZLIB_LEVEL = 1
+ZSTD_LEVEL = 3
+
+
+class BlobCodec:
+    """
+    Кодек колонки: encode(obj) → bytes, decode(bytes) → obj; tag — байт формата после BLOB_MARKER.
+    Кодеки поверх JSON-текста задают unpack(bytes) → JSON (utf-8) — по нему работает blob_json.
+    """
+
+    def __init__(self, name: str, tag: bytes, encode: Callable[[Any], bytes],
+                 decode: Optional[Callable[[bytes], Any]] = None, unpack: Optional[Callable[[bytes], bytes]] = None):
+        self.name = name
+        self.tag = tag
+        self.encode = encode
+        self.unpack = unpack
+        self.decode = decode or (lambda data: json.loads(unpack(data)))
+
+    def json_text(self, data: bytes) -> str:
+        if self.unpack:
+            return self.unpack(data).decode('utf-8')
+        return json.dumps(self.decode(data), ensure_ascii=False)
+
+
+def _compact_json(value: Any) -> bytes:
+    # ensure_ascii (по умолчанию) — самый быстрый путь json.dumps; после сжатия \uXXXX почти ничего не стоят
+    return json.dumps(value, separators=(',', ':')).encode('ascii')
+
+
+BLOB_CODECS: Dict[str, BlobCodec] = {}
+_CODECS_BY_TAG: Dict[bytes, BlobCodec] = {}
+
+
+def register_blob_codec(codec: BlobCodec):
+    """Регистрация кодека; tag не меняется, пока в БД есть записи этого формата"""
+    BLOB_CODECS[codec.name] = codec
+    _CODECS_BY_TAG[codec.tag] = codec
+
+
+register_blob_codec(BlobCodec('json', b'j', _compact_json, unpack=bytes))
+register_blob_codec(BlobCodec('zlib', b'z', lambda value: zlib.compress(_compact_json(value), ZLIB_LEVEL),
+                              unpack=zlib.decompress))
+if zstandard is not None:
+    register_blob_codec(BlobCodec(
+        'zstd', b's', lambda value: zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(_compact_json(value)),
+        unpack=lambda data: zstandard.ZstdDecompressor().decompress(data)))
+if msgpack is not None:
+    register_blob_codec(BlobCodec(
+        'msgpack', b'm', lambda value: zlib.compress(msgpack.packb(value), ZLIB_LEVEL),
+        decode=lambda data: msgpack.unpackb(zlib.decompress(data), strict_map_key=False)))
+
+_blob_codec = BLOB_CODECS[DEFAULT_BLOB_CODEC]
+
+
+def configure_blob_codec(name: str):
+    """Кодек для новых записей (Config.BLOB_CODEC); недоступный кодек — DEFAULT_BLOB_CODEC"""
+    global _blob_codec
+    codec = BLOB_CODECS.get(name)
+    if codec is None:
+        logger.warning(f"Кодек JSON-колонок {name!r} недоступен, используется {DEFAULT_BLOB_CODEC}")
+        codec = BLOB_CODECS[DEFAULT_BLOB_CODEC]
+    _blob_codec = codec
+
+
+def encode_blob(value: Any) -> bytes:
+    """Значение большой JSON-колонки для записи в БД текущим кодеком"""
+    return BLOB_MARKER + _blob_codec.tag + _blob_codec.encode(value)
+
+
+def _split_blob(raw: Union[str, bytes, None]) -> Tuple[Optional[BlobCodec], Union[str, bytes, None]]:
+    """(кодек, данные); кодек None — значение старого формата (JSON-текст)"""
+    if isinstance(raw, bytes) and raw[:1] == BLOB_MARKER:
+        codec = _CODECS_BY_TAG.get(raw[1:2])
+        if codec is None:
+            raise ValueError(f"неизвестный формат JSON-колонки: {raw[1:2]!r}")
+        return codec, raw[2:]
+    return None, raw
+
+
+def decode_blob(raw: Union[str, bytes, None], default: Any = None) -> Any:
+    """Чтение большой JSON-колонки любого формата (ошибка или пусто — default)"""
+    if not raw:
+        return default if default is not None else {}
+    try:
+        codec, data = _split_blob(raw)
+        return codec.decode(data) if codec else json.loads(data)
+    except (json.JSONDecodeError, TypeError):
+        return default if default is not None else {}
+    except Exception as e:
+        logger.error(f"Ошибка декодирования JSON-колонки: {e}")
+        return default if default is not None else {}
+
+
+def blob_json(raw: Union[str, bytes, None]) -> Optional[str]:
+    """SQL-функция blob_json(колонка): JSON-текст для json_extract / json_each в запросах"""
+    if raw is None:
+        return None
+    codec, data = _split_blob(raw)
+    if codec is None:
+        return data if isinstance(data, str) else data.decode('utf-8')
+    return codec.json_text(data)
+
+
+class TrackedCursor(sqlite3.Cursor):
+    """Курсор, учитывающий число запросов и время выполнения в соединении"""
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.connection.track_query(start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.connection.track_query(start)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self.connection.track_fetch(start)
+
+    def fetchall(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self.connection.track_fetch(start)
+
+
+class TrackedConnection(sqlite3.Connection):
+    """
+    Соединение со статистикой: query_count и query_time (секунды в SQLite).
+    Общее соединение запроса (shared) не закрывается вызовом close() —
+    его закрывает end_request_scope() по окончании запроса.
+    on_commit() — действие после успешного commit (откат транзакции его отменяет).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.shared = False
+        self.query_count = 0
+        self.query_time = 0.0
+        self._on_commit: List[Callable[[], None]] = []
+
+    def on_commit(self, callback: Callable[[], None]):
+        self._on_commit.append(callback)
+
+    def commit(self):
+        super().commit()
+        callbacks, self._on_commit = self._on_commit, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Ошибка обработчика после commit: {e}")
+
+    def rollback(self):
+        self._on_commit = []
+        super().rollback()
+
+    def track_query(self, start: float):
+        self.query_count += 1
+        self.query_time += time.perf_counter() - start
+
+    def track_fetch(self, start: float):
+        self.query_time += time.perf_counter() - start
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or TrackedCursor)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def close(self):
+        if not self.shared:
+            super().close()
+
+    def close_shared(self):
+        """Закрытие общего соединения запроса (незавершённая транзакция откатывается)"""
+        try:
+            self.rollback()
+        finally:
+            super().close()
+
+
+class RequestDBScope:
+    """Общее соединение одного HTTP-запроса; открывается при первом обращении к БД"""
+
+    def __init__(self):
+        self.conn: Optional[TrackedConnection] = None
+
+    @property
+    def query_count(self) -> int:
+        return self.conn.query_count if self.conn else 0
+
+    @property
+    def query_time(self) -> float:
+        return self.conn.query_time if self.conn else 0.0
+
+
+_request_scope: ContextVar[Optional[RequestDBScope]] = ContextVar('request_db_scope', default=None)
+
+
+def begin_request_scope() -> RequestDBScope:
+    """Начало запроса: все get_db_connection() в этом потоке вернут одно соединение"""
+    scope = RequestDBScope()
+    _request_scope.set(scope)
+    return scope
+
+
+def end_request_scope():
+    """Конец запроса: закрывает общее соединение"""
+    scope = _request_scope.get()
+    _request_scope.set(None)
+    if scope and scope.conn:
+        scope.conn.close_shared()
+
+
 def get_db_connection(max_retries: int = 2, base_delay: float = 0.05) -> sqlite3.Connection:
-    """Получение соединения с базой данных с retry"""
+    """Получение соединения с базой данных с retry (внутри HTTP-запроса — общее соединение запроса)"""
+    scope = _request_scope.get()
+    if scope and scope.conn:
+        return scope.conn
+
     for attempt in range(max_retries):
         try:
-            conn = sqlite3.connect(DATABASE_PATH, timeout=5.0)
+            conn = sqlite3.connect(DATABASE_PATH, timeout=5.0, factory=TrackedConnection)
             conn.row_factory = sqlite3.Row
+            conn.create_function("blob_json", 1, blob_json, deterministic=True)
             conn.execute("PRAGMA busy_timeout = 5000")
             conn.execute("PRAGMA journal_mode = WAL")
             conn.execute("PRAGMA synchronous = NORMAL")
+            conn.query_count, conn.query_time = 0, 0.0
+            if scope:
+                conn.shared = True
+                scope.conn = conn
             return conn
         except sqlite3.OperationalError as e:
             if "database is locked" in str(e).lower() and attempt < max_retries - 1:
+                db_lock_retries.inc()
                 delay = base_delay * (2 ** attempt)
                 logger.warning(f"БД заблокирована, попытка {attempt + 1}/{max_retries}, ждем {delay:.2f}с")
                 time.sleep(delay)
@@ -48,6 +305,7 @@ def execute_with_retry(transaction_func: Callable, max_retries: int = 2) -> Any:
             if conn:
                 conn.rollback()
             if "database is locked" in str(e).lower() and attempt < max_retries - 1:
+                db_lock_retries.inc()
                 delay = 0.1 * (2 ** attempt)
                 logger.warning(f"Транзакция не выполнена, попытка {attempt + 1}/{max_retries}")
                 time.sleep(delay)
@@ -64,143 +322,213 @@ def execute_with_retry(transaction_func: Callable, max_retries: int = 2) -> Any:
                 conn.close()
 
 
-def init_database():
-    """Инициализация базы данных"""
+# Схема первой версии: таблицы и индексы (CREATE ... IF NOT EXISTS — годится и для БД,
+# созданных до учёта миграций)
+_BASE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS tournaments (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        metadata TEXT,
+        classes TEXT,
+        courts TEXT,
+        dates TEXT,
+        draw_data TEXT,
+        status TEXT DEFAULT 'active',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS courts_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tournament_id TEXT NOT NULL,
+        court_id TEXT NOT NULL,
+        court_name TEXT,
+        event_state TEXT,
+        current_match_state TEXT,
+        class_name TEXT,
+        first_participant_score INTEGER DEFAULT 0,
+        second_participant_score INTEGER DEFAULT 0,
+        detailed_result TEXT,
+        first_participant TEXT,
+        second_participant TEXT,
+        is_tiebreak INTEGER DEFAULT 0,
+        is_super_tiebreak INTEGER DEFAULT 0,
+        is_first_participant_serving INTEGER,
+        is_serving_left INTEGER,
+        match_id TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (tournament_id) REFERENCES tournaments(id),
+        UNIQUE(tournament_id, court_id)
+    );
+
+    CREATE TABLE IF NOT EXISTS xml_files (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tournament_id TEXT NOT NULL,
+        xml_type TEXT NOT NULL,
+        filename TEXT NOT NULL,
+        name TEXT NOT NULL,
+        url TEXT NOT NULL,
+        size TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (tournament_id) REFERENCES tournaments(id)
+    );
+
+    CREATE TABLE IF NOT EXISTS tournament_schedule (
+        tournament_id TEXT PRIMARY KEY,
+        court_planner TEXT,
+        court_usage TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (tournament_id) REFERENCES tournaments(id)
+    );
+
+    CREATE TABLE IF NOT EXISTS tournament_matches (
+        tournament_id TEXT PRIMARY KEY,
+        matches_data TEXT,
+        are_matches_published INTEGER DEFAULT 0,
+        is_schedule_published INTEGER DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (tournament_id) REFERENCES tournaments(id)
+    );
+
+    CREATE TABLE IF NOT EXISTS settings (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        role TEXT DEFAULT 'admin',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_login TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS participants (
+        id INTEGER PRIMARY KEY,
+        rankedin_id TEXT UNIQUE,
+        first_name TEXT NOT NULL,
+        middle_name TEXT,
+        last_name TEXT NOT NULL,
+        country_code TEXT NOT NULL,
+        photo_url TEXT,
+        info TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS participants_tournaments (
+        participant_id INTEGER NOT NULL,
+        tournament_id TEXT NOT NULL,
+        PRIMARY KEY (participant_id, tournament_id),
+        FOREIGN KEY (participant_id) REFERENCES participants(id) ON DELETE CASCADE,
+        FOREIGN KEY (tournament_id) REFERENCES tournaments(id) ON DELETE CASCADE
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_courts_tournament ON courts_data(tournament_id);
+    CREATE INDEX IF NOT EXISTS idx_courts_updated ON courts_data(updated_at);
+    CREATE INDEX IF NOT EXISTS idx_xml_tournament ON xml_files(tournament_id);
+    CREATE INDEX IF NOT EXISTS idx_tournaments_status ON tournaments(status);
+    CREATE INDEX IF NOT EXISTS idx_tournaments_updated ON tournaments(updated_at);
+
+    CREATE TABLE IF NOT EXISTS display_windows (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        type TEXT NOT NULL CHECK(type IN ('pool', 'court')),
+        slot_number INTEGER,
+        name TEXT,
+        tournament_id TEXT,
+        court_id TEXT,
+        mode TEXT DEFAULT 'auto' CHECK(mode IN ('auto', 'manual')),
+        manual_page TEXT,
+        settings TEXT,
+        is_active INTEGER DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_display_type_slot ON display_windows(type, slot_number);
+
+    CREATE TABLE IF NOT EXISTS composite_pages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tournament_id TEXT NOT NULL,
+        page_type TEXT NOT NULL CHECK(page_type IN ('round', 'elimination')),
+        slot_number INTEGER NOT NULL CHECK(slot_number BETWEEN 1 AND 4),
+        name TEXT,
+        background_settings TEXT,
+        layers TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(tournament_id, page_type, slot_number)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_composite_tournament ON composite_pages(tournament_id);
+
+    CREATE TABLE IF NOT EXISTS court_settings (
+        tournament_id TEXT NOT NULL,
+        court_id TEXT NOT NULL,
+        has_referee INTEGER DEFAULT 1,
+        PRIMARY KEY (tournament_id, court_id),
+        FOREIGN KEY (tournament_id) REFERENCES tournaments(id)
+    );
+'''
+
+
+def _split_statements(script: str) -> List[str]:
+    """SQL-скрипт по одному оператору: executescript неявно коммитит, а миграции идут в одной транзакции"""
+    statements, current = [], ""
+    for line in script.splitlines(keepends=True):
+        current += line
+        if sqlite3.complete_statement(current):
+            if current.strip():
+                statements.append(current.strip())
+            current = ""
+    return statements
+
+
+def _migration_baseline(cursor: sqlite3.Cursor):
+    """Базовая схема и миграции, накопленные до учёта версий (проверки колонок)"""
+    for statement in _split_statements(_BASE_SCHEMA):
+        cursor.execute(statement)
+
+    # Колонка current_match_state
     try:
-        conn = sqlite3.connect(DATABASE_PATH, timeout=30.0)
-        cursor = conn.cursor()
-
-        cursor.execute("PRAGMA journal_mode = WAL")
-        cursor.execute("PRAGMA synchronous = NORMAL")
-        cursor.execute("PRAGMA busy_timeout = 30000")
-        cursor.execute("PRAGMA temp_store = MEMORY")
-        cursor.execute("PRAGMA cache_size = -64000")
-        cursor.execute("PRAGMA foreign_keys = ON")
+        cursor.execute("SELECT current_match_state FROM courts_data LIMIT 1")
+    except sqlite3.OperationalError:
+        logger.info("Миграция: добавляем колонку current_match_state в courts_data")
+        cursor.execute("ALTER TABLE courts_data ADD COLUMN current_match_state TEXT")
 
-        cursor.executescript('''
-            CREATE TABLE IF NOT EXISTS tournaments (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                metadata TEXT,
-                classes TEXT,
-                courts TEXT,
-                dates TEXT,
-                draw_data TEXT,
-                status TEXT DEFAULT 'active',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-            
-            CREATE TABLE IF NOT EXISTS courts_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                tournament_id TEXT NOT NULL,
-                court_id TEXT NOT NULL,
-                court_name TEXT,
-                event_state TEXT,
-                current_match_state TEXT,
-                class_name TEXT,
-                first_participant_score INTEGER DEFAULT 0,
-                second_participant_score INTEGER DEFAULT 0,
-                detailed_result TEXT,
-                first_participant TEXT,
-                second_participant TEXT,
-                is_tiebreak INTEGER DEFAULT 0,
-                is_super_tiebreak INTEGER DEFAULT 0,
-                is_first_participant_serving INTEGER,
-                is_serving_left INTEGER,
-                match_id TEXT,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (tournament_id) REFERENCES tournaments(id),
-                UNIQUE(tournament_id, court_id)
-            );
-            
-            CREATE TABLE IF NOT EXISTS xml_files (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                tournament_id TEXT NOT NULL,
-                xml_type TEXT NOT NULL,
-                filename TEXT NOT NULL,
-                name TEXT NOT NULL,
-                url TEXT NOT NULL,
-                size TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (tournament_id) REFERENCES tournaments(id)
-            );
-            
-            CREATE TABLE IF NOT EXISTS tournament_schedule (
-                tournament_id TEXT PRIMARY KEY,
-                court_planner TEXT,
-                court_usage TEXT,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (tournament_id) REFERENCES tournaments(id)
-            );
-            
-            CREATE TABLE IF NOT EXISTS tournament_matches (
-                tournament_id TEXT PRIMARY KEY,
-                matches_data TEXT,
-                are_matches_published INTEGER DEFAULT 0,
-                is_schedule_published INTEGER DEFAULT 0,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (tournament_id) REFERENCES tournaments(id)
-            );
-            
-            CREATE TABLE IF NOT EXISTS settings (
-                key TEXT PRIMARY KEY,
-                value TEXT NOT NULL,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
+    # Колонки для serve (подача)
+    for col in ['is_tiebreak', 'is_super_tiebreak', 'is_first_participant_serving', 'is_serving_left', 'match_id']:
+        try:
+            cursor.execute(f"SELECT {col} FROM courts_data LIMIT 1")
+        except sqlite3.OperationalError:
+            col_type = 'INTEGER' if col.startswith('is_') else 'TEXT'
+            logger.info(f"Миграция: добавляем колонку {col} в courts_data")
+            cursor.execute(f"ALTER TABLE courts_data ADD COLUMN {col} {col_type}")
 
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                role TEXT DEFAULT 'admin',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_login TIMESTAMP
-            );
-            
-            CREATE TABLE IF NOT EXISTS participants (
-                id INTEGER PRIMARY KEY,
-                rankedin_id TEXT UNIQUE,
-                first_name TEXT NOT NULL,
-                middle_name TEXT,
-                last_name TEXT NOT NULL,
-                country_code TEXT NOT NULL,
-                photo_url TEXT,
-                info TEXT
-            );
-            
-            CREATE TABLE IF NOT EXISTS participants_tournaments (
-                participant_id INTEGER NOT NULL,
-                tournament_id TEXT NOT NULL,
-                PRIMARY KEY (participant_id, tournament_id),
-                FOREIGN KEY (participant_id) REFERENCES participants(id) ON DELETE CASCADE,
-                FOREIGN KEY (tournament_id) REFERENCES tournaments(id) ON DELETE CASCADE
-            );
-            
-            CREATE INDEX IF NOT EXISTS idx_courts_tournament ON courts_data(tournament_id);
-            CREATE INDEX IF NOT EXISTS idx_courts_updated ON courts_data(updated_at);
-            CREATE INDEX IF NOT EXISTS idx_xml_tournament ON xml_files(tournament_id);
-            CREATE INDEX IF NOT EXISTS idx_tournaments_status ON tournaments(status);
-            CREATE INDEX IF NOT EXISTS idx_tournaments_updated ON tournaments(updated_at);
-            
-            CREATE TABLE IF NOT EXISTS display_windows (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                type TEXT NOT NULL CHECK(type IN ('pool', 'court')),
-                slot_number INTEGER,
-                name TEXT,
-                tournament_id TEXT,
-                court_id TEXT,
-                mode TEXT DEFAULT 'auto' CHECK(mode IN ('auto', 'manual')),
-                manual_page TEXT,
-                settings TEXT,
-                is_active INTEGER DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-            
-            CREATE INDEX IF NOT EXISTS idx_display_type_slot ON display_windows(type, slot_number);
-            
-            CREATE TABLE IF NOT EXISTS composite_pages (
+    # Хэш мастер-фото участника (имена производных файлов)
+    try:
+        cursor.execute("SELECT photo_hash FROM participants LIMIT 1")
+    except sqlite3.OperationalError:
+        logger.info("Миграция: добавляем колонку photo_hash в participants")
+        cursor.execute("ALTER TABLE participants ADD COLUMN photo_hash TEXT")
+
+    # Окна пула (до 6)
+    for i in range(1, 7):
+        cursor.execute('SELECT COUNT(*) FROM display_windows WHERE type = "pool" AND slot_number = ?', (i,))
+        if cursor.fetchone()[0] == 0:
+            cursor.execute('''
+                INSERT INTO display_windows (type, slot_number, name, settings)
+                VALUES ('pool', ?, ?, '{"items": [], "current_index": 0}')
+            ''', (i, f'Пул {i}'))
+
+    # composite_pages: CHECK constraint с 3 до 4 слотов
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='composite_pages'")
+    row = cursor.fetchone()
+    if row and 'BETWEEN 1 AND 3' in (row[0] or ''):
+        logger.info("Миграция: расширяем composite_pages до 4 слотов")
+        cursor.execute('ALTER TABLE composite_pages RENAME TO composite_pages_old')
+        cursor.execute('''
+            CREATE TABLE composite_pages (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 tournament_id TEXT NOT NULL,
                 page_type TEXT NOT NULL CHECK(page_type IN ('round', 'elimination')),
@@ -211,134 +539,191 @@ def init_database():
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 UNIQUE(tournament_id, page_type, slot_number)
-            );
-            
-            CREATE INDEX IF NOT EXISTS idx_composite_tournament ON composite_pages(tournament_id);
-
-            CREATE TABLE IF NOT EXISTS court_settings (
-                tournament_id TEXT NOT NULL,
-                court_id TEXT NOT NULL,
-                has_referee INTEGER DEFAULT 1,
-                PRIMARY KEY (tournament_id, court_id),
-                FOREIGN KEY (tournament_id) REFERENCES tournaments(id)
-            );
+            )
         ''')
-        
-        # Миграция: добавляем колонку current_match_state если её нет
-        try:
-            cursor.execute("SELECT current_match_state FROM courts_data LIMIT 1")
-        except sqlite3.OperationalError:
-            logger.info("Миграция: добавляем колонку current_match_state в courts_data")
-            cursor.execute("ALTER TABLE courts_data ADD COLUMN current_match_state TEXT")
-        
-        # Миграция: добавляем колонки для serve (подача)
-        for col in ['is_tiebreak', 'is_super_tiebreak', 'is_first_participant_serving', 'is_serving_left', 'match_id']:
-            try:
-                cursor.execute(f"SELECT {col} FROM courts_data LIMIT 1")
-            except sqlite3.OperationalError:
-                col_type = 'INTEGER' if col.startswith('is_') else 'TEXT'
-                logger.info(f"Миграция: добавляем колонку {col} в courts_data")
-                cursor.execute(f"ALTER TABLE courts_data ADD COLUMN {col} {col_type}")
-        
-        # Создаём окна пула (до 6) если их нет
-        for i in range(1, 7):
-            cursor.execute('SELECT COUNT(*) FROM display_windows WHERE type = "pool" AND slot_number = ?', (i,))
-            if cursor.fetchone()[0] == 0:
-                cursor.execute('''
-                    INSERT INTO display_windows (type, slot_number, name, settings)
-                    VALUES ('pool', ?, ?, '{"items": [], "current_index": 0}')
-                ''', (i, f'Пул {i}'))
-        
-        # Миграция: расширяем composite_pages CHECK constraint с 3 до 4 слотов
-        cursor.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='composite_pages'")
-        row = cursor.fetchone()
-        if row and 'BETWEEN 1 AND 3' in (row[0] or ''):
-            logger.info("Миграция: расширяем composite_pages до 4 слотов")
-            cursor.execute('ALTER TABLE composite_pages RENAME TO composite_pages_old')
-            cursor.execute('''
-                CREATE TABLE composite_pages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    tournament_id TEXT NOT NULL,
-                    page_type TEXT NOT NULL CHECK(page_type IN ('round', 'elimination')),
-                    slot_number INTEGER NOT NULL CHECK(slot_number BETWEEN 1 AND 4),
-                    name TEXT,
-                    background_settings TEXT,
-                    layers TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(tournament_id, page_type, slot_number)
-                )
-            ''')
-            cursor.execute('''
-                INSERT INTO composite_pages (id, tournament_id, page_type, slot_number, name,
-                    background_settings, layers, created_at, updated_at)
-                SELECT id, tournament_id, page_type, slot_number, name,
-                    background_settings, layers, created_at, updated_at
-                FROM composite_pages_old
-            ''')
-            cursor.execute('DROP TABLE composite_pages_old')
+        cursor.execute('''
+            INSERT INTO composite_pages (id, tournament_id, page_type, slot_number, name,
+                background_settings, layers, created_at, updated_at)
+            SELECT id, tournament_id, page_type, slot_number, name,
+                background_settings, layers, created_at, updated_at
+            FROM composite_pages_old
+        ''')
+        cursor.execute('DROP TABLE composite_pages_old')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_composite_tournament
+            ON composite_pages(tournament_id)
+        ''')
+
+    # Окна кортов по умолчанию
+    cursor.execute('SELECT COUNT(*) FROM display_windows WHERE type = "court"')
+    if cursor.fetchone()[0] == 0:
+        for i in range(1, 11):
             cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_composite_tournament 
-                ON composite_pages(tournament_id)
-            ''')
-
-        # Optional secure bootstrap for the first admin account.
-        cursor.execute('SELECT COUNT(*) FROM users')
-        users_count = cursor.fetchone()[0]
-        if users_count == 0:
-            bootstrap_username = os.environ.get('BOOTSTRAP_ADMIN_USERNAME')
-            bootstrap_password = os.environ.get('BOOTSTRAP_ADMIN_PASSWORD')
-            if bootstrap_username and bootstrap_password:
-                cursor.execute(
-                    'INSERT INTO users (username, password, role) VALUES (?, ?, ?)',
-                    (bootstrap_username, generate_password_hash(bootstrap_password), 'admin')
-                )
-                logger.info("Bootstrap admin user created from environment")
-            else:
-                logger.warning(
-                    "No users found. Set BOOTSTRAP_ADMIN_USERNAME and BOOTSTRAP_ADMIN_PASSWORD "
-                    "to create initial admin user."
-                )
-
-        # One-time migration for legacy plaintext user passwords.
-        cursor.execute('SELECT id, password FROM users')
-        users = cursor.fetchall()
-        migrated_count = 0
-        for user_id, password_value in users:
-            if not password_value:
-                continue
-            if isinstance(password_value, str) and password_value.startswith(('pbkdf2:', 'scrypt:', 'argon2:')):
-                continue
-            cursor.execute(
-                'UPDATE users SET password = ? WHERE id = ?',
-                (generate_password_hash(str(password_value)), user_id)
+                INSERT INTO display_windows (type, slot_number, name, mode)
+                VALUES ('court', ?, ?, 'auto')
+            ''', (i, f'Корт {i}'))
+
+
+def _migration_hash_passwords(cursor: sqlite3.Cursor):
+    """Хэширование паролей, сохранённых открытым текстом"""
+    cursor.execute('SELECT id, password FROM users')
+    migrated_count = 0
+    for user_id, password_value in cursor.fetchall():
+        if not password_value:
+            continue
+        if isinstance(password_value, str) and password_value.startswith(('pbkdf2:', 'scrypt:', 'argon2:')):
+            continue
+        cursor.execute(
+            'UPDATE users SET password = ? WHERE id = ?',
+            (generate_password_hash(str(password_value)), user_id)
+        )
+        migrated_count += 1
+
+    if migrated_count:
+        logger.info(f"Password migration completed: {migrated_count} user(s) updated")
+
+
+def _migration_change_log(cursor: sqlite3.Cursor):
+    """Журнал изменений для ленты /api/changes (api/change_feed.py)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            topic TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _migration_change_log_payload(cursor: sqlite3.Cursor):
+    """Данные события (payload) и pid воркера-писателя для шины событий (api/event_bus.py)"""
+    cursor.execute("ALTER TABLE change_log ADD COLUMN payload TEXT")
+    cursor.execute("ALTER TABLE change_log ADD COLUMN worker INTEGER")
+
+
+def _migration_maintenance_runs(cursor: sqlite3.Cursor):
+    """Последние запуски задач обслуживания SQLite (api/db_maintenance.py), общие для всех воркеров"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS maintenance_runs (
+            task TEXT PRIMARY KEY,
+            started_at REAL,
+            finished_at REAL,
+            duration_ms REAL,
+            status TEXT,
+            details TEXT,
+            worker INTEGER
+        )
+    ''')
+
+
+def _migration_tournament_data_version(cursor: sqlite3.Cursor):
+    """Версия данных турнира — seq журнала изменений его последней записи (get_tournament_version)"""
+    cursor.execute("ALTER TABLE tournaments ADD COLUMN data_version INTEGER DEFAULT 0")
+
+
+# Версии схемы: (номер, имя, функция). Новые миграции — только в конец списка
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Cursor], None]]] = [
+    (1, "baseline", _migration_baseline),
+    (2, "hash_legacy_passwords", _migration_hash_passwords),
+    (3, "change_log", _migration_change_log),
+    (4, "change_log_payload", _migration_change_log_payload),
+    (5, "maintenance_runs", _migration_maintenance_runs),
+    (6, "tournament_data_version", _migration_tournament_data_version),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def _schema_version(cursor: sqlite3.Cursor) -> int:
+    """Последняя применённая версия схемы (0 — учёта миграций ещё нет)"""
+    try:
+        cursor.execute("SELECT MAX(version) FROM schema_migrations")
+    except sqlite3.OperationalError:
+        return 0
+    return cursor.fetchone()[0] or 0
+
+
+def _apply_migrations(cursor: sqlite3.Cursor) -> List[int]:
+    """
+    Применение недостающих миграций в одной транзакции. BEGIN IMMEDIATE сериализует
+    воркеры gunicorn, стартующие одновременно: версия перечитывается под блокировкой.
+    """
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-            migrated_count += 1
+        ''')
+        current = _schema_version(cursor)
+        applied = []
+        for version, name, migrate in MIGRATIONS:
+            if version <= current:
+                continue
+            logger.info(f"Миграция схемы {version}: {name}")
+            migrate(cursor)
+            cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (?, ?)", (version, name))
+            applied.append(version)
+        cursor.execute("COMMIT")
+        return applied
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
 
-        if migrated_count:
-            logger.info(f"Password migration completed: {migrated_count} user(s) updated")
-        
-        cursor.execute('SELECT COUNT(*) FROM display_windows WHERE type = "court"')
-        if cursor.fetchone()[0] == 0:
-            for i in range(1, 11):
-                cursor.execute('''
-                    INSERT INTO display_windows (type, slot_number, name, mode)
-                    VALUES ('court', ?, ?, 'auto')
-                ''', (i, f'Корт {i}'))
 
-        conn.commit()
-        conn.close()
-        logger.info("База данных инициализирована")
+def _bootstrap_admin(cursor: sqlite3.Cursor):
+    """Optional secure bootstrap for the first admin account."""
+    cursor.execute('SELECT COUNT(*) FROM users')
+    if cursor.fetchone()[0]:
+        return
+    bootstrap_username = os.environ.get('BOOTSTRAP_ADMIN_USERNAME')
+    bootstrap_password = os.environ.get('BOOTSTRAP_ADMIN_PASSWORD')
+    if bootstrap_username and bootstrap_password:
+        cursor.execute(
+            'INSERT INTO users (username, password, role) VALUES (?, ?, ?)',
+            (bootstrap_username, generate_password_hash(bootstrap_password), 'admin')
+        )
+        logger.info("Bootstrap admin user created from environment")
+    else:
+        logger.warning(
+            "No users found. Set BOOTSTRAP_ADMIN_USERNAME and BOOTSTRAP_ADMIN_PASSWORD "
+            "to create initial admin user."
+        )
 
-        # Проверка WAL
-        conn = sqlite3.connect(DATABASE_PATH)
+
+def init_database():
+    """
+    Инициализация базы данных. DDL выполняется только если версия схемы в
+    schema_migrations меньше SCHEMA_VERSION; обычный старт воркера — PRAGMA и два SELECT.
+    """
+    started = time.perf_counter()
+    try:
+        conn = sqlite3.connect(DATABASE_PATH, timeout=30.0, isolation_level=None)
         cursor = conn.cursor()
-        cursor.execute("PRAGMA journal_mode")
+
+        cursor.execute("PRAGMA journal_mode = WAL")
         journal_mode = cursor.fetchone()[0]
+        cursor.execute("PRAGMA synchronous = NORMAL")
+        cursor.execute("PRAGMA busy_timeout = 30000")
+        cursor.execute("PRAGMA temp_store = MEMORY")
+        cursor.execute("PRAGMA cache_size = -64000")
+        cursor.execute("PRAGMA foreign_keys = ON")
+
+        applied = []
+        if _schema_version(cursor) < SCHEMA_VERSION:
+            applied = _apply_migrations(cursor)
+
+        _bootstrap_admin(cursor)
         conn.close()
 
+        elapsed = time.perf_counter() - started
+        if applied:
+            logger.info(f"База данных инициализирована: миграции {applied}, {elapsed * 1000:.0f} мс")
+        else:
+            logger.info(f"База данных: схема версии {SCHEMA_VERSION} актуальна, {elapsed * 1000:.1f} мс")
         if journal_mode.upper() == 'WAL':
             logger.info("WAL режим активирован")
+        return elapsed
 
     except Exception as e:
         logger.error(f"Ошибка инициализации БД: {e}")
@@ -355,59 +740,202 @@ def _safe_json_loads(json_str: str, default: Any = None) -> Any:
         return default if default is not None else {}
 
 
+# Поля get_tournament_data: поле → (колонка в запросе, значение по умолчанию)
+TOURNAMENT_FIELDS = {
+    "metadata": ("t.metadata", {}),
+    "classes": ("t.classes", []),
+    "courts": ("t.courts", []),
+    "dates": ("t.dates", []),
+    "draw_data": ("t.draw_data", {}),
+    "court_planner": ("s.court_planner", None),
+    "court_usage": ("s.court_usage", None),
+}
+
+
 def get_tournament_data(tournament_id: str) -> Optional[Dict]:
     """Получение данных турнира из БД"""
+    return get_tournament_fields(tournament_id, list(TOURNAMENT_FIELDS) + ["matches_data"])
+
+
+def get_tournament_fields(tournament_id: str, fields: List[str]) -> Optional[Dict]:
+    """
+    Проекция get_tournament_data: читает и декодирует только перечисленные поля
+    (ключи TOURNAMENT_FIELDS и "matches_data"). Формат словаря тот же, что у get_tournament_data:
+    court_planner/court_usage есть только при наличии расписания, matches_data — при наличии матчей.
+    data_version — версия данных турнира на момент чтения (ключ кэша разобранных сеток, draw_cache).
+    """
+    columns = [TOURNAMENT_FIELDS[f][0] for f in fields if f in TOURNAMENT_FIELDS]
+    if "matches_data" in fields:
+        columns += ["m.matches_data", "m.are_matches_published", "m.is_schedule_published"]
+
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT metadata, classes, courts, dates, draw_data 
-            FROM tournaments WHERE id = ?
+        cursor.execute(f'''
+            SELECT t.data_version, s.tournament_id, m.tournament_id{"".join(", " + c for c in columns)}
+            FROM tournaments t
+            LEFT JOIN tournament_schedule s ON s.tournament_id = t.id
+            LEFT JOIN tournament_matches m ON m.tournament_id = t.id
+            WHERE t.id = ?
         ''', (tournament_id,))
-        tournament_row = cursor.fetchone()
+        row = cursor.fetchone()
+        conn.close()
 
-        if not tournament_row:
-            conn.close()
+        if not row:
             return None
 
-        cursor.execute('''
-            SELECT court_planner, court_usage 
-            FROM tournament_schedule WHERE tournament_id = ?
-        ''', (tournament_id,))
-        schedule_row = cursor.fetchone()
+        has_schedule, has_matches = row[1] is not None, row[2] is not None
+        values = iter(row[3:])
+        data = {"tournament_id": tournament_id, "data_version": row[0] or 0}
+        for field in fields:
+            if field in TOURNAMENT_FIELDS:
+                raw = next(values)
+                column, default = TOURNAMENT_FIELDS[field]
+                if column.startswith("s.") and not has_schedule:
+                    continue
+                data[field] = decode_blob(raw, default)
+
+        if "matches_data" in fields and has_matches:
+            matches_raw, are_published, schedule_published = next(values), next(values), next(values)
+            data["matches_data"] = {
+                "Matches": decode_blob(matches_raw, []),
+                "AreMatchesPublished": bool(are_published),
+                "IsSchedulePublished": bool(schedule_published)
+            }
+
+        return data
+
+    except Exception as e:
+        logger.error(f"Ошибка получения турнира {tournament_id}: {e}")
+        return None
+
+
+def get_tournament_name(tournament_id: str) -> Optional[str]:
+    """Название турнира (metadata.name) без чтения остальных колонок; None — турнира нет или имя не задано"""
+    def transaction(conn):
+        cursor = conn.cursor()
+        cursor.execute("SELECT json_extract(metadata, '$.name') FROM tournaments WHERE id = ?", (tournament_id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    try:
+        return execute_with_retry(transaction)
+    except Exception as e:
+        logger.error(f"Ошибка получения названия турнира {tournament_id}: {e}")
+        return None
+
+
+def get_tournament_courts(tournament_id: str) -> List[Dict]:
+    """Список кортов турнира (Item1 — id, Item2 — название)"""
+    def transaction(conn):
+        cursor = conn.cursor()
+        cursor.execute('SELECT courts FROM tournaments WHERE id = ?', (tournament_id,))
+        row = cursor.fetchone()
+        return _safe_json_loads(row[0], []) if row else []
+
+    try:
+        return execute_with_retry(transaction)
+    except Exception as e:
+        logger.error(f"Ошибка получения кортов турнира {tournament_id}: {e}")
+        return []
+
+
+def get_class_draw(tournament_id: str, class_id: str, draw_type: Optional[str] = None,
+                   index: Optional[int] = None) -> Optional[Any]:
+    """
+    Сетки одной категории из draw_data без декодирования остальных категорий.
+    Без draw_type — словарь категории (class_info, round_robin, elimination);
+    с draw_type ('round_robin' / 'elimination') и index — одна сетка.
+    """
+    class_key = str(class_id)
+    if '"' in class_key:
+        return None
+    path = f'$."{class_key}"'
+    if draw_type:
+        path += f".{draw_type}[{int(index or 0)}]"
+
+    def transaction(conn):
+        cursor = conn.cursor()
+        cursor.execute('SELECT json_extract(blob_json(draw_data), ?) FROM tournaments WHERE id = ?', (path, tournament_id))
+        row = cursor.fetchone()
+        return _safe_json_loads(row[0], None) if row and row[0] else None
+
+    try:
+        return execute_with_retry(transaction)
+    except Exception as e:
+        logger.error(f"Ошибка получения сетки {class_id} турнира {tournament_id}: {e}")
+        return None
+
+
+def save_class_draws(tournament_id: str, class_id: str, draws: Dict[str, List]) -> bool:
+    """
+    Свежие сетки одной категории (draw_type → список сеток) в draw_data турнира,
+    с событием "draw" категории в ленте изменений. False — категории нет или сетки не изменились.
+    """
+    class_key = str(class_id)
 
+    def transaction(conn):
+        cursor = conn.cursor()
+        cursor.execute('SELECT draw_data FROM tournaments WHERE id = ?', (tournament_id,))
+        row = cursor.fetchone()
+        draw_data = decode_blob(row[0], {}) if row else {}
+        class_data = draw_data.get(class_key)
+        if class_data is None:
+            return False
+        updated = dict(class_data, **draws)
+        if updated == class_data:
+            return False
+        draw_data[class_key] = updated
+        cursor.execute('UPDATE tournaments SET draw_data = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+                       (encode_blob(draw_data), tournament_id))
+        record_changes(cursor, [tournament_topic(tournament_id, "draw", class_key)])
+        return True
+
+    return execute_with_retry(transaction)
+
+
+def get_draw_summary(tournament_id: str) -> List[Dict]:
+    """
+    Категории турнира: id, название и число круговых групп / сеток плей-офф (без разбора сеток в Python).
+    draw_data распаковывается один раз; битый JSON — ошибка json_each, ответ — пустой список.
+    """
+    def transaction(conn):
+        cursor = conn.cursor()
         cursor.execute('''
-            SELECT matches_data, are_matches_published, is_schedule_published 
-            FROM tournament_matches WHERE tournament_id = ?
+            SELECT d.key, json_extract(d.value, '$.class_info.Name'),
+                   json_array_length(d.value, '$.round_robin'), json_array_length(d.value, '$.elimination')
+            FROM tournaments t, json_each(blob_json(t.draw_data)) d
+            WHERE t.id = ? AND d.type = 'object'
         ''', (tournament_id,))
-        matches_row = cursor.fetchone()
-        conn.close()
+        return [
+            {"class_id": row[0], "name": row[1] or "", "round_robin": row[2] or 0, "elimination": row[3] or 0}
+            for row in cursor.fetchall()
+        ]
 
-        data = {
-            "tournament_id": tournament_id,
-            "metadata": _safe_json_loads(tournament_row[0], {}),
-            "classes": _safe_json_loads(tournament_row[1], []),
-            "courts": _safe_json_loads(tournament_row[2], []),
-            "dates": _safe_json_loads(tournament_row[3], []),
-            "draw_data": _safe_json_loads(tournament_row[4], {})
-        }
+    try:
+        return execute_with_retry(transaction)
+    except Exception as e:
+        logger.error(f"Ошибка получения категорий турнира {tournament_id}: {e}")
+        return []
 
-        if schedule_row:
-            data["court_planner"] = _safe_json_loads(schedule_row[0])
-            data["court_usage"] = _safe_json_loads(schedule_row[1])
 
-        if matches_row:
-            data["matches_data"] = {
-                "Matches": _safe_json_loads(matches_row[0], []),
-                "AreMatchesPublished": bool(matches_row[1]),
-                "IsSchedulePublished": bool(matches_row[2])
-            }
+def get_tournament_version(tournament_id: str) -> Optional[str]:
+    """Версия данных турнира для кэшей (без чтения и разбора JSON-колонок).
 
-        return data
+    tournaments.data_version — seq журнала изменений последней записи турнира, сеток,
+    расписания или матчей (change_feed.record_changes); seq не переиспользуются,
+    поэтому версия меняется при любом изменении содержимого.
+    """
+    def transaction(conn):
+        cursor = conn.cursor()
+        cursor.execute('SELECT data_version FROM tournaments WHERE id = ?', (tournament_id,))
+        row = cursor.fetchone()
+        return str(row[0] or 0) if row else None
 
+    try:
+        return execute_with_retry(transaction)
     except Exception as e:
-        logger.error(f"Ошибка получения турнира {tournament_id}: {e}")
+        logger.error(f"Ошибка получения версии турнира {tournament_id}: {e}")
         return None
 
 
@@ -461,41 +989,76 @@ def get_court_data(tournament_id: str, court_id: str) -> Optional[Dict]:
         return {"court_id": court_id, "error": str(e)}
 
 
+# Колонки courts_data, которые пишет write_courts_data (по ним же ищутся изменения корта)
+_COURT_COLUMNS = (
+    "court_name", "event_state", "current_match_state", "class_name",
+    "first_participant_score", "second_participant_score",
+    "detailed_result", "first_participant", "second_participant",
+    "is_tiebreak", "is_super_tiebreak", "is_first_participant_serving", "is_serving_left", "match_id",
+)
+
+
+def write_courts_data(cursor: sqlite3.Cursor, tournament_id: str,
+                      courts_data: List[Dict]) -> Tuple[List[str], List[str]]:
+    """
+    Запись кортов турнира в транзакции вызывающего (save_courts_data, AutoRefresh).
+    Корты, у которых изменилось содержимое, попадают в журнал изменений.
+    Возвращает (id записанных кортов, id изменившихся кортов).
+    """
+    cursor.execute(f'SELECT court_id, {", ".join(_COURT_COLUMNS)} FROM courts_data WHERE tournament_id = ?',
+                   (tournament_id,))
+    previous = {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+
+    saved, changed = [], []
+    for court in courts_data:
+        if "error" in court:
+            continue
+        court_id = str(court["court_id"])
+        values = (
+            court.get("court_name", ""),
+            court.get("event_state", ""), court.get("current_match_state", ""),
+            court.get("class_name", ""),
+            court.get("first_participant_score", 0), court.get("second_participant_score", 0),
+            json.dumps(court.get("detailed_result", [])),
+            json.dumps(court.get("first_participant", [])),
+            json.dumps(court.get("second_participant", [])),
+            1 if court.get("is_tiebreak") else 0,
+            1 if court.get("is_super_tiebreak") else 0,
+            1 if court.get("is_first_participant_serving") else (0 if court.get("is_first_participant_serving") is False else None),
+            1 if court.get("is_serving_left") else (0 if court.get("is_serving_left") is False else None),
+            court.get("match_id", "")
+        )
+        cursor.execute(f'''
+            INSERT OR REPLACE INTO courts_data
+            (tournament_id, court_id, {", ".join(_COURT_COLUMNS)}, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ''', (tournament_id, court_id) + values)
+        saved.append(court_id)
+        if previous.get(court_id) != values:
+            changed.append(court_id)
+
+    record_changes(cursor, [tournament_topic(tournament_id, "court", court_id) for court_id in changed])
+    return saved, changed
+
+
 def save_courts_data(tournament_id: str, courts_data: List[Dict]) -> int:
     """Сохранение данных кортов в БД"""
     def transaction(conn):
-        cursor = conn.cursor()
-        count = 0
-        for court in courts_data:
-            if "error" not in court:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO courts_data 
-                    (tournament_id, court_id, court_name, event_state, current_match_state, class_name,
-                     first_participant_score, second_participant_score, 
-                     detailed_result, first_participant, second_participant,
-                     is_tiebreak, is_super_tiebreak, is_first_participant_serving, is_serving_left, match_id,
-                     updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                ''', (
-                    tournament_id, str(court["court_id"]), court.get("court_name", ""),
-                    court.get("event_state", ""), court.get("current_match_state", ""),
-                    court.get("class_name", ""),
-                    court.get("first_participant_score", 0), court.get("second_participant_score", 0),
-                    json.dumps(court.get("detailed_result", [])), 
-                    json.dumps(court.get("first_participant", [])),
-                    json.dumps(court.get("second_participant", [])),
-                    1 if court.get("is_tiebreak") else 0,
-                    1 if court.get("is_super_tiebreak") else 0,
-                    1 if court.get("is_first_participant_serving") else (0 if court.get("is_first_participant_serving") is False else None),
-                    1 if court.get("is_serving_left") else (0 if court.get("is_serving_left") is False else None),
-                    court.get("match_id", "")
-                ))
-                count += 1
-        return count
+        saved, _ = write_courts_data(conn.cursor(), tournament_id, courts_data)
+        return len(saved)
 
     return execute_with_retry(transaction)
 
 
+# Поля live-счёта (со значениями по умолчанию, как при записи), которые событие корта несёт в payload
+_LIVE_SCORE_FIELDS = {
+    "first_participant_score": 0, "second_participant_score": 0, "detailed_result": [],
+    "is_tiebreak": False, "is_super_tiebreak": False,
+    "is_first_participant_serving": None, "is_serving_left": None,
+    "match_id": "", "current_match_state": "live",
+}
+
+
 def update_court_live_score(tournament_id: str, court_data: Dict) -> bool:
     """Обновление данных корта из WebSocket.
     Счёт обновляется всегда (ReceiveMatchUpdate и ReceiveMatchAction).
@@ -510,7 +1073,7 @@ def update_court_live_score(tournament_id: str, court_data: Dict) -> bool:
         second_p = court_data.get("second_participant")
         has_participants = bool(first_p or second_p)
 
-        logger.info(f"LiveScore UPDATE: tournament={tournament_id}, court={court_id}, has_participants={has_participants}")
+        logger.debug(f"LiveScore UPDATE: tournament={tournament_id}, court={court_id}, has_participants={has_participants}")
 
         base_params = (
             court_data.get("first_participant_score", 0),
@@ -566,32 +1129,61 @@ def update_court_live_score(tournament_id: str, court_data: Dict) -> bool:
             ''', base_params + (tournament_id, court_id))
 
         rows_affected = cursor.rowcount
-        logger.info(f"LiveScore UPDATE result: {rows_affected} rows affected")
+        logger.debug(f"LiveScore UPDATE result: {rows_affected} rows affected")
+        if rows_affected > 0:
+            # Счёт уходит подписчикам ленты прямо в событии — без повторного запроса корта
+            topic = tournament_topic(tournament_id, "court", court_id)
+            record_changes(cursor, [topic], {topic: {key: court_data.get(key, default) for key, default in _LIVE_SCORE_FIELDS.items()}})
         return rows_affected > 0
 
     try:
-        return execute_with_retry(transaction)
+        updated = execute_with_retry(transaction)
+        live_score_writes.inc("updated" if updated else "no_row")
+        return updated
     except Exception as e:
+        live_score_writes.inc("error")
         logger.error(f"Ошибка обновления live-счёта корта {court_data.get('court_id')}: {e}")
         return False
 
 
 def save_xml_file_info(tournament_id: str, file_info: Dict):
     """Сохранение информации о XML файле"""
+    save_xml_files_info(tournament_id, [file_info])
+
+
+def save_xml_files_info(tournament_id: str, files_info: List[Dict]):
+    """Пакетное сохранение информации о XML файлах одной транзакцией.
+    Запись для уже опубликованного файла обновляется, а не дублируется."""
+    if not files_info:
+        return
+
     def transaction(conn):
         cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO xml_files 
-            (tournament_id, xml_type, filename, name, url, size, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        ''', (
-            tournament_id,
-            file_info.get("type", ""),
-            file_info.get("filename", ""),
-            file_info.get("name", ""),
-            file_info.get("url", ""),
-            file_info.get("size", "")
-        ))
+        for file_info in files_info:
+            cursor.execute('''
+                UPDATE xml_files SET xml_type = ?, name = ?, url = ?, size = ?, created_at = CURRENT_TIMESTAMP
+                WHERE tournament_id = ? AND filename = ?
+            ''', (
+                file_info.get("type", ""),
+                file_info.get("name", ""),
+                file_info.get("url", ""),
+                file_info.get("size", ""),
+                tournament_id,
+                file_info.get("filename", "")
+            ))
+            if cursor.rowcount == 0:
+                cursor.execute('''
+                    INSERT INTO xml_files 
+                    (tournament_id, xml_type, filename, name, url, size, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ''', (
+                    tournament_id,
+                    file_info.get("type", ""),
+                    file_info.get("filename", ""),
+                    file_info.get("name", ""),
+                    file_info.get("url", ""),
+                    file_info.get("size", "")
+                ))
 
     try:
         execute_with_retry(transaction)
@@ -599,6 +1191,20 @@ def save_xml_file_info(tournament_id: str, file_info: Dict):
         logger.error(f"Ошибка сохранения XML info: {e}")
 
 
+def get_xml_file_names(tournament_id: str) -> List[str]:
+    """Имена опубликованных XML файлов турнира"""
+    def transaction(conn):
+        cursor = conn.cursor()
+        cursor.execute('SELECT DISTINCT filename FROM xml_files WHERE tournament_id = ?', (tournament_id,))
+        return [row[0] for row in cursor.fetchall()]
+
+    try:
+        return execute_with_retry(transaction)
+    except Exception as e:
+        logger.error(f"Ошибка получения XML файлов турнира {tournament_id}: {e}")
+        return []
+
+
 def get_active_tournament_ids() -> List[str]:
     """Получение ID активных турниров"""
     def transaction(conn):
@@ -611,16 +1217,7 @@ def get_active_tournament_ids() -> List[str]:
 
 def get_court_ids_for_tournament(tournament_id: str) -> List[str]:
     """Получение ID кортов турнира"""
-    def transaction(conn):
-        cursor = conn.cursor()
-        cursor.execute('SELECT courts FROM tournaments WHERE id = ?', (tournament_id,))
-        row = cursor.fetchone()
-        if row and row[0]:
-            courts = json.loads(row[0])
-            return [str(c.get("Item1")) for c in courts if c.get("Item1")]
-        return []
-
-    return execute_with_retry(transaction)
+    return [str(c.get("Item1")) for c in get_tournament_courts(tournament_id) if c.get("Item1")]
 
 
 def get_settings() -> Dict:
@@ -664,6 +1261,7 @@ def save_settings(settings: Dict):
                 INSERT OR REPLACE INTO settings (key, value, updated_at)
                 VALUES (?, ?, CURRENT_TIMESTAMP)
             ''', (key, json.dumps(value)))
+        record_changes(cursor, ["settings"])
 
     execute_with_retry(transaction)
 
@@ -678,10 +1276,11 @@ def save_tournament_matches(tournament_id: str, matches_data: Dict):
             VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
         ''', (
             tournament_id,
-            json.dumps(matches_data.get("Matches", [])),
+            encode_blob(matches_data.get("Matches", [])),
             1 if matches_data.get("AreMatchesPublished") else 0,
             1 if matches_data.get("IsSchedulePublished") else 0
         ))
+        record_changes(cursor, [tournament_topic(tournament_id, "matches")])
     execute_with_retry(transaction)
 
 
@@ -699,7 +1298,7 @@ def get_tournament_matches(tournament_id: str) -> Optional[Dict]:
             return None
             
         return {
-            "Matches": _safe_json_loads(row[0], []),
+            "Matches": decode_blob(row[0], []),
             "AreMatchesPublished": bool(row[1]),
             "IsSchedulePublished": bool(row[2]),
             "updated_at": row[3]
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Обслуживание SQLite: чекпоинт WAL, статистика планировщика, очистка таблиц и резервные копии.
+Поток обслуживания запускается в каждом воркере gunicorn, но каждую задачу выполняет
+только один из них: запуск «захватывается» условным UPDATE строки maintenance_runs,
+там же хранится результат последнего запуска — /api/status любого воркера видит одно и то же.
+
+Задачи:
+    checkpoint  wal_checkpoint(TRUNCATE), когда в БД нет записей IDLE_SECONDS
+                (или сразу, если WAL вырос больше WAL_FORCE_BYTES)
+    optimize    PRAGMA optimize (ANALYZE с analysis_limit на SQLite до 3.46)
+    retention   xml_files неактивных и удалённых турниров, дубликаты xml_files,
+                courts_data удалённых кортов, строки удалённых турниров
+    backup      VACUUM INTO в <папка БД>/backups, хранятся backup_keep последних копий
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import database
+from .database import execute_with_retry
+from .metrics import db_maintenance_runs
+
+logger = logging.getLogger(__name__)
+
+# Период проверки задач, с
+TICK_INTERVAL = 15
+# Чекпоинт: БД без записей IDLE_SECONDS и WAL больше WAL_IDLE_BYTES; WAL больше WAL_FORCE_BYTES — без ожидания простоя
+IDLE_SECONDS = 30
+CHECKPOINT_INTERVAL = 60
+WAL_IDLE_BYTES = 4 * 1024 * 1024
+WAL_FORCE_BYTES = 64 * 1024 * 1024
+OPTIMIZE_INTERVAL = 6 * 3600
+RETENTION_INTERVAL = 3600
+# Ожидание блокировок соединением обслуживания, мс (запросы воркеров важнее)
+BUSY_TIMEOUT_MS = 2000
+# Строк на таблицу при ANALYZE
+ANALYSIS_LIMIT = 400
+# courts_data корта, которого больше нет в списке кортов турнира, удаляется после стольких часов без обновлений
+ORPHAN_COURT_HOURS = 1
+
+# Таблицы с tournament_id, строки которых не нужны без турнира
+_TOURNAMENT_TABLES = ("courts_data", "xml_files", "tournament_schedule", "tournament_matches",
+                      "court_settings", "composite_pages", "participants_tournaments")
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _format_time(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat(timespec='seconds') if timestamp else None
+
+
+class DBMaintenance:
+    """Планировщик задач обслуживания БД одного воркера"""
+
+    def __init__(self, tick_interval: float = TICK_INTERVAL):
+        self.tick_interval = tick_interval
+        self.xml_retention_hours = 24
+        self.backup_interval_hours = 24
+        self.backup_keep = 7
+        self._activity: Optional[Tuple] = None
+        self._activity_since = time.monotonic()
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    @property
+    def backup_dir(self) -> str:
+        return os.path.join(os.path.dirname(os.path.abspath(database.DATABASE_PATH)), "backups")
+
+    def configure(self, xml_retention_hours: int = 24, backup_interval_hours: int = 24, backup_keep: int = 7):
+        """Срок хранения xml_files неактивных турниров, период резервных копий (0 — выключены) и их число"""
+        self.xml_retention_hours = max(1, int(xml_retention_hours))
+        self.backup_interval_hours = max(0, int(backup_interval_hours))
+        self.backup_keep = max(1, int(backup_keep))
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._maintenance_loop, name="db-maintenance", daemon=True)
+        self._thread.start()
+        logger.info(f"DBMaintenance: started (pid {os.getpid()})")
+
+    def stop(self):
+        self._running = False
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        logger.info("DBMaintenance: stopped")
+
+    def _tasks(self) -> List[Tuple[str, float, Callable[[], Dict]]]:
+        """(задача, период в секундах, функция) в порядке выполнения"""
+        tasks = [("optimize", OPTIMIZE_INTERVAL, self.optimize),
+                 ("retention", RETENTION_INTERVAL, self.retention)]
+        if self.backup_interval_hours:
+            tasks.append(("backup", self.backup_interval_hours * 3600, self.backup))
+        return tasks
+
+    def _maintenance_loop(self):
+        while self._running:
+            self._wakeup.wait(self.tick_interval)
+            if not self._running:
+                break
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"DBMaintenance: ошибка цикла обслуживания: {e}")
+
+    def tick(self):
+        """Один проход планировщика: задачи, у которых истёк период и которые не захватил другой воркер"""
+        wal_bytes = _file_size(database.DATABASE_PATH + "-wal")
+        idle = self._idle_seconds() >= IDLE_SECONDS
+        if wal_bytes >= WAL_FORCE_BYTES or (idle and wal_bytes >= WAL_IDLE_BYTES):
+            self._run("checkpoint", CHECKPOINT_INTERVAL, self.checkpoint)
+        for task, interval, func in self._tasks():
+            self._run(task, interval, func)
+
+    def _idle_seconds(self) -> float:
+        """Сколько секунд не менялись журнал изменений и файл WAL (записи любого воркера)"""
+        def transaction(conn):
+            cursor = conn.cursor()
+            cursor.execute("SELECT MAX(seq) FROM change_log")
+            return cursor.fetchone()[0]
+
+        try:
+            wal = os.stat(database.DATABASE_PATH + "-wal")
+            wal_state = (wal.st_size, wal.st_mtime_ns)
+        except OSError:
+            wal_state = None
+        activity = (execute_with_retry(transaction), wal_state)
+        now = time.monotonic()
+        if activity != self._activity:
+            self._activity, self._activity_since = activity, now
+        return now - self._activity_since
+
+    def _claim(self, task: str, interval: float) -> bool:
+        """Захват задачи: True, если с прошлого запуска (любого воркера) прошло interval секунд"""
+        now = time.time()
+
+        def transaction(conn):
+            cursor = conn.cursor()
+            cursor.execute("INSERT OR IGNORE INTO maintenance_runs (task) VALUES (?)", (task,))
+            cursor.execute('''
+                UPDATE maintenance_runs SET started_at = ?, worker = ?
+                WHERE task = ? AND COALESCE(started_at, 0) <= ?
+            ''', (now, os.getpid(), task, now - interval))
+            return cursor.rowcount == 1
+
+        return execute_with_retry(transaction)
+
+    def _run(self, task: str, interval: float, func: Callable[[], Dict]):
+        if not self._claim(task, interval):
+            return
+        started = time.perf_counter()
+        try:
+            details, status = func(), "ok"
+        except Exception as e:
+            details, status = {"error": str(e)}, "error"
+            logger.error(f"DBMaintenance: задача {task} завершилась ошибкой: {e}")
+        duration_ms = (time.perf_counter() - started) * 1000
+        db_maintenance_runs.inc(task, status)
+
+        def transaction(conn):
+            conn.cursor().execute('''
+                UPDATE maintenance_runs SET finished_at = ?, duration_ms = ?, status = ?, details = ?
+                WHERE task = ?
+            ''', (time.time(), round(duration_ms, 1), status, json.dumps(details, ensure_ascii=False), task))
+
+        execute_with_retry(transaction)
+        logger.info(f"DBMaintenance: {task} — {status}, {duration_ms:.0f} мс, {details}")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Соединение без транзакции Python (чекпоинт, ANALYZE и VACUUM нельзя выполнять внутри неё)"""
+        conn = sqlite3.connect(database.DATABASE_PATH, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        return conn
+
+    def checkpoint(self) -> Dict:
+        """Перенос WAL в БД и усечение файла WAL; busy=1 — читатели не дали дойти до конца"""
+        wal_path = database.DATABASE_PATH + "-wal"
+        wal_before = _file_size(wal_path)
+        conn = self._connect()
+        try:
+            busy, log_frames, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        finally:
+            conn.close()
+        return {"wal_before": wal_before, "wal_after": _file_size(wal_path), "busy": busy,
+                "log_frames": log_frames, "checkpointed_frames": checkpointed}
+
+    def optimize(self) -> Dict:
+        """Статистика планировщика запросов; ANALYZE ограничен ANALYSIS_LIMIT строками на индекс"""
+        conn = self._connect()
+        try:
+            conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+            has_stats = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'").fetchone()
+            # До 3.46 PRAGMA optimize смотрит только таблицы, которые читало это же соединение
+            if not has_stats or sqlite3.sqlite_version_info < (3, 46, 0):
+                conn.execute("ANALYZE")
+                mode = "analyze"
+            else:
+                conn.execute("PRAGMA optimize = 0x10002")
+                mode = "optimize"
+        finally:
+            conn.close()
+        return {"mode": mode}
+
+    def retention(self) -> Dict:
+        """Удаление ненужных строк; возвращает число удалённых строк по таблицам"""
+        def transaction(conn):
+            cursor = conn.cursor()
+            deleted: Dict[str, int] = {}
+
+            def delete(key: str, sql: str, parameters=()):
+                cursor.execute(sql, parameters)
+                if cursor.rowcount > 0:
+                    deleted[key] = deleted.get(key, 0) + cursor.rowcount
+
+            for table in _TOURNAMENT_TABLES:
+                delete(table, f"DELETE FROM {table} WHERE tournament_id NOT IN (SELECT id FROM tournaments)")
+
+            # Записи о файлах: дубликаты одного файла и давно не обновлявшиеся файлы неактивных турниров
+            delete("xml_files", '''
+                DELETE FROM xml_files WHERE id NOT IN (SELECT MAX(id) FROM xml_files GROUP BY tournament_id, filename)
+            ''')
+            delete("xml_files", '''
+                DELETE FROM xml_files
+                WHERE created_at < datetime('now', ?)
+                  AND tournament_id NOT IN (SELECT id FROM tournaments WHERE status = 'active')
+            ''', (f"-{self.xml_retention_hours} hours",))
+
+            # Корты, которых нет в списке кортов турнира (пустой или битый список не трогаем)
+            delete("courts_data", '''
+                DELETE FROM courts_data
+                WHERE updated_at < datetime('now', ?)
+                  AND EXISTS (SELECT 1 FROM tournaments t WHERE t.id = courts_data.tournament_id
+                              AND json_valid(t.courts) AND json_array_length(t.courts) > 0)
+                  AND court_id NOT IN (SELECT CAST(json_extract(c.value, '$.Item1') AS TEXT)
+                                       FROM tournaments t, json_each(t.courts) c
+                                       WHERE t.id = courts_data.tournament_id)
+            ''', (f"-{ORPHAN_COURT_HOURS} hours",))
+            return deleted
+
+        return {"deleted": execute_with_retry(transaction)}
+
+    def backup(self) -> Dict:
+        """Копия БД через VACUUM INTO (согласованный снимок без остановки записи) и удаление старых копий"""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        name = f"{self._backup_prefix()}{datetime.now():%Y%m%d-%H%M%S}.db"
+        path = os.path.join(self.backup_dir, name)
+        tmp_path = path + ".tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        conn = self._connect()
+        try:
+            conn.execute("VACUUM INTO ?", (tmp_path,))
+        finally:
+            conn.close()
+        os.replace(tmp_path, path)
+
+        removed = []
+        for old in self.list_backups()[self.backup_keep:]:
+            try:
+                os.remove(os.path.join(self.backup_dir, old))
+                removed.append(old)
+            except OSError as e:
+                logger.warning(f"DBMaintenance: не удалось удалить копию {old}: {e}")
+        return {"file": name, "bytes": _file_size(path), "removed": removed}
+
+    def _backup_prefix(self) -> str:
+        return os.path.splitext(os.path.basename(database.DATABASE_PATH))[0] + "-"
+
+    def list_backups(self) -> List[str]:
+        """Файлы резервных копий этой БД, новые первыми (время копии — в имени)"""
+        prefix = self._backup_prefix()
+        try:
+            names = [n for n in os.listdir(self.backup_dir) if n.startswith(prefix) and n.endswith(".db")]
+        except OSError:
+            return []
+        return sorted(names, reverse=True)
+
+    def status(self) -> Dict:
+        """Размеры БД и результаты последних запусков задач для /api/status"""
+        def transaction(conn):
+            cursor = conn.cursor()
+            cursor.execute("PRAGMA page_size")
+            page_size = cursor.fetchone()[0]
+            cursor.execute("PRAGMA page_count")
+            page_count = cursor.fetchone()[0]
+            cursor.execute("PRAGMA freelist_count")
+            freelist = cursor.fetchone()[0]
+            cursor.execute('''
+                SELECT task, started_at, finished_at, duration_ms, status, details, worker
+                FROM maintenance_runs ORDER BY task
+            ''')
+            return page_size, page_count, freelist, cursor.fetchall()
+
+        page_size, page_count, freelist, runs = execute_with_retry(transaction)
+        tasks = {}
+        for task, started_at, finished_at, duration_ms, status, details, worker in runs:
+            tasks[task] = {
+                "started_at": _format_time(started_at),
+                "finished_at": _format_time(finished_at),
+                "duration_ms": duration_ms,
+                "status": status,
+                "details": json.loads(details) if details else None,
+                "worker": worker,
+            }
+
+        backups = self.list_backups()
+        return {
+            "db_bytes": _file_size(database.DATABASE_PATH),
+            "wal_bytes": _file_size(database.DATABASE_PATH + "-wal"),
+            "free_bytes": freelist * page_size,
+            "pages": page_count,
+            "tasks": tasks,
+            "backups": {
+                "count": len(backups),
+                "latest": backups[0] if backups else None,
+                "latest_bytes": _file_size(os.path.join(self.backup_dir, backups[0])) if backups else 0,
+                "interval_hours": self.backup_interval_hours,
+            },
+        }
+
+
+db_maintenance = DBMaintenance()
@@ -176,6 +176,7 @@ def update_display_window(window_type: str, slot_number: int, data: Dict) -> boo
     Использует execute_with_retry для защиты от конкурентных блокировок SQLite.
     Возвращает True при успешном обновлении, False — если нет полей или строка не найдена.
     """
+    from .change_feed import record_changes, window_topic
     from .database import get_db_connection, execute_with_retry
 
     def transaction(conn):
@@ -218,7 +219,10 @@ def update_display_window(window_type: str, slot_number: int, data: Dict) -> boo
             WHERE type = ? AND slot_number = ?
         ''', values)
         
-        return cursor.rowcount > 0
+        if cursor.rowcount == 0:
+            return False
+        record_changes(cursor, [window_topic(window_type, slot_number)])
+        return True
     
     return execute_with_retry(transaction)
 
@@ -459,10 +463,9 @@ def display_media_dashboard(tournament_id: str):
     Отображает сводную панель мониторинга всех кортов.
     Передаёт в шаблон: tournament_id, tournament_name, текущую дату.
     """
-    from api import get_tournament_data
+    from api import get_tournament_name
     from datetime import date
-    tournament_data = get_tournament_data(tournament_id)
-    tournament_name = tournament_data.get("metadata", {}).get("name", f"Турнир {tournament_id}") if tournament_data else f"Турнир {tournament_id}"
+    tournament_name = get_tournament_name(tournament_id) or f"Турнир {tournament_id}"
     current_date = date.today().strftime("%d.%m.%Y")
     return render_template('media_dashboard.html',
                            tournament_id=tournament_id,
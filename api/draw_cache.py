@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Кэш разобранных сеток (круговые группы, сетки плей-офф).
+Снимок турнира из БД несёт версию данных (data_version, см. database.get_tournament_version):
+разбор хранится по ключу (турнир, категория, тип, индекс сетки, версия), поэтому
+повторные запросы неизменившейся сетки (опрос live-страниц, XML) берут готовую модель,
+хотя каждый запрос заново читает draw_data из БД.
+Снимок без версии (данные rankedin, утилиты tools/) кэшируется по идентичности словаря:
+запись держит ссылку на него, и совпадение id() означает тот же объект.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+DrawKey = Tuple[str, str, str, int, int]
+
+
+def draw_key(tournament_data: Dict, class_id, draw_type: str, draw_index: int) -> Optional[DrawKey]:
+    """Ключ разбора сетки снимка турнира; None — у снимка нет версии данных"""
+    version = tournament_data.get("data_version")
+    tournament_id = tournament_data.get("tournament_id")
+    if not version or tournament_id is None:
+        return None
+    return str(tournament_id), str(class_id), draw_type, int(draw_index or 0), version
+
+
+class SourceCache(Generic[T]):
+    """LRU разборов по ключу сетки и версии данных или по идентичности исходного словаря"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, source: Dict, build: Callable[[Dict], T], key: Optional[DrawKey] = None) -> T:
+        """Готовый разбор (по key, без key — по самому source) или build(source)"""
+        identity = key is None
+        if identity:
+            key = id(source)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (not identity or entry[0] is source):
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        parsed = build(source)
+        with self._lock:
+            self._entries[key] = (source if identity else None, parsed)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return parsed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
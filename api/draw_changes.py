@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Журнал изменений сеток для live-страниц (elimination_live.js, round_robin.js).
+Для каждой сетки (турнир, категория, тип, индекс) хранится несколько последних версий
+с их ячейками: матчи сетки плей-офф, ячейки матчей и строки итогов круговой группы.
+Запрос данных с ?since=<версия> получает только ячейки, изменившиеся с этой версии;
+неизвестная версия (вытеснена из журнала, другой воркер, перезапуск) — полный ответ.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Версий на сетку и сеток в журнале процесса
+MAX_VERSIONS_PER_DRAW = 32
+MAX_DRAWS = 512
+
+DrawKey = Tuple[str, str, str, int]
+
+
+class DrawChangeLog:
+    """Последние версии ячеек каждой сетки; ячейки сравниваются по значению"""
+
+    def __init__(self, max_versions: int = MAX_VERSIONS_PER_DRAW, max_draws: int = MAX_DRAWS):
+        self.max_versions = max_versions
+        self.max_draws = max_draws
+        self._draws: "OrderedDict[DrawKey, OrderedDict[str, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, key: DrawKey, version: str, cells: Dict[str, Any]):
+        """Запоминает ячейки версии (повторная запись той же версии ничего не меняет)"""
+        with self._lock:
+            versions = self._draws.get(key)
+            if versions is None:
+                versions = self._draws[key] = OrderedDict()
+                while len(self._draws) > self.max_draws:
+                    self._draws.popitem(last=False)
+            self._draws.move_to_end(key)
+            if version in versions:
+                return
+            versions[version] = cells
+            while len(versions) > self.max_versions:
+                versions.popitem(last=False)
+
+    def changed_since(self, key: DrawKey, since: str, cells: Dict[str, Any]) -> Optional[List[str]]:
+        """Ячейки, отличающиеся от версии since; None — версии нет в журнале или изменился состав ячеек"""
+        with self._lock:
+            old = self._draws.get(key, {}).get(since)
+        if old is None or old.keys() != cells.keys():
+            return None
+        return [cell_id for cell_id, cell in cells.items() if old.get(cell_id) != cell]
+
+
+draw_changes = DrawChangeLog()
+
+
+def _respond(key: DrawKey, data: Dict, cells: Dict[str, Any], since: Optional[str]) -> Optional[List[str]]:
+    """Записывает версию; список изменившихся ячеек для дельты или None — нужен полный ответ"""
+    version = data.get("version")
+    if not version or "error" in data:
+        return None
+    draw_changes.record(key, version, cells)
+    if not since:
+        return None
+    if since == version:
+        return []
+    return draw_changes.changed_since(key, since, cells)
+
+
+def elimination_delta(tournament_id: str, data: Dict, since: Optional[str] = None) -> Dict:
+    """
+    Ответ /api/elimination/.../data: полный (delta=False) или только изменившиеся
+    с версии since матчи (delta=True, матч целиком — как в полном ответе).
+    """
+    key = (str(tournament_id), str(data.get("class_id")), "elimination", int(data.get("draw_index") or 0))
+    cells = {m["match_id"]: m for m in data.get("matches", [])}
+    changed = _respond(key, data, cells, since)
+    if changed is None:
+        return dict(data, delta=False)
+    return dict(data, delta=True, since=since, matches=[cells[match_id] for match_id in changed])
+
+
+def round_robin_delta(tournament_id: str, data: Dict, since: Optional[str] = None) -> Dict:
+    """
+    Ответ /api/round-robin/.../data: полный (delta=False; standings — список по строкам)
+    или изменившиеся ячейки матчей и строки итогов (delta=True; standings — {номер строки: итог}).
+    """
+    key = (str(tournament_id), str(data.get("class_id")), "round_robin", int(data.get("draw_index") or 0))
+    cells = {f"m{match_key}": match for match_key, match in data.get("matches", {}).items()}
+    cells.update({f"s{row}": standing for row, standing in enumerate(data.get("standings", []))})
+    changed = _respond(key, data, cells, since)
+    if changed is None:
+        return dict(data, delta=False)
+    return dict(data, delta=True, since=since,
+                matches={cell_id[1:]: cells[cell_id] for cell_id in changed if cell_id[0] == "m"},
+                standings={cell_id[1:]: cells[cell_id] for cell_id in changed if cell_id[0] == "s"})
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модель сетки плей-офф (Elimination из draw_data) для HTML, JSON и XML.
+DrawData разбирается один раз: раунды → матчи с участниками, счётом, победителем
+и проходом без игры (Bye). Отдельно готовится отображение матча для HTML/AJAX
+(elimination_live.js) и версия сетки — хэш этого отображения.
+Модели переиспользуются генераторами и запросами, пока не сменилась версия данных турнира (draw_cache).
+"""
+
+import hashlib
+from functools import cached_property
+from typing import Dict, List, Optional
+
+from .draw_cache import DrawKey, SourceCache
+from .html_base import HTMLBaseGenerator
+
+# Сколько разобранных сеток держать в памяти процесса
+MAX_PARSED_BRACKETS = 256
+
+_ROUND_NAMES = {
+    1: ['Финал'],
+    2: ['Полуфинал', 'Финал'],
+    3: ['Четвертьфинал', 'Полуфинал', 'Финал'],
+    4: ['1/8 финала', 'Четвертьфинал', 'Полуфинал', 'Финал'],
+    5: ['1/16 финала', '1/8 финала', 'Четвертьфинал', 'Полуфинал', 'Финал']
+}
+
+
+def round_names(num_rounds: int) -> List[str]:
+    """Названия раундов от первого к финалу"""
+    if num_rounds in _ROUND_NAMES:
+        return _ROUND_NAMES[num_rounds]
+    names = [f'Раунд {i + 1}' for i in range(num_rounds - 3)]
+    names.extend(['Четвертьфинал', 'Полуфинал', 'Финал'])
+    return names
+
+
+class BracketSide:
+    """Участник матча сетки (Challenger / Challenged)"""
+
+    __slots__ = ("id", "first_player_name", "second_player_name", "name", "display_name")
+
+    def __init__(self, participant: Optional[Dict]):
+        participant = participant or {}
+        first_player = participant.get("FirstPlayer") or {}
+        second_player = participant.get("SecondPlayer") or {}
+        self.id = participant.get("EventParticipantId")
+        self.first_player_name = first_player.get("Name", "")
+        self.second_player_name = second_player.get("Name", "")
+        names = [p["Name"] for p in (first_player, second_player) if p.get("Name")]
+        # name — для XML ("Имя1/Имя2"), display_name — для HTML ("Имя1 / Имя2")
+        self.name = "/".join(names)
+        self.display_name = " / ".join(names)
+
+    @property
+    def is_bye(self) -> bool:
+        return self.name.upper() == "BYE" or not self.name.strip()
+
+
+class BracketMatch:
+    """Матч сетки: участники, результат и отображение для HTML/AJAX"""
+
+    __slots__ = ("round_number", "number", "court_name", "is_played", "has_score", "cancellation_status",
+                 "winner_id", "score", "challenger", "challenged", "winner", "bye_winner", "_display")
+
+    def __init__(self, match: Dict, number: int):
+        view_model = match.get("MatchViewModel", {})
+        self.round_number = match.get("Round", 1)
+        self.number = number
+        self.court_name = match.get("CourtName", "")
+        self.is_played = view_model.get("IsPlayed", False)
+        self.has_score = view_model.get("HasScore", False)
+        self.cancellation_status = match.get("CancellationStatus", "")
+        self.winner_id = match.get("WinnerParticipantId")
+        self.score = view_model.get("Score", {})
+        self.challenger = BracketSide(match.get("ChallengerParticipant"))
+        self.challenged = BracketSide(match.get("ChallengedParticipant"))
+
+        if self.challenger.id == self.winner_id:
+            self.winner = self.challenger
+        elif self.challenged.id == self.winner_id:
+            self.winner = self.challenged
+        else:
+            self.winner = None
+
+        # Один из участников Bye (или не определён) — второй проходит без игры
+        self.bye_winner = None
+        if self.challenger.is_bye:
+            if self.challenged.name and self.challenged.name.upper() != "BYE":
+                self.bye_winner = self.challenged
+        elif self.challenged.is_bye:
+            if self.challenger.name and self.challenger.name.upper() != "BYE":
+                self.bye_winner = self.challenger
+
+        self._display = None
+
+    @property
+    def display(self) -> Dict:
+        """Матч для HTML и AJAX: счёт и сеты со стороны верхнего участника (XML он не нужен — считается по запросу)"""
+        if self._display is None:
+            self._display = self._build_display()
+        return self._display
+
+    def _build_display(self) -> Dict:
+        team1, team2 = self.challenger, self.challenged
+        info = {
+            'team_1_name': HTMLBaseGenerator.create_short_name(team1.display_name) if team1.display_name else 'TBD',
+            'team_2_name': HTMLBaseGenerator.create_short_name(team2.display_name) if team2.display_name else 'TBD',
+            'team_1_id': team1.id,
+            'team_2_id': team2.id,
+            'status': 'scheduled',
+            'score': '0-0',
+            'sets1': '',
+            'sets2': '',
+            'secondary1': '',
+            'secondary2': ''
+        }
+        winner_id = self.winner_id
+
+        if self.is_played and self.has_score:
+            info['status'] = 'finished'
+            if winner_id == team1.id:
+                info['secondary2'] = 'lost'
+            elif winner_id == team2.id:
+                info['secondary1'] = 'lost'
+
+            # Счёт rankedin записан со стороны победителя — разворачиваем, если победил нижний
+            swap = winner_id == team2.id
+            first_score = self.score.get('FirstParticipantScore', 0)
+            second_score = self.score.get('SecondParticipantScore', 0)
+            info['score'] = f"{second_score}-{first_score}" if swap else f"{first_score}-{second_score}"
+
+            sets1_parts, sets2_parts = [], []
+            for s in self.score.get("DetailedScoring", []):
+                s_first, s_second = str(s.get('FirstParticipantScore', 0)), str(s.get('SecondParticipantScore', 0))
+                sets1_parts.append(s_second if swap else s_first)
+                sets2_parts.append(s_first if swap else s_second)
+            info['sets1'] = ' '.join(sets1_parts)
+            info['sets2'] = ' '.join(sets2_parts)
+
+        elif self.is_played and not self.has_score:
+            info['status'] = 'walkover'
+            if winner_id == team1.id:
+                info['secondary2'] = 'lost'
+                info['score'] = '1-0'
+                info['sets2'] = 'WO'
+            elif winner_id == team2.id:
+                info['secondary1'] = 'lost'
+                info['score'] = '0-1'
+                info['sets1'] = 'WO'
+
+        return info
+
+
+class BracketRound:
+    """Раунд сетки; index — позиция в списке раундов HTML (0 — колонка участников, если она есть)"""
+
+    __slots__ = ("index", "number", "title", "matches")
+
+    def __init__(self, index: int, number: int, title: str, matches: List[BracketMatch]):
+        self.index = index
+        self.number = number
+        self.title = title
+        self.matches = matches
+
+
+class EliminationBracket:
+    """Разобранная сетка; данные общие для всех генераторов — их нельзя изменять"""
+
+    def __init__(self, bracket: Dict):
+        self.source = bracket
+        self.places_start = bracket.get("PlacesStartPos", 1)
+        self.places_end = bracket.get("PlacesEndPos", 1)
+        self.participants: List[Dict] = bracket.get("FirstRoundParticipantCells") or []
+
+        matches_by_round: Dict[int, List[Dict]] = {}
+        for round_matches in bracket.get("DrawData") or []:
+            for match in round_matches:
+                if match:
+                    matches_by_round.setdefault(match.get("Round", 1), []).append(match)
+
+        numbers = sorted(matches_by_round)
+        names = round_names(len(numbers))
+        offset = 1 if self.participants else 0
+        self.rounds: List[BracketRound] = []
+        for i, number in enumerate(numbers):
+            matches = [BracketMatch(m, n) for n, m in enumerate(matches_by_round[number], 1)]
+            self.rounds.append(BracketRound(i + offset, number, names[i] if i < len(names) else f'Раунд {number}',
+                                            matches))
+
+    @cached_property
+    def matches(self) -> List[Dict]:
+        """Плоский список матчей для HTML и AJAX; match_id совпадает с data-match-id в HTML"""
+        matches: List[Dict] = []
+        for rnd in self.rounds:
+            for match in rnd.matches:
+                score_parts = match.display['score'].split('-')
+                matches.append(dict(
+                    match.display,
+                    match_id=f"match_{rnd.index}_{len(matches)}",
+                    round_index=rnd.index,
+                    round_title=rnd.title,
+                    score1=score_parts[0] if score_parts else '0',
+                    score2=score_parts[1] if len(score_parts) > 1 else '0',
+                ))
+        return matches
+
+    @cached_property
+    def version(self) -> str:
+        """Хэш отображаемого состояния матчей"""
+        digest = hashlib.md5(f"{self.places_start}-{self.places_end}:{len(self.participants)};".encode())
+        for match in self.matches:
+            digest.update(f"{match['match_id']}:{match['team_1_id']}:{match['team_2_id']}:{match['team_1_name']}:"
+                          f"{match['team_2_name']}:{match['status']}:{match['score']}:{match['sets1']}:"
+                          f"{match['sets2']};".encode())
+        return digest.hexdigest()[:8]
+
+
+_parsed: SourceCache[EliminationBracket] = SourceCache(MAX_PARSED_BRACKETS)
+
+
+def compile_bracket(bracket: Dict, key: Optional[DrawKey] = None) -> EliminationBracket:
+    """Модель сетки для словаря Elimination; повторный вызов с тем же key (draw_cache.draw_key) или объектом — готовая модель"""
+    return _parsed.get(bracket, EliminationBracket, key)
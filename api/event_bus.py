@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Шина событий между воркерами gunicorn поверх журнала изменений (change_log).
+Писатель любого воркера добавляет строку журнала в своей транзакции (change_feed.record_changes);
+в каждом воркере один поток шины следит за водяным знаком (MAX(seq)) и забирает новые
+строки в кольцевой буфер, после чего будит всех ожидающих подписчиков воркера
+(long-poll и SSE /api/changes). Подписчики читают события из буфера, а не из БД:
+на воркер приходится один дешёвый запрос раз в POLL_INTERVAL, сколько бы ни было клиентов.
+Свой commit будит поток шины сразу, чужой — не позже POLL_INTERVAL.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from .metrics import event_bus_events
+
+logger = logging.getLogger(__name__)
+
+# Проверка водяного знака, с
+POLL_INTERVAL = 0.25
+# Событий в буфере воркера и строк за одно чтение журнала
+BUFFER_SIZE = 5000
+READ_BATCH = 1000
+
+# (seq, topic, payload)
+Event = Tuple[int, str, Optional[Dict]]
+
+
+class EventBus:
+    """События журнала изменений для подписчиков одного воркера"""
+
+    def __init__(self, poll_interval: float = POLL_INTERVAL, buffer_size: int = BUFFER_SIZE):
+        self.poll_interval = poll_interval
+        self._events: "deque[Event]" = deque(maxlen=buffer_size)
+        # Буфер содержит все события с seq в (_covered_from, _watermark]
+        self._covered_from = 0
+        self._watermark = 0
+        self._changed = threading.Condition()
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    @property
+    def watermark(self) -> int:
+        return self._watermark
+
+    def start(self):
+        """Запуск потока шины: события доставляются начиная с текущего конца журнала"""
+        if self._running:
+            return
+        self._watermark = self._covered_from = self._latest_seq()
+        self._running = True
+        self._thread = threading.Thread(target=self._watch_loop, name="event-bus", daemon=True)
+        self._thread.start()
+        logger.info(f"EventBus: started (pid {os.getpid()}, seq {self._watermark})")
+
+    def stop(self):
+        self._running = False
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        logger.info("EventBus: stopped")
+
+    def notify(self):
+        """Свой commit записал события — забрать их без ожидания периода опроса"""
+        self._wakeup.set()
+
+    def wait(self, since: int, timeout: float) -> bool:
+        """Ждёт событий новее since; False — таймаут"""
+        with self._changed:
+            return self._changed.wait_for(lambda: self._watermark > since, timeout)
+
+    def events_since(self, since: int) -> Optional[List[Event]]:
+        """События новее since из буфера; None — since старше буфера (читать журнал из БД)"""
+        with self._changed:
+            if since < self._covered_from or since > self._watermark:
+                return None
+            return [event for event in self._events if event[0] > since]
+
+    def _latest_seq(self) -> int:
+        from .database import execute_with_retry
+
+        def transaction(conn):
+            cursor = conn.cursor()
+            cursor.execute("SELECT MAX(seq) FROM change_log")
+            return cursor.fetchone()[0] or 0
+
+        return execute_with_retry(transaction)
+
+    def _read_after(self, seq: int) -> List[Tuple]:
+        from .database import execute_with_retry
+
+        def transaction(conn):
+            cursor = conn.cursor()
+            cursor.execute("SELECT seq, topic, payload, worker FROM change_log WHERE seq > ? ORDER BY seq LIMIT ?",
+                           (seq, READ_BATCH))
+            return cursor.fetchall()
+
+        return execute_with_retry(transaction)
+
+    def _watch_loop(self):
+        pid = os.getpid()
+        while self._running:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            try:
+                while True:
+                    rows = self._read_after(self._watermark)
+                    if not rows:
+                        break
+                    with self._changed:
+                        for seq, topic, payload, worker in rows:
+                            if len(self._events) == self._events.maxlen:
+                                self._covered_from = self._events[0][0]
+                            self._events.append((seq, topic, json.loads(payload) if payload else None))
+                            event_bus_events.inc("local" if worker == pid else "remote")
+                        self._watermark = rows[-1][0]
+                        self._changed.notify_all()
+                    if len(rows) < READ_BATCH:
+                        break
+            except Exception as e:
+                logger.error(f"EventBus: ошибка чтения журнала изменений: {e}")
+
+
+event_bus = EventBus()
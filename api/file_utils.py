@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Атомарная запись файлов, которые читают vMix и веб-сервер (XML, фото участников):
+временный файл в той же папке + os.replace, читатель видит либо старый, либо новый файл целиком.
+"""
+
+import os
+import tempfile
+from typing import Union
+
+# Права новых файлов как у open(): 0666 с учётом umask (mkstemp создаёт 0600 — vMix по сети и веб-сервер
+# под другим пользователем не смогли бы их прочитать). umask читается один раз при импорте
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+
+def atomic_write(path: str, data: Union[str, bytes], mode: int = FILE_MODE):
+    """Запись data (str — в UTF-8) в path через временный файл с правами mode"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
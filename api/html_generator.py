@@ -5,38 +5,41 @@
 Фасад, объединяющий специализированные генераторы
 """
 
+from importlib import import_module
 from typing import Dict, List
 import logging
 
-from .html_scoreboard import ScoreboardGenerator
-from .html_scoreboard_full import ScoreboardFullGenerator
-from .html_introduction import IntroductionGenerator
-from .html_intro_player import IntroPlayerGenerator
-from .html_vs import VSGenerator
-from .html_winner import WinnerGenerator
-from .html_schedule import ScheduleGenerator
-from .html_round_robin import RoundRobinGenerator
-from .html_elimination import EliminationGenerator
-
 logger = logging.getLogger(__name__)
 
+# Атрибут фасада -> (модуль, класс). Модули импортируются при первом обращении,
+# чтобы старт воркера не тянул все генераторы
+_GENERATORS = {
+    "_scoreboard": (".html_scoreboard", "ScoreboardGenerator"),
+    "_scoreboard_full": (".html_scoreboard_full", "ScoreboardFullGenerator"),
+    "_introduction": (".html_introduction", "IntroductionGenerator"),
+    "_intro_player": (".html_intro_player", "IntroPlayerGenerator"),
+    "_vs": (".html_vs", "VSGenerator"),
+    "_winner": (".html_winner", "WinnerGenerator"),
+    "_schedule": (".html_schedule", "ScheduleGenerator"),
+    "_round_robin": (".html_round_robin", "RoundRobinGenerator"),
+    "_elimination": (".html_elimination", "EliminationGenerator"),
+}
+
 
 class HTMLGenerator:
     """
     Главный генератор HTML страниц для vMix.
-    Делегирует работу специализированным генераторам.
+    Делегирует работу специализированным генераторам (создаются при первом использовании).
     """
 
-    def __init__(self):
-        self._scoreboard = ScoreboardGenerator()
-        self._scoreboard_full = ScoreboardFullGenerator()
-        self._introduction = IntroductionGenerator()
-        self._intro_player = IntroPlayerGenerator()
-        self._vs = VSGenerator()
-        self._winner = WinnerGenerator()
-        self._schedule = ScheduleGenerator()
-        self._round_robin = RoundRobinGenerator()
-        self._elimination = EliminationGenerator()
+    def __getattr__(self, name):
+        spec = _GENERATORS.get(name)
+        if spec is None:
+            raise AttributeError(name)
+        module_name, class_name = spec
+        generator = getattr(import_module(module_name, __package__), class_name)()
+        setattr(self, name, generator)
+        return generator
 
     # === Scoreboard методы ===
 
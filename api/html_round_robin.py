@@ -4,10 +4,10 @@
 Генератор HTML для Round Robin (групповых таблиц)
 """
 
-from typing import Dict, List, Optional
+from typing import Dict
 from .html_base import HTMLBaseGenerator
-import hashlib
-import json
+from .draw_cache import draw_key
+from .round_robin_standings import RoundRobinGroup, parse_group
 import logging
 
 logger = logging.getLogger(__name__)
@@ -31,35 +31,13 @@ class RoundRobinGenerator(HTMLBaseGenerator):
         if not rr_data or "RoundRobin" not in rr_data:
             return {"error": "Неверные данные групповой таблицы", "matches": {}, "standings": []}
 
-        group_data = rr_data["RoundRobin"]
-        participants = self._extract_participants(group_data)
-        matches_matrix = self._extract_matches_matrix(group_data, len(participants))
-        standings = self._extract_standings(group_data)
-
-        # Проверяем, все ли матчи сыграны
-        non_bye_count = sum(1 for p in participants if not p.get("is_bye"))
-        expected_cells = non_bye_count * (non_bye_count - 1)
-        played_cells = sum(1 for v in matches_matrix.values() if v.get("has_result"))
-        all_played = (expected_cells > 0 and played_cells >= expected_cells)
-
-        # Собираем standings с очками и местами
-        standings_out = []
-        for p in participants:
-            standings_out.append({
-                "points": self._get_participant_points(p, standings),
-                "place": self._get_participant_place(p, standings, all_played)
-            })
-
-        # Версия для определения изменений
-        data_str = json.dumps({"m": matches_matrix, "s": standings_out}, sort_keys=True, default=str)
-        version = hashlib.md5(data_str.encode()).hexdigest()[:8]
-
+        group = parse_group(rr_data["RoundRobin"], draw_key(tournament_data, class_id, "round_robin", draw_index))
         return {
             "class_id": class_id,
             "draw_index": draw_index,
-            "matches": matches_matrix,
-            "standings": standings_out,
-            "version": version
+            "matches": group.matches,
+            "standings": group.standings_out(),
+            "version": group.version
         }
 
     def generate_round_robin_html(
@@ -82,39 +60,28 @@ class RoundRobinGenerator(HTMLBaseGenerator):
         if not rr_data or "RoundRobin" not in rr_data:
             return self._generate_empty_html("Неверные данные групповой таблицы")
 
-        group_data = rr_data["RoundRobin"]
         class_name = (xml_type_info.get("class_name", "Категория")).upper()
         group_name = (xml_type_info.get("group_name", "Группа")).upper()
 
-        participants = self._extract_participants(group_data)
-        matches_matrix = self._extract_matches_matrix(group_data, len(participants))
-        standings = self._extract_standings(group_data)
-
-        # Проверяем, все ли матчи сыграны
-        non_bye_count = sum(1 for p in participants if not p.get("is_bye"))
-        expected_cells = non_bye_count * (non_bye_count - 1)
-        played_cells = sum(1 for v in matches_matrix.values() if v.get("has_result"))
-        all_played = (expected_cells > 0 and played_cells >= expected_cells)
-
         return self._render_html(
-            class_name, group_name, participants, matches_matrix, standings,
-            tournament_id, class_id, draw_index, all_played
+            class_name, group_name,
+            parse_group(rr_data["RoundRobin"], draw_key(tournament_data, class_id, "round_robin", draw_index)),
+            tournament_id, class_id, draw_index
         )
 
     def _render_html(
         self,
         class_name: str,
         group_name: str,
-        participants: List[Dict],
-        matches_matrix: Dict,
-        standings: List[Dict],
+        group: RoundRobinGroup,
         tournament_id: str = None,
         class_id: str = None,
-        draw_index: int = 0,
-        all_played: bool = False
+        draw_index: int = 0
     ) -> str:
         """Рендерит HTML round robin таблицы с адаптивным масштабированием"""
         
+        participants = group.participants
+        matches_matrix = group.matches
         num_participants = len(participants)
         
         # FHD базовые размеры (3/4 экрана = ~1440x810)
@@ -170,8 +137,8 @@ class RoundRobinGenerator(HTMLBaseGenerator):
 
         # Строки участников
         for i, participant in enumerate(participants):
-            place = self._get_participant_place(participant, standings, all_played)
-            points = self._get_participant_points(participant, standings)
+            place = group.place(participant)
+            points = group.points(participant)
             short_name = (participant.get("short_name", " ")).upper()
             participant_id = participant.get("participant_id", "")
 
@@ -242,143 +209,3 @@ class RoundRobinGenerator(HTMLBaseGenerator):
     <script src="/static/js/round_robin.js"></script>
 </body>
 </html>'''
-
-    def _extract_participants(self, group_data: Dict) -> List[Dict]:
-        """Извлекает участников из групповых данных"""
-        participants = []
-
-        for row in group_data.get("Pool", []):
-            if not isinstance(row, list):
-                continue
-            for cell in row:
-                if not isinstance(cell, dict):
-                    continue
-                if cell.get("CellType") == "ParticipantCell" and cell.get("ParticipantCell"):
-                    participant = self._parse_participant_cell(cell["ParticipantCell"], len(participants))
-                    if participant:
-                        participants.append(participant)
-
-        half = len(participants) // 2
-        return participants[:half] if half > 0 else participants
-
-    def _parse_participant_cell(self, cell: Dict, fallback_index: int) -> Optional[Dict]:
-        """Парсит ячейку участника"""
-        players = cell.get("Players", [])
-        if not isinstance(players, list):
-            return None
-
-        team_names = [p["Name"] for p in players if isinstance(p, dict) and p.get("Name")]
-        if not team_names:
-            return None
-
-        full_name = "/".join(team_names)
-        player_ids = [str(p["Id"]) for p in players if isinstance(p, dict) and p.get("Id")]
-
-        return {
-            "index": cell.get("Index", fallback_index),
-            "participant_id": cell.get("ParticipantId"),
-            "full_name": full_name,
-            "short_name": self.create_short_name(full_name) if full_name != "Bye" else "Bye",
-            "is_bye": full_name.upper() == "BYE",
-            "player_ids": player_ids
-        }
-
-    def _extract_matches_matrix(self, group_data: Dict, num_participants: int) -> Dict:
-        """Извлекает матчи в формате матрицы"""
-        matches_matrix = {}
-
-        for row_idx, row in enumerate(group_data.get("Pool", [])):
-            if not isinstance(row, list):
-                continue
-            for cell_idx, cell in enumerate(row):
-                if not isinstance(cell, dict):
-                    continue
-                if cell.get("CellType") == "MatchCell" and cell.get("MatchCell"):
-                    match_info = self._parse_match_cell(cell["MatchCell"])
-                    if row_idx != cell_idx:
-                        matches_matrix[f"{row_idx - 1}_{cell_idx - 1}"] = match_info
-
-        return matches_matrix
-
-    def _parse_match_cell(self, match_cell: Dict) -> Dict:
-        """Парсит ячейку матча"""
-        match_results = match_cell.get("MatchResults", {})
-        match_info = {
-            "has_result": bool(match_results.get("IsPlayed", False)),
-            "is_bye": False,
-            "score": "",
-            "sets": ""
-        }
-
-        if match_results.get("HasScore") and match_results.get("Score"):
-            score_data = match_results["Score"]
-            first_score = score_data.get("FirstParticipantScore", 0)
-            second_score = score_data.get("SecondParticipantScore", 0)
-            match_info["score"] = f"{first_score}-{second_score}"
-
-            detailed_scoring = score_data.get("DetailedScoring", [])
-            if detailed_scoring:
-                sets_parts = [f"{s.get('FirstParticipantScore', 0)}-{s.get('SecondParticipantScore', 0)}" 
-                              for s in detailed_scoring]
-                match_info["sets"] = " ".join(sets_parts)
-        else:
-            cancellation = match_results.get('CancellationStatus') or ''
-            if 'Won' in cancellation:
-                match_info["score"] = 'Won'
-            elif 'Lost' in cancellation:
-                match_info["score"] = 'Lost'
-
-        return match_info
-
-    def _extract_standings(self, group_data: Dict) -> List[Dict]:
-        """Извлекает турнирную таблицу"""
-        standings_data = group_data.get("Standings", [])
-        standings = []
-        fake_id_counter = 1000
-
-        for standing in standings_data:
-            if not isinstance(standing, dict):
-                continue
-
-            player_ids = []
-            for key in ['DoublesPlayer1Model', 'DoublesPlayer2Model']:
-                player = standing.get(key)
-                if isinstance(player, dict) and player.get('Id'):
-                    player_ids.append(str(player['Id']))
-                else:
-                    player_ids.append(str(fake_id_counter))
-                    fake_id_counter += 1
-
-            standings.append({
-                "participant_id": str(standing.get("ParticipantId", "")),
-                "standing": standing.get("Standing", 0),
-                "wins": standing.get("Wins", 0),
-                "match_points": standing.get("MatchPoints", 0),
-                "player_ids": player_ids
-            })
-
-        return standings
-
-    #def _get_participant_place(self, participant: Dict, standings: List[Dict]) -> str:
-    #    """Получает место участника"""
-    #    for standing in standings:
-    #        if set(standing.get("player_ids", [])) == set(participant.get("player_ids", [])):
-    #            return str(standing.get("standing", "-"))
-    #    return "-"
-        
-    def _get_participant_place(self, participant: Dict, standings: List[Dict], all_played: bool = False) -> str:
-        """Получает место участника. Показывает только если все матчи в группе сыграны."""
-        if not all_played:
-            return ""
-        for standing in standings:
-            if set(standing.get("player_ids", [])) == set(participant.get("player_ids", [])):
-                return str(standing.get("standing", ""))
-        return ""
-
-
-    def _get_participant_points(self, participant: Dict, standings: List[Dict]) -> str:
-        """Получает очки участника"""
-        for standing in standings:
-            if set(standing.get("player_ids", [])) == set(participant.get("player_ids", [])):
-                return str(standing.get("match_points", "-"))
-        return "-"
\ No newline at end of file
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Запись и воспроизведение кадров хаба live.rankedin.com.
+
+FrameRecorder пишет все входящие сообщения SignalR с временем получения в сжатый
+журнал (gzip, строка JSON на сообщение): заголовок {"format", "version", "started",
+"pid"}, далее [время, court_id, сообщение]. Каждый воркер пишет свой файл
+live_frames_<сеанс>_<pid>.jsonl.gz; replay_frames сливает журналы сеанса по времени
+и отдаёт сообщения в deliver(court_id, message) в исходном темпе, ускоренно (speed=N)
+или без пауз (speed=0) — без сети. Читаются и записи tools/rankedin_ws.py ([время, сообщение]).
+"""
+
+import gzip
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+LOG_FORMAT = "mixranker-live-frames"
+LOG_VERSION = 1
+
+PROTOCOL_SEPARATOR = "\x1e"
+
+# Каталог журналов по умолчанию и интервал сброса буфера gzip на диск (секунды)
+DEFAULT_RECORD_DIR = os.path.join("logs", "live_frames")
+FLUSH_INTERVAL = 5.0
+
+
+def message_court(message: str) -> Optional[int]:
+    """courtId первого события сообщения, None — служебное сообщение (ping и т.п.)"""
+    for frame in message.split(PROTOCOL_SEPARATOR):
+        if not frame.strip():
+            continue
+        try:
+            args = json.loads(frame).get("arguments") or []
+        except (json.JSONDecodeError, AttributeError):
+            continue
+        first = args[0] if args else None
+        if isinstance(first, list) and first and isinstance(first[0], dict):
+            return first[0].get("courtId")
+        if isinstance(first, dict):
+            return first.get("courtId")
+    return None
+
+
+class FrameRecorder:
+    """Запись входящих кадров хаба в сжатый журнал (один файл на процесс)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._file = None
+        self._last_flush = 0.0
+        self.path: Optional[str] = None
+        self.started: Optional[float] = None
+        self.frames = 0
+
+    @property
+    def active(self) -> bool:
+        return self._file is not None
+
+    def start(self, directory: str = DEFAULT_RECORD_DIR, session: Optional[float] = None) -> str:
+        """
+        Начало записи в новый файл каталога directory; возвращает путь.
+        session — время начала общего сеанса записи: файлы воркеров сеанса получают одно имя до pid.
+        """
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.fromtimestamp(session) if session else datetime.now()
+        path = os.path.join(directory, f"live_frames_{stamp:%Y%m%d_%H%M%S}_{os.getpid()}.jsonl.gz")
+        with self._lock:
+            self._close()
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+            self.path, self.started, self.frames = path, time.time(), 0
+            self._last_flush = self.started
+            self._file.write(json.dumps({"format": LOG_FORMAT, "version": LOG_VERSION,
+                                         "started": self.started, "pid": os.getpid()}) + "\n")
+        logger.info(f"Запись live-кадров: {path}")
+        return path
+
+    def write(self, court_id: int, message: str):
+        """Запись одного сообщения WebSocket (может содержать несколько кадров SignalR)"""
+        if self._file is None:
+            return
+        now = time.time()
+        line = json.dumps([round(now, 3), court_id, message], ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + "\n")
+            self.frames += 1
+            if now - self._last_flush >= FLUSH_INTERVAL:
+                self._file.flush()
+                self._last_flush = now
+
+    def stop(self) -> Dict:
+        """Остановка записи; возвращает итог"""
+        with self._lock:
+            self._close()
+            status = self._status()
+        if status["path"]:
+            logger.info(f"Запись live-кадров остановлена: {status['path']}, сообщений {status['frames']}")
+        return status
+
+    def status(self) -> Dict:
+        with self._lock:
+            return self._status()
+
+    def _status(self) -> Dict:
+        return {"active": self._file is not None, "path": self.path, "started": self.started, "frames": self.frames}
+
+    def _close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception as e:
+                logger.error(f"Ошибка закрытия журнала live-кадров: {e}")
+            self._file = None
+
+
+def write_frames(path: str, frames: Iterable[Tuple[float, Optional[int], str]]) -> int:
+    """Журнал из готовых (время, court_id, сообщение) — для синтетических потоков; возвращает число сообщений"""
+    count = 0
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(json.dumps({"format": LOG_FORMAT, "version": LOG_VERSION, "started": None, "pid": None}) + "\n")
+        for ts, court_id, message in frames:
+            f.write(json.dumps([round(ts, 3), court_id, message], ensure_ascii=False, separators=(",", ":")) + "\n")
+            count += 1
+    return count
+
+
+def read_frames(path: str) -> Iterator[Tuple[float, Optional[int], str]]:
+    """(время, court_id, сообщение) из журнала; оборванный хвост (процесс убит) пропускается"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if not isinstance(item, list):
+                    continue
+                if len(item) == 3:
+                    yield float(item[0]), item[1], item[2]
+                elif len(item) == 2:
+                    yield float(item[0]), message_court(item[1]), item[1]
+        except (EOFError, OSError) as e:
+            logger.warning(f"Журнал {path} оборван: {e}")
+
+
+def merge_frames(paths: Sequence[str]) -> Iterator[Tuple[float, Optional[int], str]]:
+    """Кадры нескольких журналов (по файлу на воркер) в общем порядке времени"""
+    if len(paths) == 1:
+        return read_frames(paths[0])
+    return heapq.merge(*(read_frames(path) for path in paths), key=lambda item: item[0])
+
+
+def replay_frames(path: Union[str, Sequence[str]], deliver: Callable[[Optional[int], str], None], speed: float = 1.0,
+                  stop_event: Optional[threading.Event] = None) -> Dict:
+    """
+    Воспроизведение журнала (или журналов воркеров, слитых по времени):
+    deliver(court_id, message) для каждого сообщения.
+    speed — множитель темпа (1 — как записано, N — в N раз быстрее, 0 — без пауз).
+    Возвращает {messages, recorded_seconds, elapsed_seconds, speed, max_lag_seconds}:
+    max_lag — наибольшее отставание доставки от расписания (обработка не успевает).
+    """
+    first_ts = last_ts = None
+    messages = 0
+    max_lag = 0.0
+    start = time.perf_counter()
+
+    paths = [path] if isinstance(path, str) else list(path)
+    for ts, court_id, message in merge_frames(paths):
+        if first_ts is None:
+            first_ts = ts
+        last_ts = ts
+        if speed > 0:
+            delay = (ts - first_ts) / speed - (time.perf_counter() - start)
+            if delay > 0:
+                if stop_event is not None:
+                    stop_event.wait(delay)
+                else:
+                    time.sleep(delay)
+            else:
+                max_lag = max(max_lag, -delay)
+        if stop_event is not None and stop_event.is_set():
+            break
+        deliver(court_id, message)
+        messages += 1
+
+    return {
+        "messages": messages,
+        "recorded_seconds": round((last_ts - first_ts) if first_ts is not None else 0.0, 3),
+        "elapsed_seconds": round(time.perf_counter() - start, 3),
+        "speed": speed,
+        "max_lag_seconds": round(max_lag, 3),
+    }
+
+
+# Глобальный экземпляр записи
+frame_recorder = FrameRecorder()
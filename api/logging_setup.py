@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Неблокирующая настройка логирования.
+
+Корневой логгер пишет через QueueHandler в очередь; запись в файл (с ротацией)
+и в консоль выполняет отдельный поток QueueListener, так что потоки WebSocket,
+AutoRefresh и запросов не ждут диска. Горячие логгеры (live-WebSocket, запись
+счёта в БД, AutoRefresh, публикация XML) ограничены SamplingFilter: не больше
+rate записей уровня INFO/DEBUG в секунду на логгер, WARNING и выше проходят
+всегда; отброшенные записи считаются в log_records_suppressed_total.
+
+Каждый процесс (воркер gunicorn) пишет в свой файл vmix_ranker.<pid>.log:
+RotatingFileHandler в нескольких процессах на одном файле ротирует его наперегонки.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional, Sequence
+
+from .metrics import log_records_suppressed
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Логгеры, которые пишут на каждый кадр / цикл обновления
+HOT_PATH_LOGGERS = ("api.rankedin_live", "api.database", "api.auto_refresh", "api.xml_publisher")
+
+_listener: Optional[QueueListener] = None
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Ограничение частоты записей логгера (token bucket): rate записей в секунду,
+    всплеск до burst. Записи уровня WARNING и выше не ограничиваются.
+    Первая пропущенная после подавления запись сообщает, сколько было отброшено.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate * 2))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                self._suppressed += 1
+                log_records_suppressed.inc(record.name)
+                return False
+            self._tokens -= 1
+            suppressed, self._suppressed = self._suppressed, 0
+        if suppressed:
+            record.msg = f"{record.getMessage()} (пропущено записей: {suppressed})"
+            record.args = None
+        return True
+
+
+def process_log_filename(filename: str, pid: Optional[int] = None) -> str:
+    """Имя файла лога процесса: vmix_ranker.log → vmix_ranker.<pid>.log"""
+    base, ext = os.path.splitext(filename)
+    return f"{base}.{pid or os.getpid()}{ext}"
+
+
+def configure_logging(log_dir: str = 'logs', filename: str = 'vmix_ranker.log', level: str = 'INFO',
+                      max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5, sample_rate: float = 5.0,
+                      hot_loggers: Sequence[str] = HOT_PATH_LOGGERS) -> QueueListener:
+    """
+    Очередь + поток записи для корневого логгера. Повторный вызов возвращает уже
+    запущенный listener. Файл лога — свой у процесса (process_log_filename).
+    sample_rate <= 0 отключает ограничение горячих логгеров.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    os.makedirs(log_dir, exist_ok=True)
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler = RotatingFileHandler(os.path.join(log_dir, process_log_filename(filename)), maxBytes=max_bytes,
+                                       backupCount=backup_count, encoding='utf-8')
+    stream_handler = logging.StreamHandler()
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+
+    if sample_rate > 0:
+        for name in hot_loggers:
+            hot_logger = logging.getLogger(name)
+            if not any(isinstance(f, SamplingFilter) for f in hot_logger.filters):
+                hot_logger.addFilter(SamplingFilter(sample_rate))
+
+    _listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Дописать очередь и остановить поток записи"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
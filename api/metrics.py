@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Метрики производительности в текстовом формате Prometheus (без внешних зависимостей).
+Латентность HTTP по маршрутам, время и число запросов SQLite на запрос,
+латентность / ошибки / повторы запросов к rankedin по семействам эндпоинтов,
+частота кадров live-WebSocket по кортам, события live и записи live-счёта,
+длительность фаз AutoRefresh, записи логов, отброшенные ограничением частоты,
+и фазы старта воркера.
+Метрики живут в памяти процесса: у каждого воркера gunicorn свои.
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from flask import Response, g, request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+REFRESH_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Окно для расчёта частоты кадров live-WebSocket
+FRAME_RATE_WINDOW = 60.0
+
+_ID_SEGMENT_RE = re.compile(r"^\d+$")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Счётчик с метками"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, value: float = 1):
+        key = tuple(str(v) for v in labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        values = self.values()
+        if not values and not self.labelnames:
+            values = {(): 0}
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Гистограмма с метками (кумулятивные бакеты, как в Prometheus)"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # метки -> [счётчики бакетов (+Inf последним), сумма, количество]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        key = tuple(str(v) for v in labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            series[1] += value
+            series[2] += 1
+
+    def series(self) -> Dict[Tuple[str, ...], Tuple[List[int], float, int]]:
+        with self._lock:
+            return {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+
+    def quantile(self, q: float, counts: List[int], total: int) -> Optional[float]:
+        """Оценка квантиля по бакетам (линейная интерполяция внутри бакета)"""
+        if not total:
+            return None
+        rank = q * total
+        cumulative, lower = 0, 0.0
+        for i, bound in enumerate(self.buckets):
+            if cumulative + counts[i] >= rank:
+                inside = (rank - cumulative) / counts[i] if counts[i] else 0.0
+                return lower + (bound - lower) * inside
+            cumulative += counts[i]
+            lower = bound
+        return self.buckets[-1]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total_sum, count) in sorted(self.series().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                labels = _format_labels(self.labelnames, key, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total_sum)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class FrameRateMeter:
+    """Кадры live-WebSocket по кортам: счётчик и частота за последние FRAME_RATE_WINDOW секунд"""
+
+    def __init__(self, window: float = FRAME_RATE_WINDOW):
+        self.window = window
+        self.total = Counter("live_ws_frames_total", "Кадры SignalR, полученные от rankedin", ("court",))
+        self._recent: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, court_id):
+        court = str(court_id)
+        now = time.monotonic()
+        self.total.inc(court)
+        with self._lock:
+            recent = self._recent.setdefault(court, deque())
+            recent.append(now)
+            self._trim(recent, now)
+
+    def _trim(self, recent: deque, now: float):
+        while recent and now - recent[0] > self.window:
+            recent.popleft()
+
+    def rates(self) -> Dict[str, float]:
+        """Кадров в секунду по кортам"""
+        now = time.monotonic()
+        with self._lock:
+            for recent in self._recent.values():
+                self._trim(recent, now)
+            return {court: round(len(recent) / self.window, 3) for court, recent in self._recent.items() if recent}
+
+    def render(self) -> List[str]:
+        lines = self.total.render()
+        lines += ["# HELP live_ws_frame_rate Кадров в секунду за последнюю минуту",
+                  "# TYPE live_ws_frame_rate gauge"]
+        for court, rate in sorted(self.rates().items()):
+            lines.append(f'live_ws_frame_rate{{court="{court}"}} {_format_value(rate)}')
+        return lines
+
+
+class StartupTimings:
+    """Длительность фаз старта воркера, секунды (gauge: импорт модулей, init_database, create_app)"""
+
+    def __init__(self):
+        self._phases: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, seconds: float):
+        with self._lock:
+            self._phases[phase] = seconds
+
+    def values(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._phases)
+
+    def render(self) -> List[str]:
+        lines = ["# HELP app_startup_seconds Длительность фаз старта воркера",
+                 "# TYPE app_startup_seconds gauge"]
+        for phase, seconds in self.values().items():
+            lines.append(f'app_startup_seconds{{phase="{_escape(phase)}"}} {_format_value(float(seconds))}')
+        return lines
+
+
+http_latency = Histogram("http_request_duration_seconds", "Время обработки HTTP-запроса", ("route",))
+http_requests = Counter("http_requests_total", "HTTP-запросы", ("route", "method", "status"))
+http_db_time = Histogram("http_request_db_seconds", "Время в SQLite на HTTP-запрос", ("route",))
+http_db_queries = Histogram("http_request_db_queries", "Запросов к SQLite на HTTP-запрос", ("route",),
+                            buckets=QUERY_COUNT_BUCKETS)
+upstream_latency = Histogram("rankedin_request_duration_seconds", "Время запроса к rankedin", ("family",))
+upstream_errors = Counter("rankedin_request_errors_total", "Неудачные запросы к rankedin", ("family",))
+upstream_retries = Counter("rankedin_request_retries_total", "Повторы запросов к rankedin", ("family",))
+upstream_rejected = Counter("rankedin_circuit_rejections_total",
+                            "Запросы к rankedin, отклонённые открытым circuit breaker", ("family",))
+upstream_circuit_opened = Counter("rankedin_circuit_opened_total", "Переходы circuit breaker в open", ("family",))
+upstream_coalesced = Counter("rankedin_coalesced_total",
+                             "Запросы к rankedin, обслуженные чужим запросом (waited) или его свежим результатом (cached)",
+                             ("family", "kind"))
+refresh_phase = Histogram("auto_refresh_phase_duration_seconds", "Длительность фазы AutoRefresh", ("phase",),
+                          buckets=REFRESH_BUCKETS)
+db_lock_retries = Counter("sqlite_lock_retries_total", "Повторы из-за блокировки SQLite (database is locked)")
+live_frames = FrameRateMeter()
+live_events = Counter("live_ws_events_total", "События live-WebSocket (update / action) по результату обработки",
+                      ("kind", "result"))
+live_score_writes = Counter("live_score_writes_total", "Записи live-счёта в courts_data", ("result",))
+log_records_suppressed = Counter("log_records_suppressed_total", "Записи логов, отброшенные ограничением частоты",
+                                 ("logger",))
+change_log_writes = Counter("change_log_writes_total", "Записи журнала изменений (change_log) по виду темы", ("kind",))
+change_feed_responses = Counter("change_feed_responses_total", "Ответы ленты изменений /api/changes",
+                                ("mode", "result"))
+event_bus_events = Counter("event_bus_events_total",
+                           "События журнала, полученные шиной воркера: от своего воркера (local) или чужого (remote)",
+                           ("origin",))
+db_maintenance_runs = Counter("db_maintenance_runs_total", "Запуски задач обслуживания SQLite по результату",
+                              ("task", "result"))
+startup_timings = StartupTimings()
+
+_METRICS = (http_latency, http_requests, http_db_time, http_db_queries, db_lock_retries,
+            upstream_latency, upstream_errors, upstream_retries, upstream_rejected, upstream_circuit_opened,
+            upstream_coalesced,
+            refresh_phase, live_frames,
+            live_events, live_score_writes, log_records_suppressed, change_log_writes, change_feed_responses,
+            event_bus_events, db_maintenance_runs, startup_timings)
+
+
+def endpoint_family(url: str) -> str:
+    """Семейство эндпоинта rankedin: путь без версии API, id и суффикса Async"""
+    segments = [s for s in urlparse(url).path.split("/") if s and s not in ("api", "v1")]
+    family = []
+    for segment in segments:
+        if _ID_SEGMENT_RE.match(segment):
+            family.append(":id")
+        else:
+            family.append(segment[:-5] if segment.endswith("Async") else segment)
+    return "/".join(family).lower() or "root"
+
+
+def observe_upstream(url: str, started: float, error: bool = False):
+    """Завершённый запрос к rankedin (started — time.perf_counter() до запроса)"""
+    family = endpoint_family(url)
+    upstream_latency.observe(time.perf_counter() - started, family)
+    if error:
+        upstream_errors.inc(family)
+
+
+def count_upstream_retry(url: str):
+    upstream_retries.inc(endpoint_family(url))
+
+
+def count_upstream_rejected(family: str):
+    upstream_rejected.inc(family)
+
+
+def count_circuit_opened(family: str):
+    upstream_circuit_opened.inc(family)
+
+
+def count_upstream_coalesced(family: str, kind: str):
+    upstream_coalesced.inc(family, kind)
+
+
+def observe_refresh_phase(phase: str, started: float):
+    """Длительность фазы AutoRefresh (started — time.perf_counter() до фазы)"""
+    refresh_phase.observe(time.perf_counter() - started, phase)
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in _METRICS:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+def _histogram_summary(histogram: Histogram, scale: float = 1000.0, digits: int = 1) -> Dict[str, Dict]:
+    summary = {}
+    for key, (counts, total_sum, count) in histogram.series().items():
+        p95 = histogram.quantile(0.95, counts, count)
+        summary["|".join(key)] = {
+            "count": count,
+            "avg": round(total_sum / count * scale, digits) if count else 0,
+            "p95": round(p95 * scale, digits) if p95 is not None else None,
+        }
+    return summary
+
+
+def metrics_summary(top: int = 10) -> Dict:
+    """Сводка для /api/status: самые медленные маршруты (мс), rankedin, live-кадры и события, AutoRefresh (с), логи, журнал изменений"""
+    routes = _histogram_summary(http_latency)
+    db_time = _histogram_summary(http_db_time, digits=2)
+    db_queries = _histogram_summary(http_db_queries, scale=1.0)
+    for route, stats in routes.items():
+        stats["db_avg"] = db_time.get(route, {}).get("avg", 0)
+        stats["queries_avg"] = db_queries.get(route, {}).get("avg", 0)
+    slowest = dict(sorted(routes.items(), key=lambda item: item[1]["p95"] or 0, reverse=True)[:top])
+
+    errors = {k[0]: v for k, v in upstream_errors.values().items()}
+    retries = {k[0]: v for k, v in upstream_retries.values().items()}
+    rejected = {k[0]: v for k, v in upstream_rejected.values().items()}
+    coalesced: Dict[str, float] = {}
+    for (family, _kind), value in upstream_coalesced.values().items():
+        coalesced[family] = coalesced.get(family, 0) + value
+    upstream = _histogram_summary(upstream_latency)
+    for family in list(rejected) + list(coalesced):
+        upstream.setdefault(family, {"count": 0, "avg": 0, "p95": None})
+    for family, stats in upstream.items():
+        stats["errors"] = int(errors.get(family, 0))
+        stats["retries"] = int(retries.get(family, 0))
+        stats["rejected"] = int(rejected.get(family, 0))
+        stats["coalesced"] = int(coalesced.get(family, 0))
+
+    return {
+        "http_slowest_routes_ms": slowest,
+        "rankedin_ms": upstream,
+        "sqlite_lock_retries": int(db_lock_retries.values().get((), 0)),
+        "live_ws_frame_rate": live_frames.rates(),
+        "live_ws_events": {"|".join(k): int(v) for k, v in live_events.values().items()},
+        "live_score_writes": {k[0]: int(v) for k, v in live_score_writes.values().items()},
+        "log_records_suppressed": {k[0]: int(v) for k, v in log_records_suppressed.values().items()},
+        "change_log_writes": {k[0]: int(v) for k, v in change_log_writes.values().items()},
+        "change_feed_responses": {"|".join(k): int(v) for k, v in change_feed_responses.values().items()},
+        "event_bus_events": {k[0]: int(v) for k, v in event_bus_events.values().items()},
+        "startup_ms": {phase: round(seconds * 1000, 1) for phase, seconds in startup_timings.values().items()},
+        "auto_refresh_phases_s": _histogram_summary(refresh_phase, scale=1.0, digits=2),
+    }
+
+
+def register_metrics(app):
+    """Замер HTTP-запросов и эндпоинт /metrics"""
+
+    @app.before_request
+    def _start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _observe_request(response):
+        started = g.get("request_started")
+        if started is None:
+            return response
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        http_latency.observe(time.perf_counter() - started, route)
+        http_requests.inc(route, request.method, response.status_code)
+        scope = g.get("db_scope")
+        if scope is not None:
+            http_db_time.observe(scope.query_time, route)
+            http_db_queries.observe(scope.query_count, route)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Производные фото участников.
+Загрузка (байты файла + кадрирование) передаётся в пул потоков: там собирается
+мастер-PNG (1500×2048) и из него строятся варианты thumb (дашборды), medium
+(табло, VS) и full (представление, победитель) в AVIF (если поддерживается Pillow),
+WebP и PNG — поток запроса изображение не обрабатывает.
+Имена файлов содержат хэш мастер-файла, поэтому URL /photos/<id>_<вариант>_<хэш>
+неизменяемы и отдаются с долгим кэшем; формат выбирается по заголовку Accept.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .database import execute_with_retry
+from .file_utils import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Папка мастер-фото — upload_folder приложения (configure_photo_dir); производные — в её подпапке
+PHOTO_DERIVED_SUBDIR = 'derived'
+
+# Размер мастер-PNG: холст, на который кладётся кадрированная загрузка
+PHOTO_MASTER_SIZE = (1500, 2048)
+
+# Ширина варианта; высота — по пропорциям мастера
+PHOTO_VARIANTS = {
+    "thumb": 240,
+    "medium": 750,
+    "full": 1500,
+}
+
+PHOTO_CACHE_MAX_AGE = 365 * 24 * 3600
+PHOTO_WORKERS = 2
+
+_FORMAT_MIMETYPES = {
+    "avif": "image/avif",
+    "webp": "image/webp",
+    "png": "image/png",
+}
+_SAVE_OPTIONS = {
+    "avif": {"quality": 60},
+    "webp": {"quality": 82, "method": 4},
+    "png": {"optimize": True},
+}
+_VARIANT_NAME_RE = re.compile(r"^(\d+)_(thumb|medium|full)_([0-9a-f]{12})$")
+
+_upload_dir: Optional[str] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_in_flight = set()
+# Загрузки, ждущие сборки мастера: participant_id -> (байты файла, (crop_x, crop_y, crop_scale), photo_url)
+_pending_uploads: Dict[int, Tuple[bytes, Tuple[float, float, float], str]] = {}
+_formats: Optional[List[str]] = None
+
+
+def configure_photo_dir(upload_dir: str):
+    """Папка загрузки фото (upload_folder блюпринта турниров); путь фиксируется абсолютным"""
+    global _upload_dir
+    _upload_dir = os.path.abspath(upload_dir)
+
+
+def get_photo_upload_dir() -> str:
+    if _upload_dir is None:
+        raise RuntimeError("Папка фото не настроена: вызовите configure_photo_dir()")
+    return _upload_dir
+
+
+def get_photo_derived_dir() -> str:
+    return os.path.join(get_photo_upload_dir(), PHOTO_DERIVED_SUBDIR)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Пул потоков для генерации производных (создаётся при первой загрузке фото)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PHOTO_WORKERS, thread_name_prefix="photo")
+        return _executor
+
+
+def get_photo_formats() -> List[str]:
+    """Форматы производных в порядке предпочтения; PNG — для клиентов без WebP"""
+    global _formats
+    if _formats is None:
+        from PIL import features
+        _formats = [fmt for fmt in ("avif", "webp") if features.check(fmt)] + ["png"]
+    return _formats
+
+
+def get_photo_variant_url(participant_id: int, variant: str, photo_hash: str) -> str:
+    """Неизменяемый URL варианта фото"""
+    return f"/photos/{participant_id}_{variant}_{photo_hash}"
+
+
+def _master_path(participant_id: int) -> str:
+    return os.path.join(get_photo_upload_dir(), f"{participant_id}.png")
+
+
+def _file_hash(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.md5(f.read()).hexdigest()[:12]
+
+
+def submit_photo_derivatives(participant_id: int, upload: Optional[bytes] = None,
+                             crop: Tuple[float, float, float] = (0.0, 0.0, 1.0), photo_url: str = "") -> bool:
+    """
+    Ставит в очередь пула сборку мастера из загрузки (upload — байты файла, crop — x, y, масштаб;
+    photo_url записывается участнику после сохранения мастера) и генерацию производных.
+    Повторная постановка участника, чья задача ещё идёт, не создаёт вторую задачу:
+    последняя загрузка будет обработана сразу после текущей.
+    """
+    with _executor_lock:
+        if upload is not None:
+            _pending_uploads[participant_id] = (upload, crop, photo_url)
+        if participant_id in _in_flight:
+            return False
+        _in_flight.add(participant_id)
+    _get_executor().submit(_run_job, participant_id)
+    return True
+
+
+def ensure_photo_derivatives(participant_id: int, photo_url: str):
+    """Фоновая догенерация для фото, загруженных до появления производных (без настроенной папки — ничего)"""
+    if photo_url and _upload_dir is not None and os.path.exists(_master_path(participant_id)):
+        submit_photo_derivatives(participant_id)
+
+
+def _run_job(participant_id: int):
+    try:
+        with _executor_lock:
+            upload = _pending_uploads.pop(participant_id, None)
+        if upload is not None:
+            save_photo_master(participant_id, *upload)
+        build_photo_derivatives(participant_id)
+    except Exception as e:
+        logger.error(f"Ошибка генерации производных фото {participant_id}: {e}")
+    finally:
+        with _executor_lock:
+            again = participant_id in _pending_uploads
+            if not again:
+                _in_flight.discard(participant_id)
+        if again:
+            _get_executor().submit(_run_job, participant_id)
+
+
+def compose_photo_master(upload: bytes, crop: Tuple[float, float, float]) -> bytes:
+    """Мастер-PNG: загрузка, масштабированная на crop_scale и положенная в (crop_x, crop_y) прозрачного холста"""
+    from PIL import Image
+
+    crop_x, crop_y, crop_scale = crop
+    with Image.open(io.BytesIO(upload)) as source:
+        img = source.convert('RGBA') if source.mode != 'RGBA' else source.copy()
+    scaled_width, scaled_height = int(img.width * crop_scale), int(img.height * crop_scale)
+    if scaled_width > 0 and scaled_height > 0:
+        img = img.resize((scaled_width, scaled_height), Image.Resampling.LANCZOS)
+    canvas = Image.new('RGBA', PHOTO_MASTER_SIZE, (0, 0, 0, 0))
+    canvas.paste(img, (int(crop_x), int(crop_y)), img)
+    # Мастер сохраняется без optimize — сжатие делается в вариантах
+    buffer = io.BytesIO()
+    canvas.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def save_photo_master(participant_id: int, upload: bytes, crop: Tuple[float, float, float], photo_url: str):
+    """
+    Атомарная запись мастер-PNG из загрузки; файл, который Pillow не разобрал, сохраняется как есть.
+    Затем участнику записывается photo_url, а photo_hash сбрасывается до готовности производных.
+    """
+    try:
+        master = compose_photo_master(upload, crop)
+    except Exception as e:
+        logger.error(f"Фото {participant_id}: ошибка обработки изображения, сохраняется исходный файл: {e}")
+        master = upload
+    atomic_write(_master_path(participant_id), master)
+
+    def transaction(conn):
+        conn.cursor().execute('UPDATE participants SET photo_url = ?, photo_hash = NULL WHERE id = ?',
+                              (photo_url, participant_id))
+
+    execute_with_retry(transaction)
+    from .photo_utils import participant_directory
+    participant_directory.invalidate()
+
+
+def build_photo_derivatives(participant_id: int) -> Optional[str]:
+    """
+    Строит все варианты из мастер-PNG участника и записывает хэш в participants.photo_hash.
+    Возвращает хэш или None, если мастер-файла нет.
+    """
+    from PIL import Image
+
+    master = _master_path(participant_id)
+    if not os.path.exists(master):
+        return None
+
+    photo_hash = _file_hash(master)
+    derived_dir = get_photo_derived_dir()
+    os.makedirs(derived_dir, exist_ok=True)
+
+    with Image.open(master) as source:
+        img = source.convert('RGBA') if source.mode != 'RGBA' else source.copy()
+
+    for variant, width in PHOTO_VARIANTS.items():
+        if width < img.width:
+            resized = img.resize((width, round(img.height * width / img.width)), Image.Resampling.LANCZOS)
+        else:
+            resized = img
+        for fmt in get_photo_formats():
+            path = os.path.join(derived_dir, f"{participant_id}_{variant}_{photo_hash}.{fmt}")
+            if not os.path.exists(path):
+                _save_atomic(resized, path, fmt)
+
+    # Пока генерировали, могли загрузить новое фото — его хэш запишет следующая задача
+    if _file_hash(master) != photo_hash:
+        return None
+
+    def transaction(conn):
+        conn.cursor().execute('UPDATE participants SET photo_hash = ? WHERE id = ?', (photo_hash, participant_id))
+
+    execute_with_retry(transaction)
+    from .photo_utils import participant_directory
+    participant_directory.invalidate()
+    _remove_stale_derivatives(participant_id, photo_hash)
+    logger.info(f"Фото {participant_id}: производные готовы ({photo_hash})")
+    return photo_hash
+
+
+def _save_atomic(img, path: str, fmt: str):
+    """Сохранение через временный файл, чтобы не отдать недописанное изображение"""
+    buffer = io.BytesIO()
+    img.save(buffer, fmt.upper(), **_SAVE_OPTIONS[fmt])
+    atomic_write(path, buffer.getvalue())
+
+
+def _remove_stale_derivatives(participant_id: int, photo_hash: str):
+    """Удаляет производные предыдущих версий фото участника"""
+    prefix = f"{participant_id}_"
+    derived_dir = get_photo_derived_dir()
+    for filename in os.listdir(derived_dir):
+        if filename.startswith(prefix) and f"_{photo_hash}." not in filename:
+            try:
+                os.remove(os.path.join(derived_dir, filename))
+            except OSError:
+                pass
+
+
+def find_photo_variant(name: str, accept: str) -> Optional[Tuple[str, str]]:
+    """Файл варианта для URL /photos/<name> с учётом Accept: (имя файла, mimetype)"""
+    if not _VARIANT_NAME_RE.match(name):
+        return None
+    for fmt in get_photo_formats():
+        if fmt != "png" and _FORMAT_MIMETYPES[fmt] not in accept:
+            continue
+        filename = f"{name}.{fmt}"
+        if os.path.exists(os.path.join(get_photo_derived_dir(), filename)):
+            return filename, _FORMAT_MIMETYPES[fmt]
+    return None
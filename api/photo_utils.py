@@ -4,37 +4,138 @@
 
 import json
 import logging
-from typing import Dict, List
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
 
 from .database import execute_with_retry
+from .photo_pipeline import get_photo_variant_url, ensure_photo_derivatives
 
 logger = logging.getLogger(__name__)
 
+# Страховочный срок жизни справочника: изменения из других воркеров gunicorn
+# (где инвалидация не вызывалась) становятся видны не позже этого времени
+PARTICIPANT_DIRECTORY_TTL = 10.0
 
-def get_photo_urls_for_ids(player_ids: List[int]) -> Dict[int, str]:
+
+class ParticipantDirectory:
+    """
+    Справочник участников в памяти: id → photo_url, photo_hash, страна, имена.
+    Загружается одним запросом, страна разрешается один раз при загрузке
+    (info.country — ручная правка — важнее country_code из Rankedin).
+    Сбрасывается эндпоинтами загрузки фото/участников и конвейером производных фото.
+    """
+
+    def __init__(self, ttl: float = PARTICIPANT_DIRECTORY_TTL):
+        self.ttl = ttl
+        self._entries: Optional[Dict[int, Dict]] = None
+        self._loaded_at = 0.0
+        # Номер сброса: загрузка, начатая до invalidate(), не сохраняется как актуальная
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Сброс справочника; следующий запрос перечитает участников из БД"""
+        with self._lock:
+            self._entries = None
+            self._generation += 1
+
+    def snapshot(self) -> Dict[int, Dict]:
+        """Текущий справочник (перезагружается при сбросе или истечении TTL)"""
+        with self._lock:
+            if self._entries is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return self._entries
+            generation = self._generation
+
+        entries = self._load()
+        with self._lock:
+            if self._generation == generation:
+                self._entries = entries
+                self._loaded_at = time.monotonic()
+        return entries
+
+    def get_many(self, player_ids: Iterable[int]) -> Dict[int, Dict]:
+        """Записи справочника для набора id (отсутствующие пропускаются)"""
+        entries = self.snapshot()
+        result = {}
+        for pid in player_ids:
+            entry = entries.get(_participant_key(pid))
+            if entry:
+                result[_participant_key(pid)] = entry
+        return result
+
+    @staticmethod
+    def _load() -> Dict[int, Dict]:
+        def transaction(conn):
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, first_name, last_name, country_code, photo_url, photo_hash, info
+                FROM participants
+            ''')
+            return cursor.fetchall()
+
+        try:
+            rows = execute_with_retry(transaction)
+        except Exception as e:
+            logger.error(f"Ошибка загрузки справочника участников: {e}")
+            return {}
+
+        entries = {}
+        for pid, first_name, last_name, country_code, photo_url, photo_hash, info_raw in rows:
+            country = ''
+            if info_raw:
+                try:
+                    country = json.loads(info_raw).get('country', '')
+                except Exception:
+                    pass
+            entries[pid] = {
+                "first_name": first_name,
+                "last_name": last_name,
+                "country": country or country_code or '',
+                "photo_url": photo_url,
+                "photo_hash": photo_hash,
+            }
+        return entries
+
+
+participant_directory = ParticipantDirectory()
+
+
+def _participant_key(pid):
+    """id участника как в БД (INTEGER); live API иногда отдаёт id строкой"""
+    if isinstance(pid, str) and pid.isdigit():
+        return int(pid)
+    return pid
+
+
+def _resolve_photo_url(pid: int, entry: Dict, variant: Optional[str]) -> Optional[str]:
+    """URL фото участника: вариант, если производные готовы, иначе мастер (с постановкой догенерации)"""
+    photo_url = entry.get("photo_url")
+    if not photo_url:
+        return None
+    if variant:
+        if entry.get("photo_hash"):
+            return get_photo_variant_url(pid, variant, entry["photo_hash"])
+        ensure_photo_derivatives(pid, photo_url)
+    return photo_url
+
+
+def get_photo_urls_for_ids(player_ids: List[int], variant: Optional[str] = None) -> Dict[int, str]:
     """
     Получает photo_url для списка ID игроков.
+    Если указан variant (thumb / medium / full) и производные готовы — URL варианта,
+    иначе мастер-фото (производные при этом ставятся в очередь).
     Возвращает словарь {id: photo_url}
     """
     if not player_ids:
         return {}
 
-    def transaction(conn):
-        cursor = conn.cursor()
-        placeholders = ','.join('?' for _ in player_ids)
-        cursor.execute(f'''
-            SELECT id, photo_url
-            FROM participants
-            WHERE id IN ({placeholders})
-        ''', tuple(player_ids))
-
-        return {row[0]: row[1] for row in cursor.fetchall() if row[1]}
-
-    try:
-        return execute_with_retry(transaction)
-    except Exception as e:
-        logger.error(f"Ошибка получения photo_url: {e}")
-        return {}
+    result = {}
+    for pid, entry in participant_directory.get_many(player_ids).items():
+        photo_url = _resolve_photo_url(pid, entry, variant)
+        if photo_url:
+            result[pid] = photo_url
+    return result
 
 
 def extract_player_ids(court_data: Dict) -> tuple:
@@ -64,41 +165,12 @@ def enrich_players_with_photos(players: List[Dict], photo_map: Dict[int, str]) -
 
 def get_local_data_for_ids(player_ids: List[int]) -> Dict[int, Dict]:
     """
-    Возвращает {id: {"country": <код>}} из локальной БД.
+    Возвращает {id: {"country": <код>}} из справочника участников.
     Приоритет: info.country (ручная правка) > country_code (из Rankedin).
     """
     if not player_ids:
         return {}
-
-    def transaction(conn):
-        cursor = conn.cursor()
-        placeholders = ','.join('?' for _ in player_ids)
-        cursor.execute(f'''
-            SELECT id, country_code, info
-            FROM participants
-            WHERE id IN ({placeholders})
-        ''', tuple(player_ids))
-
-        result = {}
-        for row in cursor.fetchall():
-            pid, country_code, info_raw = row
-            country = ''
-            if info_raw:
-                try:
-                    info = json.loads(info_raw)
-                    country = info.get('country', '')
-                except Exception:
-                    pass
-            if not country:
-                country = country_code or ''
-            result[pid] = {'country': country}
-        return result
-
-    try:
-        return execute_with_retry(transaction)
-    except Exception as e:
-        logger.error(f"Ошибка получения данных участников: {e}")
-        return {}
+    return {pid: {'country': entry["country"]} for pid, entry in participant_directory.get_many(player_ids).items()}
 
 
 def enrich_players_with_country(players: List[Dict], local_data: Dict[int, Dict]) -> None:
@@ -114,28 +186,30 @@ def enrich_players_with_country(players: List[Dict], local_data: Dict[int, Dict]
                 player['countryCode'] = country
 
 
-def enrich_court_data_with_photos(court_data: Dict) -> Dict:
+def enrich_players(players: List[Dict], variant: Optional[str] = None) -> None:
+    """
+    Подставляет photo_url и countryCode из справочника участников на месте.
+    Работает для любого числа игроков (например, всех участников турнира) за один снимок справочника.
+    """
+    entries = participant_directory.snapshot()
+    for player in players:
+        pid = _participant_key(player.get('id'))
+        entry = entries.get(pid) if pid else None
+        if not entry:
+            continue
+        photo_url = _resolve_photo_url(pid, entry, variant)
+        if photo_url:
+            player['photo_url'] = photo_url
+        if entry["country"]:
+            player['countryCode'] = entry["country"]
+
+
+def enrich_court_data_with_photos(court_data: Dict, variant: Optional[str] = None) -> Dict:
     """
-    Обогащает данные корта фотографиями и страной участников из локальной БД.
+    Обогащает данные корта фотографиями (вариант variant) и страной участников из локальной БД.
     Возвращает модифицированный court_data.
     """
-    team1_ids, team2_ids = extract_player_ids(court_data)
-    all_ids = team1_ids + team2_ids
-
-    if not all_ids:
-        return court_data
-
-    photo_map = get_photo_urls_for_ids(all_ids)
-    local_data = get_local_data_for_ids(all_ids)
-
-    team1_players = court_data.get("first_participant", [])
-    team2_players = court_data.get("second_participant", [])
-
-    enrich_players_with_photos(team1_players, photo_map)
-    enrich_players_with_photos(team2_players, photo_map)
-    enrich_players_with_country(team1_players, local_data)
-    enrich_players_with_country(team2_players, local_data)
-
+    enrich_players(court_data.get("first_participant", []) + court_data.get("second_participant", []), variant)
     return court_data
 
 
@@ -145,24 +219,30 @@ def get_participant_photo_url(participant_id: int) -> str:
     return photos.get(participant_id, "")
 
 
-def get_participant_info(participant_id: int) -> Dict:
-    """Получает полную информацию об участнике"""
+def get_participant_info(participant_id: int, variant: Optional[str] = None) -> Dict:
+    """Получает полную информацию об участнике (photo_url — вариант variant, если готов)"""
     def transaction(conn):
         cursor = conn.cursor()
         cursor.execute('''
-            SELECT id, first_name, last_name, country_code, photo_url, info
+            SELECT id, first_name, last_name, country_code, photo_url, info, photo_hash
             FROM participants
             WHERE id = ?
         ''', (participant_id,))
 
         row = cursor.fetchone()
         if row:
+            photo_url = row[4]
+            if variant and photo_url:
+                if row[6]:
+                    photo_url = get_photo_variant_url(row[0], variant, row[6])
+                else:
+                    ensure_photo_derivatives(row[0], photo_url)
             return {
                 "id": row[0],
                 "firstName": row[1],
                 "lastName": row[2],
                 "countryCode": row[3],
-                "photo_url": row[4],
+                "photo_url": photo_url,
                 "info": row[5]
             }
         return None
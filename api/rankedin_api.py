@@ -4,6 +4,7 @@
 
 from .rankedin_api_base import RankedinAPI as BaseAPI
 from .score_parser import extract_players, parse_detailed_result
+from .xml_catalog import build_xml_data_types
 from typing import Dict, List, Optional
 from datetime import datetime
 import logging
@@ -163,6 +164,13 @@ class RankedinAPI(BaseAPI):
 
     # === DRAWS ===
     def get_all_draws_for_class(self, class_id: str) -> Dict[str, List[Dict]]:
+        """
+        Все сетки категории; одновременные загрузки одной категории объединяются
+        (один перебор стадий на всех вызывающих, см. SingleFlight).
+        """
+        return self.coalesce(("draws", str(class_id)), lambda: self._load_all_draws_for_class(class_id), "draws")
+
+    def _load_all_draws_for_class(self, class_id: str) -> Dict[str, List[Dict]]:
         """
         Загружает все сетки (draws) для одной категории турнира (class_id).
         Перебирает комбинации drawStage (0–2) × drawStrength (0–3), делая паузу 0.25 с
@@ -246,49 +254,8 @@ class RankedinAPI(BaseAPI):
 
     def get_xml_data_types(self, tournament_data: Dict) -> List[Dict]:
         """
-        Формирует список доступных типов отображения для данного турнира.
-        Каждый элемент описывает один источник данных и содержит id, name, type и доп. поля.
-        Типы элементов:
-          'tournament_table' (draw_type='round_robin')  — таблица кругового этапа,
-          'tournament_table' (draw_type='elimination')  — сетка плей-офф,
-          'schedule'                                    — расписание матчей (если есть корты/даты),
-          'court_score'                                 — табло конкретного корта.
-        Для elimination автоматически формируется читаемое название стадии
-        (Финал / Места N-M / Место N) на основе PlacesStartPos, PlacesEndPos и Consolation.
+        Формирует список доступных типов отображения для данного турнира (см. xml_catalog.build_xml_data_types).
+        Маршруты берут типы из каталога xml_catalog.get_display_catalog, который строится
+        один раз на версию данных турнира.
         """
-        types = []
-        draw_data = tournament_data.get("draw_data", {})
-        classes = tournament_data.get("classes", [])
-
-        for cid, cdata in draw_data.items():
-            if not isinstance(cdata, dict):
-                continue
-            info = cdata.get("class_info", {})
-            if not info:
-                info = next((c for c in classes if str(c.get("Id")) == str(cid)), {})
-            name = info.get("Name", f"Категория {cid}")
-
-            for i, rr in enumerate(cdata.get("round_robin", [])):
-                gname = "Групповой этап"
-                if isinstance(rr, dict) and rr.get("RoundRobin", {}).get("Name"):
-                    gname = rr["RoundRobin"]["Name"]
-                types.append({"id": f"table_{cid}_rr_{i}", "name": f"{name} - {gname}", "type": "tournament_table", "class_id": cid, "class_name": name, "draw_type": "round_robin", "draw_index": i, "group_name": gname})
-
-            for i, el in enumerate(cdata.get("elimination", [])):
-                sname = "Плей-офф"
-                if isinstance(el, dict) and el.get("Elimination"):
-                    e = el["Elimination"]
-                    ps, pe, c = e.get("PlacesStartPos", 1), e.get("PlacesEndPos", 1), e.get("Consolation", 0)
-                    sname = f"Места {ps}-{pe}" if ps != pe else f"Место {ps}" if c else ("Финал" if ps == 1 and pe == 1 else f"Места 1-{pe}")
-                types.append({"id": f"table_{cid}_elim_{i}", "name": f"{name} - {sname}", "type": "tournament_table", "class_id": cid, "class_name": name, "draw_type": "elimination", "draw_index": i, "stage_name": sname})
-
-        if tournament_data.get("court_usage") or tournament_data.get("dates"):
-            types.append({"id": "schedule", "name": "Расписание матчей", "type": "schedule"})
-
-        for court in tournament_data.get("courts", []):
-            if isinstance(court, dict) and court.get("Item1"):
-                court_id = court['Item1']
-                court_name = court.get('Item2', f'Корт {court_id}')
-                types.append({"id": f"court_{court_id}", "name": f"{court_name} - Счет", "type": "court_score", "court_id": court_id, "court_name": court.get("Item2", "")})
-
-        return types
\ No newline at end of file
+        return build_xml_data_types(tournament_data)
\ No newline at end of file
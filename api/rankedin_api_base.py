@@ -1,23 +1,264 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-"""Модуль для работы с API rankedin.com"""
+"""
+Модуль для работы с API rankedin.com.
 
+Запросы идут через circuit breaker по семействам эндпоинтов (metrics.endpoint_family):
+после BREAKER_FAILURE_THRESHOLD подряд неудач (таймаут, обрыв, 5xx, 429) семейство
+«открыто» BREAKER_OPEN_SECONDS секунд — запросы сразу возвращают None, затем один
+пробный запрос (half-open) решает, закрыть его или открыть снова.
+BackgroundRevalidator — фоновое обновление для режима stale-while-revalidate:
+обработчик запроса отдаёт последние известные данные, а свежие забирает пул потоков.
+SingleFlight объединяет одинаковые одновременные запросы (метод + URL + параметры):
+к rankedin уходит один, остальные ждут и получают копию его результата; успешный
+результат ещё SINGLE_FLIGHT_TTL секунд отдаётся без запроса.
+"""
+
+import copy
+import os
 import requests
 import logging
 import json
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, Hashable, List, Optional, Any, Tuple
+
+from .metrics import (count_circuit_opened, count_upstream_coalesced, count_upstream_rejected, count_upstream_retry,
+                      endpoint_family, observe_upstream)
 
 logger = logging.getLogger(__name__)
 
+# Адреса API rankedin; переопределяются окружением (например, для tools/fake_rankedin.py)
+API_BASE = os.environ.get('RANKEDIN_API_BASE') or "https://api.rankedin.com/v1"
+LIVE_API_BASE = os.environ.get('RANKEDIN_LIVE_API_BASE') or "https://live.rankedin.com/api/v1"
+
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_OPEN_SECONDS = 30.0
+
+# Фоновое обновление: потоков и минимальный интервал между обновлениями одного ключа (секунды)
+REVALIDATE_WORKERS = 2
+REVALIDATE_MIN_INTERVAL = 5.0
+
+# Сколько секунд успешный ответ переиспользуется одинаковыми запросами; предел числа сохранённых ответов
+SINGLE_FLIGHT_TTL = 1.0
+SINGLE_FLIGHT_MAX_RESULTS = 512
+
+
+class CircuitBreaker:
+    """Circuit breaker одного семейства эндпоинтов: closed → open → half_open → closed / open"""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, family: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 open_seconds: float = BREAKER_OPEN_SECONDS):
+        self.family = family
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Можно ли выполнить запрос; в half_open пропускается один пробный"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"rankedin {self.family}: circuit закрыт")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                count_circuit_opened(self.family)
+                logger.warning(f"rankedin {self.family}: circuit открыт на {self.open_seconds:.0f}с "
+                               f"после {self.failures} неудач подряд")
+
+    def status(self) -> Dict:
+        with self._lock:
+            status = {"state": self.state, "failures": self.failures}
+            if self.state == self.OPEN:
+                status["retry_in"] = round(max(0.0, self.open_seconds - (time.monotonic() - self.opened_at)), 1)
+            return status
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(url: str) -> CircuitBreaker:
+    """Circuit breaker семейства эндпоинтов, к которому относится url"""
+    family = endpoint_family(url)
+    with _breakers_lock:
+        breaker = _breakers.get(family)
+        if breaker is None:
+            breaker = _breakers[family] = CircuitBreaker(family)
+        return breaker
+
+
+def circuit_status() -> Dict[str, Dict]:
+    """Состояние circuit breaker по семействам (для /api/status)"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.family: b.status() for b in breakers}
+
+
+def _is_upstream_failure(error: Exception) -> bool:
+    """Неудача, говорящая о проблемах rankedin (а не о неверном запросе)"""
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError, json.JSONDecodeError)):
+        return True
+    response = getattr(error, "response", None)
+    return response is None or response.status_code >= 500 or response.status_code == 429
+
+
+class BackgroundRevalidator:
+    """Фоновое обновление по ключу: одно задание на ключ, не чаще min_interval секунд"""
+
+    def __init__(self, workers: int = REVALIDATE_WORKERS, min_interval: float = REVALIDATE_MIN_INTERVAL):
+        self.workers = workers
+        self.min_interval = min_interval
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight = set()
+        # Время старта по ключу; хранится только для идущих и стартовавших за последние min_interval
+        self._last_started: Dict[Hashable, float] = {}
+        self._last_sweep = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _sweep(self, now: float):
+        """Удаляет ключи, у которых обновление завершено и min_interval истёк (под self._lock)"""
+        if now - self._last_sweep < self.min_interval:
+            return
+        self._last_sweep = now
+        expired = [key for key, started in self._last_started.items()
+                   if key not in self._in_flight and now - started >= self.min_interval]
+        for key in expired:
+            del self._last_started[key]
+
+    def schedule(self, key: Hashable, func: Callable[[], Any]) -> bool:
+        """Запланировать func(); False — по ключу уже идёт или недавно было обновление"""
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            if key in self._in_flight or now - self._last_started.get(key, float("-inf")) < self.min_interval:
+                return False
+            self._in_flight.add(key)
+            self._last_started[key] = now
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="revalidate")
+            executor = self._executor
+        executor.submit(self._run, key, func)
+        return True
+
+    def _run(self, key: Hashable, func: Callable[[], Any]):
+        try:
+            func()
+        except Exception as e:
+            logger.error(f"Фоновое обновление {key}: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(key)
+
+
+# Общий пул фонового обновления процесса
+revalidator = BackgroundRevalidator()
+
+
+class _Flight:
+    """Выполняющийся запрос: ожидающие ждут event и берут копию result"""
+
+    __slots__ = ("event", "result")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+
+class SingleFlight:
+    """Один запрос на ключ одновременно; результат делят все ожидающие и повторы в пределах ttl"""
+
+    def __init__(self, ttl: float = SINGLE_FLIGHT_TTL, max_results: int = SINGLE_FLIGHT_MAX_RESULTS):
+        self.ttl = ttl
+        self.max_results = max_results
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], Any], family: str = "") -> Any:
+        """
+        Результат func() для ключа. Каждый вызывающий получает свой объект (копию),
+        поэтому изменять результат безопасно. None (ошибка) не сохраняется на ttl.
+        """
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.ttl:
+                count_upstream_coalesced(family, "cached")
+                return copy.deepcopy(cached[1])
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.event.wait()
+            count_upstream_coalesced(family, "waited")
+            return copy.deepcopy(flight.result)
+
+        result = None
+        try:
+            result = func()
+            return result
+        finally:
+            # Снимок до того, как ведущий вызывающий получит результат и сможет его изменить
+            snapshot = copy.deepcopy(result)
+            with self._lock:
+                self._flights.pop(key, None)
+                if snapshot is not None:
+                    if len(self._results) >= self.max_results:
+                        self._purge()
+                    self._results[key] = (time.monotonic(), snapshot)
+            flight.result = snapshot
+            flight.event.set()
+
+    def _purge(self):
+        now = time.monotonic()
+        for key in [k for k, (stored, _) in self._results.items() if now - stored >= self.ttl]:
+            del self._results[key]
+        if len(self._results) >= self.max_results:
+            self._results.clear()
+
+
+# Объединение запросов общее для всех экземпляров RankedinAPI процесса
+single_flight = SingleFlight()
+
 
 class RankedinAPI:
     """Класс для работы с API rankedin.com"""
 
-    def __init__(self, timeout: int = 10):
-        self.api_base = "https://api.rankedin.com/v1"
-        self.live_api_base = "https://live.rankedin.com/api/v1"
+    def __init__(self, timeout: int = 10, api_base: str = None, live_api_base: str = None):
+        self.api_base = (api_base or API_BASE).rstrip('/')
+        self.live_api_base = (live_api_base or LIVE_API_BASE).rstrip('/')
         self.timeout = timeout
         self.session = requests.Session()
         self.session.headers.update({
@@ -27,35 +268,88 @@ class RankedinAPI:
         })
 
     def _make_request(self, url: str, method: str = 'GET', data: Dict = None, max_retries: int = 3) -> Optional[Dict]:
-        """Выполняет HTTP запрос с retry"""
+        """Выполняет HTTP запрос с retry; одинаковые одновременные запросы объединяются (SingleFlight)"""
+        key = (method.upper(), url, json.dumps(data, sort_keys=True) if data is not None else None)
+        return single_flight.do(key, lambda: self._request_with_retry(url, method, data, max_retries),
+                                endpoint_family(url))
+
+    def _request_with_retry(self, url: str, method: str, data: Optional[Dict], max_retries: int) -> Optional[Dict]:
+        """HTTP запрос с retry; при открытом circuit breaker сразу возвращает None"""
+        breaker = get_breaker(url)
         for attempt in range(max_retries):
+            if not breaker.allow():
+                count_upstream_rejected(breaker.family)
+                logger.debug(f"Запрос к {url} пропущен: circuit {breaker.family} открыт")
+                return None
+            started = time.perf_counter()
             try:
                 resp = self.session.post(url, json=data, timeout=self.timeout) if method.upper() == 'POST' else self.session.get(url, timeout=self.timeout)
                 resp.raise_for_status()
-                return resp.json()
+                result = resp.json()
+                observe_upstream(url, started)
+                breaker.record_success()
+                return result
             except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
-                if attempt < max_retries - 1:
+                observe_upstream(url, started, error=True)
+                breaker.record_failure()
+                if attempt < max_retries - 1 and breaker.state == CircuitBreaker.CLOSED:
+                    count_upstream_retry(url)
                     time.sleep((attempt + 1) * 2)
                 else:
                     logger.error(f"Ошибка запроса к {url}: {e}")
+                    return None
             except requests.exceptions.RequestException as e:
+                observe_upstream(url, started, error=True)
+                if _is_upstream_failure(e):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
                 logger.error(f"Ошибка запроса к {url}: {e}")
                 return None
             except json.JSONDecodeError as e:
+                observe_upstream(url, started, error=True)
+                breaker.record_failure()
                 logger.error(f"Ошибка JSON от {url}: {e}")
                 return None
         return None
 
     def _get(self, endpoint: str, params: Dict[str, Any]) -> Optional[Dict]:
-        """GET-запрос к API"""
+        """GET-запрос к API; одинаковые одновременные запросы объединяются (SingleFlight)"""
+        key = ("GET", f"{self.api_base}{endpoint}", json.dumps(params, sort_keys=True, default=str))
+        return single_flight.do(key, lambda: self._get_once(endpoint, params), endpoint_family(endpoint))
+
+    def _get_once(self, endpoint: str, params: Dict[str, Any]) -> Optional[Dict]:
+        """GET-запрос к API; при открытом circuit breaker сразу возвращает None"""
+        breaker = get_breaker(endpoint)
+        if not breaker.allow():
+            count_upstream_rejected(breaker.family)
+            logger.debug(f"GET {endpoint} пропущен: circuit {breaker.family} открыт")
+            return None
+        started = time.perf_counter()
         try:
             resp = self.session.get(f"{self.api_base}{endpoint}", params=params, timeout=self.timeout)
             resp.raise_for_status()
-            return resp.json()
+            result = resp.json()
+            observe_upstream(endpoint, started)
+            breaker.record_success()
+            return result
         except Exception as e:
+            observe_upstream(endpoint, started, error=True)
+            if _is_upstream_failure(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
             logger.error(f"GET {endpoint}: {e}")
             return None
 
+    def coalesce(self, key: Hashable, load: Callable[[], Any], family: str) -> Any:
+        """Объединение составной загрузки (несколько запросов) по ключу — как у одиночных запросов"""
+        return single_flight.do((self.api_base,) + tuple(key), load, family)
+
+    def revalidate(self, key: Hashable, refresh: Callable[[], Any]) -> bool:
+        """Stale-while-revalidate: вызывающий уже отдал сохранённые данные, refresh() выполнится в фоне"""
+        return revalidator.schedule(key, refresh)
+
     # === ОСНОВНЫЕ ЗАПРОСЫ ===
     def get_tournament_metadata(self, tournament_id: str) -> Optional[Dict]:
         return self._get("/metadata/GetFeatureMetadataAsync", {"feature": "Tournament", "id": tournament_id})
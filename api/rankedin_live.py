@@ -6,27 +6,34 @@ WebSocket клиент для live-счёта RankedIn (SignalR)
 """
 
 import json
+import os
 import time
 import threading
 import logging
-from typing import Dict, Optional, Callable, List
+from typing import Dict, Optional, Callable, List, Sequence, Union
 from datetime import datetime
 
 import requests
 import websocket
 
 from .score_parser import extract_players, parse_detailed_result
+from .metrics import live_events, live_frames, observe_upstream
+from .live_recorder import frame_recorder, replay_frames, DEFAULT_RECORD_DIR
+from .database import get_settings, save_settings
 
 logger = logging.getLogger(__name__)
 
-# Константы SignalR
-BASE_URL = "https://live.rankedin.com"
+# Константы SignalR; адрес переопределяется окружением (например, для tools/fake_rankedin.py)
+BASE_URL = (os.environ.get('RANKEDIN_LIVE_URL') or "https://live.rankedin.com").rstrip('/')
 HUB_PATH = "/scores"
 PROTOCOL_SEPARATOR = "\x1e"
 
 # Таймаут неактивности (секунды)
 INACTIVITY_TIMEOUT = 60
 
+# Общий для воркеров флаг записи кадров (таблица settings): {"active", "directory", "session"}
+RECORDING_SETTING = "liveRecording"
+
 
 class RankedinLiveClient:
     """WebSocket клиент для одного корта"""
@@ -51,14 +58,24 @@ class RankedinLiveClient:
             "Referer": f"{BASE_URL}/",
         }
         
+        started = time.perf_counter()
         try:
             resp = requests.post(url, headers=headers, timeout=10)
             resp.raise_for_status()
-            return resp.json()
+            result = resp.json()
+            observe_upstream(url, started)
+            return result
         except Exception as e:
+            observe_upstream(url, started, error=True)
             logger.error(f"Court {self.court_id}: negotiate failed: {e}")
             return None
     
+    def _receive(self, ws, message: str):
+        """Сообщение из сети: запись в журнал (если включена) и обработка"""
+        if frame_recorder.active:
+            frame_recorder.write(self.court_id, message)
+        self._on_message(ws, message)
+    
     def _on_message(self, ws, message: str):
         """Обработка входящих сообщений SignalR"""
         frames = message.split(PROTOCOL_SEPARATOR)
@@ -71,6 +88,7 @@ class RankedinLiveClient:
                 data = json.loads(frame)
             except json.JSONDecodeError:
                 continue
+            live_frames.mark(self.court_id)
             
             msg_type = data.get("type")
             
@@ -79,21 +97,8 @@ class RankedinLiveClient:
                 target = data.get("target")
                 args = data.get("arguments", [])
                 
-                # Логируем все входящие сообщения с сырыми данными
-                if target in ("ReceiveMatchUpdate", "ReceiveMatchAction"):
-                    # Извлекаем courtId из данных
-                    if args and len(args) > 0:
-                        first_arg = args[0]
-                        if isinstance(first_arg, list) and len(first_arg) > 0:
-                            incoming_court_id = first_arg[0].get("courtId") if isinstance(first_arg[0], dict) else "unknown"
-                        elif isinstance(first_arg, dict):
-                            incoming_court_id = first_arg.get("courtId", "unknown")
-                        else:
-                            incoming_court_id = "unknown"
-                    else:
-                        incoming_court_id = "no_args"
-                    
-                    logger.info(f"Court {self.court_id}: received {target}, incoming_courtId={incoming_court_id}, my_courtId={self.court_id}, match={incoming_court_id == self.court_id}")
+                # Поток событий считается в live_ws_events_total; здесь только DEBUG
+                logger.debug("Court %s: received %s", self.court_id, target)
                 
                 if target == "ReceiveMatchUpdate" and args:
                     # args[0] — это список обновлений
@@ -120,17 +125,15 @@ class RankedinLiveClient:
                 continue
                 
             update_court_id = update.get("courtId")
-            logger.debug(f"Court {self.court_id}: received update for court {update_court_id}")
+            logger.debug("Court %s: received update for court %s", self.court_id, update_court_id)
             
             if update_court_id != self.court_id:
-                logger.debug(f"Court {self.court_id}: skipping update for different court {update_court_id}")
+                logger.debug("Court %s: skipping update for different court %s", self.court_id, update_court_id)
+                live_events.inc("update", "other_court")
                 continue
             
-            logger.info(f"Court {self.court_id}: match update - score={update.get('score', {}).get('firstParticipantScore')}-{update.get('score', {}).get('secondParticipantScore')}, tiebreak={update.get('isTieBreak')}")
-            
             court_data = self._transform_update(update)
-            
-            logger.info(f"Court {self.court_id}: transformed data court_id={court_data.get('court_id')}")
+            live_events.inc("update", "received")
             
             if self.on_update:
                 self.on_update(court_data)
@@ -143,10 +146,12 @@ class RankedinLiveClient:
                 
             action_court_id = action.get("courtId")
             if action_court_id != self.court_id:
+                live_events.inc("action", "other_court")
                 continue
             
             action_type = action.get("action", "")
-            logger.info(f"Court {self.court_id}: match action: {action_type}")
+            logger.debug("Court %s: match action: %s", self.court_id, action_type)
+            live_events.inc("action", "received")
             
             # courtModel содержит полные данные о матче
             court_model = action.get("courtModel")
@@ -162,7 +167,7 @@ class RankedinLiveClient:
             serve = update.get("serve", {})
             
             court_id = update.get("courtId")
-            logger.debug(f"_transform_update: courtId from update = {court_id}")
+            logger.debug("_transform_update: courtId from update = %s", court_id)
             
             is_tiebreak = update.get("isTieBreak", False)
             is_super_tiebreak = update.get("isSuperTieBreak", False)
@@ -294,7 +299,7 @@ class RankedinLiveClient:
                 self._connect()
             return
         
-        ws_url = nego["url"].replace("https://", "wss://")
+        ws_url = nego["url"].replace("https://", "wss://").replace("http://", "ws://")
         access_token = nego["accessToken"]
         ws_full_url = f"{ws_url}&access_token={access_token}"
         
@@ -302,7 +307,7 @@ class RankedinLiveClient:
             ws_full_url,
             header={"Origin": BASE_URL},
             on_open=self._on_open,
-            on_message=self._on_message,
+            on_message=self._receive,
             on_error=self._on_error,
             on_close=self._on_close
         )
@@ -344,6 +349,8 @@ class RankedinLiveManager:
         self._update_callback: Optional[Callable[[str, Dict], None]] = None
         self._cleanup_thread: Optional[threading.Thread] = None
         self._running = False
+        # Сеанс общей записи, которому следует этот воркер (None — запись не по флагу)
+        self._recording_session: Optional[float] = None
     
     def start(self):
         """Запуск менеджера с фоновой очисткой"""
@@ -353,11 +360,18 @@ class RankedinLiveManager:
         self._cleanup_thread = threading.Thread(target=self._cleanup_loop, daemon=True)
         self._cleanup_thread.start()
         logger.info("LiveManager: started with auto-cleanup")
+        
+        # LIVE_RECORD_DIR — запись всех входящих кадров с момента старта
+        record_dir = os.environ.get('LIVE_RECORD_DIR')
+        if record_dir:
+            frame_recorder.start(record_dir)
+        self._sync_recording()
     
     def stop(self):
         """Остановка менеджера"""
         self._running = False
         self.unsubscribe_all()
+        frame_recorder.stop()
         logger.info("LiveManager: stopped")
     
     def _cleanup_loop(self):
@@ -365,6 +379,7 @@ class RankedinLiveManager:
         while self._running:
             time.sleep(10)  # Проверяем каждые 10 сек
             self._cleanup_inactive()
+            self._sync_recording()
     
     def _cleanup_inactive(self):
         """Отписка от неактивных кортов"""
@@ -388,12 +403,15 @@ class RankedinLiveManager:
         """Обработка обновления от корта"""
         # Используем court_id из данных, а не из параметра
         actual_court_id = court_data.get("court_id", court_id)
-        logger.info(f"_on_court_update: param_court_id={court_id}, data_court_id={actual_court_id}")
+        logger.debug("_on_court_update: param_court_id=%s, data_court_id=%s", court_id, actual_court_id)
         
         if self._update_callback:
             tournament_id = self._get_tournament_for_court(actual_court_id)
             if tournament_id:
                 self._update_callback(tournament_id, court_data)
+                live_events.inc("court_update", "delivered")
+            else:
+                live_events.inc("court_update", "no_tournament")
     
     def _get_tournament_for_court(self, court_id: int) -> Optional[str]:
         """Получение tournament_id для корта из БД"""
@@ -424,7 +442,7 @@ class RankedinLiveManager:
             self.last_access[court_id] = time.time()
             
             if court_id in self.clients:
-                logger.debug(f"Court {court_id}: already subscribed, refreshing")
+                logger.debug("Court %s: already subscribed, refreshing", court_id)
                 return True
             
             client = RankedinLiveClient(
@@ -470,6 +488,79 @@ class RankedinLiveManager:
         """Проверка подписки на корт"""
         with self._lock:
             return court_id in self.clients
+    
+    def start_recording(self, directory: str = DEFAULT_RECORD_DIR) -> str:
+        """
+        Запись всех входящих кадров хаба во всех воркерах: флаг пишется в settings,
+        этот воркер начинает сразу, остальные — при следующей проверке (до 10 с).
+        Возвращает путь файла этого воркера.
+        """
+        save_settings({RECORDING_SETTING: {"active": True, "directory": directory, "session": time.time()}})
+        self._sync_recording()
+        return frame_recorder.status()["path"]
+    
+    def stop_recording(self) -> Dict:
+        """Остановка записи кадров во всех воркерах; итог — по файлу этого воркера"""
+        save_settings({RECORDING_SETTING: {"active": False}})
+        self._recording_session = None
+        return frame_recorder.stop()
+    
+    def recording_status(self) -> Dict:
+        status = frame_recorder.status()
+        status["shared"] = self._recording_state()
+        return status
+    
+    @staticmethod
+    def _recording_state() -> Dict:
+        state = get_settings().get(RECORDING_SETTING)
+        return state if isinstance(state, dict) else {"active": False}
+    
+    def _sync_recording(self):
+        """Включение / выключение записи этого воркера по общему флагу"""
+        try:
+            state = self._recording_state()
+            if state.get("active"):
+                session = state.get("session")
+                if session != self._recording_session or not frame_recorder.active:
+                    frame_recorder.start(state.get("directory") or DEFAULT_RECORD_DIR, session)
+                    self._recording_session = session
+            elif self._recording_session is not None:
+                self._recording_session = None
+                frame_recorder.stop()
+        except Exception as e:
+            logger.error(f"LiveManager: recording sync failed: {e}")
+    
+    def replay(self, path: Union[str, Sequence[str]], speed: float = 1.0, stop_event: Optional[threading.Event] = None) -> Dict:
+        """
+        Воспроизведение журнала кадров (или журналов воркеров) без сети: сообщения проходят через
+        RankedinLiveClient._on_message и _on_court_update в callback обновлений,
+        как при живом подключении. speed: 1 — темп записи, N — ускорение, 0 — без пауз.
+        """
+        clients: Dict[int, RankedinLiveClient] = {}
+        socket = _ReplaySocket()
+        
+        def deliver(court_id, message):
+            client = clients.get(court_id)
+            if client is None:
+                client = RankedinLiveClient(
+                    court_id,
+                    on_update=lambda data, cid=court_id: self._on_court_update(cid, data)
+                )
+                clients[court_id] = client
+            client._on_message(socket, message)
+        
+        logger.info(f"LiveManager: replay {path} (speed={speed})")
+        stats = replay_frames(path, deliver, speed, stop_event)
+        stats["courts"] = sum(1 for court_id in clients if court_id is not None)
+        logger.info(f"LiveManager: replay finished: {stats}")
+        return stats
+
+
+class _ReplaySocket:
+    """Заглушка WebSocket для воспроизведения: ответы на ping никуда не уходят"""
+    
+    def send(self, data):
+        pass
 
 
 # Глобальный экземпляр менеджера
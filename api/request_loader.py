@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Загрузчик данных в рамках одного HTTP-запроса (flask.g).
+Чтения турнира, корта и настроек корта мемоизируются на время запроса,
+все обращения к SQLite идут через одно соединение (database.begin_request_scope).
+Число запросов к БД и время в БД отдаются в заголовке X-DB-Stats —
+в режиме отладки или если клиент прислал заголовок X-Debug-DB.
+"""
+
+import copy
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from flask import g, has_request_context, request
+
+from .database import (
+    TOURNAMENT_FIELDS, begin_request_scope, end_request_scope,
+    get_court_data, get_court_has_referee, get_tournament_fields,
+)
+
+ALL_TOURNAMENT_FIELDS = tuple(TOURNAMENT_FIELDS) + ("matches_data",)
+
+
+class RequestLoader:
+    """Мемоизированные чтения данных для одного запроса"""
+
+    def __init__(self):
+        # tournament_id -> (загруженные поля, данные); None — турнира нет
+        self._tournaments: Dict[str, Optional[Tuple[Set[str], Dict[str, Any]]]] = {}
+        self._courts: Dict[Tuple[str, str], Dict] = {}
+        self._referee: Dict[Tuple[str, str], bool] = {}
+
+    def tournament(self, tournament_id: str, fields: Optional[Iterable[str]] = None) -> Optional[Dict]:
+        """Как get_tournament_fields; поля, уже прочитанные в этом запросе, повторно не загружаются"""
+        fields = tuple(fields) if fields else ALL_TOURNAMENT_FIELDS
+        if tournament_id in self._tournaments and self._tournaments[tournament_id] is None:
+            return None
+
+        loaded, data = self._tournaments.get(tournament_id) or (set(), {})
+        missing = [f for f in fields if f not in loaded]
+        if missing:
+            fresh = get_tournament_fields(tournament_id, missing)
+            if fresh is None:
+                self._tournaments[tournament_id] = None
+                return None
+            loaded.update(missing)
+            # Версия — самого раннего чтения: поля этого запроса не старше её (ключ кэша сеток)
+            if "data_version" in data:
+                fresh.pop("data_version", None)
+            data.update(fresh)
+            self._tournaments[tournament_id] = (loaded, data)
+
+        return {k: v for k, v in data.items() if k in ("tournament_id", "data_version") or k in fields}
+
+    def court(self, tournament_id: str, court_id: str) -> Dict:
+        """get_court_data; возвращается копия — страницы дополняют данные корта на месте"""
+        key = (tournament_id, str(court_id))
+        if key not in self._courts:
+            self._courts[key] = get_court_data(tournament_id, str(court_id))
+        return copy.deepcopy(self._courts[key])
+
+    def court_has_referee(self, tournament_id: str, court_id: str) -> bool:
+        key = (tournament_id, str(court_id))
+        if key not in self._referee:
+            self._referee[key] = get_court_has_referee(tournament_id, str(court_id))
+        return self._referee[key]
+
+
+def get_request_loader() -> RequestLoader:
+    """Загрузчик текущего запроса (вне запроса — новый, без общего кэша)"""
+    if not has_request_context():
+        return RequestLoader()
+    if "data_loader" not in g:
+        g.data_loader = RequestLoader()
+    return g.data_loader
+
+
+def register_request_loader(app):
+    """Подключает общее соединение БД на запрос и заголовок X-DB-Stats"""
+
+    @app.before_request
+    def _begin_db_scope():
+        g.db_scope = begin_request_scope()
+
+    @app.after_request
+    def _db_stats_header(response):
+        scope = g.get("db_scope")
+        if scope and (app.debug or "X-Debug-DB" in request.headers):
+            response.headers["X-DB-Stats"] = f"queries={scope.query_count}; time={scope.query_time * 1000:.2f}ms"
+        return response
+
+    @app.teardown_request
+    def _end_db_scope(exc):
+        end_request_scope()
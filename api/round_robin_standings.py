@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Разбор группы кругового этапа (RoundRobin из draw_data) для HTML, JSON и XML.
+Pool и Standings обходятся один раз: участники, матрица матчей, таблица с индексом
+«набор игроков → строка таблицы» и версия группы. Версия складывается из хэшей
+разобранных ячеек, а не из повторной сериализации результата.
+Разобранные группы переиспользуются генераторами и запросами, пока не сменилась версия данных турнира (draw_cache).
+"""
+
+import hashlib
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from .draw_cache import DrawKey, SourceCache
+from .html_base import HTMLBaseGenerator
+
+# Сколько разобранных групп держать в памяти процесса
+MAX_PARSED_GROUPS = 512
+
+# Первый фиктивный id игрока для строк таблицы без DoublesPlayerNModel
+_FAKE_PLAYER_ID_START = 1000
+
+
+class RoundRobinGroup:
+    """Разобранная группа; данные общие для всех генераторов — их нельзя изменять"""
+
+    def __init__(self, group_data: Dict):
+        self.source = group_data
+        # (строка, столбец, ячейка) в порядке обхода Pool
+        self.participant_cells: List[Tuple[int, int, Dict]] = []
+        self.match_cells: List[Tuple[int, int, Dict]] = []
+        for row_idx, row in enumerate(group_data.get("Pool") or []):
+            if not isinstance(row, list):
+                continue
+            for cell_idx, cell in enumerate(row):
+                if not isinstance(cell, dict):
+                    continue
+                cell_type = cell.get("CellType")
+                if cell_type == "ParticipantCell" and isinstance(cell.get("ParticipantCell"), dict) \
+                        and cell["ParticipantCell"]:
+                    self.participant_cells.append((row_idx, cell_idx, cell["ParticipantCell"]))
+                elif cell_type == "MatchCell" and isinstance(cell.get("MatchCell"), dict) and cell["MatchCell"]:
+                    self.match_cells.append((row_idx, cell_idx, cell["MatchCell"]))
+
+        self.participants = self._parse_participants()
+        self.matches: Dict[str, Dict] = {}
+        for row_idx, cell_idx, match_cell in self.match_cells:
+            if row_idx != cell_idx:
+                self.matches[f"{row_idx - 1}_{cell_idx - 1}"] = parse_match_cell(match_cell)
+
+        self.raw_standings = [s for s in group_data.get("Standings") or [] if isinstance(s, dict)]
+        self.standings = _parse_standings(self.raw_standings)
+        self._by_players: Dict[FrozenSet[str], Dict] = {}
+        for standing in self.standings:
+            self._by_players.setdefault(frozenset(standing["player_ids"]), standing)
+
+        non_bye_count = sum(1 for p in self.participants if not p.get("is_bye"))
+        expected_cells = non_bye_count * (non_bye_count - 1)
+        played_cells = sum(1 for v in self.matches.values() if v.get("has_result"))
+        self.all_played = expected_cells > 0 and played_cells >= expected_cells
+
+        self.version = self._compute_version()
+
+    def _parse_participants(self) -> List[Dict]:
+        """Участники строк таблицы: первая половина ячеек участников (вторая — заголовки столбцов)"""
+        participants = []
+        for _, _, cell in self.participant_cells:
+            participant = _parse_participant_cell(cell, len(participants))
+            if participant:
+                participants.append(participant)
+        half = len(participants) // 2
+        return participants[:half] if half > 0 else participants
+
+    def standing_for(self, participant: Dict) -> Optional[Dict]:
+        """Строка таблицы участника (по набору id игроков) или None"""
+        return self._by_players.get(frozenset(participant.get("player_ids", [])))
+
+    def points(self, participant: Dict) -> str:
+        standing = self.standing_for(participant)
+        return str(standing.get("match_points", "-")) if standing else "-"
+
+    def place(self, participant: Dict) -> str:
+        """Место показывается только когда сыграны все матчи группы"""
+        if not self.all_played:
+            return ""
+        standing = self.standing_for(participant)
+        return str(standing.get("standing", "")) if standing else ""
+
+    def standings_out(self) -> List[Dict]:
+        """Очки и место по строкам таблицы (в порядке participants)"""
+        return [{"points": self.points(p), "place": self.place(p)} for p in self.participants]
+
+    def _compute_version(self) -> str:
+        """Хэш разобранных ячеек матчей и итогов участников"""
+        digest = hashlib.md5()
+        for key, match in self.matches.items():
+            digest.update(f"{key}:{int(match['has_result'])}:{match['score']}:{match['sets']};".encode())
+        for participant in self.participants:
+            digest.update(f"{participant.get('participant_id')}:{self.points(participant)}:"
+                          f"{self.place(participant)};".encode())
+        return digest.hexdigest()[:8]
+
+
+def _parse_participant_cell(cell: Dict, fallback_index: int) -> Optional[Dict]:
+    """Участник из ParticipantCell; None — нет игроков"""
+    players = cell.get("Players", [])
+    if not isinstance(players, list):
+        return None
+
+    team_names = [p["Name"] for p in players if isinstance(p, dict) and p.get("Name")]
+    if not team_names:
+        return None
+
+    full_name = "/".join(team_names)
+    player_ids = [str(p["Id"]) for p in players if isinstance(p, dict) and p.get("Id")]
+
+    return {
+        "index": cell.get("Index", fallback_index),
+        "participant_id": cell.get("ParticipantId"),
+        "full_name": full_name,
+        "short_name": HTMLBaseGenerator.create_short_name(full_name) if full_name != "Bye" else "Bye",
+        "is_bye": full_name.upper() == "BYE",
+        "player_ids": player_ids
+    }
+
+
+def parse_match_cell(match_cell: Dict) -> Dict:
+    """Счёт матча из MatchCell: has_result, score ("6-4" / Won / Lost), sets"""
+    match_results = match_cell.get("MatchResults", {})
+    match_info = {
+        "has_result": bool(match_results.get("IsPlayed", False)),
+        "is_bye": False,
+        "score": "",
+        "sets": ""
+    }
+
+    if match_results.get("HasScore") and match_results.get("Score"):
+        score_data = match_results["Score"]
+        first_score = score_data.get("FirstParticipantScore", 0)
+        second_score = score_data.get("SecondParticipantScore", 0)
+        match_info["score"] = f"{first_score}-{second_score}"
+
+        detailed_scoring = score_data.get("DetailedScoring", [])
+        if detailed_scoring:
+            match_info["sets"] = " ".join(f"{s.get('FirstParticipantScore', 0)}-{s.get('SecondParticipantScore', 0)}"
+                                          for s in detailed_scoring)
+    else:
+        cancellation = match_results.get('CancellationStatus') or ''
+        if 'Won' in cancellation:
+            match_info["score"] = 'Won'
+        elif 'Lost' in cancellation:
+            match_info["score"] = 'Lost'
+
+    return match_info
+
+
+def _parse_standings(standings_data: List[Dict]) -> List[Dict]:
+    """Строки турнирной таблицы; игрокам без модели присваиваются фиктивные id"""
+    standings = []
+    fake_id_counter = _FAKE_PLAYER_ID_START
+
+    for standing in standings_data:
+        player_ids = []
+        for key in ('DoublesPlayer1Model', 'DoublesPlayer2Model'):
+            player = standing.get(key)
+            if isinstance(player, dict) and player.get('Id'):
+                player_ids.append(str(player['Id']))
+            else:
+                player_ids.append(str(fake_id_counter))
+                fake_id_counter += 1
+
+        standings.append({
+            "participant_id": str(standing.get("ParticipantId", "")),
+            "standing": standing.get("Standing", 0),
+            "wins": standing.get("Wins", 0),
+            "match_points": standing.get("MatchPoints", 0),
+            "player_ids": player_ids
+        })
+
+    return standings
+
+
+_parsed: SourceCache[RoundRobinGroup] = SourceCache(MAX_PARSED_GROUPS)
+
+
+def parse_group(group_data: Dict, key: Optional[DrawKey] = None) -> RoundRobinGroup:
+    """
+    Разобранная группа для словаря RoundRobin. Повторный вызов с тем же key (draw_cache.draw_key:
+    турнир, категория, индекс, версия данных) или с тем же объектом возвращает готовый разбор.
+    """
+    return _parsed.get(group_data, RoundRobinGroup, key)
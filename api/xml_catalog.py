@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Кэши live-XML для vMix.
+Каталог типов отображения (id → описание типа: таблицы, сетки, расписание, табло кортов)
+строится один раз на версию данных турнира, готовый XML турнирных таблиц хранится
+до смены этой версии. Версию даёт database.get_tournament_version — без разбора JSON-колонок.
+Описания типов каталога общие для всех запросов — их нельзя изменять.
+"""
+
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .database import get_tournament_fields, get_tournament_version
+
+# Ограничение числа записей кэша XML; при переполнении кэш сбрасывается целиком
+MAX_XML_CACHE_ENTRIES = 256
+
+# Поля турнира, из которых строится каталог (см. database.get_tournament_fields)
+CATALOG_FIELDS = ("classes", "courts", "dates", "draw_data", "court_usage")
+
+_DRAW_TYPE_SUFFIX = {"round_robin": "rr", "elimination": "elim"}
+
+_lock = threading.Lock()
+_type_indexes: Dict[str, Tuple[str, Dict[str, Dict]]] = {}
+_xml_cache: Dict[Tuple[str, str], Tuple[str, str]] = {}
+
+
+def table_type_id(class_id, draw_type: str, draw_index: int) -> str:
+    """id типа tournament_table: table_<категория>_rr_<N> / table_<категория>_elim_<N>"""
+    return f"table_{class_id}_{_DRAW_TYPE_SUFFIX[draw_type]}_{draw_index}"
+
+
+def _elimination_stage_name(elimination: Dict) -> str:
+    """Название стадии плей-офф: Финал / Места N-M / Место N"""
+    ps, pe, c = (elimination.get("PlacesStartPos", 1), elimination.get("PlacesEndPos", 1),
+                 elimination.get("Consolation", 0))
+    if ps != pe:
+        return f"Места {ps}-{pe}"
+    if c:
+        return f"Место {ps}"
+    return "Финал" if ps == 1 and pe == 1 else f"Места 1-{pe}"
+
+
+def build_xml_data_types(tournament_data: Dict) -> List[Dict]:
+    """
+    Список доступных типов отображения турнира (id, name, type и доп. поля):
+      'tournament_table' (draw_type='round_robin')  — таблица кругового этапа,
+      'tournament_table' (draw_type='elimination')  — сетка плей-офф,
+      'schedule'                                    — расписание матчей (если есть корты/даты),
+      'court_score'                                 — табло конкретного корта.
+    """
+    types = []
+    draw_data = tournament_data.get("draw_data") or {}
+    classes = tournament_data.get("classes") or []
+
+    for cid, cdata in draw_data.items():
+        if not isinstance(cdata, dict):
+            continue
+        info = cdata.get("class_info", {})
+        if not info:
+            info = next((c for c in classes if str(c.get("Id")) == str(cid)), {})
+        name = info.get("Name", f"Категория {cid}")
+
+        for i, rr in enumerate(cdata.get("round_robin", [])):
+            gname = "Групповой этап"
+            if isinstance(rr, dict) and rr.get("RoundRobin", {}).get("Name"):
+                gname = rr["RoundRobin"]["Name"]
+            types.append({"id": table_type_id(cid, "round_robin", i), "name": f"{name} - {gname}",
+                          "type": "tournament_table", "class_id": cid, "class_name": name,
+                          "draw_type": "round_robin", "draw_index": i, "group_name": gname})
+
+        for i, el in enumerate(cdata.get("elimination", [])):
+            sname = "Плей-офф"
+            if isinstance(el, dict) and el.get("Elimination"):
+                sname = _elimination_stage_name(el["Elimination"])
+            types.append({"id": table_type_id(cid, "elimination", i), "name": f"{name} - {sname}",
+                          "type": "tournament_table", "class_id": cid, "class_name": name,
+                          "draw_type": "elimination", "draw_index": i, "stage_name": sname})
+
+    if tournament_data.get("court_usage") or tournament_data.get("dates"):
+        types.append({"id": "schedule", "name": "Расписание матчей", "type": "schedule"})
+
+    for court in tournament_data.get("courts") or []:
+        if isinstance(court, dict) and court.get("Item1"):
+            court_id = court['Item1']
+            court_name = court.get('Item2', f'Корт {court_id}')
+            types.append({"id": f"court_{court_id}", "name": f"{court_name} - Счет", "type": "court_score",
+                          "court_id": court_id, "court_name": court.get("Item2", "")})
+
+    return types
+
+
+def get_xml_type_index(tournament_id: str, version: str,
+                       build_types: Callable[[], List[Dict]]) -> Dict[str, Dict]:
+    """Индекс типов XML турнира по id; build_types вызывается только при смене версии"""
+    with _lock:
+        cached = _type_indexes.get(tournament_id)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    index = {t["id"]: t for t in build_types()}
+    with _lock:
+        _type_indexes[tournament_id] = (version, index)
+    return index
+
+
+def get_display_catalog(tournament_id: str, version: Optional[str] = None,
+                        load_tournament: Optional[Callable[[], Dict]] = None) -> Optional[Dict[str, Dict]]:
+    """
+    Каталог типов отображения турнира: id → описание, в порядке build_xml_data_types.
+    None — турнира нет. При неизменной версии стоит одного запроса версии;
+    load_tournament — уже загруженные данные вызывающего (иначе читаются только CATALOG_FIELDS).
+    """
+    if version is None:
+        version = get_tournament_version(tournament_id)
+        if version is None:
+            return None
+    load = load_tournament or (lambda: get_tournament_fields(tournament_id, CATALOG_FIELDS) or {})
+    return get_xml_type_index(tournament_id, version, lambda: build_xml_data_types(load()))
+
+
+def get_cached_xml(tournament_id: str, xml_type_id: str, version: str,
+                   render: Callable[[], str]) -> str:
+    """Готовый XML для (турнир, тип) при неизменной версии данных, иначе render()"""
+    key = (tournament_id, xml_type_id)
+    with _lock:
+        cached = _xml_cache.get(key)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    xml_content = render()
+    with _lock:
+        if len(_xml_cache) >= MAX_XML_CACHE_ENTRIES:
+            _xml_cache.clear()
+        _xml_cache[key] = (version, xml_content)
+    return xml_content
+
+
+def invalidate_xml_cache(tournament_id: Optional[str] = None):
+    """Сброс кэшей турнира (или всех турниров)"""
+    with _lock:
+        if tournament_id is None:
+            _type_indexes.clear()
+            _xml_cache.clear()
+            return
+        _type_indexes.pop(tournament_id, None)
+        for key in [k for k in _xml_cache if k[0] == tournament_id]:
+            del _xml_cache[key]
@@ -5,17 +5,74 @@
 Создает XML файлы на основе данных турниров rankedin.com
 """
 
+import hashlib
+import os
+import re
+import threading
+import time
 import xml.etree.ElementTree as ET
-from xml.dom import minidom
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from typing import Dict, List, Any, Optional
 import logging
 from markupsafe import escape
 from .constants import get_sport_name, get_country_name
+from .draw_cache import DrawKey, draw_key
+from .file_utils import atomic_write
+from .elimination_bracket import BracketMatch, compile_bracket
+from .round_robin_standings import parse_group
 
 logger = logging.getLogger(__name__)
 
+XML_DECLARATION = '<?xml version="1.0" ?>'
+XML_INDENT = "  "
+
+# Отметки времени генерации не считаются изменением содержимого файла
+_XML_TIMESTAMP_RE = re.compile(r"<(generated|updated|timestamp)>[^<]*</\1>")
+
+_XML_TEXT_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "\r": "\n"})
+
+
+def _escape_xml_text(text: str) -> str:
+    """Экранирует текст узла так же, как minidom (&, <, >, ")"""
+    return text.replace("\r\n", "\n").translate(_XML_TEXT_ESCAPES)
+
+
+def _write_xml_element(elem: ET.Element, out: List[str], indent: str):
+    """
+    Записывает элемент с отступами за один проход.
+    Формат совпадает с minidom.toprettyxml(indent="  "): пустой элемент — <tag/>,
+    единственный текстовый узел — в одну строку с тегом.
+    """
+    tag = elem.tag
+    text = elem.text
+    children = list(elem)
+
+    if not children:
+        if text:
+            out.append(f"{indent}<{tag}>{_escape_xml_text(text)}</{tag}>\n")
+        else:
+            out.append(f"{indent}<{tag}/>\n")
+        return
+
+    child_indent = indent + XML_INDENT
+    out.append(f"{indent}<{tag}>\n")
+    if text:
+        out.append(f"{child_indent}{_escape_xml_text(text)}\n")
+    for child in children:
+        _write_xml_element(child, out, child_indent)
+        if child.tail:
+            out.append(f"{child_indent}{_escape_xml_text(child.tail)}\n")
+    out.append(f"{indent}</{tag}>\n")
+
+
+def serialize_xml(elem: ET.Element) -> str:
+    """Сериализует дерево в форматированный XML без повторного парсинга"""
+    out = [XML_DECLARATION, "\n"]
+    _write_xml_element(elem, out, "")
+    return "".join(out)
+
+
 class XMLGenerator:
     """Генератор XML файлов для vMix"""
 
@@ -24,9 +81,7 @@ class XMLGenerator:
 
     def _prettify_xml(self, elem: ET.Element) -> str:
         """Форматирует XML для читаемости"""
-        rough_string = ET.tostring(elem, encoding='unicode')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ")
+        return serialize_xml(elem)
 
     def generate_tournament_table_xml(self, tournament_data: Dict, xml_type_info: Dict) -> str:
         """
@@ -40,8 +95,8 @@ class XMLGenerator:
         tournament = ET.SubElement(root, "tournament")
         ET.SubElement(tournament, "id").text = str(tournament_data.get("tournament_id", ""))
         ET.SubElement(tournament, "name").text = metadata.get("name", "Неизвестный турнир")
-        ET.SubElement(tournament, "sport").text = self.get_sport_name(metadata.get("sport", 5))
-        ET.SubElement(tournament, "country").text = self.get_country_name(metadata.get("country"))
+        ET.SubElement(tournament, "sport").text = get_sport_name(metadata.get("sport", 5))
+        ET.SubElement(tournament, "country").text = get_country_name(metadata.get("country"))
         if metadata.get("featureImage"):
             ET.SubElement(tournament, "banner").text = metadata["featureImage"]
 
@@ -57,16 +112,18 @@ class XMLGenerator:
         ET.SubElement(class_info_elem, "type").text = draw_type
 
         # Данные турнирной таблицы
+        key = draw_key(tournament_data, class_id, draw_type, draw_index)
         if draw_type == "round_robin":
-            self._add_round_robin_data(root, class_data, draw_index)
+            self._add_round_robin_data(root, class_data, draw_index, key)
         elif draw_type == "elimination":
-            self._add_elimination_data(root, class_data, draw_index)
+            self._add_elimination_data(root, class_data, draw_index, key)
 
         ET.SubElement(root, "generated").text = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
 
         return self._prettify_xml(root)
 
-    def _add_round_robin_data(self, root: ET.Element, class_data: Dict, draw_index: int):
+    def _add_round_robin_data(self, root: ET.Element, class_data: Dict, draw_index: int,
+                              key: Optional[DrawKey] = None):
         """Добавляет данные группового этапа """
         try:
             # Проверяем входные данные
@@ -123,40 +180,30 @@ class XMLGenerator:
                     ET.SubElement(matches, "error").text = "Отсутствуют данные участников"
                     return
 
-                for row_index, row in enumerate(pool_data):
-                    if not isinstance(row, list):
-                        continue
-
-                    for cell_index, cell in enumerate(row):
-                        if not isinstance(cell, dict):
-                            continue
-
-                        if cell.get("CellType") == "ParticipantCell" and cell.get("ParticipantCell"):
-                            participant_cell = cell["ParticipantCell"]
-                            if not isinstance(participant_cell, dict):
-                                continue
-
-                            if participant_cell.get("Players") and isinstance(participant_cell["Players"], list):
-                                participant_info = {
-                                    "index": participant_cell.get("Index", 0),
-                                    "seed": participant_cell.get("Seed", ""),
-                                    "players": []
-                                }
-
-                                # Игроки в паре
-                                for player in participant_cell["Players"]:
-                                    if isinstance(player, dict):
-                                        participant_info["players"].append({
-                                            "id": str(player.get("Id", "")),
-                                            "name": str(player.get("Name", "")),
-                                            "rankedin_id": str(player.get("RankedinId", "")),
-                                            "country": str(player.get("CountryShort", "")),
-                                            "rating_begin": player.get("RatingBegin", 0) or 0,
-                                            "rating_end": player.get("RatingEnd", 0) or 0
-                                        })
-
-                                if participant_info["players"]:  # Добавляем только если есть игроки
-                                    participants_list.append(participant_info)
+                # Ячейки Pool разобраны один раз для HTML, JSON и XML (round_robin_standings)
+                group = parse_group(group_data, key)
+                for _, _, participant_cell in group.participant_cells:
+                    if participant_cell.get("Players") and isinstance(participant_cell["Players"], list):
+                        participant_info = {
+                            "index": participant_cell.get("Index", 0),
+                            "seed": participant_cell.get("Seed", ""),
+                            "players": []
+                        }
+
+                        # Игроки в паре
+                        for player in participant_cell["Players"]:
+                            if isinstance(player, dict):
+                                participant_info["players"].append({
+                                    "id": str(player.get("Id", "")),
+                                    "name": str(player.get("Name", "")),
+                                    "rankedin_id": str(player.get("RankedinId", "")),
+                                    "country": str(player.get("CountryShort", "")),
+                                    "rating_begin": player.get("RatingBegin", 0) or 0,
+                                    "rating_end": player.get("RatingEnd", 0) or 0
+                                })
+
+                        if participant_info["players"]:  # Добавляем только если есть игроки
+                            participants_list.append(participant_info)
 
                 # Добавляем информацию об участниках в плоском формате
                 for i, participant in enumerate(participants_list, 1):
@@ -223,40 +270,24 @@ class XMLGenerator:
                 # Обрабатываем матчи из Pool структуры
                 matches_data = []
                 try:
-                    for row_index, row in enumerate(pool_data):
-                        if not isinstance(row, list):
-                            continue
-
-                        for cell_index, cell in enumerate(row):
-                            if not isinstance(cell, dict):
-                                continue
-
-                            if cell.get("CellType") == "MatchCell" and cell.get("MatchCell"):
-                                match_cell = cell["MatchCell"]
-                                if not isinstance(match_cell, dict):
-                                    continue
-                                    
-                                match_results = match_cell.get("MatchResults", {})
-                                if not isinstance(match_results, dict):
-                                    match_results = {}
-
-                                # Определяем участников матча по позиции в таблице
-                                participant1_index = row_index
-                                participant2_index = cell_index
-
-                                if participant1_index != participant2_index:  # Избегаем матчей сами с собой
-                                    match_info = {
-                                        "participant1": participant1_index,
-                                        "participant2": participant2_index,
-                                        "match_id": str(match_cell.get("MatchId", "")),
-                                        "challenge_id": str(match_cell.get("ChallengeId", "")),
-                                        "state": int(match_cell.get("State", 0)),
-                                        "court": str(match_cell.get("Court", "")),
-                                        "date": str(match_cell.get("Date", "")),
-                                        "is_played": bool(match_results.get("IsPlayed", False)),
-                                        "match_results": match_results
-                                    }
-                                    matches_data.append(match_info)
+                    for row_index, cell_index, match_cell in group.match_cells:
+                        match_results = match_cell.get("MatchResults", {})
+                        if not isinstance(match_results, dict):
+                            match_results = {}
+
+                        # Участники матча — по позиции в таблице; матчи сами с собой пропускаются
+                        if row_index != cell_index:
+                            matches_data.append({
+                                "participant1": row_index,
+                                "participant2": cell_index,
+                                "match_id": str(match_cell.get("MatchId", "")),
+                                "challenge_id": str(match_cell.get("ChallengeId", "")),
+                                "state": int(match_cell.get("State", 0)),
+                                "court": str(match_cell.get("Court", "")),
+                                "date": str(match_cell.get("Date", "")),
+                                "is_played": bool(match_results.get("IsPlayed", False)),
+                                "match_results": match_results
+                            })
 
                 except Exception as e:
                     logger.error(f"Ошибка обработки матчей: {e}")
@@ -313,10 +344,7 @@ class XMLGenerator:
                 standings_data = group_data.get("Standings", [])
                 if isinstance(standings_data, list):
                     try:
-                        for standing in standings_data:
-                            if not isinstance(standing, dict):
-                                continue
-
+                        for standing in group.raw_standings:
                             position = int(standing.get("Standing", 0))
                             if position <= 0:
                                 continue
@@ -375,7 +403,8 @@ class XMLGenerator:
                 return game_score.get(team, str(set_score))
         return str(set_score)
 
-    def _add_elimination_data(self, root: ET.Element, class_data: Dict, draw_index: int):
+    def _add_elimination_data(self, root: ET.Element, class_data: Dict, draw_index: int,
+                              key: Optional[DrawKey] = None):
         #Добавляет данные игр на выбывание в плоском формате с обработкой Bye и Walkover
         elimination_data = class_data.get("elimination", [])
         if draw_index < len(elimination_data):
@@ -413,176 +442,91 @@ class XMLGenerator:
                         ET.SubElement(participants, f"round_0_team_{i}_name").text = team_name
                         ET.SubElement(participants, f"round_0_team_{i}_ShortName").text = short_name
 
-                # 2. Обрабатываем матчи по раундам
-                if bracket_data.get("DrawData"):
-                    # Группируем матчи по номеру раунда из данных
-                    matches_by_round = {}
-                    
-                    for round_matches in bracket_data["DrawData"]:
-                        for match_data in round_matches:
-                            if match_data:
-                                # Получаем номер раунда из данных матча
-                                round_number = match_data.get("Round", 1)
-                                if round_number not in matches_by_round:
-                                    matches_by_round[round_number] = []
-                                matches_by_round[round_number].append(match_data)
-
-                    # Обрабатываем матчи сгруппированные по раундам
-                    for round_number in sorted(matches_by_round.keys()):
-                        round_matches = matches_by_round[round_number]
-
-                        match_counter = 1
-                        for match_data in round_matches:
-                            match_view_model = match_data.get("MatchViewModel", {})
-                            prefix = f"round_{round_number}_{match_counter}"
-
-                            # Корт
-                            ET.SubElement(participants, f"{prefix}_court").text = match_data.get("CourtName", "")
-
-                            # Статус матча
-                            is_played = match_view_model.get("IsPlayed", False)
-                            has_score = match_view_model.get("HasScore", False)
-                            cancellation_status = match_data.get("CancellationStatus", "")
-                            winner_id = match_data.get("WinnerParticipantId")
-                            
-                            ET.SubElement(participants, f"{prefix}_is_played").text = str(is_played)
-                            ET.SubElement(participants, f"{prefix}_has_score").text = str(has_score)
-                            ET.SubElement(participants, f"{prefix}_cancellation_status").text = str(cancellation_status)
-
-                            # ОБРАБОТКА РАЗЛИЧНЫХ СЦЕНАРИЕВ
-                            if is_played and has_score:
-                                # 1. Обычный сыгранный матч со счетом
-                                if winner_id:
-                                    winning_team = self._find_winner_team_name(match_data, winner_id)
-                                    ET.SubElement(participants, f"{prefix}_team").text = winning_team
-                                    short_name = self._create_short_name(winning_team)
-                                    ET.SubElement(participants, f"{prefix}_Shortteam").text = short_name
-
-                                    # Имена игроков победившей команды
-                                    first_player_name, second_player_name = self._get_winner_player_names(match_data, winner_id)
-                                    ET.SubElement(participants, f"{prefix}_player1_name").text = first_player_name
-                                    ET.SubElement(participants, f"{prefix}_player2_name").text = second_player_name
-
-                                # Счет
-                                score_data = match_view_model.get("Score", {})
-                                score_summary = self._format_score_summary(score_data)
-                                sets_summary = self._format_sets_summary(score_data)
-
-                                ET.SubElement(participants, f"{prefix}_score").text = score_summary
-                                ET.SubElement(participants, f"{prefix}_sets_summary").text = sets_summary
-                                ET.SubElement(participants, f"{prefix}_match_type").text = "normal"
-
-                            elif is_played and not has_score:
-                                if winner_id:
-                                    winning_team = self._find_winner_team_name(match_data, winner_id)
-                                    ET.SubElement(participants, f"{prefix}_team").text = winning_team
-                                    short_name = self._create_short_name(winning_team)
-                                    ET.SubElement(participants, f"{prefix}_Shortteam").text = short_name
-
-                                    # Имена игроков победившей команды
-                                    first_player_name, second_player_name = self._get_winner_player_names(match_data, winner_id)
-                                    ET.SubElement(participants, f"{prefix}_player1_name").text = first_player_name
-                                    ET.SubElement(participants, f"{prefix}_player2_name").text = second_player_name
-
-                                    # Указываем что это walkover
-                                    if "W.O." in cancellation_status.upper() or "WALKOVER" in cancellation_status.upper():
-                                        ET.SubElement(participants, f"{prefix}_score").text = "W.O."
-                                        ET.SubElement(participants, f"{prefix}_sets_summary").text = "Walkover"
-                                        ET.SubElement(participants, f"{prefix}_match_type").text = "walkover"
-                                    else:
-                                        ET.SubElement(participants, f"{prefix}_score").text = "●"
-                                        ET.SubElement(participants, f"{prefix}_sets_summary").text = "Без игры"
-                                        ET.SubElement(participants, f"{prefix}_match_type").text = "forfeit"
-                                else:
-                                    # Нет информации о победителе
-                                    ET.SubElement(participants, f"{prefix}_team").text = ""
+                # 2. Матчи по раундам из модели сетки (общей с HTML и AJAX, см. elimination_bracket)
+                for bracket_round in compile_bracket(bracket_data, key).rounds:
+                    for match in bracket_round.matches:
+                        prefix = f"round_{match.round_number}_{match.number}"
+
+                        # Корт
+                        ET.SubElement(participants, f"{prefix}_court").text = match.court_name
+
+                        # Статус матча
+                        is_played = match.is_played
+                        has_score = match.has_score
+                        cancellation_status = match.cancellation_status
+
+                        ET.SubElement(participants, f"{prefix}_is_played").text = str(is_played)
+                        ET.SubElement(participants, f"{prefix}_has_score").text = str(has_score)
+                        ET.SubElement(participants, f"{prefix}_cancellation_status").text = str(cancellation_status)
+
+                        # ОБРАБОТКА РАЗЛИЧНЫХ СЦЕНАРИЕВ
+                        if is_played and has_score:
+                            # 1. Обычный сыгранный матч со счетом
+                            if match.winner_id:
+                                self._add_winner_xml(participants, prefix, match)
+
+                            # Счет
+                            ET.SubElement(participants, f"{prefix}_score").text = self._format_score_summary(match.score)
+                            ET.SubElement(participants, f"{prefix}_sets_summary").text = self._format_sets_summary(match.score)
+                            ET.SubElement(participants, f"{prefix}_match_type").text = "normal"
+
+                        elif is_played and not has_score:
+                            if match.winner_id:
+                                self._add_winner_xml(participants, prefix, match)
+
+                                # Указываем что это walkover
+                                if "W.O." in cancellation_status.upper() or "WALKOVER" in cancellation_status.upper():
                                     ET.SubElement(participants, f"{prefix}_score").text = "W.O."
-                                    ET.SubElement(participants, f"{prefix}_sets_summary").text = ""
+                                    ET.SubElement(participants, f"{prefix}_sets_summary").text = "Walkover"
                                     ET.SubElement(participants, f"{prefix}_match_type").text = "walkover"
-
-                            elif not is_played and not has_score:
-                                # 3. Матч не сыгран - проверяем на Bye
-                                bye_winner = self._check_bye_advancement(match_data)
-
-                                if bye_winner:
-                                    # Один из участников Bye - автоматически проходит другой
-                                    ET.SubElement(participants, f"{prefix}_team").text = bye_winner["team_name"]
-                                    short_name = self._create_short_name(bye_winner["team_name"])
-                                    ET.SubElement(participants, f"{prefix}_Shortteam").text = short_name
-                                    ET.SubElement(participants, f"{prefix}_player1_name").text = bye_winner["first_player"]
-                                    ET.SubElement(participants, f"{prefix}_player2_name").text = bye_winner["second_player"]
-                                    ET.SubElement(participants, f"{prefix}_score").text = "●"
-                                    ET.SubElement(participants, f"{prefix}_sets_summary").text = "Проходит без игры"
-                                    ET.SubElement(participants, f"{prefix}_match_type").text = "bye"
                                 else:
-                                    # Обычный несыгранный матч
-                                    ET.SubElement(participants, f"{prefix}_team").text = ""
-                                    ET.SubElement(participants, f"{prefix}_player1_name").text = ""
-                                    ET.SubElement(participants, f"{prefix}_score").text = ""
-                                    ET.SubElement(participants, f"{prefix}_sets_summary").text = ""
-                                    ET.SubElement(participants, f"{prefix}_match_type").text = ""
-
+                                    ET.SubElement(participants, f"{prefix}_score").text = "●"
+                                    ET.SubElement(participants, f"{prefix}_sets_summary").text = "Без игры"
+                                    ET.SubElement(participants, f"{prefix}_match_type").text = "forfeit"
                             else:
-                                # 4. Другие случаи - пустые поля
+                                # Нет информации о победителе
+                                ET.SubElement(participants, f"{prefix}_team").text = ""
+                                ET.SubElement(participants, f"{prefix}_score").text = "W.O."
+                                ET.SubElement(participants, f"{prefix}_sets_summary").text = ""
+                                ET.SubElement(participants, f"{prefix}_match_type").text = "walkover"
+
+                        elif not is_played and not has_score:
+                            # 3. Матч не сыгран - проверяем на Bye
+                            bye_winner = match.bye_winner
+
+                            if bye_winner:
+                                # Один из участников Bye - автоматически проходит другой
+                                ET.SubElement(participants, f"{prefix}_team").text = bye_winner.name
+                                ET.SubElement(participants, f"{prefix}_Shortteam").text = self._create_short_name(bye_winner.name)
+                                ET.SubElement(participants, f"{prefix}_player1_name").text = bye_winner.first_player_name
+                                ET.SubElement(participants, f"{prefix}_player2_name").text = bye_winner.second_player_name
+                                ET.SubElement(participants, f"{prefix}_score").text = "●"
+                                ET.SubElement(participants, f"{prefix}_sets_summary").text = "Проходит без игры"
+                                ET.SubElement(participants, f"{prefix}_match_type").text = "bye"
+                            else:
+                                # Обычный несыгранный матч
                                 ET.SubElement(participants, f"{prefix}_team").text = ""
                                 ET.SubElement(participants, f"{prefix}_player1_name").text = ""
                                 ET.SubElement(participants, f"{prefix}_score").text = ""
                                 ET.SubElement(participants, f"{prefix}_sets_summary").text = ""
-                                ET.SubElement(participants, f"{prefix}_match_type").text = "unknown"
-
-                            match_counter += 1
-
-    def _check_bye_advancement(self, match_data: Dict) -> Optional[Dict]:
-        """Проверяет есть ли в матче Bye и возвращает информацию о проходящей команде"""
-        challenger_data = match_data.get("ChallengerParticipant", {})
-        challenged_data = match_data.get("ChallengedParticipant", {})
-        
-        challenger_team = self._get_team_name_from_players(
-            challenger_data.get("FirstPlayer", {}),
-            challenger_data.get("SecondPlayer", {})
-        )
-        
-        challenged_team = self._get_team_name_from_players(
-            challenged_data.get("FirstPlayer", {}),
-            challenged_data.get("SecondPlayer", {})
-        )
-        
-        # Если challenger это Bye, то проходит challenged
-        if challenger_team.upper() == "BYE" or not challenger_team.strip():
-            if challenged_team and challenged_team.upper() != "BYE":
-                return {
-                    "team_name": challenged_team,
-                    "first_player": challenged_data.get("FirstPlayer", {}).get("Name", ""),
-                    "second_player": challenged_data.get("SecondPlayer", {}).get("Name", "")
-                }
-        
-        # Если challenged это Bye, то проходит challenger
-        elif challenged_team.upper() == "BYE" or not challenged_team.strip():
-            if challenger_team and challenger_team.upper() != "BYE":
-                return {
-                    "team_name": challenger_team,
-                    "first_player": challenger_data.get("FirstPlayer", {}).get("Name", ""),
-                    "second_player": challenger_data.get("SecondPlayer", {}).get("Name", "")
-                }
-        
-        return None
+                                ET.SubElement(participants, f"{prefix}_match_type").text = ""
 
-    def _get_winner_player_names(self, match_data: Dict, winner_id: int) -> tuple:
-        """Возвращает имена игроков победившей команды"""
-        challenger_data = match_data.get("ChallengerParticipant", {})
-        challenged_data = match_data.get("ChallengedParticipant", {})
-        
-        if challenger_data.get("EventParticipantId") == winner_id:
-            first_player_name = challenger_data.get("FirstPlayer", {}).get("Name", "")
-            second_player_name = challenger_data.get("SecondPlayer", {}).get("Name", "")
-        elif challenged_data.get("EventParticipantId") == winner_id:
-            first_player_name = challenged_data.get("FirstPlayer", {}).get("Name", "")
-            second_player_name = challenged_data.get("SecondPlayer", {}).get("Name", "")
-        else:
-            first_player_name = ""
-            second_player_name = ""
-        
-        return first_player_name, second_player_name
+                        else:
+                            # 4. Другие случаи - пустые поля
+                            ET.SubElement(participants, f"{prefix}_team").text = ""
+                            ET.SubElement(participants, f"{prefix}_player1_name").text = ""
+                            ET.SubElement(participants, f"{prefix}_score").text = ""
+                            ET.SubElement(participants, f"{prefix}_sets_summary").text = ""
+                            ET.SubElement(participants, f"{prefix}_match_type").text = "unknown"
+
+    def _add_winner_xml(self, participants: ET.Element, prefix: str, match: BracketMatch):
+        """Команда-победитель матча сетки и имена её игроков"""
+        winner = match.winner
+        winning_team = winner.name if winner else ""
+        ET.SubElement(participants, f"{prefix}_team").text = winning_team
+        ET.SubElement(participants, f"{prefix}_Shortteam").text = self._create_short_name(winning_team)
+        ET.SubElement(participants, f"{prefix}_player1_name").text = winner.first_player_name if winner else ""
+        ET.SubElement(participants, f"{prefix}_player2_name").text = winner.second_player_name if winner else ""
 
     def _create_short_name(self, full_name: str) -> str:
         """Создает сокращенное имя: первая буква + точка + фамилия"""
@@ -608,25 +552,6 @@ class XMLGenerator:
         
         return "/".join(short_parts)
 
-    def _find_winner_team_name(self, match_data: Dict, winner_id: int) -> str:
-
-        """Находит название команды-победителя по ID"""
-        challenger_data = match_data.get("ChallengerParticipant", {})
-        challenged_data = match_data.get("ChallengedParticipant", {})
-        
-        if challenger_data.get("EventParticipantId") == winner_id:
-            return self._get_team_name_from_players(
-                challenger_data.get("FirstPlayer", {}),
-                challenger_data.get("SecondPlayer", {})
-            )
-        elif challenged_data.get("EventParticipantId") == winner_id:
-            return self._get_team_name_from_players(
-                challenged_data.get("FirstPlayer", {}),
-                challenged_data.get("SecondPlayer", {})
-            )
-        
-        return ""
-
     def _find_game(self, match_data: Dict, winner_id: int) -> str:
                         #{ 'class': "match-result " + status_class, 'lost-team': short_team_lost, 'winner-team' : short_team, 'sets-info' : sets_summary, 'match-score': score_summary, 'Id': winner_id}
         """Находит название команды-победителя по ID"""
@@ -869,8 +794,8 @@ class XMLGenerator:
         tournament = ET.SubElement(root, "tournament")
         ET.SubElement(tournament, "id").text = str(tournament_data.get("tournament_id", ""))
         ET.SubElement(tournament, "name").text = metadata.get("name", "Неизвестный турнир")
-        ET.SubElement(tournament, "sport").text = self.get_sport_name(metadata.get("sport", 5))
-        ET.SubElement(tournament, "country").text = self.get_country_name(metadata.get("country"))
+        ET.SubElement(tournament, "sport").text = get_sport_name(metadata.get("sport", 5))
+        ET.SubElement(tournament, "country").text = get_country_name(metadata.get("country"))
         if metadata.get("featureImage"):
             ET.SubElement(tournament, "banner").text = metadata["featureImage"]
         
@@ -1004,11 +929,14 @@ class XMLGenerator:
 class XMLFileManager:
     """Менеджер XML и HTML файлов"""
     
-    def __init__(self, output_dir: str = "xml_files"):
+    def __init__(self, output_dir: str = "xml_files", api_client=None):
         self.output_dir = output_dir
+        self.api_client = api_client
         self.xml_generator = XMLGenerator()
+        # filepath -> (mtime_ns, хэш содержимого без отметок времени)
+        self._content_hashes: Dict[str, tuple] = {}
+        self._hashes_lock = threading.Lock()
         
-        import os
         os.makedirs(output_dir, exist_ok=True)
     
     def generate_and_save(self, xml_type_info: Dict, tournament_data: Dict, 
@@ -1024,13 +952,10 @@ class XMLFileManager:
         else:
             raise ValueError(f"Неизвестный тип XML: {xml_type}")
         
-        filename = self._get_filename(xml_type_info, tournament_data)
+        filename = self.get_filename(xml_type_info, tournament_data)
         filepath = f"{self.output_dir}/{filename}"
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(xml_content)
-        
-        import os
+        changed = self._write_if_changed(filepath, xml_content)
         file_stats = os.stat(filepath)
         
         return {
@@ -1040,10 +965,49 @@ class XMLFileManager:
             "url": f"/xml/{filename}",
             "size": self._format_file_size(file_stats.st_size),
             "created": datetime.now().isoformat(),
-            "type": xml_type
+            "type": xml_type,
+            "changed": changed
         }
 
-    def _get_filename(self, xml_type_info: Dict, tournament_data: Dict) -> str:
+    def _write_if_changed(self, filepath: str, content: str) -> bool:
+        """
+        Атомарная запись XML: временный файл в той же папке + os.replace,
+        чтобы vMix никогда не прочитал файл наполовину.
+        Файл не перезаписывается, если содержимое (без отметок времени) не изменилось.
+        """
+        digest = hashlib.md5(_XML_TIMESTAMP_RE.sub("", content).encode('utf-8')).hexdigest()
+        if self._current_hash(filepath) == digest:
+            return False
+
+        atomic_write(filepath, content)
+
+        with self._hashes_lock:
+            self._content_hashes[filepath] = (os.stat(filepath).st_mtime_ns, digest)
+        return True
+
+    def _current_hash(self, filepath: str) -> Optional[str]:
+        """Хэш файла на диске; пересчитывается только если файл менял другой процесс"""
+        try:
+            mtime_ns = os.stat(filepath).st_mtime_ns
+        except OSError:
+            return None
+
+        with self._hashes_lock:
+            cached = self._content_hashes.get(filepath)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                digest = hashlib.md5(_XML_TIMESTAMP_RE.sub("", f.read()).encode('utf-8')).hexdigest()
+        except (OSError, UnicodeDecodeError):
+            return None
+
+        with self._hashes_lock:
+            self._content_hashes[filepath] = (mtime_ns, digest)
+        return digest
+
+    def get_filename(self, xml_type_info: Dict, tournament_data: Dict) -> str:
         tournament_id = tournament_data.get("tournament_id", "unknown")
         xml_type = xml_type_info.get("type")
         
@@ -1078,10 +1042,10 @@ class XMLFileManager:
         else:
             return f"{size_bytes / (1024 * 1024):.1f} MB"
     
-    def generate_all_tournament_xml(self, tournament_data: Dict, courts_data: List[Dict] = None) -> List[Dict]:
-        from api.rankedin_api import RankedinAPI
-        api = RankedinAPI()
-        xml_types = api.get_xml_data_types(tournament_data)
+    def generate_all_tournament_xml(self, tournament_data: Dict, courts_data: List[Dict] = None,
+                                    xml_types: List[Dict] = None) -> List[Dict]:
+        if xml_types is None:
+            xml_types = self.api_client.get_xml_data_types(tournament_data)
         generated_files = []
         
         for xml_type_info in xml_types:
@@ -1104,7 +1068,6 @@ class XMLFileManager:
         return generated_files
     
     def cleanup_old_files(self, max_age_hours: int = 24):
-        import os, time
         current_time = time.time()
         cutoff_time = current_time - (max_age_hours * 3600)
         removed_count = 0
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Фоновая публикация XML файлов для vMix.
+Получает события изменения данных (AutoRefresh, WebSocket) и перегенерирует
+только те опубликованные файлы (есть запись в xml_files), чьи входные данные изменились.
+Запись атомарная и пропускается при неизменном содержимом (XMLFileManager),
+информация о файлах сохраняется в xml_files одной транзакцией на турнир.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+from .database import (
+    get_court_data, get_tournament_data, get_tournament_version,
+    get_xml_file_names, save_xml_files_info,
+)
+from .xml_catalog import get_display_catalog
+
+logger = logging.getLogger(__name__)
+
+# Пауза для склейки пачки событий (например, несколько очков подряд на корте)
+PUBLISH_DEBOUNCE = 1.0
+
+# Какие типы XML зависят от каждого вида изменений
+_CHANGE_KIND_TYPES = {
+    "courts": "court_score",
+    "tables": "tournament_table",
+    "schedule": "schedule",
+}
+
+
+class XMLPublisher:
+    """Публикатор XML файлов по событиям изменения данных"""
+
+    def __init__(self, xml_manager, api_client, debounce: float = PUBLISH_DEBOUNCE):
+        self.xml_manager = xml_manager
+        self.api_client = api_client
+        self.debounce = debounce
+        # tournament_id -> kind -> множество ключей (None — все объекты этого вида)
+        self._pending: Dict[str, Dict[str, Optional[Set[str]]]] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Запуск фонового потока публикации"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._publish_loop, daemon=True)
+        self._thread.start()
+        logger.info("XMLPublisher: started")
+
+    def stop(self):
+        """Остановка фонового потока публикации"""
+        self._running = False
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        logger.info("XMLPublisher: stopped")
+
+    def notify(self, tournament_id: str, kind: str, keys: Optional[List[str]] = None):
+        """Событие изменения данных: kind — 'courts' / 'tables' / 'schedule', keys — id кортов или категорий"""
+        if kind not in _CHANGE_KIND_TYPES:
+            return
+        with self._lock:
+            kinds = self._pending.setdefault(tournament_id, {})
+            if keys is None:
+                kinds[kind] = None
+            elif kinds.get(kind, set()) is not None:
+                kinds.setdefault(kind, set()).update(str(k) for k in keys)
+        self._wakeup.set()
+
+    def _publish_loop(self):
+        """Цикл публикации: ждёт событий, склеивает их и публикует по турнирам"""
+        while self._running:
+            self._wakeup.wait()
+            if not self._running:
+                break
+            time.sleep(self.debounce)
+            self._wakeup.clear()
+
+            with self._lock:
+                pending, self._pending = self._pending, {}
+
+            for tournament_id, changes in pending.items():
+                try:
+                    self.publish(tournament_id, changes)
+                except Exception as e:
+                    logger.error(f"XMLPublisher: ошибка публикации турнира {tournament_id}: {e}")
+
+    def publish(self, tournament_id: str, changes: Dict[str, Optional[Set[str]]]) -> int:
+        """Перегенерирует опубликованные файлы турнира, затронутые изменениями; возвращает число записанных"""
+        published = set(get_xml_file_names(tournament_id))
+        if not published:
+            return 0
+
+        version = get_tournament_version(tournament_id)
+        if version is None:
+            return 0
+
+        loaded = {}
+
+        def load_tournament() -> Dict:
+            if "data" not in loaded:
+                loaded["data"] = get_tournament_data(tournament_id) or {}
+            return loaded["data"]
+
+        xml_types = get_display_catalog(tournament_id, version, load_tournament)
+        # Для имени файла и XML счёта корта достаточно id турнира — полные данные грузим только для таблиц/расписания
+        stub = {"tournament_id": tournament_id}
+
+        changed_files = []
+        for xml_type_info in xml_types.values():
+            if not self._is_affected(xml_type_info, changes):
+                continue
+            if self.xml_manager.get_filename(xml_type_info, stub) not in published:
+                continue
+
+            if xml_type_info["type"] == "court_score":
+                court_data = get_court_data(tournament_id, str(xml_type_info.get("court_id")))
+                if "error" in court_data:
+                    continue
+                file_info = self.xml_manager.generate_and_save(xml_type_info, stub, court_data)
+            else:
+                file_info = self.xml_manager.generate_and_save(xml_type_info, load_tournament())
+
+            if file_info.get("changed"):
+                changed_files.append(file_info)
+
+        save_xml_files_info(tournament_id, changed_files)
+        if changed_files:
+            logger.debug(f"XMLPublisher: турнир {tournament_id}, обновлено файлов: {len(changed_files)}")
+        return len(changed_files)
+
+    @staticmethod
+    def _is_affected(xml_type_info: Dict, changes: Dict[str, Optional[Set[str]]]) -> bool:
+        """Затрагивают ли изменения данный тип XML"""
+        for kind, keys in changes.items():
+            if xml_type_info["type"] != _CHANGE_KIND_TYPES[kind]:
+                continue
+            if keys is None or kind == "schedule":
+                return True
+            key = xml_type_info.get("court_id") if kind == "courts" else xml_type_info.get("class_id")
+            if str(key) in keys:
+                return True
+        return False
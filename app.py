@@ -6,19 +6,28 @@ import os
 import time
 from typing import Dict
 
+_IMPORT_STARTED = time.perf_counter()
+
 from flask import Flask, jsonify, render_template
 
 from config import get_config
 from api import (
     RankedinAPI,
+    configure_blob_codec,
     init_database,
     register_auth_routes,
     AutoRefreshService,
     update_court_live_score,
 )
 from api.html_generator import HTMLGenerator
+from api.logging_setup import configure_logging
 from api.rankedin_live import live_manager
+from api.event_bus import event_bus
+from api.db_maintenance import db_maintenance
 from api.xml_generator import XMLFileManager
+from api.xml_publisher import XMLPublisher
+from api.request_loader import register_request_loader
+from api.metrics import register_metrics, startup_timings
 from api.display_windows import display_bp
 from api.composite_pages import composite_bp
 from api.blueprints import (
@@ -26,6 +35,7 @@ from api.blueprints import (
     create_files_blueprint,
     create_live_blueprint,
     create_settings_blueprint,
+    create_changes_blueprint,
 )
 
 
@@ -34,20 +44,27 @@ for d in ['logs', 'data', 'xml_files', 'api', 'static/css', 'static/js', 'templa
 
 UPLOAD_FOLDER = 'static/photos'
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.FileHandler('logs/vmix_ranker.log'), logging.StreamHandler()],
+_log_cfg = get_config()
+configure_logging(
+    log_dir=_log_cfg.LOGS_DIR,
+    filename=_log_cfg.LOG_FILE,
+    level=_log_cfg.LOG_LEVEL,
+    max_bytes=_log_cfg.LOG_MAX_SIZE,
+    backup_count=_log_cfg.LOG_BACKUP_COUNT,
+    sample_rate=_log_cfg.LOG_SAMPLE_RATE,
 )
 logger = logging.getLogger(__name__)
 
 
 api_client = RankedinAPI()
-xml_manager = XMLFileManager('xml_files')
+xml_manager = XMLFileManager('xml_files', api_client)
+xml_publisher = XMLPublisher(xml_manager, api_client)
 html_generator = HTMLGenerator()
 auto_refresh = None
 _services_started = False
 
+startup_timings.record('import', time.perf_counter() - _IMPORT_STARTED)
+
 
 def _register_core_routes(app: Flask):
     @app.after_request
@@ -80,14 +97,20 @@ def _start_background_services(app: Flask):
 
     _services_started = True
 
+    xml_publisher.start()
+    event_bus.start()
+    db_maintenance.start()
+
     auto_refresh = AutoRefreshService()
     auto_refresh.configure(app, api_client)
+    auto_refresh.add_change_listener(xml_publisher.notify)
     auto_refresh.start()
     logger.info('AutoRefresh service started')
 
     def on_live_update(tournament_id: str, court_data: Dict):
         try:
             update_court_live_score(tournament_id, court_data)
+            xml_publisher.notify(tournament_id, "courts", [str(court_data.get("court_id"))])
             logger.debug(f"Live update: court {court_data.get('court_id')}")
         except Exception as e:
             logger.error(f'Live update error: {e}')
@@ -98,6 +121,7 @@ def _start_background_services(app: Flask):
 
 
 def create_app():
+    started = time.perf_counter()
     app = Flask(__name__)
 
     cfg = get_config()
@@ -107,7 +131,12 @@ def create_app():
     app.secret_key = secret_key
     app.start_time = time.time()
 
-    init_database()
+    configure_blob_codec(getattr(cfg, 'BLOB_CODEC', 'zlib'))
+    startup_timings.record('init_database', init_database())
+    db_maintenance.configure(getattr(cfg, 'XML_CLEANUP_HOURS', 24), getattr(cfg, 'DB_BACKUP_HOURS', 24),
+                             getattr(cfg, 'DB_BACKUP_KEEP', 7))
+    register_request_loader(app)
+    register_metrics(app)
     register_auth_routes(app)
 
     app.register_blueprint(display_bp)
@@ -117,10 +146,15 @@ def create_app():
     app.register_blueprint(create_files_blueprint(api_client, xml_manager))
     app.register_blueprint(create_live_blueprint(api_client, html_generator, live_manager, logger))
     app.register_blueprint(create_settings_blueprint(api_client, lambda: auto_refresh, lambda: app.start_time))
+    app.register_blueprint(create_changes_blueprint(logger))
 
     _register_core_routes(app)
     _start_background_services(app)
 
+    startup_timings.record('create_app', time.perf_counter() - started)
+    timings = startup_timings.values()
+    logger.info(f"Воркер {os.getpid()} готов: импорт {timings['import'] * 1000:.0f} мс, "
+                f"БД {timings['init_database'] * 1000:.1f} мс, create_app {timings['create_app'] * 1000:.0f} мс")
     return app
 
 
@@ -132,4 +166,4 @@ if __name__ == '__main__':
         port=getattr(cfg, 'PORT', 5000),
         debug=getattr(cfg, 'DEBUG', False),
         threaded=True,
-    )
+    )
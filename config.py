@@ -17,10 +17,14 @@ class Config:
     
     # Р‘Р°Р·Р° РґР°РЅРЅС‹С…
     DATABASE_PATH = os.environ.get('DATABASE_PATH') or 'data/tournaments.db'
+    BLOB_CODEC = os.environ.get('BLOB_CODEC') or 'zlib'
+    DB_BACKUP_HOURS = int(os.environ.get('DB_BACKUP_HOURS', 24))
+    DB_BACKUP_KEEP = int(os.environ.get('DB_BACKUP_KEEP', 7))
     
     # Rankedin API РЅР°СЃС‚СЂРѕР№РєРё
-    RANKEDIN_API_BASE = "https://api.rankedin.com/v1"
-    RANKEDIN_LIVE_API_BASE = "https://live.rankedin.com/api/v1"
+    RANKEDIN_API_BASE = os.environ.get('RANKEDIN_API_BASE') or "https://api.rankedin.com/v1"
+    RANKEDIN_LIVE_API_BASE = os.environ.get('RANKEDIN_LIVE_API_BASE') or "https://live.rankedin.com/api/v1"
+    RANKEDIN_LIVE_URL = os.environ.get('RANKEDIN_LIVE_URL') or "https://live.rankedin.com"
     API_TIMEOUT = int(os.environ.get('API_TIMEOUT', 10))  # СЃРµРєСѓРЅРґС‹
     
     # РќР°СЃС‚СЂРѕР№РєРё РѕР±РЅРѕРІР»РµРЅРёСЏ
@@ -42,6 +46,7 @@ class Config:
     LOG_FILE = os.environ.get('LOG_FILE') or 'vmix_ranker.log'
     LOG_MAX_SIZE = int(os.environ.get('LOG_MAX_SIZE', 10 * 1024 * 1024))  # 10MB
     LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', 5))
+    LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 5))
     
     # Р‘РµР·РѕРїР°СЃРЅРѕСЃС‚СЊ
     MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))  # 16MB
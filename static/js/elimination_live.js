@@ -11,8 +11,7 @@
     const CONFIG = {
         BASE_WIDTH: 2480,
         BASE_HEIGHT: 1080,
-        updateInterval: 30000,      // 30 секунд - проверка изменений
-        fullReloadInterval: 300000, // 5 минут - полная перезагрузка
+        updateInterval: 5000,       // 5 секунд - проверка изменений (?since: только изменившиеся матчи)
         animationDuration: 300,
         retryDelay: 5000
     };
@@ -24,7 +23,6 @@
     let classId = null;
     let drawIndex = null;
     let updateTimer = null;
-    let reloadTimer = null;
     let isUpdating = false;
 
     /**
@@ -108,14 +106,7 @@
      */
     function startUpdates() {
         if (updateTimer) clearInterval(updateTimer);
-        if (reloadTimer) clearInterval(reloadTimer);
-        
         updateTimer = setInterval(checkForUpdates, CONFIG.updateInterval);
-        
-        reloadTimer = setInterval(() => {
-            console.log('Elimination Live: full page reload');
-            location.reload();
-        }, CONFIG.fullReloadInterval);
     }
 
     /**
@@ -126,7 +117,9 @@
         isUpdating = true;
 
         try {
-            const url = `/api/elimination/${tournamentId}/${classId}/data?draw_index=${drawIndex}`;
+            // since — версия на странице: сервер вернёт только изменившиеся с неё матчи
+            let url = `/api/elimination/${tournamentId}/${classId}/data?draw_index=${drawIndex}`;
+            if (currentVersion) url += `&since=${encodeURIComponent(currentVersion)}`;
             const response = await fetch(url);
             
             if (!response.ok) {
@@ -141,8 +134,13 @@
             }
 
             if (data.version !== currentVersion) {
-                console.log(`Elimination Live: updating (${currentVersion} -> ${data.version})`);
-                await updateBracket(data);
+                console.log(`Elimination Live: updating (${currentVersion} -> ${data.version}, ` +
+                            `${data.delta ? 'изменений' : 'матчей'}: ${(data.matches || []).length})`);
+                if (!updateBracket(data)) {
+                    // Изменилась структура сетки (матча нет на странице) — перерисовываем страницу
+                    location.reload();
+                    return;
+                }
                 currentVersion = data.version;
             }
 
@@ -154,19 +152,24 @@
     }
 
     /**
-     * Обновление турнирной сетки
+     * Обновление турнирной сетки (полный ответ или только изменившиеся матчи).
+     * false — матча из ответа нет на странице
      */
-    async function updateBracket(data) {
+    function updateBracket(data) {
         const { matches } = data;
         
-        if (!matches || !Array.isArray(matches)) return;
+        if (!matches || !Array.isArray(matches)) return true;
 
+        let complete = true;
         matches.forEach(matchData => {
             const matchEl = findMatchElement(matchData.match_id);
             if (matchEl) {
                 updateMatchElement(matchEl, matchData);
+            } else {
+                complete = false;
             }
         });
+        return complete;
     }
 
     /**
@@ -8,8 +8,7 @@
 
     // Конфигурация
     const CONFIG = {
-        updateInterval: 30000,      // 30 секунд - проверка изменений
-        fullReloadInterval: 300000, // 5 минут - полная перезагрузка
+        updateInterval: 5000,       // 5 секунд - проверка изменений (?since: только изменившиеся ячейки)
         animationDuration: 300,
         margin: 20                  // Внешний отступ
     };
@@ -21,8 +20,8 @@
     let classId = null;
     let drawIndex = null;
     let currentData = null;
+    let currentVersion = null;
     let updateTimer = null;
-    let reloadTimer = null;
     let isUpdating = false;
 
     /**
@@ -136,16 +135,7 @@
      */
     function startUpdates() {
         if (updateTimer) clearInterval(updateTimer);
-        if (reloadTimer) clearInterval(reloadTimer);
-        
-        // AJAX проверка
         updateTimer = setInterval(checkForUpdates, CONFIG.updateInterval);
-        
-        // Полная перезагрузка
-        reloadTimer = setInterval(() => {
-            console.log('Round Robin: full page reload');
-            location.reload();
-        }, CONFIG.fullReloadInterval);
     }
 
     /**
@@ -156,7 +146,9 @@
         isUpdating = true;
 
         try {
-            const url = `/api/round-robin/${tournamentId}/${classId}/${drawIndex}/data`;
+            // since — последняя полученная версия: сервер вернёт только изменившиеся ячейки
+            let url = `/api/round-robin/${tournamentId}/${classId}/${drawIndex}/data`;
+            if (currentVersion) url += `?since=${encodeURIComponent(currentVersion)}`;
             const response = await fetch(url);
             
             if (!response.ok) {
@@ -171,7 +163,10 @@
             }
 
             // Применяем обновления
-            applyUpdates(data);
+            if (data.version !== currentVersion) {
+                applyUpdates(data);
+                currentVersion = data.version;
+            }
 
         } catch (error) {
             console.error('Update check failed:', error);
@@ -190,7 +185,7 @@
         if (data.matches) {
             Object.entries(data.matches).forEach(([key, matchData]) => {
                 const [row, col] = key.split('_');
-                const cell = document.querySelector(`.match-cell[data-row="${row}"][data-col="${col}"]`);
+                const cell = document.querySelector(`[data-row="${row}"][data-col="${col}"]`);
                 
                 if (cell) {
                     const updated = updateMatchCell(cell, matchData);
@@ -199,10 +194,11 @@
             });
         }
 
-        // Обновляем очки
+        // Обновляем очки: полный ответ — массив по строкам, дельта — {номер строки: итог}
         if (data.standings) {
-            data.standings.forEach((standing, idx) => {
-                const row = document.querySelectorAll('.team-row')[idx];
+            const rows = document.querySelectorAll('.team-row');
+            Object.entries(data.standings).forEach(([idx, standing]) => {
+                const row = rows[idx];
                 if (row) {
                     const pointsEl = row.querySelector('.points-z');
                     const placeEl = row.querySelector('.place-z');
@@ -231,6 +227,15 @@
      * Обновление ячейки матча
      */
     function updateMatchCell(cell, data) {
+        // Матч сыгран, а ячейка ещё пустая — добавляем разметку счёта
+        if (!cell.querySelector('.match-score') && data.has_result) {
+            const row = cell.dataset.row;
+            const col = cell.dataset.col;
+            cell.className = 'match-cell';
+            cell.innerHTML = `<div class="match-score" data-field="score_${row}_${col}"></div>` +
+                             `<div class="match-sets" data-field="sets_${row}_${col}"></div>`;
+        }
+
         const scoreEl = cell.querySelector('.match-score');
         const setsEl = cell.querySelector('.match-sets');
         
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк кодеков больших JSON-колонок (api/database.py: BLOB_CODECS).
+Крупный синтетический турнир (tools/synthetic_tournament.py) записывается во временную
+SQLite-базу прежним форматом (json.dumps по умолчанию) и каждым доступным кодеком.
+
+Для каждого формата:
+  размер — draw_data + matches_data + court_planner + court_usage одного турнира, КБ;
+  БД — размер файла базы с --tournaments турнирами, КБ;
+  кодирование и запись — UPDATE четырёх колонок + commit, как при обновлении, мс;
+  декодирование — decode_blob всех четырёх колонок, мс;
+  категория — json_extract одной категории в SQL (get_class_draw), мс.
+Печатает медиану, мс.
+
+Пример:
+    python tools/bench_blob_codec.py --classes 24 --groups 8 --bracket 64 -o blob_codec.json
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from api.database import BLOB_CODECS, BLOB_MARKER, blob_json, decode_blob
+from tools.synthetic_tournament import build_tournament
+
+COLUMNS = ("draw_data", "matches_data", "court_planner", "court_usage")
+
+
+def median_ms(func: Callable[[], object], rounds: int) -> float:
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def encoders() -> Dict[str, Callable[[object], object]]:
+    """Прежний формат и все зарегистрированные кодеки"""
+    result: Dict[str, Callable[[object], object]] = {"json.dumps (прежний)": json.dumps}
+    for name, codec in BLOB_CODECS.items():
+        result[name] = lambda value, codec=codec: BLOB_MARKER + codec.tag + codec.encode(value)
+    return result
+
+
+def bench_format(encode: Callable[[object], object], values: Dict[str, object], class_id: str,
+                 tournaments: int, rounds: int, directory: str = None) -> Dict[str, float]:
+    fd, path = tempfile.mkstemp(suffix=".db", dir=directory)
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(path)
+        conn.create_function("blob_json", 1, blob_json, deterministic=True)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"CREATE TABLE blobs (id INTEGER PRIMARY KEY, {', '.join(COLUMNS)})")
+
+        encoded = {column: encode(value) for column, value in values.items()}
+        size_kb = sum(len(v) for v in encoded.values()) / 1024
+        conn.executemany(f"INSERT INTO blobs (id, {', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?)",
+                         [(i,) + tuple(encoded[c] for c in COLUMNS) for i in range(tournaments)])
+        conn.commit()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        db_kb = os.path.getsize(path) / 1024
+
+        def write():
+            row = tuple(encode(values[c]) for c in COLUMNS)
+            conn.execute(f"UPDATE blobs SET {', '.join(c + ' = ?' for c in COLUMNS)} WHERE id = 0", row)
+            conn.commit()
+
+        def decode():
+            row = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM blobs WHERE id = 0").fetchone()
+            return [decode_blob(raw) for raw in row]
+
+        def one_class():
+            return conn.execute("SELECT json_extract(blob_json(draw_data), ?) FROM blobs WHERE id = 0",
+                                (f'$."{class_id}"',)).fetchone()
+
+        result = {
+            "size_kb": round(size_kb, 1),
+            "db_kb": round(db_kb, 1),
+            "write_ms": round(median_ms(write, rounds), 2),
+            "decode_ms": round(median_ms(decode, rounds), 2),
+            "class_ms": round(median_ms(one_class, rounds), 2),
+        }
+        assert decode() == [values[c] for c in COLUMNS], "декодированные данные не совпадают с исходными"
+        conn.close()
+        return result
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк кодеков больших JSON-колонок')
+    parser.add_argument('--courts', type=int, default=30, help='Кортов')
+    parser.add_argument('--classes', type=int, default=24, help='Категорий')
+    parser.add_argument('--groups', type=int, default=8, help='Групп в категории')
+    parser.add_argument('--teams', type=int, default=4, help='Команд в группе')
+    parser.add_argument('--bracket', type=int, default=64, help='Участников сетки плей-офф')
+    parser.add_argument('--tournaments', type=int, default=20, help='Турниров в базе (размер файла)')
+    parser.add_argument('-r', '--rounds', type=int, default=20, help='Повторов на замер')
+    parser.add_argument('--seed', type=int, default=1, help='Seed данных')
+    parser.add_argument('--dir', help='Каталог временной базы (по умолчанию системный tmp; для замера диска — каталог data/)')
+    parser.add_argument('-o', '--output', help='Сохранить результат в JSON')
+    args = parser.parse_args()
+
+    tournament = build_tournament(args.seed, args.courts, args.classes, args.groups, args.teams, args.bracket,
+                                  datetime(2026, 6, 1))
+    values = {
+        "draw_data": tournament["draw_data"],
+        "matches_data": tournament["matches_data"]["Matches"],
+        "court_planner": tournament["court_planner"],
+        "court_usage": tournament["court_usage"],
+    }
+    class_id = next(iter(tournament["draw_data"]))
+
+    results: Dict[str, Dict] = {}
+    for name, encode in encoders().items():
+        results[name] = bench_format(encode, values, class_id, args.tournaments, args.rounds, args.dir)
+
+    headers: List[str] = ["размер, КБ", "БД, КБ", "запись", "декодир.", "категория"]
+    print(f"{'формат':<22}" + "".join(f"{h:>12}" for h in headers))
+    for name, r in results.items():
+        print(f"{name:<22}{r['size_kb']:>12.1f}{r['db_kb']:>12.1f}{r['write_ms']:>12.2f}"
+              f"{r['decode_ms']:>12.2f}{r['class_ms']:>12.2f}")
+    print(f"(мс, медиана из {args.rounds}; БД — {args.tournaments} турниров)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Результат сохранён: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк сеток плей-офф: синтетические сетки на 64 и 128 участников
+(tools/synthetic_tournament.py) проходят через модель сетки
+(api/elimination_bracket.py) и три генератора — HTML, JSON для AJAX
+(/api/elimination/.../data) и XML для vMix.
+
+Сценарии:
+  холодный — каждый вызов на новом снимке турнира (модель строится заново);
+  общий снимок — HTML + JSON + XML одного снимка, модель строится один раз.
+Печатает медиану, мс.
+
+Пример:
+    python tools/bench_elimination.py --sizes 64,128 --rounds 20 -o elimination.json
+"""
+
+import argparse
+import copy
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from tools.synthetic_tournament import build_tournament
+
+
+def measure(func: Callable[[Dict], object], snapshots: List[Dict]) -> float:
+    """Медиана времени вызова, мс; каждый вызов получает свой снимок"""
+    times = []
+    for snapshot in snapshots:
+        start = time.perf_counter()
+        func(snapshot)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def build_cases(xml_type_info: Dict) -> Dict[str, Callable[[Dict], object]]:
+    from api.elimination_bracket import EliminationBracket
+    from api.html_elimination import EliminationGenerator
+    from api.xml_generator import XMLGenerator
+
+    html, xml = EliminationGenerator(), XMLGenerator()
+    class_id, draw_index = str(xml_type_info["class_id"]), xml_type_info["draw_index"]
+
+    def bracket(tournament_data: Dict) -> Dict:
+        return tournament_data["draw_data"][class_id]["elimination"][draw_index]["Elimination"]
+
+    def all_renderers(tournament_data: Dict):
+        html.generate_elimination_html(tournament_data, xml_type_info)
+        html.get_elimination_data(tournament_data, xml_type_info)
+        xml.generate_tournament_table_xml(tournament_data, xml_type_info)
+
+    return {
+        "модель сетки": lambda t: EliminationBracket(bracket(t)),
+        "HTML (холодный)": lambda t: html.generate_elimination_html(t, xml_type_info),
+        "JSON (холодный)": lambda t: html.get_elimination_data(t, xml_type_info),
+        "XML (холодный)": lambda t: xml.generate_tournament_table_xml(t, xml_type_info),
+        "HTML+JSON+XML (общий снимок)": all_renderers,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк модели сетки плей-офф и её генераторов')
+    parser.add_argument('-s', '--sizes', default='64,128', help='Участников сетки через запятую (степени двойки)')
+    parser.add_argument('-r', '--rounds', type=int, default=20, help='Повторов на замер')
+    parser.add_argument('--progress', type=float, default=0.6, help='Доля сыгранных матчей')
+    parser.add_argument('--seed', type=int, default=1, help='Seed данных')
+    parser.add_argument('-o', '--output', help='Сохранить результат в JSON')
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+    from api.xml_catalog import build_xml_data_types
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    results: Dict[str, Dict] = {}
+    for size in sizes:
+        tournament_data = build_tournament(args.seed, 8, 1, 0, 0, size, datetime(2026, 6, 1), progress=args.progress)
+        xml_type_info = next(t for t in build_xml_data_types(tournament_data) if t.get("draw_type") == "elimination")
+        timings = {}
+        for name, func in build_cases(xml_type_info).items():
+            # Новый снимок на каждый вызов + прогрев, снимки готовятся вне замера
+            snapshots = [copy.deepcopy(tournament_data) for _ in range(args.rounds + 1)]
+            func(snapshots.pop())
+            timings[name] = round(measure(func, snapshots), 3)
+        results[str(size)] = {"timings_ms": timings}
+
+    names = list(results[str(sizes[0])]["timings_ms"])
+    print(f"{'операция':<32}" + "".join(f"{size:>12}" for size in sizes))
+    for name in names:
+        print(f"{name:<32}" + "".join(f"{results[str(size)]['timings_ms'][name]:>12.3f}" for size in sizes))
+    print(f"(мс, медиана из {args.rounds}; колонки — участников сетки)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Результат сохранён: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк генераторов страниц и XML на синтетических турнирах растущего размера
+(tools/synthetic_tournament.py). Для каждого размера замеряются:
+ScheduleGenerator.get_schedule_data, RoundRobinGenerator и EliminationGenerator
+(JSON-данные и HTML по всем группам / сеткам), XMLGenerator (расписание и все
+таблицы) и RankedinAPI.get_xml_data_types. Печатается медиана и рост относительно
+первого размера; --output сохраняет результат в JSON.
+
+Пример:
+    python tools/bench_generators.py --sizes small,medium,large,xl --rounds 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from tools.synthetic_tournament import build_tournament
+
+# (категорий, кортов, групп в категории, команд в группе, участников сетки)
+SIZES = {
+    "small": (4, 8, 4, 4, 16),
+    "medium": (8, 16, 6, 4, 16),
+    "large": (16, 30, 8, 4, 32),
+    "xl": (24, 40, 12, 5, 64),
+}
+
+
+def build_cases(tournament_data: Dict) -> Dict[str, Callable[[], object]]:
+    """Замеряемые операции для одного турнира"""
+    from api.html_schedule import ScheduleGenerator
+    from api.html_round_robin import RoundRobinGenerator
+    from api.html_elimination import EliminationGenerator
+    from api.xml_generator import XMLGenerator
+    from api.rankedin_api import RankedinAPI
+
+    api = RankedinAPI()
+    xml_types = api.get_xml_data_types(tournament_data)
+    rr_types = [t for t in xml_types if t.get("draw_type") == "round_robin"]
+    elim_types = [t for t in xml_types if t.get("draw_type") == "elimination"]
+    target_date = datetime.fromisoformat(tournament_data["dates"][0]).strftime("%d.%m.%Y")
+
+    schedule, round_robin, elimination, xml = (ScheduleGenerator(), RoundRobinGenerator(),
+                                               EliminationGenerator(), XMLGenerator())
+    return {
+        "schedule.get_schedule_data": lambda: schedule.get_schedule_data(tournament_data, target_date),
+        "round_robin.data (все группы)": lambda: [round_robin.get_round_robin_data(tournament_data, t) for t in rr_types],
+        "round_robin.html (все группы)": lambda: [round_robin.generate_round_robin_html(tournament_data, t) for t in rr_types],
+        "elimination.data (все сетки)": lambda: [elimination.get_elimination_data(tournament_data, t) for t in elim_types],
+        "elimination.html (все сетки)": lambda: [elimination.generate_elimination_html(tournament_data, t) for t in elim_types],
+        "xml.schedule": lambda: xml.generate_schedule_xml(tournament_data),
+        "xml.tables (все таблицы)": lambda: [xml.generate_tournament_table_xml(tournament_data, t) for t in rr_types + elim_types],
+        "get_xml_data_types": lambda: api.get_xml_data_types(tournament_data),
+    }
+
+
+def measure(func: Callable[[], object], rounds: int) -> float:
+    """Медиана времени одного вызова, мс"""
+    func()
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк генераторов на турнирах растущего размера')
+    parser.add_argument('-s', '--sizes', default='small,medium,large', help=f'Размеры через запятую: {", ".join(SIZES)}')
+    parser.add_argument('-r', '--rounds', type=int, default=5, help='Повторов на замер')
+    parser.add_argument('--seed', type=int, default=1, help='Seed данных')
+    parser.add_argument('-o', '--output', help='Сохранить результат в JSON')
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    sizes = [s.strip() for s in args.sizes.split(',') if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"неизвестные размеры: {', '.join(unknown)}")
+
+    results: Dict[str, Dict] = {}
+    for size in sizes:
+        classes, courts, groups, teams, bracket = SIZES[size]
+        tournament_data = build_tournament(args.seed, courts, classes, groups, teams, bracket, datetime(2026, 6, 1))
+        matches = len(tournament_data["matches_data"]["Matches"])
+        results[size] = {
+            "matches": matches,
+            "timings_ms": {name: round(measure(func, args.rounds), 3)
+                           for name, func in build_cases(tournament_data).items()},
+        }
+        print(f"{size}: категорий {classes}, кортов {courts}, матчей {matches}")
+
+    first = results[sizes[0]]["timings_ms"]
+    header = f"{'операция':<32}" + "".join(f"{s:>14}" for s in sizes)
+    print()
+    print(header)
+    for name in first:
+        row = f"{name:<32}"
+        for size in sizes:
+            ms = results[size]["timings_ms"][name]
+            growth = f" x{ms / first[name]:.1f}" if size != sizes[0] and first[name] else ""
+            row += f"{ms:>9.2f}{growth:>5}"
+        print(row)
+    print("(мс, медиана; xN — рост относительно первого размера)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Результат сохранён: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
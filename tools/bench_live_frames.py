@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Микробенчмарк обработки live-кадров SignalR.
+
+Прогоняет поток сообщений хаба через RankedinLiveClient._on_message (разбиение,
+json.loads, логирование, _transform_update / _transform_action, score_parser)
+и отдельно — через отдельные этапы. Печатает единиц/с, мкс на единицу и память
+на единицу: пик временных выделений (tracemalloc) и прирост занятых блоков
+(sys.getallocatedblocks) — CPython не ведёт счётчик отдельных выделений.
+
+Источники потока:
+  --frames FILE        запись tools/rankedin_ws.py (строки JSON [время, сообщение]
+                       или просто сообщение; .gz читается прозрачно);
+  --court-monitor DB   состояния кортов из tools/Court_monitor.py, восстановленные
+                       в кадры ReceiveMatchUpdate (счёт и геймы, без сырых полей);
+  по умолчанию         синтетический поток CourtSimulation (--courts, --points).
+
+Пример:
+    python tools/bench_live_frames.py --courts 30 --points 400 --rounds 5
+    python tools/bench_live_frames.py --frames court_7001.jsonl -o live.json
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from api.live_recorder import message_court
+from api.rankedin_live import PROTOCOL_SEPARATOR, RankedinLiveClient
+from api.score_parser import extract_players, parse_detailed_result
+from tools.synthetic_tournament import CourtSimulation
+
+# Пинг хаба раз в 15 с; в синтетическом потоке — раз в столько сообщений
+PING_EVERY = 50
+
+_POINTS = {"0": 0, "15": 1, "30": 2, "40": 3, "AD": 4}
+
+
+def load_frames(path: str) -> List[str]:
+    """Сообщения из записи rankedin_ws.py"""
+    opener = gzip.open if path.endswith(".gz") else open
+    messages = []
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                messages.append(line)
+                continue
+            messages.append(item[1] if isinstance(item, list) else item if isinstance(item, str) else json.dumps(item))
+    return messages
+
+
+def frames_from_court_monitor(db_path: str, limit: int) -> List[str]:
+    """Кадры ReceiveMatchUpdate, восстановленные из court_states (Court_monitor.py)"""
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute('''
+            SELECT court_id, first_participant_score, second_participant_score, detailed_result
+            FROM court_states ORDER BY id LIMIT ?
+        ''', (limit,)).fetchall()
+
+    messages = []
+    for court_id, first, second, detailed in rows:
+        sets = []
+        for s in json.loads(detailed or "[]"):
+            game = s.get("gameScore") or {}
+            games = []
+            if game:
+                games.append({"firstParticipantScore": _POINTS.get(game.get("first"), int(game.get("first") or 0)),
+                              "secondParticipantScore": _POINTS.get(game.get("second"), int(game.get("second") or 0))})
+            sets.append({"firstParticipantScore": s.get("firstParticipantScore", 0),
+                         "secondParticipantScore": s.get("secondParticipantScore", 0),
+                         "loserTiebreak": s.get("loserTiebreak"), "detailedResult": games})
+        update = {"courtId": int(court_id), "matchId": 0, "isTieBreak": False, "isSuperTieBreak": False,
+                  "score": {"firstParticipantScore": first or 0, "secondParticipantScore": second or 0,
+                            "detailedResult": sets},
+                  "serve": {"isFirstParticipantServing": True, "isServingLeft": False}}
+        messages.append(json.dumps({"type": 1, "target": "ReceiveMatchUpdate", "arguments": [[update]]},
+                                   ensure_ascii=False) + PROTOCOL_SEPARATOR)
+    return messages
+
+
+def synthetic_frames(courts: int, points: int, seed: int) -> List[str]:
+    """Поток хаба: очко — ReceiveMatchUpdate, конец гейма — ещё ReceiveMatchAction, периодический пинг"""
+    rng = random.Random(seed)
+    simulations = [CourtSimulation(7001 + i, f"Корт {i + 1}", 300000 + i * 4) for i in range(courts)]
+    messages = []
+    for step in range(points * courts):
+        simulation = simulations[step % courts]
+        game_over = simulation.advance(rng)
+        messages.append(json.dumps({"type": 1, "target": "ReceiveMatchUpdate",
+                                    "arguments": [[simulation.match_update()]]}, ensure_ascii=False) + PROTOCOL_SEPARATOR)
+        if game_over:
+            messages.append(json.dumps({"type": 1, "target": "ReceiveMatchAction",
+                                        "arguments": [[simulation.match_action()]]}, ensure_ascii=False) + PROTOCOL_SEPARATOR)
+        if step % PING_EVERY == 0:
+            messages.append(json.dumps({"type": 6}) + PROTOCOL_SEPARATOR)
+    return messages
+
+
+class _StubSocket:
+    def send(self, data):
+        pass
+
+
+def _events(frame: Dict) -> List[Dict]:
+    args = frame.get("arguments") or []
+    first = args[0] if args else []
+    return [e for e in (first if isinstance(first, list) else [first]) if isinstance(e, dict)]
+
+
+def build_cases(messages: List[str]) -> Dict[str, Tuple[str, Callable, List]]:
+    """Замеряемые пути: (режим логов, обработка одного элемента, элементы)"""
+    raw_frames = [f for m in messages for f in m.split(PROTOCOL_SEPARATOR) if f.strip()]
+    parsed = [json.loads(f) for f in raw_frames]
+    events = [e for frame in parsed if frame.get("type") == 1 for e in _events(frame)]
+    updates = [e for e in events if "courtModel" not in e]
+    actions = [e for e in events if "courtModel" in e]
+
+    clients: Dict = {}
+    routed = []
+    for message in messages:
+        court_id = message_court(message)
+        if court_id not in clients:
+            clients[court_id] = RankedinLiveClient(court_id, on_update=lambda data: None)
+        routed.append((clients[court_id], message))
+    ws = _StubSocket()
+    transformer = RankedinLiveClient(0)
+
+    def on_message(item):
+        item[0]._on_message(ws, item[1])
+
+    def transform(event):
+        if "courtModel" in event:
+            transformer._transform_action(event, event["courtModel"])
+        else:
+            transformer._transform_update(event)
+
+    def parse_detailed(update):
+        parse_detailed_result(update.get("score", {}).get("detailedResult", []),
+                              update.get("isTieBreak", False), update.get("isSuperTieBreak", False))
+
+    def players(action):
+        base = action["courtModel"].get("liveMatch", {}).get("base", {})
+        extract_players(base.get("firstParticipant", []))
+        extract_players(base.get("secondParticipant", []))
+
+    return {
+        "on_message (INFO в файл)": ("info", on_message, routed),
+        "on_message (логи WARNING)": ("quiet", on_message, routed),
+        "json.loads": ("quiet", json.loads, raw_frames),
+        "_transform_update/_action": ("quiet", transform, updates + actions),
+        "parse_detailed_result": ("quiet", parse_detailed, updates),
+        "extract_players": ("quiet", players, actions),
+    }
+
+
+def configure_logging(mode: str, handler: logging.Handler):
+    """info — INFO-логи live-клиента пишутся в файл (как в продакшене), quiet — только WARNING"""
+    live_logger = logging.getLogger("api.rankedin_live")
+    live_logger.setLevel(logging.INFO if mode == "info" else logging.WARNING)
+    live_logger.propagate = False
+    if handler not in live_logger.handlers:
+        live_logger.addHandler(handler)
+
+
+def measure(process: Callable, items: List, rounds: int) -> Dict:
+    """Время (медиана по rounds) и память на элемент потока"""
+    if not items:
+        return {"items": 0, "per_second": 0, "us_per_item": 0, "peak_bytes_per_item": 0, "retained_blocks_per_1000": 0}
+
+    def run():
+        for item in items:
+            process(item)
+
+    run()
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    elapsed = statistics.median(times)
+
+    # Пик временных выделений на элемент: сброс пика перед каждым элементом
+    peaks = 0
+    tracemalloc.start()
+    for item in items:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        process(item)
+        peaks += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+
+    blocks_before = sys.getallocatedblocks()
+    run()
+    retained = sys.getallocatedblocks() - blocks_before
+
+    return {
+        "items": len(items),
+        "per_second": round(len(items) / elapsed) if elapsed else 0,
+        "us_per_item": round(elapsed / len(items) * 1e6, 2),
+        "peak_bytes_per_item": round(peaks / len(items)),
+        "retained_blocks_per_1000": round(retained / len(items) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Микробенчмарк обработки live-кадров SignalR')
+    parser.add_argument('--frames', help='Запись tools/rankedin_ws.py (.jsonl / .jsonl.gz)')
+    parser.add_argument('--court-monitor', help='БД tools/Court_monitor.py (court_states)')
+    parser.add_argument('--limit', type=int, default=100000, help='Максимум состояний из --court-monitor')
+    parser.add_argument('--courts', type=int, default=30, help='Кортов в синтетическом потоке')
+    parser.add_argument('--points', type=int, default=200, help='Очков на корт в синтетическом потоке')
+    parser.add_argument('--seed', type=int, default=1, help='Seed синтетического потока')
+    parser.add_argument('-r', '--rounds', type=int, default=5, help='Повторов на замер')
+    parser.add_argument('-o', '--output', help='Сохранить результат в JSON')
+    args = parser.parse_args()
+
+    if args.frames:
+        messages, source = load_frames(args.frames), args.frames
+    elif args.court_monitor:
+        messages, source = frames_from_court_monitor(args.court_monitor, args.limit), args.court_monitor
+    else:
+        messages, source = synthetic_frames(args.courts, args.points, args.seed), \
+            f"синтетика: {args.courts} кортов × {args.points} очков"
+    if not messages:
+        print("Нет сообщений для замера")
+        sys.exit(1)
+
+    handler = logging.FileHandler(os.devnull, encoding="utf-8")
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    results = {}
+    for name, (log_mode, process, items) in build_cases(messages).items():
+        configure_logging(log_mode, handler)
+        results[name] = measure(process, items, args.rounds)
+
+    print(f"Источник: {source}, сообщений: {len(messages)}")
+    print(f"{'путь':<28} {'единиц':>8} {'в секунду':>11} {'мкс/ед.':>9} {'пик Б/ед.':>10} {'блоков/1000':>12}")
+    for name, r in results.items():
+        print(f"{name:<28} {r['items']:>8} {r['per_second']:>11} {r['us_per_item']:>9} "
+              f"{r['peak_bytes_per_item']:>10} {r['retained_blocks_per_1000']:>12}")
+    print("(единица: сообщение для on_message, кадр для json.loads, событие — для этапов)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"source": source, "messages": len(messages), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"Результат сохранён: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк старта воркера: каждый замер — новый процесс Python, который импортирует
+app и вызывает create_app() (как воркер gunicorn через wsgi.py). Процессы работают
+во временном каталоге (свои data/, logs/, xml_files/). Сценарии:
+  первый старт   — пустая БД, применяются все миграции схемы;
+  повторный      — схема актуальна, init_database не выполняет DDL.
+Печатает медиану фаз (импорт, init_database, create_app) и полного времени процесса.
+
+Пример:
+    python tools/bench_startup.py --rounds 5 -o startup.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, sys
+sys.path.insert(0, {root!r})
+import app
+app.create_app()
+from api.metrics import startup_timings
+print("STARTUP " + json.dumps(startup_timings.values()))
+"""
+
+
+def run_worker(workdir: str) -> Dict[str, float]:
+    """Один старт воркера; фазы и полное время процесса, мс"""
+    env = dict(os.environ, SECRET_KEY=os.environ.get("SECRET_KEY") or "bench-startup", LOG_LEVEL="WARNING")
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", CHILD.format(root=root_dir)], cwd=workdir, env=env,
+                            capture_output=True, text=True, timeout=120)
+    total = time.perf_counter() - started
+    line = next((l for l in result.stdout.splitlines() if l.startswith("STARTUP ")), None)
+    if result.returncode != 0 or line is None:
+        raise RuntimeError(f"воркер завершился с ошибкой:\n{result.stderr[-2000:]}")
+    timings = {phase: seconds * 1000 for phase, seconds in json.loads(line[len("STARTUP "):]).items()}
+    timings["process"] = total * 1000
+    return timings
+
+
+def summarize(samples: List[Dict[str, float]]) -> Dict[str, float]:
+    return {phase: round(statistics.median(s[phase] for s in samples), 1) for phase in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк старта воркера (import app + create_app)')
+    parser.add_argument('-r', '--rounds', type=int, default=5, help='Запусков на сценарий')
+    parser.add_argument('-o', '--output', help='Сохранить результат в JSON')
+    args = parser.parse_args()
+
+    first, warm = [], []
+    for _ in range(args.rounds):
+        workdir = tempfile.mkdtemp(prefix="bench_startup_")
+        try:
+            first.append(run_worker(workdir))
+            warm.append(run_worker(workdir))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {"first_start": summarize(first), "warm_start": summarize(warm)}
+    phases = list(results["first_start"])
+    print(f"{'сценарий':<20}" + "".join(f"{p:>15}" for p in phases))
+    for name, title in (("first_start", "первый старт"), ("warm_start", "повторный")):
+        print(f"{title:<20}" + "".join(f"{results[name][p]:>15.1f}" for p in phases))
+    print(f"(мс, медиана из {args.rounds}; process — полное время процесса с запуском интерпретатора)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Результат сохранён: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
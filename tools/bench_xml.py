@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк сериализации XML для vMix.
+Сравнивает прежний путь (ET.tostring + minidom.toprettyxml) с однопроходной
+сериализацией serialize_xml на синтетическом расписании и проверяет,
+что оба пути дают побайтно одинаковый результат.
+"""
+
+import argparse
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+from xml.dom import minidom
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from api.xml_generator import XMLGenerator, serialize_xml
+
+
+def minidom_prettify(elem: ET.Element) -> str:
+    """Прежняя реализация XMLGenerator._prettify_xml"""
+    rough_string = ET.tostring(elem, encoding='unicode')
+    return minidom.parseString(rough_string).toprettyxml(indent="  ")
+
+
+def build_schedule(courts: int, matches_per_court: int) -> Dict:
+    """Синтетический турнир с court_usage нужного размера"""
+    start = datetime(2026, 6, 1, 9, 0)
+    court_usage = []
+    for court in range(1, courts + 1):
+        for i in range(matches_per_court):
+            court_usage.append({
+                "CourtId": 1000 + court,
+                "TournamentMatchId": court * 10000 + i,
+                "ChallengeId": court * 20000 + i,
+                "MatchDate": (start + timedelta(minutes=30 * i)).isoformat(),
+                "Duration": 30,
+                "PoolName": f"Группа {chr(65 + i % 8)} & <финал>",
+                "Round": i % 5 + 1,
+                "MatchOrder": i,
+                "ChallengerName": f"Иванов И. / Петров П. {i}",
+                "ChallengedName": f"Сидоров С. / \"Кузнецов\" К. {i}",
+                "ChallengerIndividualName": "",
+                "ChallengedIndividualName": "",
+                "ChallengerResult": "6-4 6-3" if i % 3 == 0 else None,
+                "ChallengedResult": "",
+                "IsFinal": i == matches_per_court - 1,
+                "Consolation": 0,
+            })
+    return {
+        "tournament_id": "bench",
+        "metadata": {"name": "Benchmark Open", "sport": 5, "country": 146},
+        "dates": sorted({m["MatchDate"][:10] for m in court_usage}),
+        "courts": [{"Item1": 1000 + c, "Item2": f"Корт {c}"} for c in range(1, courts + 1)],
+        "court_usage": court_usage,
+    }
+
+
+def capture_tree(tournament_data: Dict) -> ET.Element:
+    """Строит дерево generate_schedule_xml, не сериализуя его"""
+    captured: List[ET.Element] = []
+    generator = XMLGenerator()
+    generator._prettify_xml = lambda elem: captured.append(elem) or ""
+    generator.generate_schedule_xml(tournament_data)
+    return captured[0]
+
+
+def measure(func: Callable[[ET.Element], str], elem: ET.Element, rounds: int) -> float:
+    """Среднее время одной сериализации, мс"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(elem)
+    return (time.perf_counter() - start) * 1000 / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк сериализации XML (minidom vs serialize_xml)')
+    parser.add_argument('-c', '--courts', type=int, default=30, help='Количество кортов')
+    parser.add_argument('-m', '--matches', type=int, default=40, help='Матчей на корт')
+    parser.add_argument('-r', '--rounds', type=int, default=20, help='Повторов на замер')
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    elem = capture_tree(build_schedule(args.courts, args.matches))
+
+    legacy = minidom_prettify(elem)
+    streamed = serialize_xml(elem)
+    if legacy != streamed:
+        print("ОШИБКА: результаты сериализации различаются")
+        sys.exit(1)
+
+    legacy_ms = measure(minidom_prettify, elem, args.rounds)
+    streamed_ms = measure(serialize_xml, elem, args.rounds)
+
+    print(f"Матчей: {args.courts * args.matches}, размер XML: {len(streamed.encode('utf-8')) / 1024:.1f} KB")
+    print(f"minidom:       {legacy_ms:8.2f} мс")
+    print(f"serialize_xml: {streamed_ms:8.2f} мс  (x{legacy_ms / streamed_ms:.1f})")
+    print("Вывод идентичен: да")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Локальная заглушка rankedin для офлайн-тестов производительности.
+
+Реализует REST-эндпоинты, которые вызывает RankedinAPI (api.rankedin.com/v1 и
+live.rankedin.com/api/v1), и SignalR-хаб live-счёта из api/rankedin_live.py:
+POST /scores/negotiate → WebSocket /client/?hub=scores (handshake, JoinCourtRoom,
+ReceiveMatchUpdate / ReceiveMatchAction, ping).
+
+Данные:
+  - синтетический турнир (tools/synthetic_tournament.py) заданного размера;
+  - записанные фикстуры: JSON-файлы в --fixtures, имя — ключ запроса (fixture_key);
+    --record проксирует промахи на настоящий rankedin и сохраняет ответы.
+Инъекции: задержка (--latency/--jitter), доля ошибок 500 (--error-rate),
+ограничение частоты с ответом 429 (--rate-limit). Во время работы меняются
+через POST /_fake/config с JSON {"latency_ms", "jitter_ms", "error_rate", "rate_limit"}.
+
+Приложение направляется на заглушку переменными окружения:
+    RANKEDIN_API_BASE=http://127.0.0.1:8099/v1
+    RANKEDIN_LIVE_API_BASE=http://127.0.0.1:8099/api/v1
+    RANKEDIN_LIVE_URL=http://127.0.0.1:8099
+
+Пример:
+    python tools/fake_rankedin.py --port 8099 --courts 30 --classes 16 --point-interval 2 --latency 80
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+import socket
+import struct
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from tools.synthetic_tournament import TOURNAMENT_ID, build_tournament, court_simulations
+
+SEPARATOR = "\x1e"
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+PING_INTERVAL = 15.0
+
+# Настоящие адреса rankedin для режима --record
+RECORD_ORIGINS = {"/v1/": "https://api.rankedin.com", "/api/v1/": "https://live.rankedin.com"}
+
+# Параметры запроса, не влияющие на ответ (не входят в ключ фикстуры)
+_IGNORED_PARAMS = {"isreadonly", "language"}
+
+
+def fixture_key(method: str, path: str, query: Dict[str, List[str]], body: Optional[Dict]) -> str:
+    """Имя файла фикстуры: путь и значимые параметры (для POST — поля тела)"""
+    params = {k.lower(): v[0] for k, v in query.items() if k.lower() not in _IGNORED_PARAMS}
+    if method == "POST" and isinstance(body, dict):
+        params.update({k.lower(): json.dumps(v, sort_keys=True) if isinstance(v, (list, dict)) else str(v)
+                       for k, v in body.items()})
+    name = re.sub(r"[^a-z0-9]+", "_", path.lower()).strip("_")
+    if params:
+        name += "__" + "_".join(f"{k}={re.sub(r'[^A-Za-z0-9.-]+', '-', v)}" for k, v in sorted(params.items()))
+    return name[:200] + ".json"
+
+
+class Injection:
+    """Задержка, ошибки и ограничение частоты REST-ответов"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 rate_limit: float = 0.0, seed: int = 1):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = rate_limit
+        self._refilled_at = time.monotonic()
+
+    def update(self, values: Dict):
+        with self._lock:
+            for name in ("latency_ms", "jitter_ms", "error_rate", "rate_limit"):
+                if name in values:
+                    setattr(self, name, float(values[name]))
+            self._tokens = min(self._tokens, self.rate_limit)
+
+    def as_dict(self) -> Dict:
+        return {"latency_ms": self.latency_ms, "jitter_ms": self.jitter_ms,
+                "error_rate": self.error_rate, "rate_limit": self.rate_limit}
+
+    def apply(self) -> Optional[int]:
+        """Ждёт задержку; возвращает код ошибки (429/500) или None"""
+        with self._lock:
+            if self.rate_limit > 0:
+                now = time.monotonic()
+                self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled_at) * self.rate_limit)
+                self._refilled_at = now
+                if self._tokens < 1:
+                    return 429
+                self._tokens -= 1
+            delay = (self.latency_ms + self._rng.uniform(0, self.jitter_ms)) / 1000
+            failed = self._rng.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        return 500 if failed else None
+
+
+class HubConnection:
+    """WebSocket-соединение клиента SignalR (JSON-протокол поверх текстовых кадров)"""
+
+    def __init__(self, sock: socket.socket, rfile):
+        self.sock = sock
+        self.rfile = rfile
+        self.courts: set = set()
+        self.closed = False
+        self._send_lock = threading.Lock()
+
+    def send_message(self, message: Dict):
+        self.send_text(json.dumps(message, ensure_ascii=False) + SEPARATOR)
+
+    def send_text(self, text: str):
+        self._send_frame(0x1, text.encode("utf-8"))
+
+    def _send_frame(self, opcode: int, payload: bytes):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < 65536:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        with self._send_lock:
+            if self.closed:
+                return
+            try:
+                self.sock.sendall(header + payload)
+            except OSError:
+                self.closed = True
+
+    def read_frame(self) -> Tuple[Optional[int], bytes]:
+        """Следующий кадр клиента (opcode, payload); (None, b'') при разрыве"""
+        head = self.rfile.read(2)
+        if len(head) < 2:
+            return None, b""
+        opcode, length = head[0] & 0x0F, head[1] & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", self.rfile.read(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", self.rfile.read(8))[0]
+        mask = self.rfile.read(4) if head[1] & 0x80 else b""
+        payload = self.rfile.read(length)
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return opcode, payload
+
+    def close(self):
+        self._send_frame(0x8, b"")
+        self.closed = True
+
+
+class FakeRankedin:
+    """HTTP + SignalR заглушка rankedin с синтетическим турниром и фикстурами"""
+
+    def __init__(self, tournament: Dict, host: str = "127.0.0.1", port: int = 0, fixtures_dir: str = None,
+                 record: bool = False, injection: Injection = None, point_interval: float = 2.0, seed: int = 1):
+        self.tournament = tournament
+        self.simulations = court_simulations(tournament)
+        self.fixtures_dir = fixtures_dir
+        self.record = record
+        self.injection = injection or Injection(seed=seed)
+        self.point_interval = point_interval
+        self.stats = {"rest": 0, "fixtures": 0, "errors": 0, "rate_limited": 0, "hub_connections": 0, "hub_frames": 0}
+        self._rng = random.Random(seed)
+        self._connections: List[HubConnection] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        threading.Thread(target=self._score_loop, daemon=True).start()
+        threading.Thread(target=self._ping_loop, daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+        self.server.shutdown()
+
+    def env(self) -> Dict[str, str]:
+        """Переменные окружения, направляющие приложение на заглушку"""
+        return {"RANKEDIN_API_BASE": f"{self.url}/v1",
+                "RANKEDIN_LIVE_API_BASE": f"{self.url}/api/v1",
+                "RANKEDIN_LIVE_URL": self.url}
+
+    # === REST ===
+
+    def respond(self, method: str, path: str, query: Dict[str, List[str]], body: Optional[Dict]) -> Tuple[int, object]:
+        """Ответ на REST-запрос: фикстура, синтетические данные или 404"""
+        if self.fixtures_dir:
+            fixture = os.path.join(self.fixtures_dir, fixture_key(method, path, query, body))
+            if os.path.exists(fixture):
+                with open(fixture, encoding="utf-8") as f:
+                    self.stats["fixtures"] += 1
+                    return 200, json.load(f)
+            if self.record:
+                return self._record(method, path, query, body, fixture)
+        return self.synthetic(path, query, body)
+
+    def synthetic(self, path: str, query: Dict[str, List[str]], body: Optional[Dict]) -> Tuple[int, object]:
+        t = self.tournament
+        match = re.match(r"^/api/v1/court/(\d+)/scoreboard/?$", path)
+        if match:
+            simulation = self.simulations.get(int(match.group(1)))
+            return (200, simulation.scoreboard()) if simulation else (404, {"error": "not found"})
+
+        param = {k.lower(): v[0] for k, v in query.items()}
+        tournament_id = param.get("tournamentid") or param.get("id") or (body or {}).get("tournamentId")
+        endpoint = path.rstrip("/").rsplit("/", 1)[-1].lower()
+        if endpoint == "getdrawsforstageandstrengthasync":
+            class_draws = t["draw_data"].get(param.get("tournamentclassid", ""), {})
+            if param.get("drawstage") == "0" and param.get("drawstrength") == "0":
+                return 200, class_draws.get("round_robin", []) + class_draws.get("elimination", [])
+            return 200, []
+        if str(tournament_id) != t["tournament_id"]:
+            return 404, {"error": "tournament not found"}
+        responses = {
+            "getfeaturemetadataasync": lambda: t["metadata"],
+            "gettournamentclassesasync": lambda: t["classes"],
+            "getclassesanddrawnamesasync": lambda: t["classes"],
+            "gettournamenttimetableinfoasync": lambda: {"Courts": t["courts"]},
+            "gettimetabledatesasync": lambda: t["dates"],
+            "getcourtplannerasync": lambda: t["court_planner"],
+            "getcourtusageasync": lambda: t["court_usage"],
+            "getallseedsasync": lambda: t["participants"],
+            "getmatchessectionasync": lambda: t["matches_data"],
+        }
+        if endpoint in responses:
+            return 200, responses[endpoint]()
+        return 404, {"error": "not found"}
+
+    def _record(self, method: str, path: str, query: Dict[str, List[str]], body: Optional[Dict],
+                fixture: str) -> Tuple[int, object]:
+        """Промах фикстуры в режиме --record: запрос к настоящему rankedin и сохранение ответа"""
+        origin = next((o for prefix, o in RECORD_ORIGINS.items() if path.startswith(prefix)), None)
+        if not origin:
+            return 404, {"error": "not found"}
+        params = {k: v[0] for k, v in query.items()}
+        try:
+            if method == "POST":
+                resp = requests.post(origin + path, params=params, json=body, timeout=30)
+            else:
+                resp = requests.get(origin + path, params=params, timeout=30)
+            data = resp.json()
+        except (requests.RequestException, ValueError) as e:
+            return 502, {"error": str(e)}
+        if resp.status_code == 200:
+            os.makedirs(self.fixtures_dir, exist_ok=True)
+            with open(fixture, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+        return resp.status_code, data
+
+    # === SignalR ===
+
+    def negotiate(self) -> Dict:
+        return {"negotiateVersion": 1, "url": f"{self.url}/client/?hub=scores", "accessToken": "fake-token"}
+
+    def serve_hub(self, conn: HubConnection):
+        """Цикл чтения кадров клиента хаба"""
+        with self._lock:
+            self._connections.append(conn)
+            self.stats["hub_connections"] += 1
+        try:
+            while not conn.closed:
+                opcode, payload = conn.read_frame()
+                if opcode is None or opcode == 0x8:
+                    break
+                if opcode == 0x9:
+                    conn._send_frame(0xA, payload)
+                    continue
+                if opcode != 0x1:
+                    continue
+                for frame in payload.decode("utf-8", errors="replace").split(SEPARATOR):
+                    if frame.strip():
+                        self._on_hub_message(conn, frame)
+        except (OSError, struct.error):
+            pass
+        finally:
+            conn.closed = True
+            with self._lock:
+                self._connections.remove(conn)
+
+    def _on_hub_message(self, conn: HubConnection, frame: str):
+        try:
+            message = json.loads(frame)
+        except json.JSONDecodeError:
+            return
+        if "protocol" in message:
+            conn.send_text("{}" + SEPARATOR)
+            return
+        if message.get("type") == 1 and message.get("target") == "JoinCourtRoom":
+            args = message.get("arguments") or [{}]
+            court_id = args[0].get("courtId")
+            conn.courts.add(court_id)
+            if message.get("invocationId") is not None:
+                conn.send_message({"type": 3, "invocationId": message["invocationId"], "result": None})
+            simulation = self.simulations.get(court_id)
+            if simulation:
+                conn.send_message({"type": 1, "target": "ReceiveMatchAction",
+                                   "arguments": [[simulation.match_action("Join")]]})
+
+    def _broadcast(self, court_id: int, message: Dict):
+        with self._lock:
+            targets = [c for c in self._connections if court_id in c.courts]
+        for conn in targets:
+            conn.send_message(message)
+            self.stats["hub_frames"] += 1
+
+    def _score_loop(self):
+        """Очки на всех кортах: на каждом корте — раз в point_interval, со сдвигом между кортами"""
+        court_ids = sorted(self.simulations)
+        if self.point_interval <= 0 or not court_ids:
+            return
+        step = self.point_interval / len(court_ids)
+        next_at, index = time.monotonic(), 0
+        while not self._stop.is_set():
+            simulation = self.simulations[court_ids[index % len(court_ids)]]
+            game_over = simulation.advance(self._rng)
+            self._broadcast(simulation.court_id, {"type": 1, "target": "ReceiveMatchUpdate",
+                                                  "arguments": [[simulation.match_update()]]})
+            if game_over:
+                self._broadcast(simulation.court_id, {"type": 1, "target": "ReceiveMatchAction",
+                                                      "arguments": [[simulation.match_action()]]})
+            index += 1
+            next_at += step
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                next_at = time.monotonic()
+
+    def _ping_loop(self):
+        while not self._stop.wait(PING_INTERVAL):
+            with self._lock:
+                targets = list(self._connections)
+            for conn in targets:
+                conn.send_message({"type": 6})
+
+    # === HTTP ===
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send_json(self, status: int, body: object, headers: Dict[str, str] = None):
+                payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _read_body(self) -> Optional[Dict]:
+                length = int(self.headers.get("Content-Length") or 0)
+                if not length:
+                    return None
+                try:
+                    return json.loads(self.rfile.read(length))
+                except ValueError:
+                    return None
+
+            def _handle(self, method: str):
+                parsed = urlparse(self.path)
+                body = self._read_body() if method == "POST" else None
+
+                if parsed.path == "/_fake/config":
+                    if method == "POST" and isinstance(body, dict):
+                        fake.injection.update(body)
+                    return self._send_json(200, dict(fake.injection.as_dict(), stats=fake.stats))
+                if parsed.path.rstrip("/") == "/client" and self.headers.get("Upgrade", "").lower() == "websocket":
+                    return self._upgrade()
+
+                fake.stats["rest"] += 1
+                failure = fake.injection.apply()
+                if failure == 429:
+                    fake.stats["rate_limited"] += 1
+                    return self._send_json(429, {"error": "Too Many Requests"}, {"Retry-After": "1"})
+                if failure:
+                    fake.stats["errors"] += 1
+                    return self._send_json(failure, {"error": "Injected failure"})
+
+                if parsed.path.rstrip("/") == "/scores/negotiate" and method == "POST":
+                    return self._send_json(200, fake.negotiate())
+                status, data = fake.respond(method, parsed.path, parse_qs(parsed.query), body)
+                self._send_json(status, data)
+
+            def _upgrade(self):
+                key = self.headers.get("Sec-WebSocket-Key", "")
+                accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+                self.send_response(101, "Switching Protocols")
+                self.send_header("Upgrade", "websocket")
+                self.send_header("Connection", "Upgrade")
+                self.send_header("Sec-WebSocket-Accept", accept)
+                self.end_headers()
+                self.wfile.flush()
+                fake.serve_hub(HubConnection(self.connection, self.rfile))
+                self.close_connection = True
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Локальная заглушка rankedin (REST + SignalR)')
+    parser.add_argument('--host', default='127.0.0.1', help='Адрес')
+    parser.add_argument('--port', type=int, default=8099, help='Порт')
+    parser.add_argument('--tournament-id', default=TOURNAMENT_ID, help='ID синтетического турнира')
+    parser.add_argument('--courts', type=int, default=10, help='Кортов')
+    parser.add_argument('--classes', type=int, default=4, help='Категорий')
+    parser.add_argument('--groups', type=int, default=4, help='Групп в категории')
+    parser.add_argument('--teams', type=int, default=4, help='Команд в группе')
+    parser.add_argument('--bracket', type=int, default=16, help='Участников сетки плей-офф (степень двойки)')
+    parser.add_argument('--date', default=datetime.now().strftime('%Y-%m-%d'), help='Игровой день (YYYY-MM-DD)')
+    parser.add_argument('--seed', type=int, default=1, help='Seed данных и счёта')
+    parser.add_argument('--point-interval', type=float, default=2.0, help='Секунд между очками на одном корте (0 — без live)')
+    parser.add_argument('--fixtures', help='Каталог записанных фикстур (имеют приоритет над синтетикой)')
+    parser.add_argument('--record', action='store_true', help='Промахи фикстур запрашивать у rankedin и сохранять')
+    parser.add_argument('--latency', type=float, default=0.0, help='Задержка ответа, мс')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Случайная добавка к задержке, мс')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Доля ответов 500 (0..1)')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='Запросов в секунду до ответов 429 (0 — без ограничения)')
+    args = parser.parse_args()
+
+    if args.record and not args.fixtures:
+        parser.error('--record требует --fixtures')
+
+    tournament = build_tournament(args.seed, args.courts, args.classes, args.groups, args.teams, args.bracket,
+                                  datetime.strptime(args.date, '%Y-%m-%d'), args.tournament_id)
+    injection = Injection(args.latency, args.jitter, args.error_rate, args.rate_limit, args.seed)
+    fake = FakeRankedin(tournament, args.host, args.port, args.fixtures, args.record, injection,
+                        args.point_interval, args.seed)
+    fake.start()
+
+    print(f"Заглушка rankedin: {fake.url}, турнир {args.tournament_id} "
+          f"({args.courts} кортов, {args.classes} категорий)")
+    print("Переменные окружения для приложения:")
+    for name, value in fake.env().items():
+        print(f"  {name}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Нагрузочный тест «трансляционного этажа».
+
+Приложение запускается в отдельном процессе во временном каталоге (чистая БД,
+свои xml_files/logs) и обращается к заглушке rankedin (tools/fake_rankedin.py)
+вместо api.rankedin.com / live.rankedin.com. Генератор нагрузки имитирует:
+  - экраны кортов:   /api/display/court/<slot>/state раз в 1 с;
+  - табло:           /api/court/<t>/<c>/data раз в 500 мс;
+  - страницы:        расписание, группы, сетка — HTML один раз, затем их JSON
+                     с интервалами из static/js (10 с / 30 с / 30 с);
+  - входы vMix:      /api/xml-live/<t>/<тип> раз в 1 с;
+  - live-кадры счёта с частотой --frame-rate на весь этаж — через SignalR-хаб
+                     заглушки на корты, на которые подписалось приложение.
+
+Отчёт: p50/p95/p99, пропускная способность и доля ошибок по сценариям,
+повторы из-за блокировок SQLite (sqlite_lock_retries_total из /metrics).
+Турнир, смещения клиентов и последовательность кадров задаются --seed,
+поэтому прогоны сравнимы: --output сохраняет результат в JSON,
+--compare сравнивает с сохранённым и завершается с кодом 1 при регрессии p95.
+
+Пример:
+    python tools/load_test.py --courts 10 --scoreboards 20 --duration 60 --output base.json
+    python tools/load_test.py --courts 10 --scoreboards 20 --duration 60 --compare base.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import re
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from tools.fake_rankedin import FakeRankedin, Injection
+from tools.synthetic_tournament import build_tournament, write_tournament
+
+# Интервалы опроса клиентов, с (как в static/js и типичной настройке vMix)
+COURT_SCREEN_INTERVAL = 1.0
+SCOREBOARD_INTERVAL = 0.5
+XML_INPUT_INTERVAL = 1.0
+PAGE_INTERVALS = {"schedule": 10.0, "round_robin": 30.0, "elimination": 30.0}
+
+
+# === Процесс приложения ===
+
+def _seed_database(tournament: Dict, court_screens: int):
+    """Турнир, данные кортов и экраны кортов (авто-режим) во временной БД"""
+    from api import execute_with_retry, save_courts_data
+    from api.display_windows import update_display_window
+
+    tid = tournament["tournament_id"]
+
+    write_tournament(tournament)
+
+    def transaction(conn):
+        cursor = conn.cursor()
+        for slot in range(1, court_screens + 1):
+            cursor.execute('SELECT COUNT(*) FROM display_windows WHERE type = "court" AND slot_number = ?', (slot,))
+            if cursor.fetchone()[0] == 0:
+                cursor.execute("INSERT INTO display_windows (type, slot_number, name, mode) VALUES ('court', ?, ?, 'auto')",
+                               (slot, f'Корт {slot}'))
+
+    execute_with_retry(transaction)
+
+    import app as app_module
+    court_ids = [str(c["Item1"]) for c in tournament["courts"]]
+    save_courts_data(tid, app_module.api_client.get_all_courts_data(court_ids))
+    for slot in range(1, court_screens + 1):
+        update_display_window('court', slot, {"tournament_id": tid, "court_id": court_ids[(slot - 1) % len(court_ids)],
+                                              "mode": "auto"})
+
+
+def serve_app(workdir: str, port: int, upstream_env: Dict[str, str], tournament: Dict, court_screens: int,
+              log_level: str):
+    """Точка входа процесса приложения"""
+    import logging
+    os.chdir(workdir)
+    os.environ.setdefault("SECRET_KEY", "load-test")
+    os.environ.update(upstream_env)
+    if root_dir not in sys.path:
+        sys.path.insert(0, root_dir)
+
+    import app as app_module
+    from werkzeug.serving import make_server
+
+    logging.getLogger().setLevel(getattr(logging, log_level))
+    for handler in logging.getLogger().handlers:
+        handler.setLevel(getattr(logging, log_level))
+    logging.getLogger("werkzeug").setLevel(getattr(logging, log_level))
+
+    application = app_module.create_app()
+    _seed_database(tournament, court_screens)
+    make_server("127.0.0.1", port, application, threaded=True).serve_forever()
+
+
+# === Генератор нагрузки ===
+
+class Client(threading.Thread):
+    """Клиент, опрашивающий свой URL с фиксированным интервалом"""
+
+    def __init__(self, scenario: str, base_url: str, urls: List[str], interval: float, offset: float,
+                 first_url: Optional[str] = None):
+        super().__init__(daemon=True)
+        self.scenario = scenario
+        self.base_url = base_url
+        self.urls = urls
+        self.interval = interval
+        self.offset = offset
+        self.first_url = first_url
+        self.session = requests.Session()
+        self.samples: List[Tuple[float, float, bool]] = []  # (время запуска, латентность, успех)
+        self.stop_at = 0.0
+
+    def request(self, url: str) -> Tuple[float, bool]:
+        started = time.perf_counter()
+        try:
+            resp = self.session.get(self.base_url + url, timeout=30)
+            ok = resp.status_code < 400
+            resp.content
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    def run(self):
+        if self.first_url:
+            latency, ok = self.request(self.first_url)
+            self.samples.append((time.perf_counter(), latency, ok))
+        next_at = time.perf_counter() + self.offset
+        index = 0
+        while True:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            now = time.perf_counter()
+            if now >= self.stop_at:
+                break
+            latency, ok = self.request(self.urls[index % len(self.urls)])
+            self.samples.append((now, latency, ok))
+            index += 1
+            next_at += self.interval
+            if next_at < time.perf_counter():
+                next_at = time.perf_counter()
+
+
+def build_clients(args, base_url: str, tournament: Dict, rng: random.Random) -> List[Client]:
+    tid = tournament["tournament_id"]
+    court_ids = [str(c["Item1"]) for c in tournament["courts"]]
+    class_ids = list(tournament["draw_data"])
+    date_param = datetime.fromisoformat(tournament["dates"][0]).strftime("%d.%m.%Y")
+    clients = []
+
+    def add(scenario, urls, interval, first_url=None):
+        clients.append(Client(scenario, base_url, urls, interval, rng.uniform(0, interval), first_url))
+
+    for slot in range(1, args.courts + 1):
+        add("court_screen", [f"/api/display/court/{slot}/state"], COURT_SCREEN_INTERVAL)
+    for i in range(args.scoreboards):
+        add("scoreboard", [f"/api/court/{tid}/{court_ids[i % len(court_ids)]}/data"], SCOREBOARD_INTERVAL)
+    for i in range(args.pages):
+        kind = ("schedule", "round_robin", "elimination")[i % 3]
+        class_id = class_ids[i // 3 % len(class_ids)]
+        if kind == "schedule":
+            add("schedule_page", [f"/api/schedule/{tid}/data?date={date_param}"], PAGE_INTERVALS[kind],
+                f"/api/html-live/schedule/{tid}?date={date_param}")
+        elif kind == "round_robin":
+            add("round_robin_page", [f"/api/round-robin/{tid}/{class_id}/0/data"], PAGE_INTERVALS[kind],
+                f"/api/html-live/round-robin/{tid}/{class_id}/0")
+        else:
+            add("elimination_page", [f"/api/elimination/{tid}/{class_id}/data?draw_index=0"], PAGE_INTERVALS[kind],
+                f"/api/html-live/elimination/{tid}/{class_id}/0")
+    xml_types = [f"court_{cid}" for cid in court_ids] + \
+                [f"table_{cid}_rr_0" for cid in class_ids] + [f"table_{cid}_elim_0" for cid in class_ids]
+    for i in range(args.xml):
+        add("vmix_xml", [f"/api/xml-live/{tid}/{xml_types[i % len(xml_types)]}"], XML_INPUT_INTERVAL)
+    return clients
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Перцентиль по ближайшему рангу"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(q * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(samples: List[Tuple[float, float, bool]], duration: float) -> Dict:
+    latencies = sorted(s[1] for s in samples)
+    errors = sum(1 for s in samples if not s[2])
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "rps": round(len(samples) / duration, 2) if duration else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def scrape_counter(base_url: str, name: str) -> float:
+    """Значение счётчика без меток из /metrics приложения"""
+    try:
+        text = requests.get(f"{base_url}/metrics", timeout=10).text
+    except requests.RequestException:
+        return 0.0
+    match = re.search(rf"^{name} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(base_url: str, timeout: float = 60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/api/status", timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("Приложение не запустилось")
+
+
+def print_report(result: Dict):
+    print(f"\nДлительность: {result['config']['duration']} с, клиентов: {result['clients']}, "
+          f"live-кадров/с: {result['config']['frame_rate']}")
+    print(f"{'сценарий':<18} {'запросов':>9} {'rps':>8} {'ошибки':>8} {'p50 мс':>9} {'p95 мс':>9} {'p99 мс':>9}")
+    for name, s in list(result["scenarios"].items()) + [("ВСЕГО", result["total"])]:
+        print(f"{name:<18} {s['requests']:>9} {s['rps']:>8} {s['error_rate'] * 100:>7.2f}% "
+              f"{s['p50_ms']:>9} {s['p95_ms']:>9} {s['p99_ms']:>9}")
+    print(f"Повторы из-за блокировок SQLite: {result['sqlite_lock_retries']:.0f}")
+    upstream = result.get("upstream", {})
+    print(f"Заглушка rankedin: REST-запросов {upstream.get('rest', 0)}, "
+          f"подключений к хабу {upstream.get('hub_connections', 0)}, кадров хаба {upstream.get('hub_frames', 0)}")
+
+
+def compare(result: Dict, baseline: Dict, tolerance: float) -> bool:
+    """Сравнение с сохранённым прогоном; False — есть регрессия p95 или рост ошибок"""
+    ok = True
+    print(f"\nСравнение с базовым прогоном (допуск p95: {tolerance:.0f}%)")
+    rows = list(result["scenarios"].items()) + [("ВСЕГО", result["total"])]
+    base_rows = dict(baseline.get("scenarios", {}), **{"ВСЕГО": baseline.get("total", {})})
+    for name, current in rows:
+        base = base_rows.get(name)
+        if not base or not base.get("p95_ms"):
+            print(f"{name:<18} нет в базовом прогоне")
+            continue
+        delta = (current["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100
+        regressed = delta > tolerance or current["error_rate"] > base["error_rate"] + 0.001
+        ok = ok and not regressed
+        print(f"{name:<18} p95 {base['p95_ms']:>8} → {current['p95_ms']:>8} мс ({delta:+6.1f}%)"
+              f"  ошибки {base['error_rate'] * 100:.2f}% → {current['error_rate'] * 100:.2f}%"
+              f"{'  РЕГРЕССИЯ' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочный тест трансляционного этажа против заглушки rankedin')
+    parser.add_argument('--courts', type=int, default=10, help='Экранов кортов (/api/display/court/<slot>/state, 1 с)')
+    parser.add_argument('--scoreboards', type=int, default=20, help='Табло (/api/court/<t>/<c>/data, 500 мс)')
+    parser.add_argument('--pages', type=int, default=6, help='Страниц расписания / групп / сетки')
+    parser.add_argument('--xml', type=int, default=8, help='Входов vMix (/api/xml-live, 1 с)')
+    parser.add_argument('--frame-rate', type=float, default=5.0, help='Live-кадров счёта в секунду на весь этаж')
+    parser.add_argument('--tournament-courts', type=int, default=10, help='Кортов в синтетическом турнире')
+    parser.add_argument('--classes', type=int, default=4, help='Категорий в турнире')
+    parser.add_argument('--groups', type=int, default=4, help='Групп в категории')
+    parser.add_argument('--teams', type=int, default=4, help='Команд в группе')
+    parser.add_argument('--bracket', type=int, default=16, help='Участников сетки плей-офф (степень двойки)')
+    parser.add_argument('--upstream-latency', type=float, default=0.0, help='Задержка ответов заглушки rankedin, мс')
+    parser.add_argument('--upstream-error-rate', type=float, default=0.0, help='Доля ошибок 500 заглушки rankedin (0..1)')
+    parser.add_argument('-d', '--duration', type=float, default=60.0, help='Длительность замера, с')
+    parser.add_argument('-w', '--warmup', type=float, default=5.0, help='Прогрев перед замером, с')
+    parser.add_argument('--seed', type=int, default=1, help='Seed данных и расписания клиентов')
+    parser.add_argument('-o', '--output', help='Сохранить результат в JSON')
+    parser.add_argument('--compare', help='JSON предыдущего прогона для сравнения')
+    parser.add_argument('--tolerance', type=float, default=20.0, help='Допустимый рост p95, %%')
+    parser.add_argument('--keep', action='store_true', help='Не удалять временный каталог приложения')
+    parser.add_argument('--log-level', default='WARNING', help='Уровень логов приложения')
+    args = parser.parse_args()
+
+    day = datetime(2026, 6, 1)
+    tournament = build_tournament(args.seed, args.tournament_courts, args.classes, args.groups,
+                                  args.teams, args.bracket, day)
+    point_interval = args.tournament_courts / args.frame_rate if args.frame_rate > 0 else 0
+    upstream = FakeRankedin(tournament, injection=Injection(args.upstream_latency, 0, args.upstream_error_rate,
+                                                           seed=args.seed),
+                            point_interval=point_interval, seed=args.seed)
+    upstream.start()
+
+    workdir = tempfile.mkdtemp(prefix="mixranker_load_")
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    ctx = multiprocessing.get_context("spawn")
+    server = ctx.Process(target=serve_app, daemon=True, args=(
+        workdir, port, upstream.env(), tournament, args.courts, args.log_level))
+    server.start()
+
+    try:
+        wait_ready(base_url)
+        clients = build_clients(args, base_url, tournament, random.Random(args.seed))
+        started = time.perf_counter()
+        measure_from = started + args.warmup
+        for client in clients:
+            client.stop_at = measure_from + args.duration
+            client.start()
+        print(f"Приложение: {base_url}, заглушка rankedin: {upstream.url}, клиентов: {len(clients)}")
+
+        time.sleep(max(measure_from - time.perf_counter(), 0))
+        lock_retries_before = scrape_counter(base_url, "sqlite_lock_retries_total")
+        for client in clients:
+            client.join()
+        lock_retries = scrape_counter(base_url, "sqlite_lock_retries_total") - lock_retries_before
+
+        by_scenario: Dict[str, List] = {}
+        for client in clients:
+            by_scenario.setdefault(client.scenario, []).extend(s for s in client.samples if s[0] >= measure_from)
+        result = {
+            "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "keep", "log_level")},
+            "clients": len(clients),
+            "scenarios": {name: summarize(samples, args.duration) for name, samples in by_scenario.items()},
+            "total": summarize([s for samples in by_scenario.values() for s in samples], args.duration),
+            "sqlite_lock_retries": lock_retries,
+            "upstream": dict(upstream.stats),
+        }
+    finally:
+        server.terminate()
+        server.join(timeout=10)
+        upstream.stop()
+        if args.keep:
+            print(f"Каталог приложения: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(result)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"Результат сохранён: {args.output}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get("config") != result["config"]:
+            print("Внимание: параметры прогонов различаются")
+        if not compare(result, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,9 @@ BASE_URL = "https://live.rankedin.com"
 HUB_PATH = "/scores"
 SEP = "\x1e"
 
+# Файл записи сырых сообщений: строка JSON [unix-время, сообщение] на каждое сообщение
+dump_file = None
+
 
 def negotiate():
     r = requests.post(
@@ -23,6 +26,10 @@ def negotiate():
 
 
 def on_message(ws, message):
+    if dump_file:
+        dump_file.write(json.dumps([time.time(), message], ensure_ascii=False) + "\n")
+        dump_file.flush()
+
     for frame in message.split(SEP):
         if not frame.strip():
             continue
@@ -55,11 +62,15 @@ def on_open(ws, court_id):
 
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python rankedin_ws.py <court_id>")
+    global dump_file
+
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python rankedin_ws.py <court_id> [frames.jsonl]")
         return
 
     court_id = int(sys.argv[1])
+    if len(sys.argv) == 3:
+        dump_file = open(sys.argv[2], "a", encoding="utf-8")
 
     while True:
         try:
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Детерминированное воспроизведение live-потока: журнал кадров хаба
+(api/live_recorder.py, запись через /api/live/recording, LIVE_RECORD_DIR или
+tools/rankedin_ws.py) проигрывается через RankedinLiveManager.replay в ту же
+цепочку, что и в приложении: _on_message → _transform_* → _on_court_update →
+update_court_live_score (БД courts_data). Сеть не нужна.
+
+--synthetic генерирует игровой день (CourtSimulation по всем кортам, очко раз
+в --point-seconds) и сверяет итоговый счёт в БД с симуляцией.
+
+Печатает сообщений/с, время callback (p50/p95/p99/max), отставание от расписания
+и число расхождений состояния.
+
+Пример:
+    python tools/replay_live.py --synthetic --courts 30 --hours 13 --speed 0
+    python tools/replay_live.py logs/live_frames/live_frames_20260601_090000_123.jsonl.gz \\
+        --tournament-id 12345 --speed 20
+    # Сеанс записи нескольких воркеров: журналы сливаются по времени кадров
+    python tools/replay_live.py logs/live_frames/live_frames_20260601_090000_*.jsonl.gz --speed 0
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from tools.synthetic_tournament import (DAY_START_HOUR, TOURNAMENT_ID, add_size_arguments, build_tournament,
+                                        court_simulations, write_tournament)
+
+
+def synthetic_day(simulations: Dict, day: datetime, hours: float, point_seconds: float, seed: int):
+    """Кадры игрового дня: (время, court_id, сообщение) в порядке времени"""
+    from api.rankedin_live import PROTOCOL_SEPARATOR
+
+    rng = random.Random(seed)
+    start = day.replace(hour=DAY_START_HOUR, minute=0, second=0).timestamp()
+    end = start + hours * 3600
+    # Корты стартуют вразнобой, интервал между очками — point_seconds ± 50%
+    next_point = {court_id: start + rng.uniform(0, point_seconds) for court_id in simulations}
+    frames = []
+    for court_id, simulation in simulations.items():
+        ts = next_point[court_id]
+        while ts < end:
+            game_over = simulation.advance(rng)
+            frames.append((ts, court_id, json.dumps({"type": 1, "target": "ReceiveMatchUpdate",
+                                                     "arguments": [[simulation.match_update()]]},
+                                                    ensure_ascii=False) + PROTOCOL_SEPARATOR))
+            if game_over:
+                frames.append((ts + 0.2, court_id, json.dumps({"type": 1, "target": "ReceiveMatchAction",
+                                                               "arguments": [[simulation.match_action()]]},
+                                                              ensure_ascii=False) + PROTOCOL_SEPARATOR))
+            ts += point_seconds * rng.uniform(0.5, 1.5)
+    frames.sort(key=lambda frame: frame[0])
+    return frames
+
+
+def map_courts(log_paths: List[str], tournament_id: str):
+    """Строки courts_data для кортов журналов, чтобы _get_tournament_for_court нашёл турнир"""
+    from api import execute_with_retry
+    from api.live_recorder import merge_frames
+
+    court_ids = sorted({court_id for _, court_id, _ in merge_frames(log_paths) if court_id is not None})
+
+    def transaction(conn):
+        cursor = conn.cursor()
+        cursor.execute("INSERT OR IGNORE INTO tournaments (id, name) VALUES (?, ?)",
+                       (tournament_id, f"Воспроизведение {tournament_id}"))
+        for court_id in court_ids:
+            cursor.execute("INSERT OR IGNORE INTO courts_data (tournament_id, court_id, court_name) VALUES (?, ?, ?)",
+                           (tournament_id, str(court_id), f"Корт {court_id}"))
+
+    execute_with_retry(transaction)
+    return court_ids
+
+
+def check_state(tournament_id: str, simulations: Dict) -> List[str]:
+    """Расхождения итогового счёта courts_data с симуляцией"""
+    from api import get_db_connection
+
+    conn = get_db_connection()
+    rows = {row[0]: row[1:] for row in conn.execute(
+        "SELECT court_id, first_participant_score, second_participant_score, detailed_result "
+        "FROM courts_data WHERE tournament_id = ?", (tournament_id,))}
+    conn.close()
+
+    mismatches = []
+    for court_id, simulation in simulations.items():
+        row = rows.get(str(court_id))
+        if row is None:
+            mismatches.append(f"корт {court_id}: нет строки courts_data")
+            continue
+        expected = simulation.match_update()["score"]
+        detailed = json.loads(row[2] or "[]")
+        games = [(s.get("firstParticipantScore"), s.get("secondParticipantScore")) for s in detailed]
+        expected_games = [(s["firstParticipantScore"], s["secondParticipantScore"]) for s in expected["detailedResult"]]
+        if (row[0], row[1]) != (expected["firstParticipantScore"], expected["secondParticipantScore"]) \
+                or games != expected_games:
+            mismatches.append(f"корт {court_id}: сеты {row[0]}:{row[1]}, геймы {games}, ожидалось {expected_games}")
+    return mismatches
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Воспроизведение журнала live-кадров в БД без сети')
+    parser.add_argument('log', nargs='*', help='Журналы кадров (.jsonl.gz / .jsonl); несколько — сливаются по времени')
+    parser.add_argument('--synthetic', action='store_true', help='Сгенерировать игровой день вместо журнала')
+    parser.add_argument('--hours', type=float, default=13, help='Длительность синтетического дня, ч')
+    parser.add_argument('--point-seconds', type=float, default=30, help='Средний интервал между очками на корте, с')
+    parser.add_argument('--save-log', help='Сохранить синтетический журнал в файл')
+    parser.add_argument('--tournament-id', help='Турнир для кортов журнала (по умолчанию — синтетический)')
+    parser.add_argument('--seed', type=int, default=1, help='Seed синтетических данных')
+    parser.add_argument('--speed', type=float, default=0, help='Темп: 1 — как записано, N — ускорение, 0 — без пауз')
+    parser.add_argument('--db', help='SQLite БД (по умолчанию временная)')
+    parser.add_argument('-o', '--output', help='Сохранить результат в JSON')
+    add_size_arguments(parser)
+    args = parser.parse_args()
+
+    if not args.log and not args.synthetic:
+        parser.error("укажите журнал или --synthetic")
+
+    import logging
+    logging.disable(logging.INFO)
+
+    workdir = tempfile.mkdtemp(prefix="replay_live_")
+    import api.database as database
+    database.DATABASE_PATH = args.db or os.path.join(workdir, "replay.db")
+    database.init_database()
+
+    from api import update_court_live_score
+    from api.live_recorder import write_frames
+    from api.rankedin_live import RankedinLiveManager
+
+    simulations: Optional[Dict] = None
+    if args.synthetic:
+        day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        tournament = build_tournament(args.seed, args.courts, 1, 1, 4, 0, day, args.tournament_id or TOURNAMENT_ID,
+                                      args.slot, 0)
+        write_tournament(tournament)
+        tournament_id = tournament["tournament_id"]
+        log_path = args.save_log or os.path.join(workdir, "synthetic.jsonl.gz")
+        simulations = court_simulations(tournament)
+        courts = tournament["courts"]
+        started = time.perf_counter()
+        count = write_frames(log_path, synthetic_day(simulations, day, args.hours, args.point_seconds, args.seed))
+        print(f"Синтетический день: кортов {len(courts)}, {args.hours} ч, сообщений {count}, "
+              f"журнал {os.path.getsize(log_path) / 1024:.0f} КБ ({time.perf_counter() - started:.1f} с)")
+        # Симуляции ушли вперёд при генерации — это и есть ожидаемое итоговое состояние
+        log_paths = [log_path]
+        map_courts(log_paths, tournament_id)
+    else:
+        log_paths = args.log
+        tournament_id = args.tournament_id or TOURNAMENT_ID
+        court_ids = map_courts(log_paths, tournament_id)
+        print(f"Журналов {len(log_paths)}: кортов {len(court_ids)}, турнир {tournament_id}")
+
+    durations: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def on_live_update(tid: str, court_data: Dict):
+        started = time.perf_counter()
+        try:
+            update_court_live_score(tid, court_data)
+        except Exception:
+            errors[0] += 1
+        with lock:
+            durations.append(time.perf_counter() - started)
+
+    manager = RankedinLiveManager()
+    manager.set_update_callback(on_live_update)
+    stats = manager.replay(log_paths, args.speed)
+
+    elapsed = stats["elapsed_seconds"] or 1e-9
+    result = {
+        **stats,
+        "updates": len(durations),
+        "update_errors": errors[0],
+        "messages_per_second": round(stats["messages"] / elapsed),
+        "compression": f"{stats['recorded_seconds'] / elapsed:.0f}x" if stats["recorded_seconds"] else None,
+        "callback_ms": {name: round(percentile(durations, p) * 1000, 3)
+                        for name, p in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))},
+    }
+    if simulations is not None:
+        mismatches = check_state(tournament_id, simulations)
+        result["state_mismatches"] = len(mismatches)
+        for line in mismatches[:10]:
+            print(f"  расхождение: {line}")
+
+    print(f"Сообщений {result['messages']} за {stats['elapsed_seconds']} с "
+          f"(записано {stats['recorded_seconds']} с, темп {args.speed or 'макс.'}): "
+          f"{result['messages_per_second']} сообщ./с, обновлений БД {result['updates']}, ошибок {errors[0]}")
+    print("callback (update_court_live_score), мс: " +
+          ", ".join(f"{k} {v}" for k, v in result["callback_ms"].items()))
+    print(f"Наибольшее отставание от расписания: {stats['max_lag_seconds']} с")
+    if "state_mismatches" in result:
+        print(f"Расхождений итогового счёта с симуляцией: {result['state_mismatches']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"Результат сохранён: {args.output}")
+
+    sys.exit(1 if result.get("state_mismatches") or errors[0] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Синтетический турнир в форматах rankedin для тестов производительности.
+
+build_tournament() строит турнир произвольного размера в формате
+get_full_tournament_data (+ matches_data): категории с круговыми группами
+(матрица Pool + Standings) и сеткой плей-офф (DrawData по раундам), участники
+(GetAllSeedsAsync), расписание court_usage / court_planner и matches_data.
+Все матчи групп и сеток расставлены по кортам и слотам (с 09:00, новые дни —
+по заполнении), первые --progress матчей расписания сыграны, победители
+проходят дальше по сетке. CourtSimulation — live-счёт корта (scoreboard и кадры
+SignalR). Одинаковый seed даёт одинаковые данные.
+
+write_tournament() записывает турнир в схему init_database (как загрузка турнира).
+
+Пример (крупное событие: 16 категорий, 30 кортов, ~1300 матчей):
+    python tools/synthetic_tournament.py --db /tmp/big.db --classes 16 --courts 30 --groups 8 --teams 4 --bracket 32
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+from itertools import combinations
+from typing import Dict, List, Optional
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+TOURNAMENT_ID = "900001"
+FIRST_COURT_ID = 7001
+FIRST_CLASS_ID = 8001
+FIRST_MATCH_ID = 500000
+
+DAY_START_HOUR = 9
+# Матчи с 22:00 расписание считает техническими W.O.-записями
+DAY_END_HOUR = 22
+
+
+def _player(pid: int) -> Dict:
+    return {"id": pid, "firstName": f"Игрок{pid}", "lastName": f"Фамилия{pid}", "countryCode": "RUS"}
+
+
+def _team(first_pid: int) -> List[Dict]:
+    return [_player(first_pid), _player(first_pid + 1)]
+
+
+def _full_name(player: Dict) -> str:
+    return f'{player["firstName"]} {player["lastName"]}'
+
+
+def _seed(player: Dict) -> Dict:
+    """Участник в формате GetAllSeedsAsync"""
+    return {"Id": player["id"], "RankedinId": f"R{player['id']}", "FirstName": player["firstName"],
+            "LastName": player["lastName"], "CountryShort": player["countryCode"]}
+
+
+def _random_score(rng: random.Random, first_wins: bool) -> Dict:
+    """Счёт матча в два сета в формате Score rankedin"""
+    sets = []
+    for _ in range(2):
+        loser = rng.randint(0, 4)
+        sets.append((6, loser) if first_wins else (loser, 6))
+    return {"FirstParticipantScore": 2 if first_wins else 0, "SecondParticipantScore": 0 if first_wins else 2,
+            "DetailedScoring": [{"FirstParticipantScore": a, "SecondParticipantScore": b} for a, b in sets]}
+
+
+def _mirror_score(score: Dict) -> Dict:
+    """Счёт с точки зрения второго участника (зеркальная ячейка матрицы группы)"""
+    return {"FirstParticipantScore": score["SecondParticipantScore"], "SecondParticipantScore": score["FirstParticipantScore"],
+            "DetailedScoring": [{"FirstParticipantScore": s["SecondParticipantScore"],
+                                 "SecondParticipantScore": s["FirstParticipantScore"]} for s in score["DetailedScoring"]]}
+
+
+def _draw_participant(team: Optional[List[Dict]]) -> Dict:
+    """Участник сетки плей-офф (пустой словарь — ещё не определён)"""
+    if not team:
+        return {}
+    return {"EventParticipantId": team[0]["id"],
+            "FirstPlayer": {"Name": _full_name(team[0])}, "SecondPlayer": {"Name": _full_name(team[1])}}
+
+
+def _pool_participant_cell(index: int, team: List[Dict]) -> Dict:
+    return {"CellType": "ParticipantCell", "ParticipantCell": {
+        "Index": index, "ParticipantId": team[0]["id"],
+        "Players": [{"Id": p["id"], "Name": _full_name(p)} for p in team],
+    }}
+
+
+class _Match:
+    """Матч турнира до раскладки по расписанию"""
+
+    def __init__(self, match_id: int, class_name: str, draw: str, pool_name: str, rnd: int, team1, team2):
+        self.id = match_id
+        self.class_name = class_name
+        self.draw = draw
+        self.pool_name = pool_name
+        self.round = rnd
+        self.team1 = team1
+        self.team2 = team2
+        self.played = False
+        self.first_wins = True
+        self.score: Optional[Dict] = None
+        self.court: Optional[Dict] = None
+        self.start: Optional[datetime] = None
+
+
+class _Builder:
+    def __init__(self, seed: int, courts: int, slot_minutes: int, progress: float, day: datetime):
+        self.rng = random.Random(seed)
+        self.courts = [{"Item1": FIRST_COURT_ID + i, "Item2": f"Корт {i + 1}"} for i in range(courts)]
+        self.slot_minutes = slot_minutes
+        self.progress = progress
+        self.day = day.replace(hour=0, minute=0, second=0, microsecond=0)
+        self.next_pid = 100000
+        self.next_match_id = FIRST_MATCH_ID
+        self.participants: List[Dict] = []
+        self.matches: List[_Match] = []
+        self.slots_per_day = max((DAY_END_HOUR - DAY_START_HOUR) * 60 // slot_minutes, 1)
+
+    def new_team(self) -> List[Dict]:
+        team = _team(self.next_pid)
+        self.next_pid += 2
+        self.participants.extend(_seed(p) for p in team)
+        return team
+
+    def new_match(self, class_name: str, draw: str, pool_name: str, rnd: int, team1, team2) -> _Match:
+        match = _Match(self.next_match_id, class_name, draw, pool_name, rnd, team1, team2)
+        self.next_match_id += 1
+        return match
+
+    def schedule(self, match: _Match):
+        """Следующий свободный слот: корты по кругу, слоты подряд, по заполнении дня — следующий день"""
+        index = len(self.matches)
+        slot = index // len(self.courts)
+        day, slot_in_day = divmod(slot, self.slots_per_day)
+        match.court = self.courts[index % len(self.courts)]
+        match.start = self.day + timedelta(days=day, hours=DAY_START_HOUR, minutes=slot_in_day * self.slot_minutes)
+        self.matches.append(match)
+
+    def play(self, match: _Match, total: int):
+        """Сыгран ли матч: первые progress·total матчей расписания, если оба участника известны"""
+        if match.team1 and match.team2 and len(self.matches) <= self.progress * total:
+            match.played = True
+            match.first_wins = self.rng.random() < 0.5
+            match.score = _random_score(self.rng, match.first_wins)
+
+
+def _round_robin_group(builder: _Builder, class_name: str, name: str, teams: List[List[Dict]]) -> List[_Match]:
+    return [builder.new_match(class_name, "RoundRobin", name, 1, teams[i], teams[j])
+            for i, j in combinations(range(len(teams)), 2)]
+
+
+def _round_robin_draw(name: str, teams: List[List[Dict]], matches: List[_Match]) -> Dict:
+    """Круговая группа в формате rankedin (матрица Pool + Standings) по результатам матчей"""
+    index = {team[0]["id"]: i for i, team in enumerate(teams)}
+    results = {}
+    wins = [0] * len(teams)
+    for match in matches:
+        i, j = index[match.team1[0]["id"]], index[match.team2[0]["id"]]
+        results[(i, j)] = (match, match.score)
+        results[(j, i)] = (match, _mirror_score(match.score) if match.score else None)
+        if match.played:
+            wins[i if match.first_wins else j] += 1
+
+    pool = [[{"CellType": "EmptyCell"}] + [_pool_participant_cell(i, t) for i, t in enumerate(teams)]]
+    for i, team in enumerate(teams):
+        row = [_pool_participant_cell(i, team)]
+        for j in range(len(teams)):
+            if i == j:
+                row.append({"CellType": "EmptyCell"})
+                continue
+            match, score = results[(i, j)]
+            row.append({"CellType": "MatchCell", "MatchCell": {"MatchId": match.id, "MatchResults": {
+                "IsPlayed": match.played, "HasScore": match.played,
+                "Score": score or {"FirstParticipantScore": 0, "SecondParticipantScore": 0, "DetailedScoring": []},
+            }}})
+        pool.append(row)
+
+    order = sorted(range(len(teams)), key=lambda i: (-wins[i], teams[i][0]["id"]))
+    standings = [{
+        "ParticipantId": teams[i][0]["id"], "Standing": place + 1, "Wins": wins[i], "MatchPoints": 2 * wins[i],
+        "DoublesPlayer1Model": {"Id": teams[i][0]["id"]}, "DoublesPlayer2Model": {"Id": teams[i][1]["id"]},
+    } for place, i in enumerate(order)]
+    return {"BaseType": "RoundRobin", "RoundRobin": {"Name": name, "Pool": pool, "Standings": standings}}
+
+
+def _elimination_draw(bracket_teams: List[List[Dict]], rounds: List[List[_Match]]) -> Dict:
+    """Сетка плей-офф в формате rankedin (FirstRoundParticipantCells + DrawData по раундам)"""
+    draw_rounds = []
+    for matches in rounds:
+        draw_rounds.append([{
+            "Round": match.round, "MatchId": match.id,
+            "ChallengerParticipant": _draw_participant(match.team1),
+            "ChallengedParticipant": _draw_participant(match.team2),
+            "WinnerParticipantId": (match.team1 if match.first_wins else match.team2)[0]["id"] if match.played else None,
+            "MatchViewModel": {"IsPlayed": match.played, "HasScore": match.played,
+                               "Score": match.score or {"FirstParticipantScore": 0, "SecondParticipantScore": 0,
+                                                        "DetailedScoring": []}},
+        } for match in matches])
+    return {"BaseType": "Elimination", "Elimination": {
+        "PlacesStartPos": 1, "PlacesEndPos": len(bracket_teams), "Consolation": 0,
+        "FirstRoundParticipantCells": [_draw_participant(t) for t in bracket_teams], "DrawData": draw_rounds,
+    }}
+
+
+def build_tournament(seed: int, courts: int, classes: int, groups: int, teams_per_group: int,
+                     bracket_size: int, day: datetime, tournament_id: str = TOURNAMENT_ID,
+                     slot_minutes: int = 40, progress: float = 0.4) -> Dict:
+    """
+    Турнир в формате get_full_tournament_data + matches_data.
+    bracket_size — участников сетки плей-офф (степень двойки, 0 — без сетки);
+    progress — доля сыгранных матчей расписания.
+    """
+    builder = _Builder(seed, courts, slot_minutes, progress, day)
+    class_list = [{"Id": FIRST_CLASS_ID + c, "Name": f"Категория {c + 1}"} for c in range(classes)]
+
+    # Группы всех категорий, затем раунды сеток — в этом порядке матчи идут в расписание
+    class_groups, class_brackets = {}, {}
+    rr_total = 0
+    for cls in class_list:
+        class_groups[cls["Id"]] = []
+        for g in range(groups):
+            name = f"Группа {chr(65 + g % 26)}{g // 26 or ''}"
+            teams = [builder.new_team() for _ in range(teams_per_group)]
+            matches = _round_robin_group(builder, cls["Name"], name, teams)
+            class_groups[cls["Id"]].append((name, teams, matches))
+            rr_total += len(matches)
+        class_brackets[cls["Id"]] = [builder.new_team() for _ in range(bracket_size)] if bracket_size > 1 else []
+    total = rr_total + sum(max(len(b) - 1, 0) for b in class_brackets.values())
+
+    for cls in class_list:
+        for _, _, matches in class_groups[cls["Id"]]:
+            for match in matches:
+                builder.schedule(match)
+                builder.play(match, total)
+
+    class_rounds = {cid: [] for cid in class_brackets}
+    current = {cid: list(teams) for cid, teams in class_brackets.items()}
+    rnd = 1
+    while any(len(teams) > 1 for teams in current.values()):
+        for cls in class_list:
+            teams = current[cls["Id"]]
+            if len(teams) < 2:
+                continue
+            matches, winners = [], []
+            for i in range(0, len(teams), 2):
+                match = builder.new_match(cls["Name"], "Elimination", "Плей-офф", rnd, teams[i], teams[i + 1])
+                builder.schedule(match)
+                builder.play(match, total)
+                matches.append(match)
+                winners.append((match.team1 if match.first_wins else match.team2) if match.played else None)
+            class_rounds[cls["Id"]].append(matches)
+            current[cls["Id"]] = winners
+        rnd += 1
+
+    draw_data = {}
+    for cls in class_list:
+        draw_data[str(cls["Id"])] = {
+            "class_info": cls,
+            "round_robin": [_round_robin_draw(name, teams, matches)
+                            for name, teams, matches in class_groups[cls["Id"]]],
+            "elimination": [_elimination_draw(class_brackets[cls["Id"]], class_rounds[cls["Id"]])]
+                           if class_brackets[cls["Id"]] else [],
+        }
+
+    final_round = {cls["Name"]: len(class_rounds[cls["Id"]]) for cls in class_list}
+    court_usage, matches_list = [], []
+    planner: Dict[int, List[int]] = {}
+    for order, match in enumerate(builder.matches):
+        t1, t2 = match.team1, match.team2
+        court_usage.append({
+            "CourtId": match.court["Item1"], "TournamentMatchId": match.id, "ChallengeId": match.id,
+            "MatchDate": match.start.isoformat(), "Duration": slot_minutes,
+            "PoolName": match.pool_name, "Round": match.round, "MatchOrder": order,
+            "ChallengerName": f"{t1[0]['lastName']} / {t1[1]['lastName']}" if t1 else "TBD",
+            "ChallengedName": f"{t2[0]['lastName']} / {t2[1]['lastName']}" if t2 else "TBD",
+            "ChallengerIndividualName": "", "ChallengedIndividualName": "",
+            "ChallengerResult": " ".join(f"{s['FirstParticipantScore']}-{s['SecondParticipantScore']}"
+                                         for s in match.score["DetailedScoring"]) if match.played else None,
+            "ChallengedResult": "",
+            "IsFinal": match.draw == "Elimination" and match.round == final_round[match.class_name],
+            "Consolation": 0,
+        })
+        planner.setdefault(match.court["Item1"], []).append(match.id)
+
+        def side(team):
+            if not team:
+                return {"Name": "TBD", "Player2Name": ""}
+            return {"Id": team[0]["id"], "Name": _full_name(team[0]), "Player2Name": _full_name(team[1]),
+                    "CountryShort": team[0]["countryCode"]}
+
+        matches_list.append({
+            "Id": match.id, "Date": match.start.isoformat(), "Court": match.court["Item2"],
+            "Draw": match.draw, "Round": match.round, "ClassName": match.class_name,
+            "Challenger": side(t1), "Challenged": side(t2),
+            "MatchResult": {"IsPlayed": match.played, "HasScore": match.played, "Score": match.score or {}},
+        })
+
+    dates = sorted({m.start.strftime("%Y-%m-%dT00:00:00") for m in builder.matches}) or \
+        [builder.day.strftime("%Y-%m-%dT00:00:00")]
+    return {
+        "tournament_id": tournament_id,
+        "metadata": {"name": "Load Test Open", "sport": 5, "tournament_id": tournament_id},
+        "classes": class_list,
+        "courts": builder.courts,
+        "dates": dates,
+        "participants": builder.participants,
+        "draw_data": draw_data,
+        "court_planner": {"Dates": dates, "Courts": [
+            {"CourtId": c["Item1"], "CourtName": c["Item2"], "MatchIds": planner.get(c["Item1"], [])}
+            for c in builder.courts]},
+        "court_usage": court_usage,
+        "matches_data": {"Matches": matches_list, "AreMatchesPublished": True, "IsSchedulePublished": True},
+    }
+
+
+def write_tournament(tournament: Dict):
+    """Записывает турнир в БД (таблицы init_database) теми же запросами, что загрузка турнира"""
+    from api import encode_blob, execute_with_retry
+    from api.change_feed import record_changes, tournament_topic
+    from api.photo_utils import participant_directory
+
+    tid = tournament["tournament_id"]
+    metadata = tournament["metadata"]
+    matches = tournament["matches_data"]
+    participants = tournament["participants"]
+
+    def transaction(conn):
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO tournaments
+            (id, name, metadata, classes, courts, dates, draw_data, status, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ''', (tid, metadata.get("name", f"Турнир {tid}"), json.dumps(metadata), json.dumps(tournament["classes"]),
+              json.dumps(tournament["courts"]), json.dumps(tournament["dates"]),
+              encode_blob(tournament["draw_data"]), "active"))
+        cursor.execute('''
+            INSERT OR REPLACE INTO tournament_schedule
+            (tournament_id, court_planner, court_usage, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        ''', (tid, encode_blob(tournament["court_planner"]), encode_blob(tournament["court_usage"])))
+        cursor.execute('''
+            INSERT OR REPLACE INTO tournament_matches
+            (tournament_id, matches_data, are_matches_published, is_schedule_published, updated_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ''', (tid, encode_blob(matches["Matches"]), 1 if matches.get("AreMatchesPublished") else 0,
+              1 if matches.get("IsSchedulePublished") else 0))
+        cursor.executemany('''
+            INSERT OR IGNORE INTO participants (id, rankedin_id, first_name, last_name, country_code)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(p["Id"], p["RankedinId"], p["FirstName"], p["LastName"], p["CountryShort"]) for p in participants])
+        cursor.executemany('''
+            INSERT OR IGNORE INTO participants_tournaments (participant_id, tournament_id) VALUES (?, ?)
+        ''', [(p["Id"], tid) for p in participants])
+        record_changes(cursor, [tournament_topic(tid)])
+
+    execute_with_retry(transaction)
+    participant_directory.invalidate()
+
+
+class CourtSimulation:
+    """Счёт матча на корте: очки → геймы → сеты, ответ scoreboard и кадры хаба в формате live API"""
+
+    def __init__(self, court_id: int, name: str, first_pid: int):
+        self.court_id = court_id
+        self.name = name
+        self.team1, self.team2 = _team(first_pid), _team(first_pid + 2)
+        self.match_id = court_id * 100
+        self.sets: List[List[int]] = []
+        self.games = [0, 0]
+        self.points = [0, 0]
+        self.serving_first = True
+
+    def advance(self, rng: random.Random) -> bool:
+        """Очко случайной команде; True, если завершился гейм"""
+        winner = 0 if rng.random() < 0.5 else 1
+        self.points[winner] += 1
+        if self.points[winner] < 4 or self.points[winner] - self.points[1 - winner] < 2:
+            return False
+        self.points = [0, 0]
+        self.games[winner] += 1
+        self.serving_first = not self.serving_first
+        if self.games[winner] >= 6 and self.games[winner] - self.games[1 - winner] >= 2 or self.games[winner] == 7:
+            self.sets.append(self.games)
+            self.games = [0, 0]
+            if sum(1 for s in self.sets if s[winner] > s[1 - winner]) == 2:
+                self.sets = []
+                self.match_id += 1
+        return True
+
+    def _score(self) -> Dict:
+        detailed = [{"firstParticipantScore": s[0], "secondParticipantScore": s[1], "detailedResult": []} for s in self.sets]
+        detailed.append({"firstParticipantScore": self.games[0], "secondParticipantScore": self.games[1],
+                         "detailedResult": [{"firstParticipantScore": self.points[0], "secondParticipantScore": self.points[1]}]})
+        return {"firstParticipantScore": sum(1 for s in self.sets if s[0] > s[1]),
+                "secondParticipantScore": sum(1 for s in self.sets if s[1] > s[0]),
+                "detailedResult": detailed}
+
+    def _serve(self) -> Dict:
+        return {"isFirstParticipantServing": self.serving_first, "isServingLeft": sum(self.points) % 2 == 1}
+
+    def scoreboard(self) -> Dict:
+        """Ответ /court/<id>/scoreboard (он же courtModel в ReceiveMatchAction)"""
+        return {
+            "details": {"courtId": self.court_id, "courtName": self.name, "eventState": "Live"},
+            "liveMatch": {
+                "base": {"className": "Категория 1", "firstParticipant": self.team1, "secondParticipant": self.team2},
+                "state": {"matchId": self.match_id, "score": self._score(),
+                          "isTieBreak": False, "isSuperTieBreak": False, "serve": self._serve()},
+            },
+            "nextMatch": None,
+        }
+
+    def match_update(self) -> Dict:
+        """Аргумент ReceiveMatchUpdate"""
+        return {"courtId": self.court_id, "matchId": self.match_id, "score": self._score(),
+                "serve": self._serve(), "isTieBreak": False, "isSuperTieBreak": False}
+
+    def match_action(self, action: str = "Score") -> Dict:
+        """Аргумент ReceiveMatchAction с полными данными корта"""
+        return {"courtId": self.court_id, "matchId": self.match_id, "action": action, "courtModel": self.scoreboard()}
+
+
+def court_simulations(tournament: Dict) -> Dict[int, CourtSimulation]:
+    """Симуляции счёта для всех кортов турнира"""
+    return {c["Item1"]: CourtSimulation(c["Item1"], c["Item2"], 300000 + i * 4) for i, c in enumerate(tournament["courts"])}
+
+
+def add_size_arguments(parser: argparse.ArgumentParser):
+    """Общие параметры размера турнира для tools/*"""
+    parser.add_argument('--courts', type=int, default=10, help='Кортов')
+    parser.add_argument('--classes', type=int, default=4, help='Категорий')
+    parser.add_argument('--groups', type=int, default=4, help='Групп в категории')
+    parser.add_argument('--teams', type=int, default=4, help='Команд в группе')
+    parser.add_argument('--bracket', type=int, default=16, help='Участников сетки плей-офф (степень двойки, 0 — без сетки)')
+    parser.add_argument('--slot', type=int, default=40, help='Длительность слота расписания, мин')
+    parser.add_argument('--progress', type=float, default=0.4, help='Доля сыгранных матчей (0..1)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Синтетический турнир в БД (схема init_database)')
+    parser.add_argument('--db', required=True, help='Путь к SQLite БД (создаётся при отсутствии)')
+    parser.add_argument('--tournament-id', default=TOURNAMENT_ID, help='ID турнира')
+    parser.add_argument('--date', default=datetime.now().strftime('%Y-%m-%d'), help='Первый игровой день (YYYY-MM-DD)')
+    parser.add_argument('--seed', type=int, default=1, help='Seed данных')
+    parser.add_argument('--json', help='Дополнительно сохранить турнир в JSON')
+    add_size_arguments(parser)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+    import api.database as database
+    database.DATABASE_PATH = args.db
+    os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+    database.init_database()
+
+    tournament = build_tournament(args.seed, args.courts, args.classes, args.groups, args.teams, args.bracket,
+                                  datetime.strptime(args.date, '%Y-%m-%d'), args.tournament_id,
+                                  args.slot, args.progress)
+    write_tournament(tournament)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(tournament, f, ensure_ascii=False)
+
+    matches = tournament["matches_data"]["Matches"]
+    print(f"Турнир {args.tournament_id} записан в {args.db}: категорий {len(tournament['classes'])}, "
+          f"кортов {len(tournament['courts'])}, матчей {len(matches)} "
+          f"(сыграно {sum(1 for m in matches if m['MatchResult']['IsPlayed'])}), "
+          f"участников {len(tournament['participants'])}, дней {len(tournament['dates'])}")
+
+
+if __name__ == "__main__":
+    main()